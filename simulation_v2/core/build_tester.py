@@ -1,16 +1,29 @@
 """Build combination testing for Simulation V2."""
 
+import dataclasses
 import gc
 import psutil
 import os
+import time
+import numpy as np
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from src.game_data import UPGRADES, LIMITS
 from src.models import Character, AttackBuild, MultiAttackBuild
-from src.simulation import run_simulation_batch
-from src.build_generator import generate_archetype_builds_chunked
+from src.exact_solver import solve_or_simulate_batch
+from src.dice import seed, seed_common, seed_worker
+from src.build_generator import generate_archetype_builds_chunked, generate_archetype_build_space
+from src.results_store import ResultsStore, run_key
+from src.result_columns import ResultColumns, RankedResults, ResultColumnsWriter, write_result_columns
+from src.scheduler import TaskScheduler, CostModel, WorkUnit, scenario_cost_key, scenario_cost_prior
 from core.config import SimConfigV2
+from core.racing import race_builds, fixed_schedule_runs
+
+RESULT_WRITE_BATCH = 1000  # Completed builds per results store transaction
+# Settings that change neither the builds tested nor their results (left out of results store run keys)
+RESULTS_NEUTRAL_SETTINGS = ('archetypes', 'use_threading', 'build_chunk_size', 'scheduler', 'result_cache',
+                            'results_store')
 
 
 @dataclass
@@ -31,27 +44,57 @@ class BuildTester:
         self.attacker = Character(*config.attacker_stats)
         self.defender = Character(*config.defender_stats)
         self.max_points = config.max_points_per_attack(archetype)
+        self.dominance_audit = []  # DominatedBuild entries dropped before testing
+        self.surrogate_screen = None  # ScreenResult when surrogate screening ran
+        self.surrogate_explored = []  # Builds the surrogate sent to simulation at random
 
-    def test_all_builds(self) -> List[Tuple[AttackBuild | MultiAttackBuild, float, float]]:
+    def test_all_builds(self, results_dir: str) -> RankedResults:
         """
         Test all valid build combinations.
 
-        Returns list of (build, avg_dpt, avg_turns) tuples for compatibility
-        with existing reporting code.
+        Results are written to results_dir as result columns (streamed from the
+        results store in batches, so the run's results are never held in memory
+        together); per-scenario turns and outcome counts are included unless
+        racing or progressive elimination ran.
+
+        Args:
+            results_dir: Directory for the result columns
+
+        Returns:
+            (build, avg_dpt, avg_turns) rows in rank order, read from the columns
         """
         print(f"\n=== Testing Build Combinations ({self.archetype}) ===")
 
         # Generate all valid builds
         print(f"  Generating builds (max {self.max_points} points)...")
-        builds = list(generate_archetype_builds_chunked(
-            self.archetype,
-            self.config.tier,
-            attack_types=self.config.attack_types,
-            max_points_per_attack=self.max_points,
-            config=self.config
-        ))
+        if self.archetype == 'focused':
+            builds = list(generate_archetype_builds_chunked(
+                self.archetype,
+                self.config.tier,
+                attack_types=self.config.attack_types,
+                max_points_per_attack=self.max_points,
+                config=self.config,
+                dominance_audit=self.dominance_audit
+            ))
+        else:
+            # Index space: each MultiAttackBuild is created when it is tested, not up front
+            builds = generate_archetype_build_space(
+                self.archetype,
+                self.config.tier,
+                attack_types=self.config.attack_types,
+                max_points_per_attack=self.max_points,
+                config=self.config,
+                dominance_audit=self.dominance_audit
+            )
 
         print(f"  Found {len(builds)} valid builds")
+        if self.dominance_audit:
+            print(f"  Dominance pruning dropped {len(self.dominance_audit)} builds before simulation")
+        if self.config.surrogate.enabled:
+            if self.archetype == 'focused':
+                builds = self._screen_builds_with_surrogate(builds)
+            else:
+                print(f"  Surrogate screening models single attacks - skipped for {self.archetype}")
         print(f"  Testing builds across {len(self.config.scenarios)} scenarios...")
 
         # Check for GPU batch simulation support
@@ -63,179 +106,297 @@ class BuildTester:
             except ImportError:
                 pass
 
-        results = []
+        scenario_names = [scenario.name for scenario in self.config.scenarios]
 
-        # Use progressive elimination if enabled
-        if self.config.progressive_elimination.enabled:
-            results = self._test_builds_with_progressive_elimination(builds)
-        elif self.config.use_threading:
-            results = self._test_builds_parallel(builds)
+        # Use statistical racing or progressive elimination if enabled
+        if self.config.racing.enabled:
+            write_result_columns(results_dir, self._test_builds_with_racing(builds), self.archetype, scenario_names)
+        elif self.config.progressive_elimination.enabled:
+            write_result_columns(results_dir, self._test_builds_with_progressive_elimination(builds),
+                                 self.archetype, scenario_names)
         else:
-            results = self._test_builds_sequential(builds)
+            self._test_builds_stored(builds, results_dir)
+        ranked = ResultColumns(results_dir).ranked()
 
-        print(f"  Completed testing {len(results)} builds")
+        print(f"  Completed testing {len(ranked)} builds")
+        if len(ranked):
+            turns = ranked.column('avg_turns')
+            top = max(1, int(len(turns) * 0.05))
+            print(f"  Avg turns: median {np.median(turns):.2f}, top 5% median {np.median(turns[:top]):.2f}, "
+                  f"best {turns[0]:.2f}")
 
-        return results
+        if self.surrogate_screen is not None:
+            # Exploration builds that reach the true top estimate what the screen dropped
+            top_count = max(1, int(len(ranked) * self.config.surrogate.top_fraction))
+            self.surrogate_screen.record_exploration(self.surrogate_explored, {r[0] for r in ranked[:top_count]})
+            print(f"  Surrogate calibration: {self.surrogate_screen.calibration.summary()}")
+
+        return ranked
+
+    def _screen_builds_with_surrogate(self, builds: List[AttackBuild]) -> List[AttackBuild]:
+        """
+        Keep the builds the surrogate predicts in the top, plus its training and exploration samples.
+
+        The training sample is simulated per scenario at surrogate.train_runs (see src/surrogate.py).
+        """
+        from src.surrogate import FeatureEncoder, SurrogateScreen
+
+        surrogate = self.config.surrogate
+        screen = SurrogateScreen(
+            FeatureEncoder(self.attacker, [self.defender], self.config.scenarios),
+            keep_fraction=surrogate.keep_fraction,
+            explore_fraction=surrogate.explore_fraction,
+            train_size=surrogate.train_size,
+            model=surrogate.model,
+            top_fraction=surrogate.top_fraction,
+            seed=surrogate.seed if surrogate.seed is not None else self.config.random_seed
+        )
+
+        print(f"  Surrogate screening: simulating {min(surrogate.train_size, len(builds))} training builds "
+              f"({surrogate.train_runs} runs per scenario)...")
+        self.surrogate_screen = screen.run(builds, lambda train: np.array(
+            [self._test_build_per_scenario(build, surrogate.train_runs, 'surrogate')[0] for build in train]))
+        self.surrogate_explored = [builds[index] for index in self.surrogate_screen.explore_indices]
+
+        tested = [builds[index] for index in self.surrogate_screen.tested_indices]
+        print(f"  Surrogate kept {len(tested)} of {len(builds)} builds "
+              f"({len(self.surrogate_screen.explore_indices)} for exploration)")
+        print(f"    Holdout: {self.surrogate_screen.calibration.summary()}")
+        return tested
+
+    def _results_run_key(self) -> str:
+        """Results store key of this run: every setting that changes the builds tested or their results"""
+        settings = dataclasses.asdict(self.config)
+        for name in RESULTS_NEUTRAL_SETTINGS:
+            settings.pop(name)
+        settings.update(archetype=self.archetype, max_points=self.max_points)
+        return run_key(settings)
+
+    def _test_builds_stored(self, builds, results_dir: str):
+        """
+        Test builds sequentially or in parallel, keeping results in a ResultsStore,
+        then write every build's result to results_dir as result columns.
+
+        With results_store enabled the store persists, and a restarted run with
+        the same settings skips every stored build and continues from the first
+        chunk with a missing one. Otherwise the store is a temporary file.
+        """
+        import tempfile
+
+        if self.config.results_store.enabled:
+            path = self.config.results_store.full_path()
+        else:
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.sqlite')
+            path = temp_file.name
+            temp_file.close()
 
-    def _test_builds_sequential(self, builds: List) -> List[Tuple]:
-        """Test builds sequentially (slower but simpler)."""
+        store = ResultsStore(path, self._results_run_key())
+        try:
+            store.begin(self.archetype, len(builds))
+            build_ids = store.missing(builds)
+            if len(build_ids) < len(builds):
+                first_chunk = build_ids[0] // self.config.build_chunk_size + 1 if build_ids else None
+                print(f"  Results store: {len(builds) - len(build_ids)}/{len(builds)} builds already tested"
+                      + (f", resuming at chunk {first_chunk}" if build_ids else ""))
+
+            if build_ids:
+                if self.config.use_threading:
+                    self._test_builds_parallel(builds, build_ids, store)
+                else:
+                    self._test_builds_sequential(builds, build_ids, store)
+                store.mark_complete()
+
+            writer = ResultColumnsWriter(results_dir, len(builds), self.archetype,
+                                         [scenario.name for scenario in self.config.scenarios])
+            for batch in store.batches(builds, RESULT_WRITE_BATCH):
+                writer.append(*batch)
+            writer.close()
+        finally:
+            store.close()
+            if not self.config.results_store.enabled:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.unlink(path + suffix)
+
+    def _test_builds_sequential(self, builds: List, build_ids: List[int], store: ResultsStore):
+        """Test builds sequentially (slower but simpler), appending results to the store."""
         import time
 
-        results = []
+        pending = []
         process = psutil.Process(os.getpid())
         start_time = time.time()
 
-        for i, build in enumerate(builds):
-            if (i + 1) % 1000 == 0:
-                # Calculate time estimates
-                elapsed = time.time() - start_time
-                builds_done = i + 1
+        try:
+            for i, build_id in enumerate(build_ids):
+                if (i + 1) % RESULT_WRITE_BATCH == 0:
+                    store.append(pending)
+                    pending = []
 
-                avg_time_per_build = elapsed / builds_done
-                remaining_builds = len(builds) - builds_done
-                est_remaining = avg_time_per_build * remaining_builds
+                    # Calculate time estimates
+                    elapsed = time.time() - start_time
+                    builds_done = i + 1
 
-                # Format time
-                if est_remaining < 60:
-                    time_str = f"~{int(est_remaining)}s remaining"
-                else:
-                    mins = int(est_remaining / 60)
-                    secs = int(est_remaining % 60)
-                    time_str = f"~{mins}m {secs}s remaining"
+                    avg_time_per_build = elapsed / builds_done
+                    remaining_builds = len(build_ids) - builds_done
+                    est_remaining = avg_time_per_build * remaining_builds
 
-                # Format elapsed time
-                elapsed_mins = int(elapsed / 60)
-                elapsed_secs = int(elapsed % 60)
-                elapsed_str = f"{elapsed_mins}m {elapsed_secs}s"
+                    # Format time
+                    if est_remaining < 60:
+                        time_str = f"~{int(est_remaining)}s remaining"
+                    else:
+                        mins = int(est_remaining / 60)
+                        secs = int(est_remaining % 60)
+                        time_str = f"~{mins}m {secs}s remaining"
 
-                # Get current time
-                current_time = datetime.now().strftime("%H:%M:%S")
+                    # Format elapsed time
+                    elapsed_mins = int(elapsed / 60)
+                    elapsed_secs = int(elapsed % 60)
+                    elapsed_str = f"{elapsed_mins}m {elapsed_secs}s"
 
-                # Get memory usage
-                mem_mb = process.memory_info().rss / 1024 / 1024
-                print(f"    Progress: {i + 1}/{len(builds)} builds tested ({time_str}) | Elapsed: {elapsed_str} | Time: {current_time} | Memory: {mem_mb:.1f} MB")
+                    # Get current time
+                    current_time = datetime.now().strftime("%H:%M:%S")
 
-                # Trigger garbage collection every 1000 builds to prevent memory buildup
-                gc.collect()
+                    # Get memory usage
+                    mem_mb = process.memory_info().rss / 1024 / 1024
+                    print(f"    Progress: {i + 1}/{len(build_ids)} builds tested ({time_str}) | Elapsed: {elapsed_str} | Time: {current_time} | Memory: {mem_mb:.1f} MB")
+
+                    # Trigger garbage collection every 1000 builds to prevent memory buildup
+                    gc.collect()
 
-                # Check for excessive memory usage
-                if mem_mb > 2048:  # Warn if over 2GB
-                    print(f"    WARNING: High memory usage detected ({mem_mb:.1f} MB)")
+                    # Check for excessive memory usage
+                    if mem_mb > 2048:  # Warn if over 2GB
+                        print(f"    WARNING: High memory usage detected ({mem_mb:.1f} MB)")
 
-            avg_turns, avg_dpt = self._test_single_build(build)
-            results.append((build, avg_dpt, avg_turns))
+                build = builds[build_id]
+                all_turns, all_dpt, outcomes = self._test_build_per_scenario(build)
+                avg_turns = sum(all_turns) / len(all_turns)
+                avg_dpt = sum(all_dpt) / len(all_dpt)
+                pending.append((build_id, build, avg_dpt, avg_turns, all_turns, outcomes))
+        finally:
+            # Keep every finished build, even on Ctrl-C or a crash
+            store.append(pending)
 
         # Final garbage collection
         gc.collect()
 
-        return results
+    def _test_builds_parallel(self, builds: List, build_ids: List[int], store: ResultsStore):
+        """
+        Test builds using multiprocessing, appending results to the store.
 
-    def _test_builds_parallel(self, builds: List) -> List[Tuple]:
-        """Test builds using multiprocessing."""
+        The builds, characters and config are shipped once per worker through the
+        pool initializer, and tasks carry only build IDs. Results are consumed as
+        they complete and appended to the store in small batches.
+        """
         from multiprocessing import Pool, cpu_count
-        import itertools
-        import time
-        import pickle
-        import tempfile
 
-        # Chunk builds for progress reporting
+        # Progress is reported every build_chunk_size completed builds
         chunk_size = self.config.build_chunk_size
-        build_chunks = [builds[i:i + chunk_size] for i in range(0, len(builds), chunk_size)]
-
-        print(f"  Using {cpu_count()} CPU cores")
-        print(f"  Processing {len(build_chunks)} chunks of {chunk_size} builds")
+        num_chunks = (len(build_ids) + chunk_size - 1) // chunk_size
+        workers = cpu_count()
 
-        # Create temporary file to stream results to disk
-        temp_file = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.pkl')
-        temp_path = temp_file.name
-        temp_file.close()
+        print(f"  Using {workers} CPU cores")
+        print(f"  Processing {num_chunks} chunks of {chunk_size} builds")
 
         start_time = time.time()
         process = psutil.Process(os.getpid())
+        context = BuildWorkerContext(builds, self.attacker, self.defender, self.config, self.archetype)
+        pending = []
 
         try:
-            with Pool(processes=cpu_count()) as pool:
-                # Open file in append mode for streaming results
-                with open(temp_path, 'wb') as f:
-                    for chunk_idx, chunk in enumerate(build_chunks):
+            with Pool(processes=workers, initializer=init_build_worker, initargs=(context,)) as pool:
+                for done, (build_id, avg_dpt, avg_turns, all_turns, outcomes, usage) in enumerate(
+                        self._stream_parallel_results(pool, builds, build_ids, workers), 1):
+                    build = builds[build_id]
+                    merge_attack_usage(build, usage)
+                    pending.append((build_id, build, avg_dpt, avg_turns, all_turns, outcomes))
+                    if len(pending) >= RESULT_WRITE_BATCH:
+                        store.append(pending)
+                        pending = []
+
+                    if done % chunk_size == 0 and done < len(build_ids):
                         # Calculate time estimates
                         elapsed = time.time() - start_time
-                        chunks_done = chunk_idx
-
-                        if chunks_done > 0:
-                            avg_time_per_chunk = elapsed / chunks_done
-                            remaining_chunks = len(build_chunks) - chunks_done
-                            est_remaining = avg_time_per_chunk * remaining_chunks
-
-                            # Get memory usage
-                            mem_mb = process.memory_info().rss / 1024 / 1024
+                        est_remaining = elapsed / done * (len(build_ids) - done)
 
-                            # Format time
-                            if est_remaining < 60:
-                                time_str = f"~{int(est_remaining)}s remaining"
-                            else:
-                                mins = int(est_remaining / 60)
-                                secs = int(est_remaining % 60)
-                                time_str = f"~{mins}m {secs}s remaining"
-
-                            # Format elapsed time
-                            elapsed_mins = int(elapsed / 60)
-                            elapsed_secs = int(elapsed % 60)
-                            elapsed_str = f"{elapsed_mins}m {elapsed_secs}s"
-
-                            # Get current time
-                            current_time = datetime.now().strftime("%H:%M:%S")
-
-                            print(f"    Processing chunk {chunk_idx + 1}/{len(build_chunks)}... ({time_str}) | Elapsed: {elapsed_str} | Time: {current_time} | Memory: {mem_mb:.1f} MB")
-
-                            # Warn if memory is high
-                            if mem_mb > 2048:
-                                print(f"    WARNING: High memory usage detected ({mem_mb:.1f} MB)")
+                        # Format time
+                        if est_remaining < 60:
+                            time_str = f"~{int(est_remaining)}s remaining"
                         else:
-                            mem_mb = process.memory_info().rss / 1024 / 1024
-                            current_time = datetime.now().strftime("%H:%M:%S")
-                            print(f"    Processing chunk {chunk_idx + 1}/{len(build_chunks)}... | Time: {current_time} | Memory: {mem_mb:.1f} MB")
+                            mins = int(est_remaining / 60)
+                            secs = int(est_remaining % 60)
+                            time_str = f"~{mins}m {secs}s remaining"
 
-                        # Create arguments for parallel processing
-                        test_args = [(build, self.attacker, self.defender, self.config, self.archetype) for build in chunk]
+                        # Format elapsed time
+                        elapsed_mins = int(elapsed / 60)
+                        elapsed_secs = int(elapsed % 60)
+                        elapsed_str = f"{elapsed_mins}m {elapsed_secs}s"
 
-                        # Process chunk in parallel
-                        chunk_results = pool.starmap(test_single_build_worker, test_args)
+                        # Get current time and memory usage
+                        current_time = datetime.now().strftime("%H:%M:%S")
+                        mem_mb = process.memory_info().rss / 1024 / 1024
 
-                        # Immediately serialize chunk to disk
-                        pickle.dump(chunk_results, f)
+                        print(f"    Completed chunk {done // chunk_size}/{num_chunks} ({done}/{len(build_ids)} builds, {time_str}) | Elapsed: {elapsed_str} | Time: {current_time} | Memory: {mem_mb:.1f} MB")
 
-                        # Clear chunk results from memory
-                        del chunk_results
-                        del test_args
+                        # Warn if memory is high
+                        if mem_mb > 2048:
+                            print(f"    WARNING: High memory usage detected ({mem_mb:.1f} MB)")
 
                         # Trigger garbage collection after each chunk to prevent memory buildup
                         gc.collect()
-
-            # Load all results from disk
-            print(f"  Loading results from disk...")
-            all_results = []
-            with open(temp_path, 'rb') as f:
-                try:
-                    while True:
-                        chunk = pickle.load(f)
-                        all_results.extend(chunk)
-                except EOFError:
-                    pass  # End of file reached
-
-            # Clean up temporary file
-            os.unlink(temp_path)
-
-        except Exception as e:
-            # Clean up on error
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            raise e
+        finally:
+            # Keep every finished build, even on Ctrl-C or a crash
+            store.append(pending)
 
         # Final garbage collection
         gc.collect()
 
-        return all_results
+    def _stream_parallel_results(self, pool, builds, build_ids: List[int], workers: int):
+        """
+        Yield (build ID, avg_dpt, avg_turns, turns per scenario, outcome counts, attack usage
+        counts) for the given builds, in completion order.
+
+        With the scheduler, builds are split into build x scenario units planned
+        one chunk at a time; otherwise whole builds go to imap_unordered.
+        """
+        chunk_size = self.config.build_chunk_size
+        num_scenarios = len(self.config.scenarios)
+
+        if not self.config.scheduler.enabled:
+            task_chunk = max(1, min(64, len(build_ids) // (workers * 4)))
+            yield from pool.imap_unordered(test_build_index_worker, build_ids, chunksize=task_chunk)
+            return
+
+        # Costs are learned over all chunks; the next chunk is planned while the last one finishes
+        scheduler = TaskScheduler(
+            workers=workers,
+            cost_model=CostModel(scenario_cost_prior(self.config.scenarios)),
+            grains_per_worker=self.config.scheduler.grains_per_worker,
+            in_flight_per_worker=self.config.scheduler.in_flight_per_worker
+        )
+
+        def batches():
+            for chunk_start in range(0, len(build_ids), chunk_size):
+                chunk_ids = build_ids[chunk_start:chunk_start + chunk_size]
+                yield [WorkUnit(build_id, scenario_index, scenario_cost_key(builds[build_id], scenario_index))
+                       for build_id in chunk_ids for scenario_index in range(num_scenarios)]
+
+        def make_args(grain):
+            return [(unit.task, unit.part) for unit in grain]
+
+        def combine(task, values):
+            # Same averaging as test_build_index_worker
+            all_turns = [turns for turns, _, _, _ in values]
+            avg_turns = sum(all_turns) / num_scenarios
+            avg_dpt = sum(dpt for _, dpt, _, _ in values) / num_scenarios
+            usage = {}
+            for _, _, _, unit_usage in values:
+                for attack_idx, count in unit_usage.items():
+                    usage[attack_idx] = usage.get(attack_idx, 0) + count
+            return avg_dpt, avg_turns, all_turns, sum_outcomes(outcomes for _, _, outcomes, _ in values), usage
+
+        for task, aggregate in scheduler.run_batches(pool, test_scenario_units_worker, batches(),
+                                                     make_args, combine, num_scenarios):
+            yield (task, *aggregate)
 
     def _test_builds_with_progressive_elimination(self, builds: List) -> List[Tuple]:
         """
@@ -296,7 +457,7 @@ class BuildTester:
                     if (i + 1) % 1000 == 0:
                         gc.collect()
 
-                avg_turns, avg_dpt = self._test_single_build(build, simulation_runs=sim_runs)
+                avg_turns, avg_dpt = self._test_single_build(build, simulation_runs=sim_runs, round_index=round_num)
                 results.append((build, avg_dpt, avg_turns))
 
             # Sort by avg_turns (ascending = better)
@@ -326,143 +487,375 @@ class BuildTester:
         # Should not reach here, but return empty if something goes wrong
         return []
 
-    def _test_single_build(self, build, simulation_runs: int = None) -> Tuple[float, float]:
+    def _use_gpu_batch(self) -> bool:
+        """Check whether GPU batch simulation is enabled and available."""
+        return use_gpu_batch(self.config)
+
+    def _simulate_scenario(self, build, scenario, simulation_runs: int, use_gpu_batch: bool) -> Tuple:
+        """
+        Simulate one build against one scenario.
+
+        Returns:
+            Tuple of (results, avg_turns, dpt, outcome_stats) as from run_simulation_batch
+        """
+        return simulate_scenario(build, scenario, simulation_runs, self.attacker, self.defender,
+                                 self.config, self.archetype, use_gpu_batch)
+
+    def _sample_build(self, build, simulation_runs: int, batch_index: int) -> Tuple[np.ndarray, bool, float]:
+        """
+        Run one racing batch of a build across all scenarios.
+
+        Args:
+            build: Build to test
+            simulation_runs: Runs per scenario in this batch
+            batch_index: How many batches this build has already run (keys the dice stream)
+
+        Returns:
+            Tuple of (per-run turns averaged across scenarios, True if every scenario was solved exactly,
+            DPT averaged across scenarios)
+        """
+        # Each batch needs fresh dice - reseeding with the same keys would replay the previous batch
+        if self.config.random_seed is not None and not self.config.common_random_numbers:
+            seed(self.config.random_seed, self.archetype, build, 'race', batch_index)
+
+        use_gpu_batch = self._use_gpu_batch()
+        scores = np.zeros(simulation_runs)
+        exact = True
+        total_dpt = 0.0
+
+        for scenario_index, scenario in enumerate(self.config.scenarios):
+            # Common random numbers: every build's n-th batch replays the same dice
+            if self.config.common_random_numbers:
+                seed_common(self.config.random_seed, self.archetype, scenario_index, 'race', batch_index)
+
+            results, avg_turns, dpt, win_rate = self._simulate_scenario(build, scenario, simulation_runs,
+                                                                        use_gpu_batch)
+            total_dpt += dpt
+            if results:
+                scores += results
+                exact = False
+            else:
+                # Exact solve - every run scores the exact mean
+                scores += avg_turns
+
+        return scores / len(self.config.scenarios), exact, total_dpt / len(self.config.scenarios)
+
+    def _test_builds_with_racing(self, builds: List) -> List[Tuple]:
+        """
+        Test builds by statistical racing.
+
+        Instead of fixed rounds, keeps sampling only the builds whose confidence
+        interval still straddles the top keep_percent cut (see core/racing.py).
+        Returns every build, sorted, with its mean over the runs it received.
+        """
+        import time
+
+        racing = self.config.racing
+        final_runs = self.config.simulation_runs if racing.final_runs == -1 else racing.final_runs
+        keep_count = max(1, int(len(builds) * racing.keep_percent))
+        fixed_runs = fixed_schedule_runs(len(builds), self.config.progressive_elimination.rounds,
+                                         self.config.simulation_runs)
+        start_time = time.time()
+
+        print(f"\n  Statistical racing enabled - separating top {keep_count} of {len(builds)} builds "
+              f"({racing.initial_runs} initial runs, +{racing.batch_runs} per iteration, max {racing.max_runs})")
+
+        def progress(iteration, active, cut):
+            elapsed = time.time() - start_time
+            current_time = datetime.now().strftime("%H:%M:%S")
+            print(f"    Iteration {iteration}: {active} builds near cut {cut:.2f} turns | "
+                  f"Elapsed: {int(elapsed / 60)}m {int(elapsed % 60)}s | Time: {current_time}")
+
+        stats, summary = race_builds(
+            builds,
+            self._sample_build,
+            keep_count,
+            racing.initial_runs,
+            racing.batch_runs,
+            racing.max_runs,
+            confidence=racing.confidence,
+            final_runs=final_runs,
+            fixed_runs=fixed_runs,
+            progress=progress
+        )
+
+        num_scenarios = len(self.config.scenarios)
+        print(f"  Racing complete - {summary.runs_used * num_scenarios:,} combats vs "
+              f"{summary.fixed_schedule_runs * num_scenarios:,} for the fixed schedule "
+              f"({summary.percent_saved:.1f}% saved, {summary.iterations} iterations)")
+        if summary.builds_at_cap:
+            print(f"    {summary.builds_at_cap} builds reached max_runs without separating from the cut")
+
+        # Measured DPT, averaged over the same runs as the turns
+        results = [(build, s.dpt, s.mean) for build, s in zip(builds, stats)]
+        results.sort(key=lambda x: x[2])
+
+        gc.collect()
+        return results
+
+    def _test_single_build(self, build, simulation_runs: int = None, round_index: int = 0) -> Tuple[float, float]:
         """
         Test a single build across all scenarios.
 
         Args:
             build: Build to test
             simulation_runs: Number of simulation runs (None = use config.simulation_runs)
+            round_index: Progressive elimination round (keys the common random numbers)
 
         Returns:
             Tuple of (avg_turns, avg_dpt)
         """
+        all_turns, all_dpt, _ = self._test_build_per_scenario(build, simulation_runs, round_index)
+
+        # Average across scenarios
+        avg_turns = sum(all_turns) / len(all_turns)
+        avg_dpt = sum(all_dpt) / len(all_dpt)
+
+        return avg_turns, avg_dpt
+
+    def _test_build_per_scenario(self, build, simulation_runs: int = None,
+                                 round_index=0) -> Tuple[List[float], List[float], Tuple[int, int, int]]:
+        """
+        Test a single build against each scenario.
+
+        Args:
+            build: Build to test
+            simulation_runs: Number of simulation runs (None = use config.simulation_runs)
+            round_index: Key of the common random numbers (elimination round, or 'surrogate')
+
+        Returns:
+            Tuple of (avg turns per scenario, avg DPT per scenario, outcome counts summed over scenarios)
+        """
         if simulation_runs is None:
             simulation_runs = self.config.simulation_runs
 
         all_turns = []
         all_dpt = []
+        all_outcomes = []
 
         # Use GPU acceleration if enabled and available
-        if self.config.use_gpu:
-            try:
-                from src.combat_gpu import run_simulation_batch_gpu, is_gpu_available
-                use_gpu_batch = is_gpu_available()
-            except ImportError:
-                use_gpu_batch = False
-        else:
-            use_gpu_batch = False
-
-        for scenario in self.config.scenarios:
-            # GPU batch simulation now works for ALL scenarios!
-            if use_gpu_batch:
-                # Use GPU-accelerated batch simulation
-                from src.combat_gpu import run_simulation_batch_gpu
-                results, avg_turns, dpt, win_rate = run_simulation_batch_gpu(
-                    self.attacker,
-                    build,
-                    simulation_runs,
-                    100,
-                    self.defender,
-                    num_enemies=scenario.num_enemies,
-                    enemy_hp=scenario.enemy_hp,
-                    enemy_hp_list=scenario.enemy_hp_list,
-                    archetype=self.archetype
-                )
-            elif scenario.enemy_hp_list:
-                # Multi-enemy scenario - use CPU
-                results, avg_turns, dpt, win_rate = run_simulation_batch(
-                    self.attacker,
-                    build,
-                    simulation_runs,
-                    100,
-                    self.defender,
-                    enemy_hp_list=scenario.enemy_hp_list,
-                    archetype=self.archetype
-                )
-            else:
-                # Standard scenario - use CPU
-                results, avg_turns, dpt, win_rate = run_simulation_batch(
-                    self.attacker,
-                    build,
-                    simulation_runs,
-                    100,
-                    self.defender,
-                    num_enemies=scenario.num_enemies,
-                    enemy_hp=scenario.enemy_hp,
-                    archetype=self.archetype
-                )
+        use_gpu_batch = self._use_gpu_batch()
 
+        for scenario_index, scenario in enumerate(self.config.scenarios):
+            seed_scenario(self.config, self.archetype, build, scenario_index, round_index)
+            results, avg_turns, dpt, outcome_stats = self._simulate_scenario(build, scenario, simulation_runs,
+                                                                             use_gpu_batch)
             all_turns.append(avg_turns)
             all_dpt.append(dpt)
+            all_outcomes.append(outcome_counts(outcome_stats))
 
-        # Average across scenarios
-        avg_turns = sum(all_turns) / len(all_turns)
-        avg_dpt = sum(all_dpt) / len(all_dpt)
+        return all_turns, all_dpt, sum_outcomes(all_outcomes)
 
-        return avg_turns, avg_dpt
 
+def outcome_counts(outcome_stats: dict) -> Tuple[int, int, int]:
+    """(wins, losses, timeouts) of a batch's outcome_stats"""
+    return outcome_stats['wins'], outcome_stats['losses'], outcome_stats['timeouts']
 
-def test_single_build_worker(build, attacker, defender, config, archetype):
+
+def sum_outcomes(counts) -> Tuple[int, int, int]:
+    """Element-wise sum of (wins, losses, timeouts) tuples"""
+    wins = losses = timeouts = 0
+    for batch_wins, batch_losses, batch_timeouts in counts:
+        wins += batch_wins
+        losses += batch_losses
+        timeouts += batch_timeouts
+    return wins, losses, timeouts
+
+
+def attack_usage(build) -> Dict[int, int]:
+    """Copy of a build's attack usage counts (attack_idx -> times used; empty for single attacks)"""
+    return dict(getattr(build, 'attack_usage_counts', {}))
+
+
+def usage_since(build, before: Dict[int, int]) -> Dict[int, int]:
+    """Attack usage recorded on a build since attack_usage(build) returned before"""
+    usage = {}
+    for attack_idx, count in attack_usage(build).items():
+        if count != before.get(attack_idx, 0):
+            usage[attack_idx] = count - before.get(attack_idx, 0)
+    return usage
+
+
+def merge_attack_usage(build, usage: Dict[int, int]):
     """
-    Worker function for parallel build testing.
-    Must be a module-level function for multiprocessing to work.
+    Add attack usage counted elsewhere (a pool worker's copy of the build) to the build.
+
+    Workers simulate their own copy of each build, so the usage the simulation
+    records there has to come back with the results.
     """
-    all_turns = []
-    all_dpt = []
+    for attack_idx, count in usage.items():
+        build.attack_usage_counts[attack_idx] = build.attack_usage_counts.get(attack_idx, 0) + count
 
-    # Check for GPU support
-    if config.use_gpu:
-        try:
-            from src.combat_gpu import run_simulation_batch_gpu, is_gpu_available
-            use_gpu_batch = is_gpu_available()
-        except ImportError:
-            use_gpu_batch = False
+
+def use_gpu_batch(config: SimConfigV2) -> bool:
+    """Check whether GPU batch simulation is enabled and available."""
+    if not config.use_gpu:
+        return False
+    try:
+        from src.combat_gpu import is_gpu_available
+        return is_gpu_available()
+    except ImportError:
+        return False
+
+
+def seed_scenario(config: SimConfigV2, archetype: str, build, scenario_index: int, round_index=0):
+    """
+    Reseed the dice for one build x scenario test.
+
+    Seeded runs reseed per build and scenario, so results do not depend on test
+    order, worker, or which scheduler unit ran the scenario. Common random
+    numbers leave the build out: every build replays the same dice for this
+    scenario and round.
+    """
+    if config.common_random_numbers:
+        seed_common(config.random_seed, archetype, scenario_index, round_index)
+    elif config.random_seed is not None:
+        seed(config.random_seed, archetype, build, scenario_index)
+
+
+def simulate_scenario(build, scenario, simulation_runs: int, attacker: Character, defender: Character,
+                      config: SimConfigV2, archetype: str, use_gpu_batch: bool) -> Tuple:
+    """
+    Simulate one build against one scenario.
+
+    Returns:
+        Tuple of (results, avg_turns, dpt, outcome_stats) as from run_simulation_batch
+    """
+    # GPU batch simulation now works for ALL scenarios!
+    if use_gpu_batch:
+        # Use GPU-accelerated batch simulation
+        from src.combat_gpu import run_simulation_batch_gpu
+        return run_simulation_batch_gpu(
+            attacker,
+            build,
+            simulation_runs,
+            100,
+            defender,
+            num_enemies=scenario.num_enemies,
+            enemy_hp=scenario.enemy_hp,
+            enemy_hp_list=scenario.enemy_hp_list,
+            archetype=archetype
+        )
+    elif scenario.enemy_hp_list:
+        # Multi-enemy scenario - use CPU
+        return solve_or_simulate_batch(
+            attacker,
+            build,
+            simulation_runs,
+            100,
+            defender,
+            enemy_hp_list=scenario.enemy_hp_list,
+            archetype=archetype,
+            use_exact_solver=config.use_exact_solver,
+            use_batch_engine=config.use_batch_engine
+        )
     else:
-        use_gpu_batch = False
-
-    for scenario in config.scenarios:
-        # GPU now works for ALL scenarios!
-        if use_gpu_batch:
-            from src.combat_gpu import run_simulation_batch_gpu
-            results, avg_turns, dpt, win_rate = run_simulation_batch_gpu(
-                attacker,
-                build,
-                config.simulation_runs,
-                100,
-                defender,
-                num_enemies=scenario.num_enemies,
-                enemy_hp=scenario.enemy_hp,
-                enemy_hp_list=scenario.enemy_hp_list,
-                archetype=archetype
-            )
-        elif scenario.enemy_hp_list:
-            results, avg_turns, dpt, win_rate = run_simulation_batch(
-                attacker,
-                build,
-                config.simulation_runs,
-                100,
-                defender,
-                enemy_hp_list=scenario.enemy_hp_list,
-                archetype=archetype
-            )
-        else:
-            results, avg_turns, dpt, win_rate = run_simulation_batch(
-                attacker,
-                build,
-                config.simulation_runs,
-                100,
-                defender,
-                num_enemies=scenario.num_enemies,
-                enemy_hp=scenario.enemy_hp,
-                archetype=archetype
-            )
+        # Standard scenario - use CPU
+        return solve_or_simulate_batch(
+            attacker,
+            build,
+            simulation_runs,
+            100,
+            defender,
+            num_enemies=scenario.num_enemies,
+            enemy_hp=scenario.enemy_hp,
+            archetype=archetype,
+            use_exact_solver=config.use_exact_solver,
+            use_batch_engine=config.use_batch_engine
+        )
+
+
+def _test_build_scenarios(build, attacker: Character, defender: Character, config: SimConfigV2,
+                          archetype: str) -> Tuple[List[float], List[float], Tuple[int, int, int]]:
+    """
+    Test one build against every scenario, as the pool workers test it.
 
+    Returns:
+        Tuple of (avg turns per scenario, avg DPT per scenario, outcome counts summed over scenarios)
+    """
+    all_turns = []
+    all_dpt = []
+    all_outcomes = []
+
+    gpu_batch = use_gpu_batch(config)
+    for scenario_index, scenario in enumerate(config.scenarios):
+        # Same keys as BuildTester._test_single_build, whichever worker runs the build
+        seed_scenario(config, archetype, build, scenario_index)
+        results, avg_turns, dpt, outcome_stats = simulate_scenario(build, scenario, config.simulation_runs,
+                                                                   attacker, defender, config, archetype, gpu_batch)
         all_turns.append(avg_turns)
         all_dpt.append(dpt)
+        all_outcomes.append(outcome_counts(outcome_stats))
 
-    # Average across scenarios
+    return all_turns, all_dpt, sum_outcomes(all_outcomes)
+
+
+@dataclass
+class BuildWorkerContext:
+    """Immutable state of a parallel build test, shipped to each worker once (see init_build_worker)."""
+    builds: Sequence  # List of builds or MultiBuildSpace; tasks name builds by index
+    attacker: Character
+    defender: Character
+    config: SimConfigV2
+    archetype: str
+
+
+_worker_context: Optional[BuildWorkerContext] = None  # Set in each pool process by init_build_worker
+
+
+def init_build_worker(context: BuildWorkerContext):
+    """
+    Pool initializer for parallel build testing.
+
+    Stores the shared context so tasks only carry build indices, gives the
+    worker its own dice stream and opens the result cache (spawned workers do
+    not inherit the parent's connection).
+    """
+    global _worker_context
+    _worker_context = context
+    seed_worker(context.config.random_seed)
+    context.config.result_cache.open()
+
+
+def test_build_index_worker(build_index: int) -> Tuple:
+    """
+    Worker function testing one build of the shared context across all scenarios.
+
+    Returns:
+        (build_index, avg_dpt, avg_turns, avg turns per scenario, outcome counts, attack usage counts)
+    """
+    context = _worker_context
+    build = context.builds[build_index]
+    usage_before = attack_usage(build)
+    all_turns, all_dpt, outcomes = _test_build_scenarios(build, context.attacker, context.defender,
+                                                         context.config, context.archetype)
     avg_turns = sum(all_turns) / len(all_turns)
     avg_dpt = sum(all_dpt) / len(all_dpt)
+    return build_index, avg_dpt, avg_turns, all_turns, outcomes, usage_since(build, usage_before)
 
-    return (build, avg_dpt, avg_turns)
+
+def test_scenario_units_worker(units) -> List[Tuple[Tuple, float]]:
+    """
+    Worker function for scheduled parallel testing (see src/scheduler.py).
+
+    Args:
+        units: [(build_index, scenario_index), ...] into the shared context
+
+    Returns:
+        ((avg_turns, dpt, outcome counts, attack usage counts), seconds) per unit, in order
+    """
+    context = _worker_context
+    config = context.config
+    gpu_batch = use_gpu_batch(config)
+    results = []
+    for build_index, scenario_index in units:
+        start = time.perf_counter()
+        build = context.builds[build_index]
+        usage_before = attack_usage(build)
+        seed_scenario(config, context.archetype, build, scenario_index)
+        _, avg_turns, dpt, outcome_stats = simulate_scenario(build, config.scenarios[scenario_index],
+                                                             config.simulation_runs, context.attacker,
+                                                             context.defender, config, context.archetype, gpu_batch)
+        results.append(((avg_turns, dpt, outcome_counts(outcome_stats), usage_since(build, usage_before)),
+                        time.perf_counter() - start))
+    return results
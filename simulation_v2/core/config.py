@@ -2,8 +2,9 @@
 
 import json
 import os
-from dataclasses import dataclass
-from typing import List, Dict
+import secrets
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional
 
 
 @dataclass
@@ -20,6 +21,82 @@ class ProgressiveEliminationConfig:
     rounds: List[ProgressiveEliminationRound]
 
 
+@dataclass
+class RacingConfig:
+    """Statistical racing configuration (adaptive replacement for progressive elimination)."""
+    enabled: bool = False
+    keep_percent: float = 0.2    # Fraction of builds to separate from the rest
+    initial_runs: int = 2        # Runs every build gets first
+    batch_runs: int = 3          # Extra runs per iteration for builds near the cut
+    max_runs: int = 30           # Per-build run cap
+    confidence: float = 0.95     # Confidence level of the per-build intervals
+    final_runs: int = -1         # Minimum runs for kept builds (-1 = use config.simulation_runs)
+
+
+@dataclass
+class ResultCacheConfig:
+    """Persistent simulation result cache configuration (see src/result_cache.py)."""
+    enabled: bool = False
+    path: str = 'cache/simulation_results.sqlite'  # Relative to the simulation_v2 directory
+    max_size_mb: float = 512                       # LRU eviction threshold
+
+    def open(self):
+        """Open the process-wide cache if enabled (safe to call in every worker)."""
+        if self.enabled:
+            from src.result_cache import open_result_cache
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            open_result_cache(os.path.join(base_dir, self.path), self.max_size_mb)
+
+
+@dataclass
+class ResultsStoreConfig:
+    """Durable, resumable store of build test results (see src/results_store.py)."""
+    enabled: bool = False
+    path: str = 'cache/build_results.sqlite'  # Relative to the simulation_v2 directory
+
+    def full_path(self) -> str:
+        """Absolute path of the store file"""
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, self.path)
+
+
+@dataclass
+class BuildSamplingConfig:
+    """Seeded sampling of the single-build space for quick exploratory runs."""
+    enabled: bool = False
+    fraction: float = 0.01           # Fraction of valid builds to draw
+    count: Optional[int] = None      # Exact sample size (overrides fraction)
+    stratify: Optional[str] = None   # None, "attack_type" or "upgrade_count"
+    seed: Optional[int] = None       # Sample seed (None = use random_seed)
+
+
+@dataclass
+class DominancePruningConfig:
+    """Analytical pruning of provably dominated builds before simulation (see src/dominance.py)."""
+    enabled: bool = False
+
+
+@dataclass
+class SurrogateConfig:
+    """Surrogate model that pre-screens builds before full simulation (see src/surrogate.py)."""
+    enabled: bool = False
+    model: str = 'boosted'           # "boosted" regression trees or "ridge" regression
+    train_size: int = 500            # Builds simulated to fit the model
+    train_runs: int = 5              # Simulation runs per scenario for the training builds
+    keep_fraction: float = 0.3       # Predicted top share of the other builds sent to full simulation
+    explore_fraction: float = 0.05   # Random share of the rest also simulated (for calibration)
+    top_fraction: float = 0.1        # Share of builds that counts as the true top in calibration
+    seed: Optional[int] = None       # Sample seed (None = use random_seed)
+
+
+@dataclass
+class SchedulerConfig:
+    """Balanced build x scenario scheduling for parallel testing (see src/scheduler.py)."""
+    enabled: bool = True
+    grains_per_worker: int = 4       # Grains per worker cut from the remaining work (higher = finer, flatter tail)
+    in_flight_per_worker: int = 2    # Grains queued per worker at any time
+
+
 @dataclass
 class DualNaturedConfig:
     """Dual natured archetype configuration for fallback attack system."""
@@ -34,6 +111,13 @@ class PruningConfig:
     top_percent: float
     simulation_runs: int
     scenario_index: int = 0  # Deprecated - now tests all scenarios
+    top_k_per_slot: Optional[int] = 50  # Candidates kept per attack type before combining (None = no cap)
+
+
+@dataclass
+class VersatileMasterConfig:
+    """Versatile master archetype configuration."""
+    set_size: int = 3  # Attacks per build (sets are drawn with replacement from the candidates)
 
 
 @dataclass
@@ -73,6 +157,18 @@ class SimConfigV2:
     dual_natured: DualNaturedConfig
     pruning: PruningConfig
     progressive_elimination: ProgressiveEliminationConfig
+    use_exact_solver: bool = True  # Solve history-independent builds exactly instead of simulating
+    use_batch_engine: bool = True  # Simulate larger batches with the NumPy lockstep engine
+    random_seed: Optional[int] = None  # Run seed for reproducible dice (None = fresh entropy)
+    common_random_numbers: bool = False  # Every build replays the same dice per scenario (lower-variance ranking)
+    racing: RacingConfig = field(default_factory=RacingConfig)  # Adaptive top-K racing (overrides progressive elimination)
+    result_cache: ResultCacheConfig = field(default_factory=ResultCacheConfig)  # On-disk cache of simulation batches
+    results_store: ResultsStoreConfig = field(default_factory=ResultsStoreConfig)  # Keep build results on disk, resume runs
+    build_sampling: BuildSamplingConfig = field(default_factory=BuildSamplingConfig)  # Test a sample instead of every build
+    dominance_pruning: DominancePruningConfig = field(default_factory=DominancePruningConfig)  # Skip provably dominated builds
+    versatile_master: VersatileMasterConfig = field(default_factory=VersatileMasterConfig)  # Attacks per versatile master build
+    surrogate: SurrogateConfig = field(default_factory=SurrogateConfig)  # Predict builds, simulate only the promising ones
+    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)  # Split parallel work into build x scenario units
 
     @classmethod
     def load(cls, config_path: str = None):
@@ -108,7 +204,14 @@ class SimConfigV2:
             enabled=pruning_data.get('enabled', False),
             top_percent=pruning_data.get('top_percent', 0.05),
             simulation_runs=pruning_data.get('simulation_runs', 5),
-            scenario_index=pruning_data.get('scenario_index', 0)
+            scenario_index=pruning_data.get('scenario_index', 0),
+            top_k_per_slot=pruning_data.get('top_k_per_slot', 50)
+        )
+
+        # Parse versatile_master config (with defaults if not specified)
+        versatile_data = data.get('versatile_master', {})
+        versatile_master = VersatileMasterConfig(
+            set_size=versatile_data.get('set_size', VersatileMasterConfig().set_size)
         )
 
         # Parse progressive elimination config (with defaults if not specified)
@@ -127,6 +230,80 @@ class SimConfigV2:
             # Default: disabled with empty rounds
             progressive_elimination = ProgressiveEliminationConfig(enabled=False, rounds=[])
 
+        # Parse racing config (with defaults if not specified)
+        racing_data = data.get('racing', {})
+        defaults = RacingConfig()
+        racing = RacingConfig(
+            enabled=racing_data.get('enabled', False),
+            keep_percent=racing_data.get('keep_percent', defaults.keep_percent),
+            initial_runs=racing_data.get('initial_runs', defaults.initial_runs),
+            batch_runs=racing_data.get('batch_runs', defaults.batch_runs),
+            max_runs=racing_data.get('max_runs', defaults.max_runs),
+            confidence=racing_data.get('confidence', defaults.confidence),
+            final_runs=racing_data.get('final_runs', defaults.final_runs)
+        )
+
+        # Parse result cache config (with defaults if not specified)
+        cache_data = data.get('result_cache', {})
+        cache_defaults = ResultCacheConfig()
+        result_cache = ResultCacheConfig(
+            enabled=cache_data.get('enabled', False),
+            path=cache_data.get('path', cache_defaults.path),
+            max_size_mb=cache_data.get('max_size_mb', cache_defaults.max_size_mb)
+        )
+
+        # Parse results store config (with defaults if not specified)
+        store_data = data.get('results_store', {})
+        store_defaults = ResultsStoreConfig()
+        results_store = ResultsStoreConfig(
+            enabled=store_data.get('enabled', False),
+            path=store_data.get('path', store_defaults.path)
+        )
+
+        # Parse build sampling config (with defaults if not specified)
+        sampling_data = data.get('build_sampling', {})
+        sampling_defaults = BuildSamplingConfig()
+        build_sampling = BuildSamplingConfig(
+            enabled=sampling_data.get('enabled', False),
+            fraction=sampling_data.get('fraction', sampling_defaults.fraction),
+            count=sampling_data.get('count'),
+            stratify=sampling_data.get('stratify'),
+            seed=sampling_data.get('seed')
+        )
+
+        # Parse dominance pruning config (with defaults if not specified)
+        dominance_data = data.get('dominance_pruning', {})
+        dominance_pruning = DominancePruningConfig(enabled=dominance_data.get('enabled', False))
+
+        # Parse surrogate config (with defaults if not specified)
+        surrogate_data = data.get('surrogate', {})
+        surrogate_defaults = SurrogateConfig()
+        surrogate = SurrogateConfig(
+            enabled=surrogate_data.get('enabled', False),
+            model=surrogate_data.get('model', surrogate_defaults.model),
+            train_size=surrogate_data.get('train_size', surrogate_defaults.train_size),
+            train_runs=surrogate_data.get('train_runs', surrogate_defaults.train_runs),
+            keep_fraction=surrogate_data.get('keep_fraction', surrogate_defaults.keep_fraction),
+            explore_fraction=surrogate_data.get('explore_fraction', surrogate_defaults.explore_fraction),
+            top_fraction=surrogate_data.get('top_fraction', surrogate_defaults.top_fraction),
+            seed=surrogate_data.get('seed')
+        )
+
+        # Parse scheduler config (with defaults if not specified)
+        scheduler_data = data.get('scheduler', {})
+        scheduler_defaults = SchedulerConfig()
+        scheduler = SchedulerConfig(
+            enabled=scheduler_data.get('enabled', scheduler_defaults.enabled),
+            grains_per_worker=scheduler_data.get('grains_per_worker', scheduler_defaults.grains_per_worker),
+            in_flight_per_worker=scheduler_data.get('in_flight_per_worker', scheduler_defaults.in_flight_per_worker)
+        )
+
+        # Common random numbers need one base seed shared by every build and worker
+        random_seed = data.get('random_seed')
+        common_random_numbers = data.get('common_random_numbers', False)
+        if common_random_numbers and random_seed is None:
+            random_seed = secrets.randbits(32)
+
         return cls(
             tier=data['tier'],
             archetypes=data['archetypes'],
@@ -140,7 +317,19 @@ class SimConfigV2:
             scenarios=scenarios,
             dual_natured=dual_natured,
             pruning=pruning,
-            progressive_elimination=progressive_elimination
+            progressive_elimination=progressive_elimination,
+            use_exact_solver=data.get('use_exact_solver', True),
+            use_batch_engine=data.get('use_batch_engine', True),
+            random_seed=random_seed,
+            common_random_numbers=common_random_numbers,
+            racing=racing,
+            result_cache=result_cache,
+            results_store=results_store,
+            build_sampling=build_sampling,
+            dominance_pruning=dominance_pruning,
+            versatile_master=versatile_master,
+            surrogate=surrogate,
+            scheduler=scheduler
         )
 
     def max_points_per_attack(self, archetype: str) -> int:
@@ -4,7 +4,9 @@ from dataclasses import dataclass
 from typing import Dict, List
 from src.game_data import UPGRADES, LIMITS, ATTACK_TYPES, RuleValidator, PREREQUISITES
 from src.models import Character, AttackBuild
-from src.simulation import run_simulation_batch, simulate_combat_verbose
+from src.simulation import simulate_combat_verbose
+from src.exact_solver import solve_or_simulate_batch
+from src.dice import seed, seed_common
 from core.config import SimConfigV2
 import os
 
@@ -70,6 +72,10 @@ class IndividualTester:
         if total_cost > self.max_points:
             return None
 
+        # Seeded runs give each enhancement its own reproducible dice stream
+        if self.config.random_seed is not None and not self.config.common_random_numbers:
+            seed(self.config.random_seed, self.archetype, upgrade_name)
+
         attack_type_turns = {}
         all_turns = []
 
@@ -81,19 +87,24 @@ class IndividualTester:
 
             # Test across all scenarios
             scenario_turns = []
-            for scenario in self.config.scenarios:
+            for scenario_index, scenario in enumerate(self.config.scenarios):
+                # Common random numbers: every enhancement replays the same dice per attack type and scenario
+                if self.config.common_random_numbers:
+                    seed_common(self.config.random_seed, self.archetype, attack_type_name, scenario_index)
                 if scenario.enemy_hp_list:
-                    results, avg_turns, dpt, win_rate = run_simulation_batch(
+                    results, avg_turns, dpt, win_rate = solve_or_simulate_batch(
                         self.attacker,
                         AttackBuild(attack_type_name, upgrades_to_test, []),
                         self.config.simulation_runs,
                         100,  # target_hp (not used in multi-enemy)
                         self.defender,
                         enemy_hp_list=scenario.enemy_hp_list,
-                        archetype=self.archetype
+                        archetype=self.archetype,
+                        use_exact_solver=self.config.use_exact_solver,
+                        use_batch_engine=self.config.use_batch_engine
                     )
                 else:
-                    results, avg_turns, dpt, win_rate = run_simulation_batch(
+                    results, avg_turns, dpt, win_rate = solve_or_simulate_batch(
                         self.attacker,
                         AttackBuild(attack_type_name, upgrades_to_test, []),
                         self.config.simulation_runs,
@@ -101,7 +112,9 @@ class IndividualTester:
                         self.defender,
                         num_enemies=scenario.num_enemies,
                         enemy_hp=scenario.enemy_hp,
-                        archetype=self.archetype
+                        archetype=self.archetype,
+                        use_exact_solver=self.config.use_exact_solver,
+                        use_batch_engine=self.config.use_batch_engine
                     )
                 scenario_turns.append(avg_turns)
 
@@ -134,6 +147,10 @@ class IndividualTester:
         if limit_cost > self.max_points:
             return None
 
+        # Seeded runs give each enhancement its own reproducible dice stream
+        if self.config.random_seed is not None and not self.config.common_random_numbers:
+            seed(self.config.random_seed, self.archetype, limit_name)
+
         attack_type_turns = {}
         all_turns = []
 
@@ -141,19 +158,24 @@ class IndividualTester:
         for attack_type_name in self.config.attack_types:
             # Test across all scenarios
             scenario_turns = []
-            for scenario in self.config.scenarios:
+            for scenario_index, scenario in enumerate(self.config.scenarios):
+                # Common random numbers: every enhancement replays the same dice per attack type and scenario
+                if self.config.common_random_numbers:
+                    seed_common(self.config.random_seed, self.archetype, attack_type_name, scenario_index)
                 if scenario.enemy_hp_list:
-                    results, avg_turns, dpt, win_rate = run_simulation_batch(
+                    results, avg_turns, dpt, win_rate = solve_or_simulate_batch(
                         self.attacker,
                         AttackBuild(attack_type_name, [], [limit_name]),
                         self.config.simulation_runs,
                         100,
                         self.defender,
                         enemy_hp_list=scenario.enemy_hp_list,
-                        archetype=self.archetype
+                        archetype=self.archetype,
+                        use_exact_solver=self.config.use_exact_solver,
+                        use_batch_engine=self.config.use_batch_engine
                     )
                 else:
-                    results, avg_turns, dpt, win_rate = run_simulation_batch(
+                    results, avg_turns, dpt, win_rate = solve_or_simulate_batch(
                         self.attacker,
                         AttackBuild(attack_type_name, [], [limit_name]),
                         self.config.simulation_runs,
@@ -161,7 +183,9 @@ class IndividualTester:
                         self.defender,
                         num_enemies=scenario.num_enemies,
                         enemy_hp=scenario.enemy_hp,
-                        archetype=self.archetype
+                        archetype=self.archetype,
+                        use_exact_solver=self.config.use_exact_solver,
+                        use_batch_engine=self.config.use_batch_engine
                     )
                 scenario_turns.append(avg_turns)
 
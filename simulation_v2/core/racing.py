@@ -0,0 +1,196 @@
+"""Statistical racing for build testing in Simulation V2.
+
+Progressive elimination gives every build in a round the same number of runs,
+so a build that is clearly hopeless after two combats still gets the full
+budget. Racing keeps a running mean and variance per build instead and only
+keeps sampling builds whose confidence interval still straddles the top-K cut.
+"""
+
+import math
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class RaceStats:
+    """Running mean and variance of one build's per-run scores (Welford, merged per batch)."""
+    runs: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    batches: int = 0
+    exact: bool = False  # Every scenario solved exactly - no sampling noise left
+    dpt: float = 0.0     # Running mean of the measured DPT over the same runs
+
+    def add(self, scores: np.ndarray, exact: bool = False, dpt: float = 0.0):
+        """Merge a batch of per-run scores and its mean DPT (Chan et al. parallel update)."""
+        count = len(scores)
+        batch_mean = float(np.mean(scores))
+        batch_m2 = float(np.sum((scores - batch_mean) ** 2))
+        total = self.runs + count
+        delta = batch_mean - self.mean
+        self.mean += delta * count / total
+        self.dpt += (dpt - self.dpt) * count / total
+        self.m2 += batch_m2 + delta * delta * self.runs * count / total
+        self.runs = total
+        self.batches += 1
+        self.exact = exact
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the per-run scores."""
+        return self.m2 / (self.runs - 1) if self.runs > 1 else 0.0
+
+    def half_width(self, z: float, prior_variance: float, prior_weight: float) -> float:
+        """
+        Confidence half-width of the mean.
+
+        The variance is shrunk towards the pooled variance of all builds, so a
+        handful of identical rolls does not look like a certain result.
+        """
+        if self.exact:
+            return 0.0
+        variance = (self.m2 + prior_weight * prior_variance) / (self.runs - 1 + prior_weight)
+        return z * math.sqrt(variance / self.runs)
+
+
+@dataclass
+class RaceSummary:
+    """Budget accounting for a finished race."""
+    builds: int
+    keep_count: int
+    runs_used: int
+    fixed_schedule_runs: int
+    iterations: int
+    builds_at_cap: int  # Builds that hit max_runs while still straddling the cut
+
+    @property
+    def runs_saved(self) -> int:
+        return self.fixed_schedule_runs - self.runs_used
+
+    @property
+    def percent_saved(self) -> float:
+        if self.fixed_schedule_runs <= 0:
+            return 0.0
+        return self.runs_saved / self.fixed_schedule_runs * 100
+
+
+def fixed_schedule_runs(num_builds: int, rounds, default_runs: int) -> int:
+    """
+    Count the runs per scenario a fixed progressive elimination schedule spends.
+
+    Args:
+        num_builds: Builds entering the first round
+        rounds: ProgressiveEliminationRound list (empty = one round at default_runs)
+        default_runs: config.simulation_runs (used for rounds with simulation_runs -1)
+
+    Returns:
+        Total runs per scenario across all builds and rounds
+    """
+    if not rounds:
+        return num_builds * default_runs
+
+    total = 0
+    remaining = num_builds
+    for round_config in rounds:
+        runs = default_runs if round_config.simulation_runs == -1 else round_config.simulation_runs
+        total += remaining * runs
+        remaining = max(1, int(remaining * round_config.keep_percent))
+    return total
+
+
+def race_builds(builds: List, sample_build: Callable[[object, int, int], Tuple[np.ndarray, bool, float]],
+                keep_count: int, initial_runs: int, batch_runs: int, max_runs: int,
+                confidence: float = 0.95, final_runs: int = 0, prior_weight: float = 2.0,
+                fixed_runs: int = 0, progress: Callable[[int, int, float], None] = None
+                ) -> Tuple[List[RaceStats], RaceSummary]:
+    """
+    Race builds until the top keep_count is separated from the rest.
+
+    Every build gets initial_runs. Each iteration then places the cut halfway
+    between the keep_count-th and the next best mean, and gives batch_runs more
+    to every build whose confidence interval still contains the cut and that is
+    below max_runs. Builds whose interval lies wholly on one side stop sampling
+    (they resume if the cut later moves into their interval). Finally builds
+    above the cut are topped up to final_runs so their reported means are as
+    precise as the fixed schedule's final round.
+
+    Args:
+        builds: Builds to race
+        sample_build: Callable(build, runs, batch_index) -> (per-run scores, exact, batch mean DPT);
+            lower scores are better
+        keep_count: Number of top builds to separate from the rest
+        initial_runs: Runs every build gets first
+        batch_runs: Extra runs per iteration for builds near the cut
+        max_runs: Per-build run cap
+        confidence: Two-sided confidence level of the intervals
+        final_runs: Minimum runs for builds above the cut (0 = no top-up)
+        prior_weight: Pseudo-runs of pooled variance mixed into each build's variance
+        fixed_runs: Runs the fixed schedule would spend (for the summary)
+        progress: Optional callable(iteration, active_builds, cut) for reporting
+
+    Returns:
+        Tuple of (RaceStats per build in input order, RaceSummary)
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    stats = [RaceStats() for _ in builds]
+    keep_count = max(1, min(keep_count, len(builds)))
+
+    def sample(index: int, runs: int):
+        scores, exact, dpt = sample_build(builds[index], runs, stats[index].batches)
+        stats[index].add(np.asarray(scores, dtype=np.float64), exact, dpt)
+
+    for index in range(len(builds)):
+        sample(index, initial_runs)
+
+    iterations = 0
+    cut = 0.0
+    at_cap = 0
+    while keep_count < len(builds):
+        means = np.array([s.mean for s in stats])
+        order = np.argsort(means, kind='stable')
+        cut = (means[order[keep_count - 1]] + means[order[keep_count]]) / 2
+
+        noisy = [s.variance for s in stats if not s.exact and s.runs > 1]
+        prior_variance = float(np.mean(noisy)) if noisy else 0.0
+
+        active = []
+        at_cap = 0
+        for index, s in enumerate(stats):
+            if abs(s.mean - cut) > s.half_width(z, prior_variance, prior_weight):
+                continue
+            if s.exact:
+                continue
+            if s.runs >= max_runs:
+                at_cap += 1
+                continue
+            active.append(index)
+
+        if progress:
+            progress(iterations, len(active), cut)
+        if not active:
+            break
+
+        iterations += 1
+        for index in active:
+            sample(index, min(batch_runs, max_runs - stats[index].runs))
+
+    # Survivors get at least the fixed schedule's final-round precision for reporting
+    if final_runs:
+        means = np.array([s.mean for s in stats])
+        for index in np.argsort(means, kind='stable')[:keep_count]:
+            s = stats[index]
+            if not s.exact and s.runs < final_runs:
+                sample(int(index), final_runs - s.runs)
+
+    summary = RaceSummary(
+        builds=len(builds),
+        keep_count=keep_count,
+        runs_used=sum(s.runs for s in stats),
+        fixed_schedule_runs=fixed_runs,
+        iterations=iterations,
+        builds_at_cap=at_cap
+    )
+    return stats, summary
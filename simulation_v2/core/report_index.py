@@ -0,0 +1,376 @@
+"""
+Single-pass aggregation index of build results for ReporterV2.
+
+Every report used to re-sort and rescan the full build results on its own
+(enhancement stats, tier analysis, saturation, ranking tiers, top 1000), and
+with columnar results each scan decoded every build again. ReportIndex walks
+the results once, in rank order (ascending avg turns), and keeps what the
+reports ask for:
+- results: the rank order itself, and turns: avg turns per rank
+- per enhancement (EnhancementOccurrences): rank and avg turns of every
+  occurrence (one per attack that has it), per attack slot and attack type,
+  and the ranks of the builds that contain it. Occurrences are recorded in
+  rank order, so the count, turn sum, mean or median over any top-N cut is a
+  binary search and a slice, and the turns of any cut are already sorted.
+- the distinct enhancement sets of the builds, for diversity (unique sets
+  in a rank range) and 2-3 enhancement co-occurrence counts
+- membership (MembershipMatrix): builds x enhancements as bit-packed
+  columns, so the builds containing each enhancement in any top-N cut are
+  a cumulative sum lookup and pairwise co-occurrence is a bitwise product
+  (primary_membership counts only the primary attack of dual_natured
+  builds, as the top N saturation reports do)
+
+Example:
+    index = ReportIndex(build_results)
+    top_10 = index.tier_count(0.10)
+    for name, count in zip(index.membership.names, index.membership.counts(top_10)):
+        print(name, count / top_10)
+"""
+
+from collections import Counter
+from fractions import Fraction
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.game_data import UPGRADES, LIMITS
+from src.models import MultiAttackBuild
+from src.result_columns import RankedResults
+
+
+def sorted_median(values: Sequence[float]) -> float:
+    """statistics.median of values that are already sorted"""
+    count = len(values)
+    middle = count // 2
+    if count % 2:
+        median = values[middle]
+    else:
+        median = (values[middle - 1] + values[middle]) / 2
+    return median.item() if isinstance(median, np.generic) else median
+
+
+def exact_mean(values: Sequence[float]) -> float:
+    """
+    statistics.mean of floats: the exact mean, correctly rounded.
+
+    Every float is an integer mantissa times a power of two, so the mantissas
+    are summed exactly per exponent in int64 (split in 26-bit halves, which
+    cannot overflow) and only the few per-exponent sums become fractions.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    fractions, exponents = np.frexp(values)
+    mantissas = (fractions * 2.0 ** 53).astype(np.int64)
+    high, low = mantissas >> 26, mantissas & (2 ** 26 - 1)
+    total = Fraction(0)
+    for exponent in np.unique(exponents).tolist():
+        selected = exponents == exponent
+        mantissa_sum = (int(high[selected].sum()) << 26) + int(low[selected].sum())
+        total += Fraction(mantissa_sum) * Fraction(2) ** (exponent - 53)
+    return float(total / len(values))
+
+
+class EnhancementOccurrences:
+    """Occurrences of one enhancement in the ranked results (ranks are 1-based)."""
+
+    def __init__(self, name: str, enhancement_type: str, cost: int):
+        self.name = name
+        self.type = enhancement_type
+        self.cost = cost
+        self.ranks = []                 # Rank of the build of each occurrence
+        self.turns = []                 # Avg turns of the build of each occurrence (ascending)
+        self.slots = []                 # Attack slot of each occurrence
+        self.attack_types = []          # Attack type of each occurrence
+        self.build_ranks = []           # Ranks of the builds containing it (once per build)
+        self.usage_totals = [0, 0]      # Summed combat usage % of attacks 1 and 2 (multi-attack builds)
+        self.usage_count = 0
+        self.slot_ranks: Dict[int, np.ndarray] = {}         # Attack slot -> occurrence ranks
+        self.attack_type_ranks: Dict[str, np.ndarray] = {}  # Attack type -> occurrence ranks
+        self.attack_type_turns: Dict[str, np.ndarray] = {}  # Attack type -> occurrence turns
+        self._turn_sums = None
+
+    def _freeze(self):
+        """Compact the occurrence lists once the pass is complete"""
+        self.ranks = np.array(self.ranks, dtype=np.int64)
+        self.turns = np.array(self.turns, dtype=np.float64)
+        self.build_ranks = np.array(self.build_ranks, dtype=np.int64)
+        slots = np.array(self.slots, dtype=np.int64)
+        self.slot_ranks = {slot: self.ranks[slots == slot] for slot in np.unique(slots).tolist()}
+        attack_types = np.array(self.attack_types, dtype=object)
+        for attack_type in dict.fromkeys(self.attack_types):
+            selected = attack_types == attack_type
+            self.attack_type_ranks[attack_type] = self.ranks[selected]
+            self.attack_type_turns[attack_type] = self.turns[selected]
+        self.slots = self.attack_types = None
+
+    @property
+    def appearances(self) -> int:
+        return len(self.ranks)
+
+    def count(self, top: int) -> int:
+        """Occurrences in the builds ranked 1..top"""
+        return int(np.searchsorted(self.ranks, top, side='right'))
+
+    def turns_in(self, top: int) -> np.ndarray:
+        """Avg turns of the occurrences in the builds ranked 1..top (ascending)"""
+        return self.turns[:self.count(top)]
+
+    def turns_sum(self, top: int) -> float:
+        """Sum of turns_in(top), added one occurrence at a time in rank order"""
+        if self._turn_sums is None:
+            self._turn_sums = np.concatenate(([0.0], np.cumsum(self.turns)))
+        return float(self._turn_sums[self.count(top)])
+
+    def slot_count(self, slot: int, top: int) -> int:
+        """Occurrences in an attack slot in the builds ranked 1..top"""
+        ranks = self.slot_ranks.get(slot)
+        return int(np.searchsorted(ranks, top, side='right')) if ranks is not None else 0
+
+    def attack_type_turns_in(self, attack_type: str, top: int) -> np.ndarray:
+        """Avg turns of the occurrences on an attack type in the builds ranked 1..top"""
+        ranks = self.attack_type_ranks.get(attack_type)
+        if ranks is None:
+            return self.turns[:0]
+        return self.attack_type_turns[attack_type][:int(np.searchsorted(ranks, top, side='right'))]
+
+
+_BYTE_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits of each uint64 word (np.bitwise_count needs NumPy 2.0)"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    counts = _BYTE_POPCOUNT[np.ascontiguousarray(words).view(np.uint8)].reshape(*words.shape, 8)
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+class MembershipMatrix:
+    """
+    Builds (rank order) x enhancements membership, one bit-packed column per enhancement.
+
+    Bit r of column j is set when the build ranked r + 1 contains enhancement
+    j. Per-word popcounts are prefix-summed once, so counts(top) for every
+    enhancement at any cut is one lookup plus the partial word.
+
+    Args:
+        names: Enhancement of each column
+        rows: Sorted 0-based rank rows containing each enhancement, per column
+        total: Number of builds
+    """
+
+    def __init__(self, names: List[str], rows: List[np.ndarray], total: int):
+        self.names = list(names)
+        self.columns = {name: column for column, name in enumerate(self.names)}
+        self.rows = rows
+        self.total = total
+        words = (total + 63) // 64
+        self.words = np.zeros((len(self.names), words), dtype=np.uint64)
+        bits = np.zeros(words * 64, dtype=bool)
+        for column, column_rows in enumerate(rows):
+            bits[:] = False
+            bits[column_rows] = True
+            self.words[column] = np.packbits(bits, bitorder='little').view('<u8')
+        self._cumulative = np.zeros((len(self.names), words + 1), dtype=np.int64)
+        np.cumsum(_popcount(self.words), axis=1, out=self._cumulative[:, 1:])
+
+    def _prefix(self, words: np.ndarray, top: int) -> np.ndarray:
+        """Words covering the builds ranked 1..top (bits beyond top cleared)"""
+        top = min(top, self.total)
+        full, partial = divmod(top, 64)
+        if not partial:
+            return words[..., :full]
+        prefix = words[..., :full + 1].copy()
+        prefix[..., full] &= np.uint64((1 << partial) - 1)
+        return prefix
+
+    def counts(self, top: int) -> np.ndarray:
+        """Builds ranked 1..top containing each enhancement (column order)"""
+        top = min(top, self.total)
+        full, partial = divmod(top, 64)
+        counts = self._cumulative[:, full].copy()
+        if partial:
+            last_word = self.words[:, full] & np.uint64((1 << partial) - 1)
+            counts += _popcount(last_word).astype(np.int64)
+        return counts
+
+    def count(self, name: str, top: int) -> int:
+        """Builds ranked 1..top containing an enhancement (0 if it never appears)"""
+        column = self.columns.get(name)
+        return int(np.searchsorted(self.rows[column], top)) if column is not None else 0
+
+    def rows_in(self, name: str, top: int) -> np.ndarray:
+        """0-based rank rows of the builds ranked 1..top containing an enhancement"""
+        column_rows = self.rows[self.columns[name]]
+        return column_rows[:np.searchsorted(column_rows, top)]
+
+    def partner_counts(self, name: str, top: int) -> np.ndarray:
+        """Builds ranked 1..top containing both an enhancement and each column's enhancement"""
+        words = self._prefix(self.words, top)
+        return _popcount(words & words[self.columns[name]]).sum(axis=1, dtype=np.int64)
+
+    def co_occurrence(self, top: int) -> np.ndarray:
+        """
+        Builds ranked 1..top containing each pair of enhancements (columns x columns).
+
+        The bit-packed form of M^T M over the top rows; the diagonal is counts(top).
+        """
+        words = self._prefix(self.words, top)
+        matrix = np.zeros((len(self.names), len(self.names)), dtype=np.int64)
+        for column in range(len(self.names)):
+            row = _popcount(words[column:] & words[column]).sum(axis=1, dtype=np.int64)
+            matrix[column, column:] = row
+            matrix[column:, column] = row
+        return matrix
+
+    def count_any(self, names: Sequence[str], top: int, within: str = None) -> int:
+        """Builds ranked 1..top containing at least one of names (and within, if given)"""
+        words = self._prefix(self.words, top)
+        selected = np.zeros(words.shape[1], dtype=np.uint64)
+        for name in names:
+            selected |= words[self.columns[name]]
+        if within is not None:
+            selected &= words[self.columns[within]]
+        return int(_popcount(selected).sum())
+
+
+def _usage_percentages(counts) -> Optional[Tuple[int, int]]:
+    """
+    Combat usage % of attacks 1 and 2 from per-attack usage counts, as
+    MultiAttackBuild.get_attack_usage_percentages; None without recorded usage.
+    """
+    total = sum(counts) if counts is not None else 0
+    if not total:
+        return None
+    return int((counts[0] / total) * 100), int((counts[1] / total) * 100)
+
+
+class ReportIndex:
+    """
+    Rank order, per-enhancement occurrences and enhancement sets of build results, built in one pass.
+
+    Args:
+        build_results: (build, avg_dpt, avg_turns) tuples in any order, or RankedResults
+    """
+
+    def __init__(self, build_results):
+        if isinstance(build_results, RankedResults):
+            self.results = build_results
+        else:
+            self.results = sorted(build_results, key=lambda x: x[2])
+        self.total = len(self.results)
+        self.enhancements: Dict[str, EnhancementOccurrences] = {}  # In order of first occurrence
+        self.sets: List[frozenset] = []  # Distinct enhancement sets, in order of first occurrence
+        self.primary_only = False  # Dual-natured builds: primary_membership skips the fallback attack
+        self._index()
+
+    def _rows(self):
+        """
+        (avg_turns, attacks, combat usage %) per build in rank order; attacks are (type, upgrades, limits).
+
+        Usage is None for single attacks and for builds without recorded usage.
+        """
+        if isinstance(self.results, RankedResults):
+            self.primary_only = self.results.columns.archetype == 'dual_natured'
+            for avg_turns, attacks, counts in self.results.attack_rows():
+                yield avg_turns, attacks, _usage_percentages(counts)
+            return
+        for build, _, avg_turns in self.results:
+            if isinstance(build, MultiAttackBuild):
+                self.primary_only = self.primary_only or bool(build.fallback_type)
+                attacks = [(sub.attack_type, sub.upgrades, sub.limits) for sub in build.builds]
+                counts = [build.attack_usage_counts.get(attack_idx, 0) for attack_idx in range(len(attacks))]
+                yield avg_turns, attacks, _usage_percentages(counts)
+            else:
+                yield avg_turns, [(build.attack_type, build.upgrades, build.limits)], None
+
+    def _index(self):
+        enhancements = self.enhancements
+        set_ids = {}
+        turns = []
+        row_sets = []
+        set_last_ranks = []
+
+        for rank, (avg_turns, attacks, usage) in enumerate(self._rows(), 1):
+            turns.append(avg_turns)
+            names_in_build = []
+            for slot, (attack_type, upgrades, limits) in enumerate(attacks):
+                for names, enhancement_type, table in ((upgrades, 'upgrade', UPGRADES), (limits, 'limit', LIMITS)):
+                    for name in names:
+                        enhancement = enhancements.get(name)
+                        if enhancement is None:
+                            enhancement = enhancements[name] = EnhancementOccurrences(
+                                name, enhancement_type, table[name].cost)
+                        enhancement.ranks.append(rank)
+                        enhancement.turns.append(avg_turns)
+                        enhancement.slots.append(slot)
+                        enhancement.attack_types.append(attack_type)
+                        if usage is not None:
+                            enhancement.usage_totals[0] += usage[0]
+                            enhancement.usage_totals[1] += usage[1]
+                            enhancement.usage_count += 1
+                        names_in_build.append(name)
+
+            enhancement_set = frozenset(names_in_build)
+            for name in enhancement_set:
+                enhancements[name].build_ranks.append(rank)
+            set_id = set_ids.get(enhancement_set)
+            if set_id is None:
+                set_id = set_ids[enhancement_set] = len(self.sets)
+                self.sets.append(enhancement_set)
+                set_last_ranks.append(rank)
+            else:
+                set_last_ranks[set_id] = rank
+            row_sets.append(set_id)
+
+        self.turns = np.array(turns, dtype=np.float64)
+        self.set_ids = np.array(row_sets, dtype=np.int64)
+        # Set IDs are given in order of first occurrence, so their first ranks are ascending
+        self._set_first_ranks = np.unique(self.set_ids, return_index=True)[1] + 1
+        self._set_last_ranks = np.sort(np.array(set_last_ranks, dtype=np.int64))
+        for enhancement in enhancements.values():
+            enhancement._freeze()
+
+        names = list(enhancements)
+        self.membership = MembershipMatrix(
+            names, [enhancements[name].build_ranks - 1 for name in names], self.total)
+        if self.primary_only:
+            primary = [name for name in names if 0 in enhancements[name].slot_ranks]
+            self.primary_membership = MembershipMatrix(
+                primary, [enhancements[name].slot_ranks[0] - 1 for name in primary], self.total)
+        else:
+            self.primary_membership = self.membership
+
+    def tier_count(self, fraction: float) -> int:
+        """Number of builds in the top fraction of the ranking (at least 1)"""
+        return max(1, int(self.total * fraction))
+
+    def median(self, top: int = None) -> float:
+        """Median avg turns of the builds ranked 1..top (all builds by default)"""
+        turns = self.turns if top is None else self.turns[:top]
+        return sorted_median(turns) if len(turns) else 0
+
+    def unique_sets(self, start: int, stop: int) -> int:
+        """Distinct enhancement sets among the builds ranked start+1..stop"""
+        stop = min(stop, self.total)
+        if start == 0:
+            return int(np.searchsorted(self._set_first_ranks, stop, side='right'))
+        if stop == self.total:
+            return len(self._set_last_ranks) - int(np.searchsorted(self._set_last_ranks, start, side='right'))
+        return len(np.unique(self.set_ids[start:stop]))
+
+    def combination_counts(self, top: int, sizes: Tuple[int, ...] = (2, 3)) -> Counter:
+        """
+        Occurrences of every enhancement combination of the given sizes in the builds ranked 1..top.
+
+        Combinations are sorted name tuples, counted once per build and
+        inserted in order of first occurrence (so most_common breaks ties by
+        rank). Each distinct enhancement set is expanded once.
+        """
+        combination_counts = Counter()
+        for set_id, count in Counter(self.set_ids[:top].tolist()).items():
+            names = sorted(self.sets[set_id])
+            for size in sizes:
+                for combination in combinations(names, size):
+                    combination_counts[combination] += count
+        return combination_counts
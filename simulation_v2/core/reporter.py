@@ -5,9 +5,18 @@ import statistics
 from datetime import datetime
 from typing import List, Tuple, Dict
 
+import numpy as np
+
 from src.game_data import UPGRADES, LIMITS
 from src.models import AttackBuild, MultiAttackBuild
 from core.individual_tester import IndividualResult
+from core.report_index import MembershipMatrix, ReportIndex, exact_mean, sorted_median
+
+# Top N cuts of the top N saturation reports
+TOP_N_THRESHOLDS = [10, 50, 100, 200, 500, 1000]
+
+# Minimum builds containing a pair for it to be ranked in the pair synergy report
+MIN_PAIR_SUPPORT = 10
 
 
 class ReporterV2:
@@ -20,10 +29,13 @@ class ReporterV2:
 
     def generate_all_reports(
         self,
-        build_results: List[Tuple[AttackBuild | MultiAttackBuild, float, float]],
+        build_results: List[Tuple[AttackBuild | MultiAttackBuild, float, float]] | ReportIndex,
         individual_results: List[IndividualResult] = None
     ):
-        """Generate both enhancement ranking and cost analysis reports."""
+        """Generate both enhancement ranking and cost analysis reports.
+
+        build_results may be an already built ReportIndex of the results.
+        """
         print(f"\n=== Generating Reports ({self.archetype}) ===")
 
         # Generate individual enhancement reports if results provided
@@ -36,35 +48,28 @@ class ReporterV2:
         if individual_results:
             individual_results_dict = {result.enhancement_name: result for result in individual_results}
 
+        # Index the results once (rank order, per-enhancement occurrences); every report reads from it
+        index = build_results if isinstance(build_results, ReportIndex) else ReportIndex(build_results)
+
         # Calculate enhancement stats from build results
-        enhancement_stats = self._calculate_enhancement_stats(build_results, individual_results_dict)
+        enhancement_stats = self._calculate_enhancement_stats(index, individual_results_dict)
 
         # Calculate overall median and percentile medians for all reports
-        all_turns = [avg_turns for _, _, avg_turns in build_results]
-        overall_median = statistics.median(all_turns) if all_turns else 0
+        overall_median = index.median()
 
         # Calculate percentile medians (top builds by rank)
-        sorted_builds = sorted(build_results, key=lambda x: x[2])  # Sort by avg_turns (ascending = better)
-        total_builds = len(sorted_builds)
-
-        if total_builds > 0:
-            top_1_count = max(1, int(total_builds * 0.01))
-            top_5_count = max(1, int(total_builds * 0.05))
-            top_10_count = max(1, int(total_builds * 0.10))
-            top_20_count = max(1, int(total_builds * 0.20))
-            top_50_count = max(1, int(total_builds * 0.50))
-
-            top_1_median = statistics.median([turns for _, _, turns in sorted_builds[:top_1_count]])
-            top_5_median = statistics.median([turns for _, _, turns in sorted_builds[:top_5_count]])
-            top_10_median = statistics.median([turns for _, _, turns in sorted_builds[:top_10_count]])
-            top_20_median = statistics.median([turns for _, _, turns in sorted_builds[:top_20_count]])
-            top_50_median = statistics.median([turns for _, _, turns in sorted_builds[:top_50_count]])
+        if index.total > 0:
+            top_1_median = index.median(index.tier_count(0.01))
+            top_5_median = index.median(index.tier_count(0.05))
+            top_10_median = index.median(index.tier_count(0.10))
+            top_20_median = index.median(index.tier_count(0.20))
+            top_50_median = index.median(index.tier_count(0.50))
         else:
             top_1_median = top_5_median = top_10_median = top_20_median = top_50_median = 0
 
         # Generate reports
         self._generate_enhancement_ranking_report(
-            enhancement_stats, len(build_results), overall_median,
+            enhancement_stats, index.total, overall_median,
             top_50_median, top_20_median, top_10_median, top_5_median, top_1_median
         )
         self._generate_cost_analysis_report(
@@ -72,11 +77,11 @@ class ReporterV2:
             top_50_median, top_20_median, top_10_median, top_5_median, top_1_median
         )
         self._generate_performance_tier_analysis(
-            build_results, overall_median,
+            index, overall_median,
             top_50_median, top_20_median, top_10_median, top_5_median, top_1_median
         )
         self._generate_top_1000_builds_report(
-            build_results, overall_median
+            index, overall_median
         )
 
         # Generate balance assessment report if individual results provided
@@ -85,143 +90,56 @@ class ReporterV2:
 
         # Generate multi-tier reports (saturation and ranking)
         print(f"\n  Generating multi-tier reports...")
-        self._generate_enhancement_saturation_report(build_results, overall_median)
-        self._generate_enhancement_ranking_tiers_report(build_results, overall_median)
+        self._generate_enhancement_saturation_report(index, overall_median)
+        self._generate_enhancement_ranking_tiers_report(index, overall_median)
+        self._generate_enhancement_pair_synergy_report(index, overall_median)
 
         # Generate top N reports (attack type distribution and enhancement saturation)
         print(f"\n  Generating top N analysis reports...")
-        self._generate_top_n_attack_type_reports(build_results, overall_median)
-        self._generate_top_n_saturation_reports(build_results, overall_median)
-        self._generate_enhancement_saturation_summary(build_results, overall_median)
+        self._generate_top_n_attack_type_reports(index.results, overall_median)
+        self._generate_top_n_saturation_reports(index, overall_median)
+        self._generate_enhancement_saturation_summary(index, overall_median)
 
         print(f"\n  Reports saved to {self.reports_dir}")
 
     def _calculate_enhancement_stats(
         self,
-        build_results: List[Tuple],
+        index: ReportIndex,
         individual_results_dict: Dict[str, IndividualResult] = None
     ) -> List[Dict]:
-        """Calculate enhancement statistics from build results."""
-        # Track enhancement appearances
-        enhancement_data = {}  # enhancement_name -> list of (rank, avg_turns, attack_type)
-
-        for rank, (build, avg_dpt, avg_turns) in enumerate(build_results, 1):
-            # Handle both single and multi-attack builds
-            if isinstance(build, MultiAttackBuild):
-                # For MultiAttackBuilds, process each sub-build
-                builds_to_process = enumerate(build.builds)
-                # Get combat usage percentages from this build
-                usage_pct = build.get_attack_usage_percentages()
-            else:
-                builds_to_process = enumerate([build])
-                usage_pct = None
-
-            # Process all builds (either the single build or all sub-builds)
-            for build_idx, sub_build in builds_to_process:
-                attack_type = sub_build.attack_type
-
-                # Track upgrades
-                for upgrade in sub_build.upgrades:
-                    if upgrade not in enhancement_data:
-                        enhancement_data[upgrade] = {
-                            'type': 'upgrade',
-                            'cost': UPGRADES[upgrade].cost,
-                            'appearances': [],
-                            'attack_types': {},
-                            'attack_positions': {},  # Track which attack slot (0=Slot1, 1=Slot2)
-                            'combat_usage_total': {0: 0, 1: 0},  # Track actual combat usage
-                            'combat_usage_count': 0
-                        }
-                    enhancement_data[upgrade]['appearances'].append((rank, avg_turns))
-
-                    if attack_type not in enhancement_data[upgrade]['attack_types']:
-                        enhancement_data[upgrade]['attack_types'][attack_type] = []
-                    enhancement_data[upgrade]['attack_types'][attack_type].append(avg_turns)
-
-                    # Track attack position for multi-attack builds (which slot has it)
-                    if build_idx not in enhancement_data[upgrade]['attack_positions']:
-                        enhancement_data[upgrade]['attack_positions'][build_idx] = 0
-                    enhancement_data[upgrade]['attack_positions'][build_idx] += 1
-
-                    # Track combat usage (which attack was actually used)
-                    if usage_pct is not None:
-                        enhancement_data[upgrade]['combat_usage_total'][0] += usage_pct[0]
-                        enhancement_data[upgrade]['combat_usage_total'][1] += usage_pct[1]
-                        enhancement_data[upgrade]['combat_usage_count'] += 1
-
-                # Track limits
-                for limit in sub_build.limits:
-                    if limit not in enhancement_data:
-                        enhancement_data[limit] = {
-                            'type': 'limit',
-                            'cost': LIMITS[limit].cost,
-                            'appearances': [],
-                            'attack_types': {},
-                            'attack_positions': {},  # Track which attack slot (0=Slot1, 1=Slot2)
-                            'combat_usage_total': {0: 0, 1: 0},  # Track actual combat usage
-                            'combat_usage_count': 0
-                        }
-                    enhancement_data[limit]['appearances'].append((rank, avg_turns))
-
-                    if attack_type not in enhancement_data[limit]['attack_types']:
-                        enhancement_data[limit]['attack_types'][attack_type] = []
-                    enhancement_data[limit]['attack_types'][attack_type].append(avg_turns)
-
-                    # Track attack position for multi-attack builds (which slot has it)
-                    if build_idx not in enhancement_data[limit]['attack_positions']:
-                        enhancement_data[limit]['attack_positions'][build_idx] = 0
-                    enhancement_data[limit]['attack_positions'][build_idx] += 1
-
-                    # Track combat usage (which attack was actually used)
-                    if usage_pct is not None:
-                        enhancement_data[limit]['combat_usage_total'][0] += usage_pct[0]
-                        enhancement_data[limit]['combat_usage_total'][1] += usage_pct[1]
-                        enhancement_data[limit]['combat_usage_count'] += 1
-
+        """Calculate enhancement statistics from the indexed build results."""
         # Calculate statistics
-        all_turns = [avg_turns for _, _, avg_turns in build_results]
-        median_turns = statistics.median(all_turns) if all_turns else 0
+        median_turns = index.median()
 
         enhancement_stats = []
-        for name, data in enhancement_data.items():
-            appearances = data['appearances']
-            turns_values = [turns for _, turns in appearances]
+        for name, data in index.enhancements.items():
+            # Occurrences are in rank order, so their turns are already sorted
+            turns_values = data.turns
 
             # Overall statistics
-            avg_turns = statistics.mean(turns_values)
+            avg_turns = exact_mean(turns_values)
             vs_median = avg_turns - median_turns
 
             # Top 0.02%, Top 0.05%, Top 0.2%, Top 0.5%, Top 1%, Top 5%, Top 10%, Top 20%, and Top 50% statistics
-            sorted_appearances = sorted(appearances, key=lambda x: x[0])  # Sort by rank
-            top_0_02_count = max(1, len(sorted_appearances) // 5000)  # Top 0.02%
-            top_0_05_count = max(1, len(sorted_appearances) // 2000)  # Top 0.05%
-            top_0_2_count = max(1, len(sorted_appearances) // 500)   # Top 0.2%
-            top_0_5_count = max(1, len(sorted_appearances) // 200)   # Top 0.5%
-            top_1_count = max(1, len(sorted_appearances) // 100)
-            top_5_count = max(1, len(sorted_appearances) // 20)
-            top_10_count = max(1, len(sorted_appearances) // 10)
-            top_20_count = max(1, len(sorted_appearances) // 5)
-            top_50_count = max(1, len(sorted_appearances) // 2)
-
-            top_0_02_turns = [turns for _, turns in sorted_appearances[:top_0_02_count]]
-            top_0_05_turns = [turns for _, turns in sorted_appearances[:top_0_05_count]]
-            top_0_2_turns = [turns for _, turns in sorted_appearances[:top_0_2_count]]
-            top_0_5_turns = [turns for _, turns in sorted_appearances[:top_0_5_count]]
-            top_1_turns = [turns for _, turns in sorted_appearances[:top_1_count]]
-            top_5_turns = [turns for _, turns in sorted_appearances[:top_5_count]]
-            top_10_turns = [turns for _, turns in sorted_appearances[:top_10_count]]
-            top_20_turns = [turns for _, turns in sorted_appearances[:top_20_count]]
-            top_50_turns = [turns for _, turns in sorted_appearances[:top_50_count]]
-
-            median_top_0_02 = statistics.median(top_0_02_turns) if top_0_02_turns else 0
-            median_top_0_05 = statistics.median(top_0_05_turns) if top_0_05_turns else 0
-            median_top_0_2 = statistics.median(top_0_2_turns) if top_0_2_turns else 0
-            median_top_0_5 = statistics.median(top_0_5_turns) if top_0_5_turns else 0
-            median_top_1 = statistics.median(top_1_turns) if top_1_turns else 0
-            median_top_5 = statistics.median(top_5_turns) if top_5_turns else 0
-            median_top_10 = statistics.median(top_10_turns) if top_10_turns else 0
-            median_top_20 = statistics.median(top_20_turns) if top_20_turns else 0
-            median_top_50 = statistics.median(top_50_turns) if top_50_turns else 0
+            top_0_02_count = max(1, data.appearances // 5000)  # Top 0.02%
+            top_0_05_count = max(1, data.appearances // 2000)  # Top 0.05%
+            top_0_2_count = max(1, data.appearances // 500)   # Top 0.2%
+            top_0_5_count = max(1, data.appearances // 200)   # Top 0.5%
+            top_1_count = max(1, data.appearances // 100)
+            top_5_count = max(1, data.appearances // 20)
+            top_10_count = max(1, data.appearances // 10)
+            top_20_count = max(1, data.appearances // 5)
+            top_50_count = max(1, data.appearances // 2)
+
+            median_top_0_02 = sorted_median(turns_values[:top_0_02_count])
+            median_top_0_05 = sorted_median(turns_values[:top_0_05_count])
+            median_top_0_2 = sorted_median(turns_values[:top_0_2_count])
+            median_top_0_5 = sorted_median(turns_values[:top_0_5_count])
+            median_top_1 = sorted_median(turns_values[:top_1_count])
+            median_top_5 = sorted_median(turns_values[:top_5_count])
+            median_top_10 = sorted_median(turns_values[:top_10_count])
+            median_top_20 = sorted_median(turns_values[:top_20_count])
+            median_top_50 = sorted_median(turns_values[:top_50_count])
 
             top0_02_vs_median = median_top_0_02 - median_turns
             top0_05_vs_median = median_top_0_05 - median_turns
@@ -233,7 +151,7 @@ class ReporterV2:
             top20_vs_median = median_top_20 - median_turns
             top50_vs_median = median_top_50 - median_turns
 
-            cost = data['cost']
+            cost = data.cost
             top0_02_efficiency = top0_02_vs_median / cost if cost > 0 else 0
             top0_05_efficiency = top0_05_vs_median / cost if cost > 0 else 0
             top0_2_efficiency = top0_2_vs_median / cost if cost > 0 else 0
@@ -247,42 +165,39 @@ class ReporterV2:
             # Attack type breakdown
             attack_type_turns = {}
             for attack_type in ['melee_ac', 'melee_dg', 'ranged', 'area', 'direct_damage']:
-                if attack_type in data['attack_types']:
-                    attack_type_turns[attack_type] = statistics.mean(data['attack_types'][attack_type])
+                if attack_type in data.attack_type_turns:
+                    attack_type_turns[attack_type] = exact_mean(data.attack_type_turns[attack_type])
                 else:
                     attack_type_turns[attack_type] = 0
 
             # Calculate build slot percentages (which slot contains the enhancement)
-            attack_positions = data.get('attack_positions', {})
-            total_attack_uses = sum(attack_positions.values())
+            total_attack_uses = data.appearances
             slot1_pct = 0
             slot2_pct = 0
             if total_attack_uses > 0:
-                slot1_pct = int((attack_positions.get(0, 0) / total_attack_uses) * 100)
-                slot2_pct = int((attack_positions.get(1, 0) / total_attack_uses) * 100)
-
-            # Calculate combat usage percentages (which attack was actually used)
-            combat_usage_count = data.get('combat_usage_count', 0)
-            combat_usage_total = data.get('combat_usage_total', {0: 0, 1: 0})
-            used1_pct = 0
-            used2_pct = 0
-            if combat_usage_count > 0:
-                used1_pct = int(combat_usage_total[0] / combat_usage_count)
-                used2_pct = int(combat_usage_total[1] / combat_usage_count)
+                slot1_pct = int((len(data.slot_ranks.get(0, ())) / total_attack_uses) * 100)
+                slot2_pct = int((len(data.slot_ranks.get(1, ())) / total_attack_uses) * 100)
+
+            # Calculate combat usage percentages (which attack was actually used; None without usage data)
+            used1_pct = None
+            used2_pct = None
+            if data.usage_count > 0:
+                used1_pct = int(data.usage_totals[0] / data.usage_count)
+                used2_pct = int(data.usage_totals[1] / data.usage_count)
 
             # === NEW BALANCE METRICS ===
 
             # 1. Median Rank Percentile (0-100, where 0=best, 100=worst)
             # Only consider top 50% of builds for median rank calculation
-            total_builds = len(build_results)
-            top_50_count_global = max(1, int(total_builds * 0.50))
-            top_50_ranks = [rank for rank, _ in appearances if rank <= top_50_count_global]
-            median_rank_val = statistics.median(top_50_ranks) if top_50_ranks else None
+            total_builds = index.total
+            top_50_count_global = index.tier_count(0.50)
+            top_50_ranks = data.ranks[:data.count(top_50_count_global)]
+            median_rank_val = sorted_median(top_50_ranks) if len(top_50_ranks) else None
             median_rank_percentile = (median_rank_val / total_builds) * 100 if median_rank_val else 100
 
             # 2. Top 10% Saturation (% of top 10% builds that contain this enhancement)
-            top_10_count_global = max(1, int(total_builds * 0.10))
-            appearances_in_top_10 = len([r for r, _ in sorted_appearances if r <= top_10_count_global])
+            top_10_count_global = index.tier_count(0.10)
+            appearances_in_top_10 = data.count(top_10_count_global)
             top_10_saturation = (appearances_in_top_10 / top_10_count_global) * 100 if top_10_count_global > 0 else 0
 
             # 3. Synergy Dependence Score (Top 50% builds only)
@@ -290,11 +205,10 @@ class ReporterV2:
             synergy_score = 0.0
             if individual_results_dict and name in individual_results_dict:
                 # Get top 50% builds with this enhancement (by global rank, not local)
-                top_50_count_global = max(1, int(total_builds * 0.50))
-                top_50_appearances = [turns for rank, turns in sorted_appearances if rank <= top_50_count_global]
+                top_50_appearances = data.turns_in(top_50_count_global)
 
-                if top_50_appearances:
-                    top_50_avg_turns = statistics.mean(top_50_appearances)
+                if len(top_50_appearances):
+                    top_50_avg_turns = exact_mean(top_50_appearances)
                     individual_avg_turns = individual_results_dict[name].avg_turns
 
                     # Calculate synergy: negative = better in builds, positive = worse in builds
@@ -318,7 +232,7 @@ class ReporterV2:
 
             enhancement_stats.append({
                 'name': name,
-                'type': data['type'],
+                'type': data.type,
                 'cost': cost,
                 'avg_turns': avg_turns,
                 'vs_median': vs_median,
@@ -349,7 +263,7 @@ class ReporterV2:
                 'median_top_50': median_top_50,
                 'top50_vs_median': top50_vs_median,
                 'top50_efficiency': top50_efficiency,
-                'appearances': len(appearances),
+                'appearances': data.appearances,
                 'median_rank': median_rank_val if median_rank_val else 0,  # Already calculated above using top 50%
                 'slot1_pct': slot1_pct,
                 'slot2_pct': slot2_pct,
@@ -369,83 +283,50 @@ class ReporterV2:
 
         return enhancement_stats
 
-    def _get_enhancement_set(self, build) -> frozenset:
-        """Extract all enhancements (upgrades + limits) from a build as a frozenset."""
-        enhancements = []
-
-        if isinstance(build, MultiAttackBuild):
-            # For multi-attack builds, collect enhancements from all sub-builds
-            for sub_build in build.builds:
-                enhancements.extend(sub_build.upgrades)
-                enhancements.extend(sub_build.limits)
-        else:
-            # For single attack builds
-            enhancements.extend(build.upgrades)
-            enhancements.extend(build.limits)
-
-        return frozenset(enhancements)
-
-    def _calculate_synergy_concentration(self, top_builds: List[Tuple], enhancement_name: str) -> float:
-        """Calculate what % of top builds contain the 2-3 most common co-occurring enhancements.
+    def _calculate_synergy_concentration(self, membership: MembershipMatrix, enhancement_name: str, top: int) -> float:
+        """Calculate what % of top builds with an enhancement contain one of its 3 most common partners.
 
         Instead of looking for exact matching sets, this counts individual enhancement
-        co-occurrences and finds the most common partners.
+        co-occurrences (one bitwise AND per partner column) and finds the most common partners.
 
         Args:
-            top_builds: List of (rank, build, avg_turns) tuples
+            membership: Build x enhancement membership of the ranked builds
             enhancement_name: Name of enhancement to analyze
+            top: Number of top-ranked builds to analyze
 
         Returns:
-            Percentage (0-100) of top builds containing at least one of the top 2-3 partner enhancements
+            Percentage (0-100) of the top builds containing the enhancement that also contain at
+            least one of its top 3 partner enhancements
         """
-        if not top_builds:
+        builds_with_enhancement = membership.count(enhancement_name, top)
+        if not builds_with_enhancement:
             return 0.0
 
         # Count individual enhancement co-occurrences
-        partner_counts = {}
-        for _, build, _ in top_builds:
-            full_set = self._get_enhancement_set(build)
-            # Count each other enhancement that appears with the target
-            for other_enhancement in full_set:
-                if other_enhancement != enhancement_name:
-                    partner_counts[other_enhancement] = partner_counts.get(other_enhancement, 0) + 1
-
-        if not partner_counts:
-            return 0.0
+        partner_counts = membership.partner_counts(enhancement_name, top)
+        partner_counts[membership.columns[enhancement_name]] = 0
 
-        # Find top 2-3 most common partner enhancements
-        sorted_partners = sorted(partner_counts.items(), key=lambda x: x[1], reverse=True)
-        top_partners = [name for name, _ in sorted_partners[:3]]  # Top 3 partners
+        # Find top 3 most common partner enhancements
+        top_partners = [membership.names[column] for column in np.argsort(-partner_counts, kind='stable')[:3]
+                        if partner_counts[column]]
+        if not top_partners:
+            return 0.0
 
         # Calculate % of builds containing at least one of these top partners
-        builds_with_top_partners = 0
-        for _, build, _ in top_builds:
-            full_set = self._get_enhancement_set(build)
-            if any(partner in full_set for partner in top_partners):
-                builds_with_top_partners += 1
+        builds_with_top_partners = membership.count_any(top_partners, top, within=enhancement_name)
+        return (builds_with_top_partners / builds_with_enhancement) * 100
 
-        concentration_pct = (builds_with_top_partners / len(top_builds)) * 100 if top_builds else 0.0
-
-        return concentration_pct
-
-    def _calculate_diversity_index(self, builds: List[Tuple]) -> int:
-        """Count unique enhancement combinations in the given builds.
+    def _calculate_diversity_index(self, index: ReportIndex, top: int) -> int:
+        """Count unique enhancement combinations in the top builds.
 
         Args:
-            builds: List of (rank, build, avg_turns) tuples
+            index: Indexed build results
+            top: Number of top-ranked builds to analyze
 
         Returns:
             Count of unique enhancement sets
         """
-        if not builds:
-            return 0
-
-        unique_sets = set()
-        for _, build, _ in builds:
-            enhancement_set = self._get_enhancement_set(build)
-            unique_sets.add(enhancement_set)
-
-        return len(unique_sets)
+        return index.unique_sets(0, min(top, index.total))
 
     def _generate_enhancement_ranking_report(
         self,
@@ -528,7 +409,11 @@ class ReporterV2:
                 # Add build slot and combat usage columns for multi-attack archetypes
                 if has_multi_attack:
                     if stats.get('has_multi_attack', False):
-                        row += f"{stats['slot1_pct']}% | {stats['slot2_pct']}% | {stats['used1_pct']}% | {stats['used2_pct']}% | "
+                        row += f"{stats['slot1_pct']}% | {stats['slot2_pct']}% | "
+                        if stats['used1_pct'] is not None:
+                            row += f"{stats['used1_pct']}% | {stats['used2_pct']}% | "
+                        else:
+                            row += "- | - | "
                     else:
                         row += "- | - | - | - | "
 
@@ -707,7 +592,7 @@ class ReporterV2:
 
     def _generate_performance_tier_analysis(
         self,
-        build_results: List[Tuple],
+        index: ReportIndex,
         overall_median: float,
         top_50_median: float,
         top_20_median: float,
@@ -718,7 +603,7 @@ class ReporterV2:
         """Generate performance tier analysis report showing build distribution and enhancement representation.
 
         Args:
-            build_results: List of (build, avg_dpt, avg_turns) tuples
+            index: ReportIndex of the build results
             overall_median: Median turns across all builds
             top_50_median: Median turns for top 50% of builds
             top_20_median: Median turns for top 20% of builds
@@ -728,58 +613,53 @@ class ReporterV2:
         """
         report_path = os.path.join(self.reports_dir, f'performance_tier_analysis_{self.archetype}.md')
 
-        # Sort builds by performance (ascending = better)
-        sorted_builds = sorted(build_results, key=lambda x: x[2])
-        total_builds = len(sorted_builds)
+        # Builds are indexed by performance (ascending = better)
+        total_builds = index.total
 
         # Calculate tier boundaries
-        top_5_count = max(1, int(total_builds * 0.05))
-        top_10_count = max(1, int(total_builds * 0.10))
-        top_20_count = max(1, int(total_builds * 0.20))
-        top_50_count = max(1, int(total_builds * 0.50))
+        top_5_count = index.tier_count(0.05)
+        top_10_count = index.tier_count(0.10)
+        top_20_count = index.tier_count(0.20)
+        top_50_count = index.tier_count(0.50)
 
-        # Extract tier builds
+        # Tier rank ranges (builds ranked start+1..stop)
         tiers = {
-            'Top 5%': sorted_builds[:top_5_count],
-            'Top 10%': sorted_builds[:top_10_count],
-            'Top 20%': sorted_builds[:top_20_count],
-            'Top 50%': sorted_builds[:top_50_count],
-            'Bottom 50%': sorted_builds[top_50_count:]
+            'Top 5%': (0, min(top_5_count, total_builds)),
+            'Top 10%': (0, min(top_10_count, total_builds)),
+            'Top 20%': (0, min(top_20_count, total_builds)),
+            'Top 50%': (0, min(top_50_count, total_builds)),
+            'Bottom 50%': (min(top_50_count, total_builds), total_builds)
         }
 
         # Calculate tier statistics
         tier_stats = {}
-        for tier_name, tier_builds in tiers.items():
-            turns_values = [turns for _, _, turns in tier_builds]
-            median_turns = statistics.median(turns_values) if turns_values else 0
-            std_dev = statistics.stdev(turns_values) if len(turns_values) >= 2 else 0
+        for tier_name, (start, stop) in tiers.items():
+            turns_values = index.turns[start:stop]
+            median_turns = sorted_median(turns_values) if len(turns_values) else 0
+            std_dev = float(np.std(turns_values, ddof=1)) if len(turns_values) >= 2 else 0
             vs_overall = median_turns - overall_median
-            unique_builds = len(set(self._get_enhancement_set(build) for build, _, _ in tier_builds))
+            unique_builds = index.unique_sets(start, stop)
 
             tier_stats[tier_name] = {
                 'median': median_turns,
                 'std_dev': std_dev,
                 'vs_overall': vs_overall,
                 'unique_builds': unique_builds,
-                'total_builds': len(tier_builds)
+                'total_builds': stop - start
             }
 
         # Calculate skill expression (performance gap)
         skill_expression = tier_stats['Bottom 50%']['median'] - tier_stats['Top 5%']['median']
 
-        # Track enhancement representation in each tier
+        # Track enhancement representation in each tier (builds containing it, counted once per build)
         enhancement_tier_data = {}
 
-        for tier_name, tier_builds in tiers.items():
-            # Count enhancement appearances in this tier
-            enhancement_counts = {}
-            for build, _, _ in tier_builds:
-                enhancement_set = self._get_enhancement_set(build)
-                for enhancement in enhancement_set:
-                    enhancement_counts[enhancement] = enhancement_counts.get(enhancement, 0) + 1
+        for tier_name, (start, stop) in tiers.items():
+            tier_counts = index.membership.counts(stop) - index.membership.counts(start)
+            for enhancement, count in zip(index.membership.names, tier_counts.tolist()):
+                if not count:
+                    continue
 
-            # Store representation data
-            for enhancement, count in enhancement_counts.items():
                 if enhancement not in enhancement_tier_data:
                     enhancement_tier_data[enhancement] = {
                         'name': enhancement,
@@ -789,7 +669,7 @@ class ReporterV2:
                     }
 
                 enhancement_tier_data[enhancement]['tier_counts'][tier_name] = count
-                enhancement_tier_data[enhancement]['tier_percentages'][tier_name] = (count / len(tier_builds)) * 100
+                enhancement_tier_data[enhancement]['tier_percentages'][tier_name] = (count / (stop - start)) * 100
 
         # Calculate tier preference ratios and identify noob traps/elite picks
         enhancement_analysis = []
@@ -826,26 +706,9 @@ class ReporterV2:
         enhancement_analysis.sort(key=lambda x: x['tier_ratio'], reverse=True)
 
         # Find dominant build archetypes (common 2-3 enhancement combinations)
-        def find_common_combinations(tier_builds, top_n=10):
-            """Find most common 2-3 enhancement combinations in a tier."""
-            from collections import Counter
-            from itertools import combinations
-
-            combo_counts = Counter()
-            for build, _, _ in tier_builds:
-                enhancement_set = self._get_enhancement_set(build)
-                # Generate all 2-enhancement and 3-enhancement combinations
-                for size in [2, 3]:
-                    if len(enhancement_set) >= size:
-                        for combo in combinations(sorted(enhancement_set), size):
-                            combo_counts[combo] += 1
-
-            # Get top N combinations
-            return combo_counts.most_common(top_n)
-
         tier_archetypes = {}
         for tier_name in ['Top 5%', 'Top 10%', 'Top 20%']:
-            tier_archetypes[tier_name] = find_common_combinations(tiers[tier_name], top_n=10)
+            tier_archetypes[tier_name] = index.combination_counts(tiers[tier_name][1]).most_common(10)
 
         # Write report
         with open(report_path, 'w', encoding='utf-8') as f:
@@ -1115,20 +978,24 @@ class ReporterV2:
 
     def _generate_top_1000_builds_report(
         self,
-        build_results: List[Tuple],
+        index: ReportIndex,
         overall_median: float
     ):
         """Generate top 1000 builds report showing ranked list of best builds.
 
         Args:
-            build_results: List of (build, avg_dpt, avg_turns) tuples, already sorted by performance
+            index: ReportIndex of the build results
             overall_median: Median turns across all builds
         """
         report_path = os.path.join(self.reports_dir, f'top_1000_builds_{self.archetype}.md')
 
-        # Deduplicate builds - keep best performance for each unique build
+        # Deduplicate builds - keep best performance for each unique build.
+        # Results are read in rank order, so the first 1000 unique builds are the top 1000.
         seen_builds = {}
-        for build, avg_dpt, avg_turns in build_results:
+        for build, avg_dpt, avg_turns in index.results:
+            if len(seen_builds) == 1000:
+                break
+
             # Create a hashable key for the build
             if isinstance(build, MultiAttackBuild):
                 # For multi-attack, hash all sub-builds
@@ -1150,7 +1017,7 @@ class ReporterV2:
         # Take top 1000 builds (or all if less than 1000)
         top_builds = deduplicated_results[:1000]
         total_analyzed = len(top_builds)
-        total_before_dedup = len(build_results[:1000]) if len(build_results) >= 1000 else len(build_results)
+        total_before_dedup = min(1000, index.total)
         duplicates_removed = total_before_dedup - total_analyzed
 
         # Calculate statistics
@@ -1739,7 +1606,7 @@ class ReporterV2:
 
     def _generate_enhancement_saturation_report(
         self,
-        build_results: List[Tuple],
+        index: ReportIndex,
         overall_median: float
     ):
         """Generate multi-tier enhancement saturation reports (Top 50%, 20%, 5%, 1%, 0.5%, 0.2%, 0.1%, 0.05%, 0.02%, 0.01%).
@@ -1748,11 +1615,9 @@ class ReporterV2:
         Counts each enhancement once per build (no double-counting).
 
         Args:
-            build_results: List of (build, avg_dpt, avg_turns) tuples, already sorted by performance
+            index: ReportIndex of the build results
             overall_median: Median turns across all builds
         """
-        from collections import defaultdict
-
         # Define tier thresholds
         tiers = {
             'top_50': (0.50, 'Top 50%'),
@@ -1768,54 +1633,24 @@ class ReporterV2:
         }
 
         for tier_key, (threshold, tier_name) in tiers.items():
-            tier_count = max(1, int(len(build_results) * threshold))
-            tier_results = build_results[:tier_count]
+            tier_count = index.tier_count(threshold)
+            tier_size = min(tier_count, index.total)
 
-            # Track enhancement appearances
-            enhancement_counts = defaultdict(int)
+            # Builds in the tier containing each enhancement (counted once per build)
+            enhancement_counts = {}
             enhancement_types = {}
             enhancement_costs = {}
-
-            for build, _, _ in tier_results:
-                # Track unique enhancements per build (avoid double counting)
-                enhancements_in_build = set()
-
-                if isinstance(build, MultiAttackBuild):
-                    # Process each sub-build
-                    for sub_build in build.builds:
-                        for upgrade in sub_build.upgrades:
-                            enhancements_in_build.add(upgrade)
-                            if upgrade not in enhancement_types:
-                                enhancement_types[upgrade] = 'upgrade'
-                                enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                        for limit in sub_build.limits:
-                            enhancements_in_build.add(limit)
-                            if limit not in enhancement_types:
-                                enhancement_types[limit] = 'limit'
-                                enhancement_costs[limit] = LIMITS[limit].cost
-                else:
-                    # Single attack build
-                    for upgrade in build.upgrades:
-                        enhancements_in_build.add(upgrade)
-                        if upgrade not in enhancement_types:
-                            enhancement_types[upgrade] = 'upgrade'
-                            enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                    for limit in build.limits:
-                        enhancements_in_build.add(limit)
-                        if limit not in enhancement_types:
-                            enhancement_types[limit] = 'limit'
-                            enhancement_costs[limit] = LIMITS[limit].cost
-
-                # Count each unique enhancement once per build
-                for enh in enhancements_in_build:
-                    enhancement_counts[enh] += 1
+            for name, count in zip(index.membership.names, index.membership.counts(tier_count).tolist()):
+                if count:
+                    occurrences = index.enhancements[name]
+                    enhancement_counts[name] = count
+                    enhancement_types[name] = occurrences.type
+                    enhancement_costs[name] = occurrences.cost
 
             # Calculate saturation rates
             saturation_data = []
             for name, count in enhancement_counts.items():
-                saturation_rate = (count / len(tier_results)) * 100
+                saturation_rate = (count / tier_size) * 100
 
                 saturation_data.append({
                     'name': name,
@@ -1836,7 +1671,7 @@ class ReporterV2:
 
                 # Summary
                 f.write("## Summary\n\n")
-                f.write(f"- **Tier**: {tier_name} of all builds ({len(tier_results):,} builds)\n")
+                f.write(f"- **Tier**: {tier_name} of all builds ({tier_size:,} builds)\n")
                 f.write(f"- **Unique enhancements found**: {len(saturation_data)}\n")
                 if saturation_data:
                     f.write(f"- **Average saturation rate**: {statistics.mean([d['saturation_rate'] for d in saturation_data]):.1f}%\n")
@@ -1923,7 +1758,7 @@ class ReporterV2:
 
     def _generate_enhancement_ranking_tiers_report(
         self,
-        build_results: List[Tuple],
+        index: ReportIndex,
         overall_median: float
     ):
         """Generate multi-tier enhancement ranking reports with detailed performance metrics.
@@ -1932,11 +1767,9 @@ class ReporterV2:
         Includes slot positions, usage percentages, and attack type breakdowns.
 
         Args:
-            build_results: List of (build, avg_dpt, avg_turns) tuples, already sorted by performance
+            index: ReportIndex of the build results
             overall_median: Median turns across all builds
         """
-        from collections import defaultdict
-
         # Define tier thresholds
         tiers = {
             'top_50': (0.50, 'Top 50%'),
@@ -1952,58 +1785,20 @@ class ReporterV2:
         }
 
         for tier_key, (threshold, tier_name) in tiers.items():
-            tier_count = max(1, int(len(build_results) * threshold))
-            tier_results = build_results[:tier_count]
+            tier_count = index.tier_count(threshold)
+            tier_size = min(tier_count, index.total)
 
             # Calculate tier median
-            tier_turns = [avg_turns for _, _, avg_turns in tier_results]
-            tier_median = statistics.median(tier_turns)
-
-            # Track enhancement statistics
-            enhancement_data = defaultdict(lambda: {
-                'appearances': 0,
-                'total_turns': 0,
-                'slot_positions': defaultdict(int),  # Which attack slot (0, 1, 2, etc.)
-                'by_attack_type': defaultdict(list),
-            })
-
-            # Collect enhancement statistics
-            for build, _, avg_turns in tier_results:
-                if isinstance(build, MultiAttackBuild):
-                    # Process each sub-build
-                    for slot_idx, sub_build in enumerate(build.builds):
-                        for upgrade in sub_build.upgrades:
-                            enhancement_data[upgrade]['appearances'] += 1
-                            enhancement_data[upgrade]['total_turns'] += avg_turns
-                            enhancement_data[upgrade]['slot_positions'][slot_idx] += 1
-                            enhancement_data[upgrade]['by_attack_type'][sub_build.attack_type].append(avg_turns)
-
-                        for limit in sub_build.limits:
-                            enhancement_data[limit]['appearances'] += 1
-                            enhancement_data[limit]['total_turns'] += avg_turns
-                            enhancement_data[limit]['slot_positions'][slot_idx] += 1
-                            enhancement_data[limit]['by_attack_type'][sub_build.attack_type].append(avg_turns)
-                else:
-                    # Single attack build - always slot 0
-                    for upgrade in build.upgrades:
-                        enhancement_data[upgrade]['appearances'] += 1
-                        enhancement_data[upgrade]['total_turns'] += avg_turns
-                        enhancement_data[upgrade]['slot_positions'][0] += 1
-                        enhancement_data[upgrade]['by_attack_type'][build.attack_type].append(avg_turns)
-
-                    for limit in build.limits:
-                        enhancement_data[limit]['appearances'] += 1
-                        enhancement_data[limit]['total_turns'] += avg_turns
-                        enhancement_data[limit]['slot_positions'][0] += 1
-                        enhancement_data[limit]['by_attack_type'][build.attack_type].append(avg_turns)
+            tier_median = sorted_median(index.turns[:tier_count])
 
             # Calculate statistics for each enhancement
             enhancement_stats = []
-            for name, data in enhancement_data.items():
-                if data['appearances'] == 0:
+            for name, data in index.enhancements.items():
+                appearances = data.count(tier_count)
+                if appearances == 0:
                     continue
 
-                avg_turns = data['total_turns'] / data['appearances']
+                avg_turns = data.turns_sum(tier_count) / appearances
                 vs_median = avg_turns - tier_median
 
                 # Determine type and cost
@@ -2019,20 +1814,21 @@ class ReporterV2:
                 efficiency = vs_median / cost if cost > 0 else 0
 
                 # Calculate slot percentages
-                slot_positions = data['slot_positions']
+                slot_positions = {slot: data.slot_count(slot, tier_count) for slot in data.slot_ranks}
                 total_slot_appearances = sum(slot_positions.values())
                 slot1_pct = (slot_positions.get(0, 0) / total_slot_appearances * 100) if total_slot_appearances > 0 else 0
                 slot2_pct = (slot_positions.get(1, 0) / total_slot_appearances * 100) if total_slot_appearances > 0 else 0
                 slot3_pct = (slot_positions.get(2, 0) / total_slot_appearances * 100) if total_slot_appearances > 0 else 0
 
                 # Calculate appearance rate (% of builds in tier)
-                appearance_rate = (data['appearances'] / len(tier_results)) * 100
+                appearance_rate = (appearances / tier_size) * 100
 
                 # Attack type breakdown (average turns when paired with each attack type)
                 attack_type_turns = {}
                 for attack_type in ['melee_ac', 'melee_dg', 'ranged', 'area', 'direct_damage']:
-                    if attack_type in data['by_attack_type']:
-                        attack_type_turns[attack_type] = statistics.mean(data['by_attack_type'][attack_type])
+                    attack_type_values = data.attack_type_turns_in(attack_type, tier_count)
+                    if len(attack_type_values):
+                        attack_type_turns[attack_type] = exact_mean(attack_type_values)
                     else:
                         attack_type_turns[attack_type] = None
 
@@ -2040,7 +1836,7 @@ class ReporterV2:
                     'name': name,
                     'type': enh_type,
                     'cost': cost,
-                    'appearances': data['appearances'],
+                    'appearances': appearances,
                     'appearance_rate': appearance_rate,
                     'avg_turns': avg_turns,
                     'vs_median': vs_median,
@@ -2048,7 +1844,7 @@ class ReporterV2:
                     'slot1_pct': slot1_pct,
                     'slot2_pct': slot2_pct,
                     'slot3_pct': slot3_pct,
-                    'has_multi_slots': total_slot_appearances > data['appearances'],  # Appears in multiple slots
+                    'has_multi_slots': total_slot_appearances > appearances,  # Appears in multiple slots
                     **attack_type_turns
                 })
 
@@ -2063,7 +1859,7 @@ class ReporterV2:
 
                 # Summary
                 f.write("## Summary\n\n")
-                f.write(f"- **Tier**: {tier_name} of all builds ({len(tier_results):,} builds)\n")
+                f.write(f"- **Tier**: {tier_name} of all builds ({tier_size:,} builds)\n")
                 f.write(f"- **Tier Median**: {tier_median:.2f} turns\n")
                 f.write(f"- **Overall Median**: {overall_median:.2f} turns\n")
                 f.write(f"- **Unique enhancements**: {len(enhancement_stats)}\n\n")
@@ -2160,6 +1956,120 @@ class ReporterV2:
 
             print(f"  + {tier_name} ranking report: enhancement_ranking_{tier_key}.md")
 
+    def _generate_enhancement_pair_synergy_report(
+        self,
+        index: ReportIndex,
+        overall_median: float
+    ):
+        """Generate the enhancement pair synergy report (Top 1%, Top 10% and all builds).
+
+        Pair counts come from the bit-packed build x enhancement membership matrix
+        (co-occurrence = M^T M over the top rows), so every pair is counted over the
+        entire run rather than a sample of builds. Lift compares how often a pair
+        appears with how often it would if the two enhancements were independent.
+
+        Args:
+            index: ReportIndex of the build results
+            overall_median: Median turns across all builds
+        """
+        membership = index.membership
+        cuts = [
+            ('Top 1%', index.tier_count(0.01)),
+            ('Top 10%', index.tier_count(0.10)),
+            ('All Builds', index.total)
+        ]
+
+        report_path = os.path.join(self.reports_dir, f'enhancement_pair_synergy_{self.archetype}.md')
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {self.archetype.upper()} - Enhancement Pair Synergy Report\n\n")
+            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+            # Summary
+            f.write("## Summary\n\n")
+            f.write(f"- **Total Builds**: {index.total:,}\n")
+            f.write(f"- **Enhancements**: {len(membership.names)}\n")
+            f.write(f"- **Overall Median Turns**: {overall_median:.2f}\n\n")
+
+            f.write("| Cut | Builds | Unique Enhancement Sets | Median Turns |\n")
+            f.write("|-----|--------|-------------------------|--------------|\n")
+            for cut_name, top in cuts:
+                if top:
+                    f.write(f"| {cut_name} | {top:,} | {self._calculate_diversity_index(index, top):,} | "
+                            f"{index.median(top):.2f} |\n")
+
+            # Methodology
+            f.write("\n## Methodology\n\n")
+            f.write("Each enhancement is counted once per build (all attacks of multi-attack builds).\n\n")
+            f.write("**Key Metrics**:\n")
+            f.write("1. **Builds**: Number of builds in the cut containing both enhancements\n")
+            f.write("2. **Pair Rate**: % of builds in the cut containing both enhancements\n")
+            f.write("3. **Expected Rate**: Pair rate if the two enhancements appeared independently (rate A x rate B)\n")
+            f.write("4. **Lift**: Pair Rate / Expected Rate - above 1.0 means the pair is chosen together more than chance\n")
+            f.write("5. **Synergy Concentration**: % of builds with the enhancement that also contain one of its top 3 partners\n\n")
+            f.write(f"Pairs found in fewer than {MIN_PAIR_SUPPORT} builds of a cut are not ranked.\n")
+
+            for cut_name, top in cuts:
+                if not top:
+                    continue
+
+                co_occurrence = membership.co_occurrence(top)
+                counts = np.diagonal(co_occurrence)
+                first, second = np.triu_indices(len(membership.names), 1)
+                pair_counts = co_occurrence[first, second]
+                expected_rates = (counts[first] / top) * (counts[second] / top)
+
+                supported = pair_counts >= MIN_PAIR_SUPPORT
+                first, second = first[supported], second[supported]
+                pair_counts, expected_rates = pair_counts[supported], expected_rates[supported]
+                lifts = (pair_counts / top) / expected_rates
+
+                f.write(f"\n## {cut_name} ({top:,} builds)\n\n")
+
+                # Strongest and weakest pairs by lift
+                order = np.lexsort((-pair_counts, -lifts))
+                for title, ranked in (('Strongest Pairs (Highest Lift)', order[:20]),
+                                      ('Most Avoided Pairs (Lowest Lift)', order[::-1][:10])):
+                    f.write(f"### {title}\n\n")
+                    if not len(ranked):
+                        f.write("No pairs meet the minimum support.\n\n")
+                        continue
+                    f.write("| Rank | Enhancement A | Enhancement B | Builds | Pair Rate | Expected Rate | Lift |\n")
+                    f.write("|------|---------------|---------------|--------|-----------|---------------|------|\n")
+                    for rank, pair in enumerate(ranked, 1):
+                        f.write(
+                            f"| {rank} | {membership.names[first[pair]]} | {membership.names[second[pair]]} | "
+                            f"{pair_counts[pair]:,} | {pair_counts[pair] / top * 100:.1f}% | "
+                            f"{expected_rates[pair] * 100:.1f}% | {lifts[pair]:.2f} |\n"
+                        )
+                    f.write("\n")
+
+                # Most common partners of each enhancement
+                f.write("### Top Partners per Enhancement\n\n")
+                f.write("| Enhancement | Builds | Top Partners (% of its builds) | Synergy Concentration |\n")
+                f.write("|-------------|--------|--------------------------------|-----------------------|\n")
+                for column in np.argsort(-counts, kind='stable'):
+                    if not counts[column]:
+                        break
+                    partner_counts = co_occurrence[column].copy()
+                    partner_counts[column] = 0
+                    partners = [
+                        f"{membership.names[partner]} ({partner_counts[partner] / counts[column] * 100:.0f}%)"
+                        for partner in np.argsort(-partner_counts, kind='stable')[:3] if partner_counts[partner]
+                    ]
+                    concentration = self._calculate_synergy_concentration(membership, membership.names[column], top)
+                    f.write(
+                        f"| {membership.names[column]} | {counts[column]:,} | {', '.join(partners) or '—'} | "
+                        f"{concentration:.1f}% |\n"
+                    )
+
+            # Notes
+            f.write("\n## Notes\n\n")
+            f.write("- Lift is only meaningful with enough support; rare pairs are excluded from the rankings\n")
+            f.write("- Mutually exclusive enhancements never appear together and are not listed\n")
+            f.write("- Compare lift across cuts: pairs whose lift rises in the Top 1% are synergies that top builds rely on\n")
+
+        print(f"  + Enhancement pair synergy report: enhancement_pair_synergy_{self.archetype}.md")
+
     def _generate_top_n_attack_type_reports(
         self,
         build_results: List[Tuple],
@@ -2348,7 +2258,7 @@ class ReporterV2:
 
     def _generate_top_n_saturation_reports(
         self,
-        build_results: List[Tuple],
+        index: ReportIndex,
         overall_median: float,
         archetype_label: str = None
     ):
@@ -2359,120 +2269,25 @@ class ReporterV2:
         For dual_natured builds, only counts enhancements from primary attack (excludes fallback).
 
         Args:
-            build_results: List of (build, avg_dpt, avg_turns, [archetype]) tuples, already sorted by performance
+            index: Indexed build results
             overall_median: Median turns across all builds
             archetype_label: Optional label for combined reports (e.g., "COMBINED (FOCUSED + DUAL_NATURED)")
         """
-        from collections import defaultdict
-
         # Create top_n_analysis subdirectory
         top_n_dir = os.path.join(self.reports_dir, 'top_n_analysis')
         os.makedirs(top_n_dir, exist_ok=True)
 
-        # Define top N thresholds
-        thresholds = [10, 50, 100, 200, 500, 1000]
-
-        for n in thresholds:
+        for n in TOP_N_THRESHOLDS:
             # Skip if not enough builds
-            if len(build_results) < n:
-                print(f"  Skipping Top {n} saturation report (only {len(build_results)} builds)")
+            if index.total < n:
+                print(f"  Skipping Top {n} saturation report (only {index.total} builds)")
                 continue
 
-            top_n_results = build_results[:n]
-
-            # Track enhancement appearances and archetype distribution
-            enhancement_counts = defaultdict(int)
-            enhancement_types = {}
-            enhancement_costs = {}
-            enhancement_turns = defaultdict(list)
-            archetype_counts = defaultdict(int)  # Track builds by archetype
-            archetype_enhancement_counts = defaultdict(lambda: defaultdict(int))  # Track enhancements per archetype
-
-            for result in top_n_results:
-                # Handle both 3-tuple and 4-tuple formats (with/without archetype)
-                if len(result) == 4:
-                    build, _, avg_turns, source_archetype = result
-                elif len(result) == 3:
-                    build, _, avg_turns = result
-                    source_archetype = self.archetype if hasattr(self, 'archetype') else None
-                else:
-                    continue
-
-                # Track archetype if available
-                if source_archetype:
-                    archetype_counts[source_archetype] += 1
-
-                # Track unique enhancements per build (avoid double counting)
-                enhancements_in_build = set()
-
-                if isinstance(build, MultiAttackBuild):
-                    # For dual_natured builds, only count enhancements from primary attack (builds[0])
-                    if build.fallback_type:
-                        # Only process primary attack
-                        primary_build = build.builds[0]
-                        for upgrade in primary_build.upgrades:
-                            enhancements_in_build.add(upgrade)
-                            if upgrade not in enhancement_types:
-                                enhancement_types[upgrade] = 'upgrade'
-                                enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                        for limit in primary_build.limits:
-                            enhancements_in_build.add(limit)
-                            if limit not in enhancement_types:
-                                enhancement_types[limit] = 'limit'
-                                enhancement_costs[limit] = LIMITS[limit].cost
-                    else:
-                        # For other multi-attack builds (versatile_master), process all sub-builds
-                        for sub_build in build.builds:
-                            for upgrade in sub_build.upgrades:
-                                enhancements_in_build.add(upgrade)
-                                if upgrade not in enhancement_types:
-                                    enhancement_types[upgrade] = 'upgrade'
-                                    enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                            for limit in sub_build.limits:
-                                enhancements_in_build.add(limit)
-                                if limit not in enhancement_types:
-                                    enhancement_types[limit] = 'limit'
-                                    enhancement_costs[limit] = LIMITS[limit].cost
-                else:
-                    # Single attack build (focused)
-                    for upgrade in build.upgrades:
-                        enhancements_in_build.add(upgrade)
-                        if upgrade not in enhancement_types:
-                            enhancement_types[upgrade] = 'upgrade'
-                            enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                    for limit in build.limits:
-                        enhancements_in_build.add(limit)
-                        if limit not in enhancement_types:
-                            enhancement_types[limit] = 'limit'
-                            enhancement_costs[limit] = LIMITS[limit].cost
-
-                # Count each unique enhancement once per build
-                for enh in enhancements_in_build:
-                    enhancement_counts[enh] += 1
-                    enhancement_turns[enh].append(avg_turns)
-                    if source_archetype:
-                        archetype_enhancement_counts[source_archetype][enh] += 1
-
-            # Calculate saturation rates
-            saturation_data = []
-            for name, count in enhancement_counts.items():
-                saturation_rate = (count / n) * 100
-                avg_turns = statistics.mean(enhancement_turns[name])
-
-                saturation_data.append({
-                    'name': name,
-                    'type': enhancement_types[name],
-                    'cost': enhancement_costs[name],
-                    'appearances': count,
-                    'saturation_rate': saturation_rate,
-                    'avg_turns': avg_turns
-                })
-
-            # Sort by saturation rate (descending), then by avg_turns (ascending)
-            saturation_data.sort(key=lambda x: (-x['saturation_rate'], x['avg_turns']))
+            saturation_data, archetype_counts, archetype_enhancement_counts = self._top_n_enhancement_saturation(
+                {self.archetype: index}, {self.archetype: n}, n
+            )
+            enhancement_types = {data['name']: data['type'] for data in saturation_data}
+            enhancement_costs = {data['name']: data['cost'] for data in saturation_data}
 
             # Write report
             report_path = os.path.join(top_n_dir, f'enhancement_saturation_top{n}.md')
@@ -2608,6 +2423,77 @@ class ReporterV2:
 
             print(f"  + Top {n} enhancement saturation report: enhancement_saturation_top{n}.md")
 
+    def _stratified_counts(self, archetype_names, n: int) -> Dict[str, int]:
+        """Builds to take from each archetype for a stratified top N sample.
+
+        N/num_archetypes each; the remainder goes to the first archetypes in sorted
+        name order (deterministic).
+        """
+        archetype_names = sorted(archetype_names)
+        if not archetype_names:
+            return {}
+        per_archetype, remainder = divmod(n, len(archetype_names))
+        return {name: per_archetype + (1 if idx < remainder else 0) for idx, name in enumerate(archetype_names)}
+
+    def _top_n_enhancement_saturation(
+        self,
+        indexes: Dict[str, ReportIndex],
+        counts: Dict[str, int],
+        n: int
+    ) -> Tuple[List[Dict], Dict[str, int], Dict[str, Dict[str, int]]]:
+        """Enhancement saturation of the top counts[archetype] builds of each archetype.
+
+        Counts each enhancement once per build from the primary membership columns
+        (fallback attacks of dual_natured builds excluded), so any cut is a
+        cumulative count lookup rather than a pass over the builds.
+
+        Args:
+            indexes: Dict mapping archetype name -> indexed build results
+            counts: Dict mapping archetype name -> number of top builds taken from it
+            n: Builds in the sample (saturation rates are relative to n)
+
+        Returns:
+            (saturation_data sorted by saturation rate then avg turns,
+             builds per archetype, enhancement counts per archetype)
+        """
+        appearances = {}
+        turns = {}
+        occurrences = {}
+        archetype_counts = {}
+        archetype_enhancement_counts = {}
+
+        for archetype, index in indexes.items():
+            top = min(counts.get(archetype, 0), index.total)
+            if not top:
+                continue
+            archetype_counts[archetype] = top
+            archetype_enhancement_counts[archetype] = {}
+
+            membership = index.primary_membership
+            for name, count in zip(membership.names, membership.counts(top).tolist()):
+                if not count:
+                    continue
+                archetype_enhancement_counts[archetype][name] = count
+                appearances[name] = appearances.get(name, 0) + count
+                turns.setdefault(name, []).append(index.turns[membership.rows_in(name, top)])
+                occurrences.setdefault(name, index.enhancements[name])
+
+        saturation_data = []
+        for name, count in appearances.items():
+            saturation_data.append({
+                'name': name,
+                'type': occurrences[name].type,
+                'cost': occurrences[name].cost,
+                'appearances': count,
+                'saturation_rate': (count / n) * 100,
+                'avg_turns': exact_mean(np.concatenate(turns[name]))
+            })
+
+        # Sort by saturation rate (descending), then by avg_turns (ascending)
+        saturation_data.sort(key=lambda x: (-x['saturation_rate'], x['avg_turns']))
+
+        return saturation_data, archetype_counts, archetype_enhancement_counts
+
     def _stratified_sample_top_n(
         self,
         archetype_results: Dict[str, List[Tuple]],
@@ -2626,23 +2512,10 @@ class ReporterV2:
         Returns:
             List of (build, avg_dpt, avg_turns, archetype) tuples, sorted by avg_turns
         """
-        num_archetypes = len(archetype_results)
-        if num_archetypes == 0:
-            return []
-
-        # Calculate how many to take from each archetype
-        per_archetype = n // num_archetypes
-        remainder = n % num_archetypes
-
         stratified_results = []
-        archetype_names = sorted(archetype_results.keys())  # Sort for deterministic ordering
-
-        for idx, archetype_name in enumerate(archetype_names):
+        for archetype_name, count_from_this in self._stratified_counts(archetype_results, n).items():
             results = archetype_results[archetype_name]
 
-            # Give remainder to first archetypes (deterministic)
-            count_from_this = per_archetype + (1 if idx < remainder else 0)
-
             # Take top count_from_this results (already sorted by avg_turns)
             for build, avg_dpt, avg_turns in results[:count_from_this]:
                 stratified_results.append((build, avg_dpt, avg_turns, archetype_name))
@@ -2840,7 +2713,7 @@ class ReporterV2:
 
     def _generate_top_n_saturation_reports_stratified(
         self,
-        archetype_results: Dict[str, List[Tuple]],
+        archetype_indexes: Dict[str, ReportIndex],
         overall_median: float,
         archetype_label: str = None
     ):
@@ -2850,116 +2723,30 @@ class ReporterV2:
         Identical logic to _generate_top_n_saturation_reports but with stratified sampling.
 
         Args:
-            archetype_results: Dict mapping archetype name -> list of (build, avg_dpt, avg_turns) tuples
+            archetype_indexes: Dict mapping archetype name -> indexed build results
             overall_median: Median turns across all builds
             archetype_label: Optional label for combined reports
         """
-        from collections import defaultdict
-
         # Create top_n_analysis subdirectory
         top_n_dir = os.path.join(self.reports_dir, 'top_n_analysis')
         os.makedirs(top_n_dir, exist_ok=True)
 
-        # Define top N thresholds
-        thresholds = [10, 50, 100, 200, 500, 1000]
-
-        num_archetypes = len(archetype_results)
+        num_archetypes = len(archetype_indexes)
         per_archetype_text = f"top {{}}/{num_archetypes} from each archetype"
 
-        for n in thresholds:
+        for n in TOP_N_THRESHOLDS:
             # Get stratified sample (top N/2 from each archetype)
-            stratified_sample = self._stratified_sample_top_n(archetype_results, n)
+            saturation_data, archetype_counts, archetype_enhancement_counts = self._top_n_enhancement_saturation(
+                archetype_indexes, self._stratified_counts(archetype_indexes, n), n
+            )
 
-            if len(stratified_sample) < n:
-                print(f"  Skipping Top {n} saturation report (only {len(stratified_sample)} builds available)")
+            available = sum(archetype_counts.values())
+            if available < n:
+                print(f"  Skipping Top {n} saturation report (only {available} builds available)")
                 continue
 
-            top_n_results = stratified_sample[:n]  # Ensure exactly n builds
-
-            # Track enhancement appearances and archetype distribution
-            enhancement_counts = defaultdict(int)
-            enhancement_types = {}
-            enhancement_costs = {}
-            enhancement_turns = defaultdict(list)
-            archetype_counts = defaultdict(int)
-            archetype_enhancement_counts = defaultdict(lambda: defaultdict(int))
-
-            for result in top_n_results:
-                # All results from stratified sample have 4-tuple format
-                build, _, avg_turns, source_archetype = result
-
-                # Track archetype
-                archetype_counts[source_archetype] += 1
-
-                # Track unique enhancements per build (avoid double counting)
-                enhancements_in_build = set()
-
-                if isinstance(build, MultiAttackBuild):
-                    # For dual_natured builds, only count enhancements from primary attack
-                    if build.fallback_type:
-                        primary_build = build.builds[0]
-                        for upgrade in primary_build.upgrades:
-                            enhancements_in_build.add(upgrade)
-                            if upgrade not in enhancement_types:
-                                enhancement_types[upgrade] = 'upgrade'
-                                enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                        for limit in primary_build.limits:
-                            enhancements_in_build.add(limit)
-                            if limit not in enhancement_types:
-                                enhancement_types[limit] = 'limit'
-                                enhancement_costs[limit] = LIMITS[limit].cost
-                    else:
-                        # For other multi-attack builds, process all sub-builds
-                        for sub_build in build.builds:
-                            for upgrade in sub_build.upgrades:
-                                enhancements_in_build.add(upgrade)
-                                if upgrade not in enhancement_types:
-                                    enhancement_types[upgrade] = 'upgrade'
-                                    enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                            for limit in sub_build.limits:
-                                enhancements_in_build.add(limit)
-                                if limit not in enhancement_types:
-                                    enhancement_types[limit] = 'limit'
-                                    enhancement_costs[limit] = LIMITS[limit].cost
-                else:
-                    # Single attack build (focused)
-                    for upgrade in build.upgrades:
-                        enhancements_in_build.add(upgrade)
-                        if upgrade not in enhancement_types:
-                            enhancement_types[upgrade] = 'upgrade'
-                            enhancement_costs[upgrade] = UPGRADES[upgrade].cost
-
-                    for limit in build.limits:
-                        enhancements_in_build.add(limit)
-                        if limit not in enhancement_types:
-                            enhancement_types[limit] = 'limit'
-                            enhancement_costs[limit] = LIMITS[limit].cost
-
-                # Count each unique enhancement once per build
-                for enh in enhancements_in_build:
-                    enhancement_counts[enh] += 1
-                    enhancement_turns[enh].append(avg_turns)
-                    archetype_enhancement_counts[source_archetype][enh] += 1
-
-            # Calculate saturation rates
-            saturation_data = []
-            for name, count in enhancement_counts.items():
-                saturation_rate = (count / n) * 100
-                avg_turns_val = statistics.mean(enhancement_turns[name])
-
-                saturation_data.append({
-                    'name': name,
-                    'type': enhancement_types[name],
-                    'cost': enhancement_costs[name],
-                    'appearances': count,
-                    'saturation_rate': saturation_rate,
-                    'avg_turns': avg_turns_val
-                })
-
-            # Sort by saturation rate (descending), then by avg_turns (ascending)
-            saturation_data.sort(key=lambda x: (-x['saturation_rate'], x['avg_turns']))
+            enhancement_types = {data['name']: data['type'] for data in saturation_data}
+            enhancement_costs = {data['name']: data['cost'] for data in saturation_data}
 
             # Write report
             report_path = os.path.join(top_n_dir, f'enhancement_saturation_top{n}.md')
@@ -2999,7 +2786,7 @@ class ReporterV2:
                 f.write("**Sampling Strategy**:\n")
                 f.write(f"- Stratified sampling ensures equal representation from each archetype\n")
                 f.write(f"- Takes {per_archetype_text.format(n // num_archetypes)} to guarantee balanced comparison\n")
-                f.write(f"- Total of {n} builds analyzed ({' + '.join([f'{n // num_archetypes} {arch}' for arch in sorted(archetype_results.keys())])})\n\n")
+                f.write(f"- Total of {n} builds analyzed ({' + '.join([f'{n // num_archetypes} {arch}' for arch in sorted(archetype_indexes.keys())])})\n\n")
                 f.write("**Key Metrics**:\n")
                 f.write("1. **Saturation Rate**: % of builds containing this enhancement (counts once per build)\n")
                 f.write("2. **Appearances**: Number of builds containing this enhancement\n")
@@ -3103,7 +2890,7 @@ class ReporterV2:
 
     def _generate_enhancement_saturation_summary(
         self,
-        build_results,  # Can be List[Tuple] or Dict[str, List[Tuple]]
+        build_results,  # Can be ReportIndex or Dict[str, ReportIndex]
         overall_median: float,
         archetype_label: str = None
     ):
@@ -3113,19 +2900,17 @@ class ReporterV2:
         (10, 50, 100, 200, 500, 1000) in one table with H/M/L tags.
 
         Args:
-            build_results: List of (build, avg_dpt, avg_turns, [archetype]) tuples, already sorted by performance
-                          OR Dict mapping archetype name -> list of tuples (for stratified sampling)
+            build_results: Indexed build results
+                          OR Dict mapping archetype name -> indexed build results (for stratified sampling)
             overall_median: Median turns across all builds
             archetype_label: Optional label for combined reports
         """
-        from collections import defaultdict
-
         # Create top_n_analysis subdirectory
         top_n_dir = os.path.join(self.reports_dir, 'top_n_analysis')
         os.makedirs(top_n_dir, exist_ok=True)
 
         # Define thresholds
-        thresholds = [10, 50, 100, 200, 500, 1000]
+        thresholds = TOP_N_THRESHOLDS
 
         # Helper function to get saturation tag
         def get_saturation_tag(rate: float) -> str:
@@ -3146,73 +2931,26 @@ class ReporterV2:
         for n in thresholds:
             # Get the appropriate sample for this threshold
             if use_stratified:
-                top_n_results = self._stratified_sample_top_n(build_results, n)
-                if not top_n_results:
+                saturation_data, archetype_counts, _ = self._top_n_enhancement_saturation(
+                    build_results, self._stratified_counts(build_results, n), n
+                )
+                if not archetype_counts:
                     continue
             else:
-                if len(build_results) < n:
-                    continue
-                top_n_results = build_results[:n]
-            enhancement_counts = defaultdict(int)
-
-            for result in top_n_results:
-                # Handle both 3-tuple and 4-tuple formats
-                if len(result) == 4:
-                    build, _, _, _ = result
-                elif len(result) == 3:
-                    build, _, _ = result
-                else:
+                if build_results.total < n:
                     continue
-
-                # Track unique enhancements per build
-                enhancements_in_build = set()
-
-                if isinstance(build, MultiAttackBuild):
-                    # For dual_natured builds, only count primary attack
-                    if build.fallback_type:
-                        primary_build = build.builds[0]
-                        for upgrade in primary_build.upgrades:
-                            enhancements_in_build.add(upgrade)
-                            if upgrade not in enhancement_metadata:
-                                enhancement_metadata[upgrade] = {'type': 'upgrade', 'cost': UPGRADES[upgrade].cost}
-                        for limit in primary_build.limits:
-                            enhancements_in_build.add(limit)
-                            if limit not in enhancement_metadata:
-                                enhancement_metadata[limit] = {'type': 'limit', 'cost': LIMITS[limit].cost}
-                    else:
-                        # Process all sub-builds
-                        for sub_build in build.builds:
-                            for upgrade in sub_build.upgrades:
-                                enhancements_in_build.add(upgrade)
-                                if upgrade not in enhancement_metadata:
-                                    enhancement_metadata[upgrade] = {'type': 'upgrade', 'cost': UPGRADES[upgrade].cost}
-                            for limit in sub_build.limits:
-                                enhancements_in_build.add(limit)
-                                if limit not in enhancement_metadata:
-                                    enhancement_metadata[limit] = {'type': 'limit', 'cost': LIMITS[limit].cost}
-                else:
-                    # Single attack build
-                    for upgrade in build.upgrades:
-                        enhancements_in_build.add(upgrade)
-                        if upgrade not in enhancement_metadata:
-                            enhancement_metadata[upgrade] = {'type': 'upgrade', 'cost': UPGRADES[upgrade].cost}
-                    for limit in build.limits:
-                        enhancements_in_build.add(limit)
-                        if limit not in enhancement_metadata:
-                            enhancement_metadata[limit] = {'type': 'limit', 'cost': LIMITS[limit].cost}
-
-                # Count each unique enhancement
-                for enh in enhancements_in_build:
-                    enhancement_counts[enh] += 1
+                saturation_data, _, _ = self._top_n_enhancement_saturation(
+                    {self.archetype: build_results}, {self.archetype: n}, n
+                )
 
             # Calculate saturation rates for this threshold
             enhancement_saturation_by_threshold[n] = {}
-            for enh, count in enhancement_counts.items():
-                saturation_rate = (count / n) * 100
-                enhancement_saturation_by_threshold[n][enh] = saturation_rate
+            for data in saturation_data:
+                enhancement_saturation_by_threshold[n][data['name']] = data['saturation_rate']
+                enhancement_metadata.setdefault(data['name'], {'type': data['type'], 'cost': data['cost']})
 
         # Build summary data
-        all_enhancements = set(enhancement_metadata.keys())
+        all_enhancements = list(enhancement_metadata.keys())
         summary_data = []
 
         for enh in all_enhancements:
@@ -3307,7 +3045,7 @@ class ReporterV2:
 
             # Missing enhancements section
             all_available_enhancements = set(UPGRADES.keys()) | set(LIMITS.keys())
-            missing_enhancements = all_available_enhancements - all_enhancements
+            missing_enhancements = all_available_enhancements - set(all_enhancements)
 
             if missing_enhancements:
                 f.write("\n## Missing Enhancements (0% Saturation)\n\n")
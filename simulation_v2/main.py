@@ -16,10 +16,13 @@ from core.config import SimConfigV2
 from core.individual_tester import IndividualTester
 from core.build_tester import BuildTester
 from core.reporter import ReporterV2
+from core.report_index import ReportIndex, sorted_median
 from src.models import Character, AttackBuild, MultiAttackBuild
 from src.simulation import simulate_combat_verbose
 import shutil
 
+import numpy as np
+
 
 def cleanup_old_reports(reports_base_dir: str, max_folders: int = 5):
     """Delete oldest report folders if there are more than max_folders.
@@ -188,6 +191,24 @@ def run_simulation_v2(config_path: str = None):
     print(f"  Simulation runs: {config.simulation_runs}")
     print(f"  Scenarios: {len(config.scenarios)}")
     print(f"  Threading: {'enabled' if config.use_threading else 'disabled'}")
+    print(f"  Exact solver: {'enabled' if config.use_exact_solver else 'disabled'}")
+    print(f"  Batch engine: {'enabled' if config.use_batch_engine else 'disabled'}")
+    if config.racing.enabled:
+        print(f"  Statistical racing: enabled (top {config.racing.keep_percent:.0%}, max {config.racing.max_runs} runs)")
+
+    # Seed the dice stream (per-build streams are derived from the same run seed)
+    from src.dice import seed as seed_dice
+    seed_dice(config.random_seed)
+    if config.random_seed is not None:
+        print(f"  Random seed: {config.random_seed}")
+    if config.common_random_numbers:
+        print(f"  Common random numbers: enabled (every build replays the same dice per scenario)")
+
+    # Open the persistent result cache (workers reopen it from the same config)
+    config.result_cache.open()
+    if config.result_cache.enabled:
+        from src.result_cache import get_result_cache
+        print(f"  Result cache: {config.result_cache.path} ({len(get_result_cache()):,} cached batches)")
 
     # Initialize GPU if enabled
     if config.use_gpu:
@@ -216,6 +237,7 @@ def run_simulation_v2(config_path: str = None):
 
     # Collect all build results for combined reports
     all_archetype_results = {}  # archetype_name -> build_results
+    archetype_indexes = {}  # archetype_name -> ReportIndex of build_results
 
     # Process each archetype
     for archetype in config.archetypes:
@@ -236,16 +258,26 @@ def run_simulation_v2(config_path: str = None):
         individual_results = individual_tester.test_all_enhancements()
         print(f"  Generated {len(individual_results)} combat logs")
 
-        # Step 2: Build testing
+        # Step 2: Build testing. Results are written as memory-mapped columns as they are read from the
+        # results store; reports read them in rank order (ascending avg_turns = better) without holding
+        # every build in memory
         build_tester = BuildTester(config, archetype)
-        build_results = build_tester.test_all_builds()
-
-        # Sort results by avg_turns (ascending = better)
-        build_results.sort(key=lambda x: x[2])  # x[2] is avg_turns
+        build_results = build_tester.test_all_builds(os.path.join(archetype_reports_dir, 'results'))
+        if config.dominance_pruning.enabled:
+            from src.dominance import write_dominance_audit
+            write_dominance_audit(build_tester.dominance_audit,
+                                  os.path.join(archetype_reports_dir, 'dominance_audit.md'))
+        if build_tester.surrogate_screen is not None:
+            from src.surrogate import write_surrogate_calibration
+            write_surrogate_calibration(build_tester.surrogate_screen.calibration,
+                                        os.path.join(archetype_reports_dir, 'surrogate_calibration.md'))
+
+        index = ReportIndex(build_results)
 
         # Store build results for combined reporting (if archetype is focused or dual_natured)
         if archetype in ['focused', 'dual_natured']:
             all_archetype_results[archetype] = build_results
+            archetype_indexes[archetype] = index
 
         # Step 3: Generate top 50 combat logs
         print("\n--- Generating Top 50 Combat Logs ---")
@@ -273,7 +305,7 @@ def run_simulation_v2(config_path: str = None):
 
         # Step 4: Generate reports
         reporter = ReporterV2(archetype_reports_dir, archetype)
-        reporter.generate_all_reports(build_results, individual_results)
+        reporter.generate_all_reports(index, individual_results)
 
     # Generate combined reports (focused + dual_natured only)
     if 'focused' in all_archetype_results and 'dual_natured' in all_archetype_results:
@@ -285,15 +317,14 @@ def run_simulation_v2(config_path: str = None):
         combined_reports_dir = os.path.join(base_reports_dir, 'combined')
         os.makedirs(combined_reports_dir, exist_ok=True)
 
-        # Calculate median from each archetype for info
-        focused_turns = [t for _, _, t in all_archetype_results['focused']]
-        dual_turns = [t for _, _, t in all_archetype_results['dual_natured']]
-        focused_median = __import__('statistics').median(focused_turns) if focused_turns else 0
-        dual_median = __import__('statistics').median(dual_turns) if dual_turns else 0
+        # Exact medians from the indexes' ranked avg turns
+        focused_median = archetype_indexes['focused'].median()
+        dual_median = archetype_indexes['dual_natured'].median()
 
-        # Calculate combined median (from all builds merged)
-        all_turns = focused_turns + dual_turns
-        combined_median = __import__('statistics').median(all_turns) if all_turns else 0
+        # Calculate combined median (from both archetypes' avg turns merged)
+        combined_turns = np.sort(np.concatenate([archetype_indexes['focused'].turns,
+                                                 archetype_indexes['dual_natured'].turns]))
+        combined_median = sorted_median(combined_turns) if len(combined_turns) else 0
 
         print(f"  Focused builds: {len(all_archetype_results['focused'])} (median: {focused_median:.2f})")
         print(f"  Dual_natured builds: {len(all_archetype_results['dual_natured'])} (median: {dual_median:.2f})")
@@ -313,18 +344,23 @@ def run_simulation_v2(config_path: str = None):
             archetype_label="COMBINED (FOCUSED + DUAL_NATURED)"
         )
         combined_reporter._generate_top_n_saturation_reports_stratified(
-            all_archetype_results,
+            archetype_indexes,
             combined_median,
             archetype_label="COMBINED (FOCUSED + DUAL_NATURED)"
         )
         combined_reporter._generate_enhancement_saturation_summary(
-            all_archetype_results,
+            archetype_indexes,
             combined_median,
             archetype_label="COMBINED (FOCUSED + DUAL_NATURED)"
         )
 
         print(f"\n  Combined reports saved to: {combined_reports_dir}")
 
+    if config.result_cache.enabled:
+        from src.result_cache import get_result_cache, close_result_cache
+        print(f"\nResult cache: {len(get_result_cache()):,} cached batches")
+        close_result_cache()
+
     print("\n" + "="*80)
     print("SIMULATION V2 COMPLETE")
     print("="*80)
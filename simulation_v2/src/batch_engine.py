@@ -0,0 +1,786 @@
+"""
+NumPy lockstep batch combat engine for the Vitality System.
+
+run_simulation_batch plays its runs one at a time through simulate_combat_verbose.
+This engine advances all N runs of one build and scenario together, as arrays:
+
+- Enemy HP and pending bleed are (runs x enemies) matrices; alive masks are
+  derived from the HP matrix
+- Attacker HP, charges, cooldowns, charge history, channeled turns, empower,
+  leech, attrition and every "last turn" flag read by limits are per-run vectors
+- Dice are drawn as arrays from src.dice (d20 and the exact 3d6 exploding tables)
+
+Each make_attack call in simulate_combat_verbose becomes one vectorized call
+over the runs that make it, in the same per-run order. Charges, cooldowns,
+attrition and leech therefore accumulate exactly as in the scalar engine. This
+includes follow-up attacks (double tap, extra attack, barrage, explosive
+critical, splinter), AOE shared rolls and the basic-attack, empower and
+focused fallbacks. Multi-attack builds pick their attack per run with the
+same dual_natured and versatile_master rules.
+
+Runs that finish drop out of the active set. A turn then costs a fixed number
+of NumPy operations, whatever the number of runs. The random streams differ
+from the scalar engine, so individual runs do not match, but the turn and
+outcome distributions do.
+"""
+
+from typing import List, Tuple
+import numpy as np
+from src.models import Character, AttackBuild, MultiAttackBuild
+from src.dice import draw_d20, draw_3d6_exploding
+from src.compiled_build import (
+    LIMIT_RULES, LIMIT_HP_MAX, LIMIT_FULL_HP, LIMIT_ATTRITION, LIMIT_CHARGES,
+    LIMIT_STATE_REQUIRED, LIMIT_STATE_FORBIDDEN, LIMIT_TURN_MAX, LIMIT_TURN_MIN,
+    LIMIT_COOLDOWN, LIMIT_DC, DICE_FLAT_15, DICE_EXPLODE_5_6,
+)
+
+# Attack types that hit every alive enemy
+AREA_ATTACK_TYPES = ('area', 'direct_area_damage')
+
+# Per-run make_attack outcomes
+ATTACK_FAILED = 0   # Unreliable limit failed or the attack missed: (0, [], False)
+ATTACK_BASIC = 1    # A limit condition was not met: (0, ['basic_attack'], False)
+ATTACK_CHARGE = 2   # charge_up build charged instead: (0, ['charge'], False)
+ATTACK_HIT = 3      # Attack hit (damage may still be 0)
+_PROCEED = 4        # Limits passed and the attack is not resolved yet (preview: 'attack')
+
+# CombatState flags read by state-based limits
+STATE_FLAGS = tuple(sorted({param for kind, param, _ in LIMIT_RULES.values()
+                            if kind in (LIMIT_STATE_REQUIRED, LIMIT_STATE_FORBIDDEN)}))
+
+# Below this many runs the per-turn NumPy overhead outweighs the scalar loop
+BATCH_ENGINE_MIN_RUNS = 24
+
+
+def _finishing_threshold(compiled) -> int:
+    """HP threshold of the build's finishing blow condition (0 if none)"""
+    for condition in compiled.hit_conditions:
+        if condition.startswith('finishing_'):
+            return int(condition.split('_')[1])
+    return 0
+
+
+class BatchCombat:
+    """Per-run combat state for N lockstep runs of one build against one enemy group"""
+
+    def __init__(self, attacker: Character, defender: Character, num_runs: int,
+                 enemy_hps: List[int], archetype: str = None):
+        self.attacker = attacker
+        self.defender = defender
+        self.archetype = archetype
+        self.tier = attacker.tier
+        self.num_runs = num_runs
+        self.max_splinter_attacks = (attacker.tier + 1) // 2  # Tier/2 rounded up
+
+        self.max_hp = np.asarray(enemy_hps, dtype=np.int64)
+        self.hp = np.tile(self.max_hp, (num_runs, 1))
+        self.bleed = np.zeros_like(self.hp)  # Bleed damage due at the start of next turn
+        # Enemies defeated by a basic-attack fallback (the only kills simulate_combat_verbose
+        # marks defeated_this_turn, which then stays set)
+        self.basic_kill = np.zeros(self.hp.shape, dtype=bool)
+
+        self.attacker_hp = np.full(num_runs, attacker.max_hp, dtype=np.int64)
+        self.charge_history = np.zeros((num_runs, 2), dtype=bool)  # [previous turn - 1, previous turn]
+        self.charges_used = {}
+        self.cooldowns = {}
+        self.flags = {name: np.zeros(num_runs, dtype=bool) for name in STATE_FLAGS}
+        self.last_target = np.full(num_runs, -1, dtype=np.int64)
+        self.channeled_turns = np.zeros(num_runs, dtype=np.int64)
+        self.leech_hp = np.zeros(num_runs, dtype=np.int64)
+        self.attrition_cost = np.zeros(num_runs, dtype=np.int64)
+        self.empower_bonus = np.zeros(num_runs, dtype=np.int64)
+
+        self._basic_builds = {}
+        self._expected_damages = None
+
+        # Enemies attack back with a basic ranged attack using the defender's stats
+        enemy_build = AttackBuild('ranged', [], []).compiled
+        self._enemy_compiled = enemy_build
+        self._enemy_accuracy = (defender.focus + defender.tier * enemy_build.accuracy_tier_coef
+                                - enemy_build.accuracy_flat_penalty)
+        self._enemy_flat_damage = (defender.power + defender.tier * enemy_build.damage_tier_coef
+                                   - enemy_build.damage_flat_penalty)
+
+    def _per_run(self, store: dict, name: str, default: int) -> np.ndarray:
+        """Per-run counter for a charges or cooldown limit, created on first use"""
+        values = store.get(name)
+        if values is None:
+            values = store[name] = np.full(self.num_runs, default, dtype=np.int64)
+        return values
+
+    def _basic_build(self, attack_type: str) -> AttackBuild:
+        """Basic fallback build (same attack type, no upgrades or limits)"""
+        build = self._basic_builds.get(attack_type)
+        if build is None:
+            build = self._basic_builds[attack_type] = AttackBuild(attack_type, [], [])
+        return build
+
+    def charged_for(self, charge_up_turns: int, runs: np.ndarray) -> np.ndarray:
+        """Runs that charged on each of the previous charge_up_turns turns"""
+        if charge_up_turns == 2:
+            return self.charge_history[runs, 0] & self.charge_history[runs, 1]
+        return self.charge_history[runs, 1].copy()
+
+    def check_limits(self, compiled, runs: np.ndarray, turn_number: int, preview: bool = False,
+                     skip_consumption: bool = False) -> np.ndarray:
+        """
+        Vectorized make_attack limit passes for a group of runs.
+
+        Args:
+            compiled: CompiledBuild of the attack
+            runs: Run indices making the attack
+            turn_number: Current turn number (1-indexed)
+            preview: Check like preview_activation (no DC rolls, nothing consumed)
+            skip_consumption: AOE targets after the first (charges and cooldowns shared)
+
+        Returns:
+            Outcome per run: ATTACK_FAILED, ATTACK_BASIC, ATTACK_CHARGE or _PROCEED
+        """
+        outcome = np.full(len(runs), _PROCEED, dtype=np.int8)
+        charge_up_turns = compiled.charge_up_turns
+        if not compiled.limit_checks and not charge_up_turns:
+            return outcome
+
+        open_runs = np.ones(len(runs), dtype=bool)
+        charged = self.charged_for(charge_up_turns, runs) if charge_up_turns else None
+        for limit_name, kind, param, _, is_action_based in compiled.limit_checks:
+            # Action-based limits are only checked on the first charge turn
+            if is_action_based and charged is not None:
+                checked = open_runs & ~charged
+            else:
+                checked = open_runs.copy()
+            failed_outcome = ATTACK_BASIC
+
+            if kind == LIMIT_DC:
+                if preview or param <= 0:
+                    continue
+                failed = np.zeros(len(runs), dtype=bool)
+                failed[checked] = draw_d20(int(checked.sum())) < param
+                failed_outcome = ATTACK_FAILED
+            elif kind == LIMIT_CHARGES:
+                charges_used = self._per_run(self.charges_used, limit_name, 0)
+                used = charges_used[runs]
+                if skip_consumption and not preview:
+                    used = used - 1
+                failed = checked & (used >= param)
+                if not preview and not skip_consumption:
+                    charges_used[runs[checked & ~failed]] += 1
+            elif kind == LIMIT_COOLDOWN:
+                last_used = self._per_run(self.cooldowns, limit_name, -999)
+                run_last_used = last_used[runs]
+                if skip_consumption and not preview:
+                    # Later AOE targets share the activation made on the first target
+                    checked &= run_last_used != turn_number
+                failed = checked & (turn_number - run_last_used <= param)
+                if not preview:
+                    last_used[runs[checked & ~failed]] = turn_number
+            elif kind == LIMIT_ATTRITION:
+                failed = checked & (self.attacker_hp[runs] < param)
+                if not preview:
+                    self.attrition_cost[runs[checked & ~failed]] += 25
+            elif kind == LIMIT_HP_MAX:
+                failed = checked & (self.attacker_hp[runs] > param)
+            elif kind == LIMIT_FULL_HP:
+                failed = checked & (self.attacker_hp[runs] < self.attacker.max_hp)
+            elif kind == LIMIT_STATE_REQUIRED:
+                failed = checked & ~self.flags[param][runs]
+            elif kind == LIMIT_STATE_FORBIDDEN:
+                failed = checked & self.flags[param][runs]
+            elif kind == LIMIT_TURN_MAX:
+                failed = checked if turn_number > param else np.zeros(len(runs), dtype=bool)
+            elif kind == LIMIT_TURN_MIN:
+                failed = checked if turn_number < param else np.zeros(len(runs), dtype=bool)
+            else:
+                continue
+
+            outcome[failed] = failed_outcome
+            open_runs &= ~failed
+
+        # charge_up limits are checked last
+        if charge_up_turns:
+            outcome[open_runs & ~charged] = ATTACK_CHARGE
+        return outcome
+
+    def attack(self, compiled, runs: np.ndarray, turn_number: int, target_max_hp, tier_bonus: int = 0,
+               allow_multi: bool = True, aoe_roll: np.ndarray = None,
+               skip_consumption: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized untraced make_attack for a group of runs.
+
+        Args:
+            compiled: CompiledBuild of the attack
+            runs: Run indices making the attack (each run at most once)
+            turn_number: Current turn number (1-indexed)
+            target_max_hp: Target max HP (scalar or per-run array) for slayer bonuses
+            tier_bonus: Dual-natured fallback bonus to accuracy and damage
+            allow_multi: Allow double tap, extra attack and barrage follow-ups
+            aoe_roll: Per-run shared AOE damage roll (None for single-target attacks)
+            skip_consumption: AOE targets after the first (charges and cooldowns shared)
+
+        Returns:
+            Tuple of per-run arrays (damage, outcome, explosive_critical, has_conditions)
+        """
+        n = len(runs)
+        damage = np.zeros(n, dtype=np.int64)
+        explosive = np.zeros(n, dtype=bool)
+        has_conditions = np.zeros(n, dtype=bool)
+        outcome = self.check_limits(compiled, runs, turn_number, skip_consumption=skip_consumption)
+        attacking = np.flatnonzero(outcome == _PROCEED)
+        if len(attacking) == 0:
+            return damage, outcome, explosive, has_conditions
+
+        tier = self.tier
+        attacker = self.attacker
+        defender = self.defender
+        attacking_runs = runs[attacking]
+
+        slayer_bonus = np.zeros(len(attacking), dtype=np.int64)
+        if compiled.slayer_target_hps:
+            if isinstance(target_max_hp, np.ndarray):
+                target_hps = target_max_hp[attacking]
+            else:
+                target_hps = np.full(len(attacking), target_max_hp)
+            slayer_bonus[np.isin(target_hps, list(compiled.slayer_target_hps))] = tier
+        channeled_bonus = np.zeros(len(attacking), dtype=np.int64)
+        if compiled.has_channeled:
+            channeled_bonus = np.minimum(self.channeled_turns[attacking_runs] - 3, 5) * tier
+        accuracy = (attacker.focus + tier * compiled.accuracy_tier_coef - compiled.accuracy_flat_penalty
+                    + tier_bonus + slayer_bonus + channeled_bonus)
+
+        if compiled.is_direct:
+            hits = attacking
+            accuracy_roll = np.zeros(len(hits), dtype=np.int64)
+        else:
+            accuracy_roll = draw_d20(len(attacking))
+            if compiled.has_advantage:
+                accuracy_roll = np.maximum(accuracy_roll, draw_d20(len(attacking)))
+            total_attack_roll = accuracy_roll + accuracy
+            hit = total_attack_roll >= defender.avoidance
+            outcome[attacking[~hit]] = ATTACK_FAILED
+            hits = attacking[hit]
+            accuracy_roll = accuracy_roll[hit]
+            total_attack_roll = total_attack_roll[hit]
+            slayer_bonus = slayer_bonus[hit]
+            channeled_bonus = channeled_bonus[hit]
+        outcome[hits] = ATTACK_HIT
+        if len(hits) == 0:
+            return damage, outcome, explosive, has_conditions
+        hit_runs = runs[hits]
+
+        overhit_bonus = 0
+        if compiled.has_overhit and not compiled.is_direct:
+            overhit_bonus = np.where(total_attack_roll >= defender.avoidance + 3 * tier,
+                                     (total_attack_roll - defender.avoidance) // 2, 0)
+
+        if compiled.is_direct:
+            base_damage = compiled.direct_damage_base + compiled.direct_damage_tier_coef * tier
+        elif aoe_roll is not None:
+            base_damage = aoe_roll[hits]
+        elif compiled.dice_mode == DICE_FLAT_15:
+            base_damage = 15
+        else:
+            base_damage = draw_3d6_exploding(len(hits), compiled.dice_mode == DICE_EXPLODE_5_6)
+
+        flat_bonus = (attacker.power + tier * compiled.damage_tier_coef - compiled.damage_flat_penalty
+                      + channeled_bonus)
+        critical_damage_bonus = np.where(accuracy_roll >= compiled.crit_threshold,
+                                         tier * 2 if compiled.has_powerful_critical else tier, 0)
+        empower_bonus = self.empower_bonus[hit_runs]
+        self.empower_bonus[hit_runs] = 0
+        total_damage = (base_damage + flat_bonus + slayer_bonus + critical_damage_bonus + overhit_bonus
+                        + tier_bonus + empower_bonus)
+
+        effective_durability = defender.tier if compiled.has_armor_piercing else defender.durability
+        damage_dealt = np.maximum(0, total_damage - effective_durability)
+        if compiled.has_brutal:
+            excess = total_damage - effective_durability - 5 * tier
+            damage_dealt += np.where(excess > 0, excess // 2, 0)
+        if compiled.has_leech:
+            self.leech_hp[hit_runs] += damage_dealt // 2
+
+        conditions = np.full(len(hits), bool(compiled.hit_conditions))
+        if allow_multi:
+            follow_up_range = accuracy_roll >= 15
+            if compiled.has_explosive_critical:
+                explosive[hits] = follow_up_range
+                conditions |= follow_up_range
+            if compiled.has_double_tap:
+                tapped = np.flatnonzero(follow_up_range)
+                if len(tapped):
+                    damage_dealt[tapped] += self.attack(compiled, hit_runs[tapped], turn_number,
+                                                        defender.max_hp, allow_multi=False)[0]
+            if compiled.has_ricochet:
+                conditions |= follow_up_range
+            if compiled.has_extra_attack:
+                extra = np.flatnonzero((damage_dealt > 0) & conditions)
+                if len(extra):
+                    damage_dealt[extra] += self.attack(compiled, hit_runs[extra], turn_number,
+                                                       defender.max_hp, allow_multi=False)[0]
+            if compiled.has_barrage:
+                second = np.flatnonzero((damage_dealt > 0) & conditions)
+                if len(second):
+                    second_damage = self.attack(compiled, hit_runs[second], turn_number,
+                                                defender.max_hp, allow_multi=False)[0]
+                    damage_dealt[second] += second_damage
+                    third = second[second_damage > 0]
+                    if len(third):
+                        damage_dealt[third] += self.attack(compiled, hit_runs[third], turn_number,
+                                                           defender.max_hp, allow_multi=False)[0]
+
+        damage[hits] = damage_dealt
+        has_conditions[hits] = conditions
+        return damage, outcome, explosive, has_conditions
+
+    def _apply_bleed(self, runs: np.ndarray, enemies: np.ndarray, damage: np.ndarray):
+        """Replace the bleed on each (run, enemy) with damage - tier for one turn"""
+        self.bleed[runs, enemies] = np.maximum(0, damage - self.tier)
+
+    def bleed_phase(self, runs: np.ndarray):
+        """Apply and clear bleed damage due this turn (alive enemies only)"""
+        hp = self.hp[runs]
+        self.hp[runs] = np.where(hp > 0, np.maximum(0, hp - self.bleed[runs]), hp)
+        self.bleed[runs] = 0
+
+    def _area_attack(self, compiled, runs: np.ndarray, turn_number: int, tier_bonus: int,
+                     order: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        make_aoe_attack against each run's alive enemies (after its charge preview).
+
+        Returns:
+            (damage, outcome) per run and enemy (enemies not targeted: 0, ATTACK_FAILED)
+        """
+        n, num_enemies = order.shape
+        damage = np.zeros((n, num_enemies), dtype=np.int64)
+        outcome = np.full((n, num_enemies), ATTACK_FAILED, dtype=np.int8)
+        shared_roll = None
+        if not compiled.is_direct:
+            if compiled.dice_mode == DICE_FLAT_15:
+                shared_roll = np.full(n, 15, dtype=np.int64)
+            else:
+                shared_roll = draw_3d6_exploding(n, compiled.dice_mode == DICE_EXPLODE_5_6)
+
+        # Targets are attacked in enemy order; the first one consumes charges and cooldowns
+        for slot in range(num_enemies):
+            in_slot = np.flatnonzero(counts > slot)
+            if len(in_slot) == 0:
+                break
+            targets = order[in_slot, slot]
+            slot_damage, slot_outcome, _, _ = self.attack(
+                compiled, runs[in_slot], turn_number, self.max_hp[targets], tier_bonus,
+                aoe_roll=shared_roll[in_slot] if shared_roll is not None else None,
+                skip_consumption=slot > 0
+            )
+            damage[in_slot, targets] = slot_damage
+            outcome[in_slot, targets] = slot_outcome
+        return damage, outcome
+
+    def _area_turn(self, build: AttackBuild, runs: np.ndarray, turn_number: int,
+                   tier_bonus: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """AOE attack phase: returns per-run (charged, damage dealt, made channeled attack)"""
+        compiled = build.compiled
+        n = len(runs)
+        total_damage = np.zeros(n, dtype=np.int64)
+        made_channeled = np.zeros(n, dtype=bool)
+        charged = self.check_limits(compiled, runs, turn_number, preview=True) == ATTACK_CHARGE
+
+        attacking = np.flatnonzero(~charged)
+        if len(attacking) == 0:
+            return charged, total_damage, made_channeled
+        attack_runs = runs[attacking]
+        alive = self.hp[attack_runs] > 0
+        order = np.argsort(~alive, axis=1, kind='stable')
+        counts = alive.sum(axis=1)
+        damage, outcome = self._area_attack(compiled, attack_runs, turn_number, tier_bonus, order, counts)
+
+        first_outcome = outcome[np.arange(len(attacking)), order[:, 0]]
+        basic = first_outcome == ATTACK_BASIC
+        if basic.any():
+            basic_runs = attack_runs[basic]
+            if self.archetype == 'focused':
+                pass  # Focused builds cannot use basic attacks
+            elif 'passive' in build.limits:
+                self.empower_bonus[basic_runs] += self.tier
+            else:
+                basic_damage, _ = self._area_attack(self._basic_build(build.attack_type).compiled, basic_runs,
+                                                    turn_number, tier_bonus, order[basic], counts[basic])
+                hp = self.hp[basic_runs]
+                hp = np.where(basic_damage > 0, np.maximum(0, hp - basic_damage), hp)
+                self.hp[basic_runs] = hp
+                self.basic_kill[basic_runs] |= (basic_damage > 0) & (hp <= 0)
+                total_damage[attacking[basic]] = basic_damage.sum(axis=1)
+
+        normal = np.flatnonzero(~basic)
+        if len(normal) == 0:
+            return charged, total_damage, made_channeled
+        normal_runs = attack_runs[normal]
+        damage = damage[normal]
+        hit = outcome[normal] == ATTACK_HIT
+        hp = np.maximum(0, self.hp[normal_runs] - damage)
+        finishing_threshold = _finishing_threshold(compiled)
+        if finishing_threshold:
+            hp[hit & (hp > 0) & (hp <= finishing_threshold)] = 0
+        if 'culling_strike' in compiled.hit_conditions:
+            hp[hit & (hp > 0) & (hp <= self.max_hp // 5)] = 0
+        self.hp[normal_runs] = hp
+        if 'bleed' in compiled.hit_conditions:
+            bleed = self.bleed[normal_runs]
+            bleed[hit] = np.maximum(0, damage[hit] - self.tier)
+            self.bleed[normal_runs] = bleed
+        total_damage[attacking[normal]] = damage.sum(axis=1)
+        made_channeled[attacking[normal]] = compiled.has_channeled
+
+        if 'splinter' in compiled.hit_conditions:
+            total_damage[attacking[normal]] += self._area_splinters(
+                compiled, normal_runs, order[normal], counts[normal], hit, turn_number, tier_bonus)
+        return charged, total_damage, made_channeled
+
+    def _area_splinters(self, compiled, runs: np.ndarray, order: np.ndarray, counts: np.ndarray,
+                        hit: np.ndarray, turn_number: int, tier_bonus: int) -> np.ndarray:
+        """Splinter attacks for AOE targets the attack defeated (no chaining)"""
+        n = len(runs)
+        rows = np.arange(n)
+        defeated = self.hp[runs] <= 0
+        splinter_attacks = np.zeros(n, dtype=np.int64)
+        total_damage = np.zeros(n, dtype=np.int64)
+        for slot in range(order.shape[1]):
+            targets = order[:, slot]
+            splintering = np.flatnonzero((counts > slot) & hit[rows, targets] & defeated[rows, targets] &
+                                         (splinter_attacks < self.max_splinter_attacks))
+            if len(splintering) == 0:
+                continue
+            alive = self.hp[runs[splintering]] > 0
+            has_target = alive.any(axis=1)
+            splintering = splintering[has_target]
+            if len(splintering) == 0:
+                continue
+            next_targets = np.argmax(alive[has_target], axis=1)
+            splinter_runs = runs[splintering]
+            splinter_attacks[splintering] += 1
+            splinter_damage, splinter_outcome, _, _ = self.attack(compiled, splinter_runs, turn_number,
+                                                                  self.defender.max_hp, tier_bonus)
+            self.hp[splinter_runs, next_targets] = np.maximum(0, self.hp[splinter_runs, next_targets] - splinter_damage)
+            total_damage[splintering] += splinter_damage
+            if 'bleed' in compiled.hit_conditions:
+                bled = splinter_outcome == ATTACK_HIT
+                self._apply_bleed(splinter_runs[bled], next_targets[bled], splinter_damage[bled])
+        return total_damage
+
+    def _single_turn(self, build: AttackBuild, runs: np.ndarray, turn_number: int,
+                     tier_bonus: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Single-target attack phase: returns per-run (charged, damage dealt, made channeled attack, target)"""
+        compiled = build.compiled
+        n = len(runs)
+        total_damage = np.zeros(n, dtype=np.int64)
+        made_channeled = np.zeros(n, dtype=bool)
+        targets = np.argmax(self.hp[runs] > 0, axis=1)
+        damage, outcome, explosive, has_conditions = self.attack(compiled, runs, turn_number,
+                                                                 self.max_hp[targets], tier_bonus)
+        charged = outcome == ATTACK_CHARGE
+
+        basic = np.flatnonzero(outcome == ATTACK_BASIC)
+        if len(basic) and self.archetype != 'focused':
+            if 'passive' in build.limits:
+                self.empower_bonus[runs[basic]] += self.tier
+            else:
+                basic_runs = runs[basic]
+                basic_targets = targets[basic]
+                basic_damage = self.attack(self._basic_build(build.attack_type).compiled, basic_runs,
+                                           turn_number, self.max_hp[basic_targets], tier_bonus)[0]
+                hp = np.maximum(0, self.hp[basic_runs, basic_targets] - basic_damage)
+                self.hp[basic_runs, basic_targets] = hp
+                self.basic_kill[basic_runs[hp <= 0], basic_targets[hp <= 0]] = True
+                total_damage[basic] = basic_damage
+
+        # A hit that dealt no damage and applied no conditions is handled like a miss
+        normal = np.flatnonzero((outcome == ATTACK_HIT) & ((damage > 0) | has_conditions))
+        if len(normal) == 0:
+            return charged, total_damage, made_channeled, targets
+        normal_runs = runs[normal]
+        normal_targets = targets[normal]
+        normal_damage = damage[normal]
+        hp = np.maximum(0, self.hp[normal_runs, normal_targets] - normal_damage)
+        finishing_threshold = _finishing_threshold(compiled)
+        if finishing_threshold:
+            hp[(hp > 0) & (hp <= finishing_threshold)] = 0
+        if 'culling_strike' in compiled.hit_conditions:
+            hp[(hp > 0) & (hp <= self.max_hp[normal_targets] // 5)] = 0
+        self.hp[normal_runs, normal_targets] = hp
+        if 'bleed' in compiled.hit_conditions:
+            self._apply_bleed(normal_runs, normal_targets, normal_damage)
+        total_damage[normal] = normal_damage
+        made_channeled[normal] = compiled.has_channeled
+
+        if compiled.has_explosive_critical:
+            exploding = normal[explosive[normal]]
+            if len(exploding):
+                total_damage[exploding] += self._explosive_splash(compiled, runs[exploding], targets[exploding],
+                                                                  turn_number, tier_bonus)
+        if 'splinter' in compiled.hit_conditions:
+            splintering = normal[hp <= 0]
+            if len(splintering):
+                total_damage[splintering] += self._splinter_chain(compiled, runs[splintering], turn_number,
+                                                                  tier_bonus)
+        return charged, total_damage, made_channeled, targets
+
+    def _explosive_splash(self, compiled, runs: np.ndarray, targets: np.ndarray, turn_number: int,
+                          tier_bonus: int) -> np.ndarray:
+        """Explosive critical: attack every other alive enemy, in enemy order"""
+        total_damage = np.zeros(len(runs), dtype=np.int64)
+        splash_targets = self.hp[runs] > 0
+        splash_targets[np.arange(len(runs)), targets] = False
+        for enemy in range(self.hp.shape[1]):
+            splashed = np.flatnonzero(splash_targets[:, enemy])
+            if len(splashed) == 0:
+                continue
+            splash_runs = runs[splashed]
+            splash_damage, splash_outcome, _, _ = self.attack(compiled, splash_runs, turn_number,
+                                                              self.max_hp[enemy], tier_bonus)
+            hp = np.maximum(0, self.hp[splash_runs, enemy] - splash_damage)
+            splash_hit = splash_outcome == ATTACK_HIT
+            if 'bleed' in compiled.hit_conditions:
+                self.bleed[splash_runs[splash_hit], enemy] = np.maximum(0, splash_damage[splash_hit] - self.tier)
+            if 'culling_strike' in compiled.hit_conditions:
+                hp[splash_hit & (hp > 0) & (hp <= self.max_hp[enemy] // 5)] = 0
+            self.hp[splash_runs, enemy] = hp
+            total_damage[splashed] += splash_damage
+        return total_damage
+
+    def _splinter_chain(self, compiled, runs: np.ndarray, turn_number: int, tier_bonus: int) -> np.ndarray:
+        """Splinter attacks on the next alive enemy, continuing while each one defeats its target"""
+        total_damage = np.zeros(len(runs), dtype=np.int64)
+        chaining = np.arange(len(runs))
+        for _ in range(self.max_splinter_attacks):
+            alive = self.hp[runs[chaining]] > 0
+            has_target = alive.any(axis=1)
+            chaining = chaining[has_target]
+            if len(chaining) == 0:
+                break
+            chain_runs = runs[chaining]
+            next_targets = np.argmax(alive[has_target], axis=1)
+            splinter_damage, splinter_outcome, _, _ = self.attack(compiled, chain_runs, turn_number,
+                                                                  self.defender.max_hp, tier_bonus)
+            hp = np.maximum(0, self.hp[chain_runs, next_targets] - splinter_damage)
+            self.hp[chain_runs, next_targets] = hp
+            total_damage[chaining] += splinter_damage
+            if 'bleed' in compiled.hit_conditions:
+                bled = splinter_outcome == ATTACK_HIT
+                self._apply_bleed(chain_runs[bled], next_targets[bled], splinter_damage[bled])
+            chaining = chaining[hp <= 0]
+        return total_damage
+
+    def select_attacks(self, build, runs: np.ndarray, turn_number: int) -> List[Tuple[AttackBuild, np.ndarray, int]]:
+        """
+        Choose each run's attack for this turn.
+
+        Returns:
+            List of (attack build, positions in runs, tier bonus) groups
+        """
+        if not isinstance(build, MultiAttackBuild):
+            return [(build, np.arange(len(runs)), 0)]
+
+        if build.archetype == 'dual_natured' and len(build.builds) == 2:
+            from src.damage_calculator import calculate_all_expected_damages, is_aoe_attack
+
+            primary_build, fallback_build = build.builds
+            if self._expected_damages is None:
+                self._expected_damages = calculate_all_expected_damages(build.builds, self.attacker,
+                                                                        self.defender, build.tier_bonus)
+            activation = self.check_limits(primary_build.compiled, runs, turn_number, preview=True)
+            use_primary = activation == ATTACK_CHARGE
+            can_attack = np.flatnonzero(activation == _PROCEED)
+            if len(can_attack):
+                num_alive = (self.hp[runs[can_attack]] > 0).sum(axis=1)
+                primary_exp = self._expected_damages[0] * (num_alive if is_aoe_attack(primary_build) else 1)
+                fallback_exp = self._expected_damages[1] * (num_alive if is_aoe_attack(fallback_build) else 1)
+                use_primary[can_attack] = primary_exp >= fallback_exp
+            choice = np.where(use_primary, 0, 1)
+            tier_bonuses = [0, build.tier_bonus]
+        else:
+            from src.simulation import rank_attacks_by_scenario
+
+            # Attack priority depends only on the alive count and alive HP, so rank each distinct pair once
+            hp = self.hp[runs]
+            alive = hp > 0
+            scenario_keys = alive.sum(axis=1) * (int(self.max_hp.sum()) + 1) + np.where(alive, hp, 0).sum(axis=1)
+            _, first_runs, scenario_index = np.unique(scenario_keys, return_index=True, return_inverse=True)
+            priorities = np.array([
+                rank_attacks_by_scenario(build.builds, int(alive[first].sum()), int(hp[first][alive[first]].sum()))
+                for first in first_runs
+            ])[scenario_index.reshape(-1)]
+            available = np.stack([
+                self.check_limits(candidate.compiled, runs, turn_number, preview=True) != ATTACK_BASIC
+                for candidate in build.builds
+            ], axis=1)
+            available = np.take_along_axis(available, priorities, axis=1)
+            first_available = np.argmax(available, axis=1)
+            choice = np.where(available.any(axis=1), priorities[np.arange(len(runs)), first_available], 0)
+            tier_bonuses = [0] * len(build.builds)
+
+        groups = []
+        for attack_idx, count in enumerate(np.bincount(choice, minlength=len(build.builds))):
+            if count:
+                # Same totals as one record_attack_usage call per run and turn
+                build.attack_usage_counts[attack_idx] = build.attack_usage_counts.get(attack_idx, 0) + int(count)
+                groups.append((build.builds[attack_idx], np.flatnonzero(choice == attack_idx),
+                               tier_bonuses[attack_idx]))
+        return groups
+
+    def defender_phase(self, runs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Alive enemies attack back: 1 attack per alive enemy, at most 3 per turn.
+
+        Returns:
+            Per-run (attacks made, hits, damage taken)
+        """
+        attacker = self.attacker
+        enemy_build = self._enemy_compiled
+        attacks = np.minimum((self.hp[runs] > 0).sum(axis=1), 3)
+        hits = np.zeros(len(runs), dtype=np.int64)
+        damage_taken = np.zeros(len(runs), dtype=np.int64)
+        for attack_number in range(3):
+            attacking = np.flatnonzero(attacks > attack_number)
+            if len(attacking) == 0:
+                break
+            accuracy_roll = draw_d20(len(attacking))
+            hit = accuracy_roll + self._enemy_accuracy >= attacker.avoidance
+            hitting = attacking[hit]
+            if len(hitting) == 0:
+                continue
+            hit_runs = runs[hitting]
+            critical_bonus = np.where(accuracy_roll[hit] >= enemy_build.crit_threshold, self.defender.tier, 0)
+            damage = (draw_3d6_exploding(len(hitting)) + self._enemy_flat_damage + critical_bonus
+                      + self.empower_bonus[hit_runs])
+            self.empower_bonus[hit_runs] = 0
+            damage_dealt = np.maximum(0, damage - attacker.durability)
+            self.attacker_hp[hit_runs] -= damage_dealt
+            hits[hitting] += 1
+            damage_taken[hitting] += damage_dealt
+        return attacks, hits, damage_taken
+
+    def play_turn(self, build, runs: np.ndarray, turn_number: int):
+        """Attack, defender and end-of-turn phases for runs with enemies still alive after bleed"""
+        n = len(runs)
+        charged = np.zeros(n, dtype=bool)
+        total_damage = np.zeros(n, dtype=np.int64)
+        made_channeled = np.zeros(n, dtype=bool)
+        current_target = np.full(n, -1, dtype=np.int64)
+
+        for active_build, positions, tier_bonus in self.select_attacks(build, runs, turn_number):
+            group_runs = runs[positions]
+            if active_build.attack_type in AREA_ATTACK_TYPES:
+                group_charged, group_damage, group_channeled = self._area_turn(active_build, group_runs,
+                                                                               turn_number, tier_bonus)
+            else:
+                group_charged, group_damage, group_channeled, targets = self._single_turn(
+                    active_build, group_runs, turn_number, tier_bonus)
+                current_target[positions] = targets
+            charged[positions] = group_charged
+            total_damage[positions] = group_damage
+            made_channeled[positions] = group_channeled
+
+        self.charge_history[runs, 0] = self.charge_history[runs, 1]
+        self.charge_history[runs, 1] = charged
+
+        attacks, hits, damage_taken = self.defender_phase(runs)
+
+        # HP costs and recovery
+        attacker_hp = self.attacker_hp[runs] - self.attrition_cost[runs]
+        leech_hp = self.leech_hp[runs]
+        self.attacker_hp[runs] = np.where(leech_hp > 0, np.minimum(attacker_hp + leech_hp, self.attacker.max_hp),
+                                          attacker_hp)
+        self.attrition_cost[runs] = 0
+        self.leech_hp[runs] = 0
+
+        # Last-turn trackers read by limits next turn
+        flags = self.flags
+        flags['defeated_enemy_last_turn'][runs] = self.basic_kill[runs].any(axis=1)
+        flags['dealt_damage_last_turn'][runs] = (total_damage > 0) & ~charged
+        flags['hit_same_target_last_turn'][runs] = (current_target >= 0) & (current_target == self.last_target[runs])
+        self.last_target[runs] = current_target
+        was_hit = hits > 0
+        flags['was_hit_last_turn'][runs] = was_hit
+        flags['all_attacks_missed_last_turn'][runs] = (attacks > 0) & ~was_hit
+        flags['was_damaged_last_turn'][runs] = was_hit & (damage_taken > 0)
+        flags['was_hit_no_damage_last_turn'][runs] = was_hit & (damage_taken == 0)
+        self.empower_bonus[runs] = 0
+        self.channeled_turns[runs] = np.where(made_channeled, self.channeled_turns[runs] + 1, 0)
+
+
+def simulate_combat_batch(attacker: Character, build, num_runs: int, target_hp: int = 100,
+                          defender: Character = None, num_enemies: int = 1, enemy_hp: int = None,
+                          max_turns: int = 100, enemy_hp_list: List[int] = None,
+                          archetype: str = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate num_runs combats in lockstep with the simulate_combat_verbose rules.
+
+    Args:
+        enemy_hp_list: Optional list of HP values for mixed enemy groups.
+                       If provided, overrides num_enemies and enemy_hp.
+
+    Returns:
+        Tuple of (turns, won) arrays; runs that did not win timed out
+    """
+    if defender is None:
+        defender = Character(focus=0, power=0, mobility=3, endurance=0, tier=attacker.tier)
+    if enemy_hp_list is not None:
+        enemy_hps = list(enemy_hp_list)
+    else:
+        if enemy_hp is None:
+            enemy_hp = target_hp
+        enemy_hps = [enemy_hp] * num_enemies
+
+    combat = BatchCombat(attacker, defender, num_runs, enemy_hps, archetype)
+    turns = np.zeros(num_runs, dtype=np.int64)
+    won = np.zeros(num_runs, dtype=bool)
+    runs = np.arange(num_runs)
+    turn_number = 0
+    while True:
+        cleared = ~(combat.hp[runs] > 0).any(axis=1)
+        turns[runs[cleared]] = turn_number
+        won[runs[cleared]] = True
+        runs = runs[~cleared]
+        if len(runs) == 0 or turn_number >= max_turns:
+            break
+        turn_number += 1
+
+        combat.bleed_phase(runs)
+        # Runs whose last enemies died from bleed end this turn without attacking
+        fighting = runs[(combat.hp[runs] > 0).any(axis=1)]
+        if len(fighting):
+            combat.play_turn(build, fighting, turn_number)
+
+    turns[runs] = turn_number
+    return turns, won
+
+
+def run_simulation_batch_vectorized(attacker: Character, build, num_runs: int = 10,
+                                    target_hp: int = 100, defender: Character = None,
+                                    num_enemies: int = 1, enemy_hp: int = None, max_turns: int = 100,
+                                    enemy_hp_list: List[int] = None,
+                                    archetype: str = None) -> Tuple[List[int], float, float, dict]:
+    """
+    Drop-in replacement for run_simulation_batch using the lockstep engine.
+
+    Returns:
+        Tuple of (individual_results, average_turns, damage_per_turn, outcome_stats)
+        where outcome_stats = {"wins": int, "losses": int, "timeouts": int, "win_rate": float}
+    """
+    turns, won = simulate_combat_batch(attacker, build, num_runs, target_hp, defender,
+                                       num_enemies=num_enemies, enemy_hp=enemy_hp, max_turns=max_turns,
+                                       enemy_hp_list=enemy_hp_list, archetype=archetype)
+
+    if enemy_hp_list:
+        total_hp_pool = sum(enemy_hp_list)
+    else:
+        total_hp_pool = (enemy_hp if enemy_hp else target_hp) * num_enemies
+
+    avg_turns = float(turns.mean()) if num_runs > 0 else 0
+    dpt = total_hp_pool / avg_turns if avg_turns > 0 else 0
+    wins = int(won.sum())
+    outcome_stats = {
+        "wins": wins,
+        "losses": 0,
+        "timeouts": num_runs - wins,
+        "win_rate": (wins / num_runs * 100) if num_runs > 0 else 0
+    }
+    return turns.tolist(), avg_turns, dpt, outcome_stats
@@ -0,0 +1,218 @@
+"""
+Constraint-propagating enumeration of valid AttackBuilds.
+
+BuildGenerator used to build an AttackBuild for every upgrade x limit candidate
+and then run RuleValidator on it. This module uses the compiled rule tables of
+game_data (combined upgrade/limit bits) instead:
+- each option's conflict mask (union of its MUTUAL_EXCLUSIONS groups)
+- each attack type's forbidden-upgrade mask (ATTACK_TYPE_RESTRICTIONS, AOE_RESTRICTIONS)
+- prerequisite masks (PREREQUISITES)
+
+Upgrade sets are grown depth-first and cut as soon as they conflict or exceed
+the budget. Limit sets (none, one or two limits) are precomputed once; for each
+upgrade set the fitting limit sets depend only on the points left and on the
+limits the upgrades exclude, so they are memoized per (points left, excluded
+limits). No object is created until a build is requested, which gives:
+- count(): size of the space without materializing it
+- nth(i): random access to the i-th build
+- builds(start, stop): an index range, so sharding work is a matter of slicing
+- strata(by): index ranges per attack type or upgrade count, for stratified sampling
+
+Builds come out in the same order as the original generator: attack type,
+upgrade count, upgrade combinations in UPGRADES order, then no limit, single
+limits and limit pairs in LIMITS order.
+"""
+
+from bisect import bisect_right
+from itertools import combinations
+from typing import Dict, Generator, List, Tuple, Union
+
+from src.models import AttackBuild
+from src.game_data import (ATTACK_TYPES, UPGRADES, LIMITS, PREREQUISITES, UPGRADE_BITS, ATTACK_TYPE_IDS,
+                           FORBIDDEN_UPGRADE_MASKS, EXCLUSION_GROUP_MASKS, combined_bit)
+
+DEFAULT_ATTACK_TYPES = ['melee_ac', 'melee_dg', 'ranged', 'area', 'direct_damage', 'direct_area_damage']
+AOE_ATTACK_TYPES = ('area', 'direct_area_damage')
+
+MAX_UPGRADES = 3
+MAX_LIMITS = 2
+
+# Shared bit index: upgrades first, then limits (game_data's combined mask)
+UPGRADE_NAMES = list(UPGRADES)
+LIMIT_NAMES = list(LIMITS)
+_BIT = {name: combined_bit(name) for name in UPGRADE_NAMES + LIMIT_NAMES}
+LIMIT_MASK = sum(_BIT[name] for name in LIMIT_NAMES)
+
+
+def _conflict_masks() -> Dict[str, int]:
+    """Mask of every option each upgrade/limit shares an exclusion group with"""
+    conflicts = {name: 0 for name in _BIT}
+    for group_mask in EXCLUSION_GROUP_MASKS:
+        for name, bit in _BIT.items():
+            if group_mask & bit:
+                conflicts[name] |= group_mask & ~bit
+    return conflicts
+
+
+CONFLICTS = _conflict_masks()
+PREREQUISITE_MASKS = {
+    name: sum(_BIT[required] for required in required_list if required in _BIT)
+    for name, required_list in PREREQUISITES.items()
+}
+
+
+def allowed_upgrades(attack_type: str) -> List[str]:
+    """Upgrades the attack type may take (in UPGRADES order)"""
+    forbidden = FORBIDDEN_UPGRADE_MASKS[ATTACK_TYPE_IDS[attack_type]]
+    return [name for name in UPGRADE_NAMES if not forbidden & UPGRADE_BITS[name]]
+
+
+def _limit_options() -> List[Tuple[Tuple[str, ...], int, int]]:
+    """Every limit set of up to MAX_LIMITS limits without a mutual exclusion, as (names, mask, cost)"""
+    options = []
+    for count in range(MAX_LIMITS + 1):
+        for names in combinations(LIMIT_NAMES, count):
+            mask = 0
+            valid = True
+            for name in names:
+                if CONFLICTS[name] & mask:
+                    valid = False
+                    break
+                mask |= _BIT[name]
+            if valid:
+                options.append((names, mask, sum(LIMITS[name].cost for name in names)))
+    return options
+
+
+LIMIT_OPTIONS = _limit_options()
+
+
+class BuildEnumerator:
+    """
+    Indexed space of valid AttackBuilds for a point budget.
+
+    Example:
+        enumerator = BuildEnumerator(8, ['melee_dg', 'area'])
+        total = enumerator.count()
+        shard = list(enumerator.builds(0, total // 2))
+    """
+
+    def __init__(self, max_points: int, attack_types: List[str] = None):
+        self.max_points = max_points
+        self.attack_types = list(attack_types) if attack_types is not None else list(DEFAULT_ATTACK_TYPES)
+
+        # One block per (attack type, upgrade set): its fitting limit option indices
+        self._blocks: List[Tuple[str, Tuple[str, ...], Tuple[int, ...]]] = []
+        self._offsets: List[int] = [0]
+        self._limit_cache: Dict[Tuple[int, int], Tuple[int, ...]] = {}
+
+        for attack_type in self.attack_types:
+            # Upgrades and limits both cost double on AOE attacks
+            multiplier = 2 if attack_type in AOE_ATTACK_TYPES else 1
+            points = (self.max_points - ATTACK_TYPES[attack_type].cost) // multiplier
+            if points < 0:
+                continue
+            candidates = [name for name in allowed_upgrades(attack_type) if UPGRADES[name].cost <= points]
+            for count in range(MAX_UPGRADES + 1):
+                self._add_upgrade_sets(attack_type, candidates, count, points)
+
+    def _add_upgrade_sets(self, attack_type: str, candidates: List[str], count: int, points: int):
+        """Depth-first upgrade sets of exactly count upgrades, cut on conflicts and budget"""
+        chosen = []
+
+        def extend(start: int, mask: int, excluded: int, cost: int):
+            if len(chosen) == count:
+                if any(PREREQUISITE_MASKS.get(name, 0) & ~mask for name in chosen):
+                    return
+                limits = self._fitting_limits(points - cost, excluded & LIMIT_MASK)
+                if limits:
+                    self._blocks.append((attack_type, tuple(chosen), limits))
+                    self._offsets.append(self._offsets[-1] + len(limits))
+                return
+            for index in range(start, len(candidates)):
+                name = candidates[index]
+                bit = _BIT[name]
+                upgrade_cost = UPGRADES[name].cost
+                if excluded & bit or cost + upgrade_cost > points:
+                    continue
+                chosen.append(name)
+                extend(index + 1, mask | bit, excluded | CONFLICTS[name], cost + upgrade_cost)
+                chosen.pop()
+
+        extend(0, 0, 0, 0)
+
+    def _fitting_limits(self, points_left: int, excluded: int) -> Tuple[int, ...]:
+        """Indices of limit options within points_left that avoid the excluded limits"""
+        key = (points_left, excluded)
+        limits = self._limit_cache.get(key)
+        if limits is None:
+            limits = tuple(index for index, (_, mask, cost) in enumerate(LIMIT_OPTIONS)
+                           if cost <= points_left and not mask & excluded)
+            self._limit_cache[key] = limits
+        return limits
+
+    def count(self) -> int:
+        """Number of valid builds (nothing is materialized)"""
+        return self._offsets[-1]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def nth(self, index: int) -> AttackBuild:
+        """The build at a position of the enumeration order"""
+        if index < 0:
+            index += self.count()
+        if not 0 <= index < self.count():
+            raise IndexError(f"build index {index} out of range for {self.count()} builds")
+        block = bisect_right(self._offsets, index) - 1
+        attack_type, upgrades, limits = self._blocks[block]
+        limit_names = LIMIT_OPTIONS[limits[index - self._offsets[block]]][0]
+        return AttackBuild(attack_type, upgrades, limit_names)
+
+    def builds(self, start: int = 0, stop: int = None) -> Generator[AttackBuild, None, None]:
+        """
+        Builds with indices in [start, stop) in enumeration order.
+
+        Args:
+            start: First index (inclusive)
+            stop: Last index (exclusive, None = end)
+        """
+        stop = self.count() if stop is None else min(stop, self.count())
+        if start >= stop:
+            return
+        block = bisect_right(self._offsets, start) - 1
+        position = start - self._offsets[block]
+        index = start
+        while index < stop:
+            attack_type, upgrades, limits = self._blocks[block]
+            for limit_index in limits[position:position + stop - index]:
+                yield AttackBuild(attack_type, upgrades, LIMIT_OPTIONS[limit_index][0])
+            index = self._offsets[block + 1]
+            block += 1
+            position = 0
+
+    def __iter__(self):
+        return self.builds()
+
+    def strata(self, by: str) -> Dict[Union[str, int], List[Tuple[int, int]]]:
+        """
+        Index ranges of each stratum, in enumeration order.
+
+        Blocks are ordered by attack type and then upgrade count, so every
+        stratum is a short list of contiguous [start, stop) ranges.
+
+        Args:
+            by: "attack_type" or "upgrade_count"
+        """
+        if by not in ('attack_type', 'upgrade_count'):
+            raise ValueError(f"Unknown stratum '{by}' (expected 'attack_type' or 'upgrade_count')")
+        ranges: Dict[Union[str, int], List[Tuple[int, int]]] = {}
+        for block, (attack_type, upgrades, _) in enumerate(self._blocks):
+            key = attack_type if by == 'attack_type' else len(upgrades)
+            start, stop = self._offsets[block], self._offsets[block + 1]
+            key_ranges = ranges.setdefault(key, [])
+            if key_ranges and key_ranges[-1][1] == start:
+                key_ranges[-1] = (key_ranges[-1][0], stop)
+            else:
+                key_ranges.append((start, stop))
+        return ranges
@@ -2,10 +2,11 @@
 Build generation and validation for the Vitality System.
 """
 
-import itertools
-from typing import List, Generator
+from typing import List, Generator, Optional
+import numpy as np
 from src.models import AttackBuild
-from src.game_data import UPGRADES, LIMITS, RuleValidator, MUTUAL_EXCLUSIONS
+from src.game_data import UPGRADES, LIMITS
+from src.build_enumerator import BuildEnumerator
 
 
 class BuildGenerator:
@@ -20,81 +21,11 @@ class BuildGenerator:
 
     def generate_builds_chunked(self, attack_types: List[str] = None, chunk_size: int = None) -> Generator[AttackBuild, None, None]:
         """Generate valid builds as a chunked generator to reduce memory usage"""
-        if attack_types is None:
-            attack_types = ['melee_ac', 'melee_dg', 'ranged', 'area', 'direct_damage', 'direct_area_damage']
-
-        # Generate builds for each attack type
-        for attack_type in attack_types:
-            # Generate upgrade combinations of varying sizes (0 to 3 upgrades)
-            for max_upgrade_count in range(0, 4):  # 0, 1, 2, 3 upgrades
-                upgrade_combinations = self._generate_upgrade_combinations(
-                    attack_type, max_upgrade_count
-                )
-
-                for upgrades in upgrade_combinations:
-                    # Generate all valid limit combinations for this upgrade set
-                    limit_combinations = self._generate_limit_combinations(upgrades)
-
-                    for limits in limit_combinations:
-                        build = AttackBuild(attack_type, upgrades, limits)
-                        if build.is_valid(self.max_points):
-                            yield build
-
-    def _generate_upgrade_combinations(self, attack_type: str, max_count: int) -> List[List[str]]:
-        """Generate all valid upgrade combinations for given attack type"""
-        available_upgrades = list(UPGRADES.keys())
-        combinations = []
-
-        # Generate combinations of exactly max_count size (not "or smaller" to avoid duplicates)
-        for combo in itertools.combinations(available_upgrades, max_count):
-            upgrades = list(combo)
-
-            # Check if this combination is valid according to rules
-            is_valid, errors = RuleValidator.validate_combination(attack_type, upgrades)
-            if is_valid:
-                # Quick cost check to avoid expensive builds early
-                total_cost = sum(UPGRADES[u].cost for u in upgrades)
-                if total_cost <= self.max_points:
-                    combinations.append(upgrades)
-
-        return combinations
-
-    def _generate_limit_combinations(self, upgrades: List[str]) -> List[List[str]]:
-        """Generate all valid limit combinations that fit within budget"""
-        # Calculate remaining points after upgrades
-        upgrade_cost = sum(UPGRADES[u].cost for u in upgrades)
-        remaining_points = self.max_points - upgrade_cost
-
-        if remaining_points < 0:
-            return [[]]  # No limits possible
-
-        limit_combinations = [[]]  # Always include no limits option
-
-        # Generate single limit combinations
-        for limit_name, limit in LIMITS.items():
-            if limit.cost <= remaining_points:
-                limit_combinations.append([limit_name])
-
-        # Generate two-limit combinations (with mutual exclusion rules)
-        limit_names = list(LIMITS.keys())
-        for limit1, limit2 in itertools.combinations(limit_names, 2):
-            # Skip mutually exclusive limits
-            if self._are_limits_mutually_exclusive(limit1, limit2):
-                continue
-
-            cost1, cost2 = LIMITS[limit1].cost, LIMITS[limit2].cost
-            if cost1 + cost2 <= remaining_points:
-                limit_combinations.append([limit1, limit2])
-
-        return limit_combinations
-
-    def _are_limits_mutually_exclusive(self, limit1: str, limit2: str) -> bool:
-        """Check if two limits are mutually exclusive"""
-        # Check if they're in the same mutual exclusion group
-        for exclusion_group in MUTUAL_EXCLUSIONS:
-            if limit1 in exclusion_group and limit2 in exclusion_group:
-                return True
-        return False
+        yield from BuildEnumerator(self.max_points, attack_types).builds()
+
+    def count_builds(self, attack_types: List[str] = None) -> int:
+        """Number of valid builds, without generating them"""
+        return BuildEnumerator(self.max_points, attack_types).count()
 
 
 def generate_valid_builds(max_points: int = 60, attack_types: List[str] = None) -> List[AttackBuild]:
@@ -109,6 +40,74 @@ def generate_valid_builds_chunked(max_points: int = 60, attack_types: List[str]
     return generator.generate_builds_chunked(attack_types, chunk_size)
 
 
+def sample_valid_builds(max_points: int = 60, attack_types: List[str] = None, fraction: float = None,
+                        count: int = None, seed: Optional[int] = None,
+                        stratify: Optional[str] = None) -> Generator[AttackBuild, None, None]:
+    """
+    Draw a uniform sample of valid builds without generating the full build list.
+
+    Indices are drawn from the enumerator's count and unranked with nth(), so
+    memory grows with the sample size only.
+
+    Args:
+        max_points: Point budget per attack
+        attack_types: Attack types to sample from (None = all)
+        fraction: Fraction of the build space to draw (ignored if count is given)
+        count: Exact number of builds to draw
+        seed: Seed for the draw (same seed = same sample, None = fresh entropy)
+        stratify: None for a plain uniform draw, or "attack_type"/"upgrade_count" to
+                  split the sample across strata in proportion to their size (every
+                  stratum gets at least one build when the sample is large enough)
+
+    Yields:
+        Sampled AttackBuild objects in enumeration order (no duplicates)
+    """
+    enumerator = BuildEnumerator(max_points, attack_types)
+    total = enumerator.count()
+    if count is None:
+        count = max(1, int(total * fraction))
+    count = min(count, total)
+    if count <= 0:
+        return
+
+    strata = enumerator.strata(stratify) if stratify else {None: [(0, total)]}
+    stratum_ranges = list(strata.values())
+    stratum_sizes = [sum(stop - start for start, stop in ranges) for ranges in stratum_ranges]
+    allocation = _allocate_sample(stratum_sizes, count)
+
+    rng = np.random.default_rng(seed)
+    indices = []
+    for ranges, size, draws in zip(stratum_ranges, stratum_sizes, allocation):
+        if draws == 0:
+            continue
+        # Position within the stratum -> index of the enumeration
+        positions = np.sort(rng.choice(size, draws, replace=False))
+        starts = np.array([start for start, _ in ranges])
+        range_offsets = np.cumsum([0] + [stop - start for start, stop in ranges])
+        which = np.searchsorted(range_offsets, positions, side='right') - 1
+        indices.extend((starts[which] + positions - range_offsets[which]).tolist())
+
+    for index in sorted(indices):
+        yield enumerator.nth(index)
+
+
+def _allocate_sample(stratum_sizes: List[int], sample_size: int) -> List[int]:
+    """Split a sample across strata in proportion to size (largest remainder, one per stratum first)"""
+    allocation = [1] * len(stratum_sizes) if sample_size >= len(stratum_sizes) else [0] * len(stratum_sizes)
+    remaining = sample_size - sum(allocation)
+    capacity = [size - taken for size, taken in zip(stratum_sizes, allocation)]
+    total_capacity = sum(capacity)
+    if remaining <= 0 or total_capacity == 0:
+        return allocation
+
+    quotas = [remaining * free / total_capacity for free in capacity]
+    extra = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(quotas)), key=lambda i: extra[i] - quotas[i])
+    for i in by_remainder[:remaining - sum(extra)]:
+        extra[i] += 1
+    return [taken + added for taken, added in zip(allocation, extra)]
+
+
 def generate_single_upgrade_builds(max_points: int = 60, attack_types: List[str] = None) -> List[AttackBuild]:
     """Generate builds with exactly one upgrade for testing individual upgrade effectiveness"""
     valid_builds = []
@@ -117,12 +116,10 @@ def generate_single_upgrade_builds(max_points: int = 60, attack_types: List[str]
 
     for attack_type in attack_types:
         for upgrade_name in UPGRADES.keys():
-            # Check if upgrade is compatible with attack type
-            is_valid, _ = RuleValidator.validate_combination(attack_type, [upgrade_name])
-            if is_valid:
-                build = AttackBuild(attack_type, [upgrade_name], [])
-                if build.is_valid(max_points):
-                    valid_builds.append(build)
+            # is_valid checks compatibility with the attack type (compiled rule tables)
+            build = AttackBuild(attack_type, [upgrade_name], [])
+            if build.is_valid(max_points):
+                valid_builds.append(build)
 
     return valid_builds
 
@@ -137,12 +134,10 @@ def generate_slayer_builds(max_points: int = 60, attack_types: List[str] = None)
 
     for attack_type in attack_types:
         for slayer_upgrade in slayer_upgrades:
-            # Check if slayer upgrade is compatible with attack type
-            is_valid, _ = RuleValidator.validate_combination(attack_type, [slayer_upgrade])
-            if is_valid:
-                build = AttackBuild(attack_type, [slayer_upgrade], [])
-                if build.is_valid(max_points):
-                    valid_builds.append(build)
+            # is_valid checks compatibility with the attack type (compiled rule tables)
+            build = AttackBuild(attack_type, [slayer_upgrade], [])
+            if build.is_valid(max_points):
+                valid_builds.append(build)
 
     return valid_builds
 
@@ -162,7 +157,7 @@ def generate_limit_builds(max_points: int = 60, attack_types: List[str] = None)
     return valid_builds
 
 
-def generate_archetype_builds_chunked(archetype: str, tier: int, attack_types: List[str] = None, chunk_size: int = 1000, max_points_per_attack: int = None, config=None) -> Generator:
+def generate_archetype_builds_chunked(archetype: str, tier: int, attack_types: List[str] = None, chunk_size: int = 1000, max_points_per_attack: int = None, config=None, dominance_audit: list = None) -> Generator:
     """
     Generate builds for a specific archetype as a chunked generator
 
@@ -173,33 +168,93 @@ def generate_archetype_builds_chunked(archetype: str, tier: int, attack_types: L
         chunk_size: Size of chunks for memory efficiency
         max_points_per_attack: Override max points calculation (if None, calculated from tier+archetype)
         config: Optional SimConfigV2 config object for pruning
+        dominance_audit: Optional list receiving a DominatedBuild for every build dropped by
+                         dominance pruning (config.dominance_pruning)
 
     Yields:
         For focused: AttackBuild objects
         For dual_natured/versatile_master: MultiAttackBuild objects
     """
-    from src.models import MultiAttackBuild
-
     # Calculate max points per attack if not provided
     if max_points_per_attack is None:
-        tier_archetype_levels = {
-            3: {"focused": 6, "dual_natured": 4, "versatile_master": 2},
-            4: {"focused": 8, "dual_natured": 6, "versatile_master": 4},
-            5: {"focused": 10, "dual_natured": 8, "versatile_master": 6},
-        }
-        max_points_per_attack = tier_archetype_levels.get(tier, {}).get(archetype, 2)
+        max_points_per_attack = _max_points_per_attack(tier, archetype)
 
     if archetype == "focused":
         # For focused archetype, just generate single builds
-        yield from generate_valid_builds_chunked(max_points_per_attack, attack_types, chunk_size)
+        yield from _single_builds(max_points_per_attack, attack_types, config, chunk_size,
+                                  archetype=archetype, dominance_audit=dominance_audit)
+
+    else:
+        # Multi-attack archetypes: MultiAttackBuilds are created one at a time from an index space
+        yield from generate_archetype_build_space(archetype, tier, attack_types, max_points_per_attack, config,
+                                                  dominance_audit)
+
+
+def generate_archetype_build_space(archetype: str, tier: int, attack_types: List[str] = None,
+                                   max_points_per_attack: int = None, config=None, dominance_audit: list = None):
+    """
+    Index space of dual_natured or versatile_master builds (see src/multi_build_space.py)
+
+    Only the candidate AttackBuilds are generated; each MultiAttackBuild is created when it is
+    requested, so the space can be counted, sliced and streamed without holding every set.
+
+    Args:
+        archetype: "dual_natured" or "versatile_master"
+        tier: Character tier (determines points per attack)
+        attack_types: List of attack types to consider
+        max_points_per_attack: Override max points calculation (if None, calculated from tier+archetype)
+        config: Optional SimConfigV2 config object for pruning and archetype settings
+        dominance_audit: Optional list receiving the single builds dropped by dominance pruning
+
+    Returns:
+        MultiBuildSpace
+    """
+    if max_points_per_attack is None:
+        max_points_per_attack = _max_points_per_attack(tier, archetype)
+
+    if archetype == "dual_natured":
+        return _dual_natured_space(max_points_per_attack, attack_types, config, dominance_audit)
+    if archetype == "versatile_master":
+        return _versatile_master_space(max_points_per_attack, attack_types, config, dominance_audit)
+    raise ValueError(f"'{archetype}' is not a multi-attack archetype")
+
+
+def _max_points_per_attack(tier: int, archetype: str) -> int:
+    """Points per attack for a tier and archetype"""
+    tier_archetype_levels = {
+        3: {"focused": 6, "dual_natured": 4, "versatile_master": 2},
+        4: {"focused": 8, "dual_natured": 6, "versatile_master": 4},
+        5: {"focused": 10, "dual_natured": 8, "versatile_master": 6},
+    }
+    return tier_archetype_levels.get(tier, {}).get(archetype, 2)
+
+
+def _single_builds(max_points: int, attack_types: List[str] = None, config=None, chunk_size: int = 10000,
+                   archetype: str = 'focused', dominance_audit: list = None) -> Generator[AttackBuild, None, None]:
+    """
+    All valid single builds, or a seeded sample of them when config.build_sampling is enabled.
+
+    With config.dominance_pruning enabled, builds that are provably never better than a
+    cheaper sibling are dropped (see src/dominance.py). Only the focused archetype uses
+    the "weaker" rules; the others choose between attacks and keep to equivalent builds.
+    """
+    sampling = getattr(config, 'build_sampling', None)
+    if sampling is None or not sampling.enabled:
+        builds = generate_valid_builds_chunked(max_points, attack_types, chunk_size)
+    else:
+        sample_seed = sampling.seed if sampling.seed is not None else config.random_seed
+        builds = sample_valid_builds(max_points, attack_types, fraction=sampling.fraction, count=sampling.count,
+                                     seed=sample_seed, stratify=sampling.stratify)
 
-    elif archetype == "dual_natured":
-        # Generate all pairs of builds
-        yield from _generate_dual_natured_builds(max_points_per_attack, attack_types, config)
+    dominance = getattr(config, 'dominance_pruning', None)
+    if dominance is not None and dominance.enabled:
+        from src.models import Character
+        from src.dominance import DominanceAnalyzer
 
-    elif archetype == "versatile_master":
-        # Generate all sets of 5 builds (with optional pruning)
-        yield from _generate_versatile_master_builds(max_points_per_attack, attack_types, config)
+        analyzer = DominanceAnalyzer(config.scenarios, [Character(*config.defender_stats)],
+                                     allow_weaker=archetype == 'focused')
+        builds = analyzer.prune(builds, dominance_audit)
+    yield from builds
 
 
 def _prune_builds_by_performance(
@@ -208,7 +263,8 @@ def _prune_builds_by_performance(
     defender_stats: List[int],
     scenarios,
     simulation_runs: int,
-    top_percent: float
+    top_percent: float,
+    common_seed: Optional[int] = None
 ) -> List[AttackBuild]:
     """
     Test builds quickly and return only top performers.
@@ -220,12 +276,13 @@ def _prune_builds_by_performance(
         scenarios: List of ScenarioConfig objects to test against
         simulation_runs: Number of simulation runs per scenario
         top_percent: Fraction of builds to keep (0.05 = top 5%)
+        common_seed: Base seed for common random numbers (every build replays the
+                     same dice per scenario), or None for independent dice
 
     Returns:
         List of top performing builds sorted by avg_turns (ascending)
     """
     from src.models import Character
-    from src.simulation import run_simulation_batch
 
     attacker = Character(*attacker_stats)
     defender = Character(*defender_stats)
@@ -240,20 +297,7 @@ def _prune_builds_by_performance(
             print(f"    Progress: {i + 1}/{len(builds)} builds tested")
 
         # Run simulation against all scenarios and average the results
-        scenario_turns = []
-        for scenario in scenarios:
-            if scenario.enemy_hp_list:
-                _, avg_turns, _, _ = run_simulation_batch(
-                    attacker, build, simulation_runs, 100, defender,
-                    enemy_hp_list=scenario.enemy_hp_list
-                )
-            else:
-                _, avg_turns, _, _ = run_simulation_batch(
-                    attacker, build, simulation_runs, 100, defender,
-                    num_enemies=scenario.num_enemies,
-                    enemy_hp=scenario.enemy_hp
-                )
-            scenario_turns.append(avg_turns)
+        scenario_turns = _quick_scenario_turns(build, attacker, defender, scenarios, simulation_runs, common_seed)
 
         # Average performance across all scenarios
         overall_avg_turns = sum(scenario_turns) / len(scenario_turns)
@@ -272,6 +316,82 @@ def _prune_builds_by_performance(
     return pruned_builds
 
 
+def _quick_scenario_turns(build: AttackBuild, attacker, defender, scenarios, simulation_runs: int,
+                          common_seed: Optional[int] = None) -> List[float]:
+    """Avg turns of a build per scenario from a quick plain simulation (used by pruning)"""
+    from src.exact_solver import solve_or_simulate_batch
+    from src.dice import seed_common
+
+    scenario_turns = []
+    for scenario_index, scenario in enumerate(scenarios):
+        if common_seed is not None:
+            seed_common(common_seed, 'pruning', scenario_index)
+        # Plain simulation (no solver/batch engine), routed through the result cache
+        if scenario.enemy_hp_list:
+            _, avg_turns, _, _ = solve_or_simulate_batch(
+                attacker, build, simulation_runs, 100, defender,
+                enemy_hp_list=scenario.enemy_hp_list,
+                use_exact_solver=False, use_batch_engine=False
+            )
+        else:
+            _, avg_turns, _, _ = solve_or_simulate_batch(
+                attacker, build, simulation_runs, 100, defender,
+                num_enemies=scenario.num_enemies,
+                enemy_hp=scenario.enemy_hp,
+                use_exact_solver=False, use_batch_engine=False
+            )
+        scenario_turns.append(avg_turns)
+    return scenario_turns
+
+
+def _prune_builds_with_surrogate(
+    builds: List[AttackBuild],
+    attacker_stats: List[int],
+    defender_stats: List[int],
+    scenarios,
+    simulation_runs: int,
+    top_percent: float,
+    surrogate,
+    seed: Optional[int] = None,
+    common_seed: Optional[int] = None
+) -> List[AttackBuild]:
+    """
+    Like _prune_builds_by_performance, but only a training sample is simulated.
+
+    The surrogate (see src/surrogate.py) predicts the other builds; training builds
+    are ranked by their simulated turns and the rest by prediction.
+
+    Args:
+        surrogate: SurrogateConfig (model, train_size, top_fraction)
+        seed: Training sample seed
+        Other arguments as for _prune_builds_by_performance
+
+    Returns:
+        List of top builds sorted by (simulated or predicted) avg_turns (ascending)
+    """
+    from src.models import Character
+    from src.surrogate import FeatureEncoder, SurrogateScreen
+
+    attacker = Character(*attacker_stats)
+    defender = Character(*defender_stats)
+
+    print(f"  Pruning {len(builds)} builds with the surrogate (keeping top {top_percent*100:.1f}%)...")
+    print(f"    Simulating {min(surrogate.train_size, len(builds))} training builds "
+          f"with {simulation_runs} runs per scenario")
+    screen = SurrogateScreen(FeatureEncoder(attacker, [defender], scenarios), keep_fraction=top_percent,
+                             explore_fraction=0.0, train_size=surrogate.train_size, model=surrogate.model,
+                             top_fraction=surrogate.top_fraction, seed=seed)
+    result = screen.run(builds, lambda train: np.array(
+        [_quick_scenario_turns(build, attacker, defender, scenarios, simulation_runs, common_seed)
+         for build in train]))
+
+    keep_count = max(1, int(len(builds) * top_percent))
+    ranked = np.argsort(result.scores, kind='stable')[:keep_count]
+    print(f"    Pruned to {keep_count} builds (from {len(builds)})")
+    print(f"    Holdout: {result.calibration.summary()}")
+    return [builds[index] for index in ranked]
+
+
 def _apply_stratified_sampling(builds: List[AttackBuild], top_n_per_type: int) -> List[AttackBuild]:
     """
     Apply stratified sampling to ensure diversity across attack types and upgrade combinations.
@@ -282,7 +402,7 @@ def _apply_stratified_sampling(builds: List[AttackBuild], top_n_per_type: int) -
 
     Args:
         builds: List of AttackBuild objects (assumed to be pre-sorted by performance)
-        top_n_per_type: Maximum number of builds to keep per attack type
+        top_n_per_type: Maximum number of builds to keep per attack type (None = no cap)
 
     Returns:
         Curated list with diverse attack type and upgrade representation
@@ -313,7 +433,7 @@ def _apply_stratified_sampling(builds: List[AttackBuild], top_n_per_type: int) -
             diverse_builds.append(sig_builds[0])
 
         # Take top N diverse builds (or all if fewer than N)
-        selected = diverse_builds[:min(top_n_per_type, len(diverse_builds))]
+        selected = diverse_builds if top_n_per_type is None else diverse_builds[:top_n_per_type]
         curated.extend(selected)
 
         print(f"    {attack_type}: {len(selected)} builds with {len(selected)} unique patterns "
@@ -322,18 +442,23 @@ def _apply_stratified_sampling(builds: List[AttackBuild], top_n_per_type: int) -
     return curated
 
 
-def _generate_dual_natured_builds(max_points_per_attack: int, attack_types: List[str] = None, config=None) -> Generator:
-    """Generate dual-natured builds with multiple fallback attack types.
+def _dual_natured_space(max_points_per_attack: int, attack_types: List[str] = None, config=None,
+                        dominance_audit: list = None):
+    """Dual-natured builds with multiple fallback attack types.
 
-    For each valid primary build, generates one MultiAttackBuild per fallback type.
+    Each valid primary build is paired with a basic attack of each fallback type.
     Each primary+fallback combination is a distinct build for ranking purposes.
 
     Args:
         max_points_per_attack: Maximum points allowed per attack
         attack_types: List of attack types to consider for primary attacks
         config: SimConfigV2 config object (for dual_natured settings)
+        dominance_audit: Optional list receiving the primaries dropped by dominance pruning
+
+    Returns:
+        MultiBuildSpace of (primary, fallback) pairs, primary-major
     """
-    from src.models import MultiAttackBuild, AttackBuild
+    from src.multi_build_space import MultiBuildSpace
 
     if attack_types is None:
         attack_types = ['melee_ac', 'melee_dg', 'ranged', 'area', 'direct_damage', 'direct_area_damage']
@@ -346,74 +471,73 @@ def _generate_dual_natured_builds(max_points_per_attack: int, attack_types: List
         fallback_attacks = ['melee_dg']  # Default fallback
         tier_bonus = 1  # Default tier bonus
 
-    # Generate all valid builds for the primary attack slot
-    for primary_build in generate_valid_builds_chunked(max_points_per_attack, attack_types, chunk_size=10000):
-        # For each fallback type, create a separate MultiAttackBuild
-        for fallback_type in fallback_attacks:
-            # Create basic fallback attack (no upgrades, no limits)
-            fallback_build = AttackBuild(fallback_type, [], [])
-
-            # Create multi-attack build: [primary with upgrades/limits, fallback basic]
-            multi_build = MultiAttackBuild(
-                builds=[primary_build, fallback_build],
-                archetype="dual_natured",
-                fallback_type=fallback_type,
-                tier_bonus=tier_bonus
-            )
-            yield multi_build
+    # Valid builds for the primary attack slot (interned AttackBuilds, not pairs)
+    primaries = list(_single_builds(max_points_per_attack, attack_types, config,
+                                    archetype='dual_natured', dominance_audit=dominance_audit))
+    return MultiBuildSpace.dual_natured(primaries, fallback_attacks, tier_bonus)
+
 
+def _versatile_master_space(max_points_per_attack: int, attack_types: List[str] = None, config=None,
+                            dominance_audit: list = None):
+    """All sets of config.versatile_master.set_size builds for versatile master archetype
 
-def _generate_versatile_master_builds(max_points_per_attack: int, attack_types: List[str] = None, config=None) -> Generator:
-    """Generate all valid sets of 3 builds for versatile master archetype
+    Candidates are the valid single builds, optionally pruned by performance, then capped
+    at config.pruning.top_k_per_slot diverse builds per attack type.
 
     Args:
         max_points_per_attack: Maximum points per attack
         attack_types: List of attack types to consider
         config: Optional SimConfigV2 config object for pruning
+        dominance_audit: Optional list receiving the single builds dropped by dominance pruning
+
+    Returns:
+        MultiBuildSpace of candidate multisets
     """
-    from src.models import MultiAttackBuild
+    from src.multi_build_space import MultiBuildSpace
 
     if attack_types is None:
         attack_types = ['melee_ac', 'melee_dg', 'ranged', 'area', 'direct_damage', 'direct_area_damage']
 
     # Generate all valid single builds first
-    all_builds = list(generate_valid_builds_chunked(max_points_per_attack, attack_types, chunk_size=10000))
+    all_builds = list(_single_builds(max_points_per_attack, attack_types, config,
+                                     archetype='versatile_master', dominance_audit=dominance_audit))
 
     print(f"  Generated {len(all_builds)} single builds for versatile_master")
 
     # Apply pruning if enabled
     if config and hasattr(config, 'pruning') and config.pruning.enabled:
         print(f"  Pruning enabled - reducing build set before combination generation")
-        all_builds = _prune_builds_by_performance(
-            builds=all_builds,
-            attacker_stats=config.attacker_stats,
-            defender_stats=config.defender_stats,
-            scenarios=config.scenarios,
-            simulation_runs=config.pruning.simulation_runs,
-            top_percent=config.pruning.top_percent
-        )
-
-    # Apply stratified sampling for diversity
-    curated_builds = _apply_stratified_sampling(all_builds, top_n_per_type=50)
-    print(f"  After diversity-aware curation: {len(curated_builds)} builds (from {len(all_builds)})")
-
-    # Calculate expected number of combinations
-    import itertools
-    n = len(curated_builds)
-    expected_combos = (n + 2) * (n + 1) * n // 6  # Formula for C(n+2, 3)
-    print(f"  Generating combinations of 3 from {n} builds...")
-    print(f"  Expected total combinations: {expected_combos:,}")
-
-    combo_count = 0
-    progress_interval = 50000
-    for build_combo in itertools.combinations_with_replacement(curated_builds, 3):
-        multi_build = MultiAttackBuild(list(build_combo), "versatile_master")
-        combo_count += 1
-
-        if combo_count % progress_interval == 0:
-            progress_pct = (combo_count / expected_combos) * 100
-            print(f"    Progress: {combo_count:,}/{expected_combos:,} ({progress_pct:.1f}%)")
+        common_seed = config.random_seed if getattr(config, 'common_random_numbers', False) else None
+        surrogate = getattr(config, 'surrogate', None)
+        if surrogate is not None and surrogate.enabled:
+            all_builds = _prune_builds_with_surrogate(
+                builds=all_builds,
+                attacker_stats=config.attacker_stats,
+                defender_stats=config.defender_stats,
+                scenarios=config.scenarios,
+                simulation_runs=config.pruning.simulation_runs,
+                top_percent=config.pruning.top_percent,
+                surrogate=surrogate,
+                seed=surrogate.seed if surrogate.seed is not None else config.random_seed,
+                common_seed=common_seed
+            )
+        else:
+            all_builds = _prune_builds_by_performance(
+                builds=all_builds,
+                attacker_stats=config.attacker_stats,
+                defender_stats=config.defender_stats,
+                scenarios=config.scenarios,
+                simulation_runs=config.pruning.simulation_runs,
+                top_percent=config.pruning.top_percent,
+                common_seed=common_seed
+            )
 
-        yield multi_build
+    # Apply stratified sampling for diversity (top K candidates per attack type)
+    top_k = config.pruning.top_k_per_slot if config and hasattr(config, 'pruning') else 50
+    curated_builds = _apply_stratified_sampling(all_builds, top_n_per_type=top_k)
+    print(f"  After diversity-aware curation: {len(curated_builds)} builds (from {len(all_builds)})")
 
-    print(f"  Generated {combo_count:,} versatile_master combinations")
+    set_size = config.versatile_master.set_size if config and hasattr(config, 'versatile_master') else 3
+    space = MultiBuildSpace.versatile_master(curated_builds, set_size)
+    print(f"  Combinations of {set_size} from {len(curated_builds)} builds: {space.count():,} (generated lazily)")
+    return space
@@ -2,36 +2,19 @@
 Combat mechanics and attack resolution for the Vitality System.
 """
 
-import random
-import copy
 from typing import List, Tuple, Optional
-from src.models import Character, AttackBuild
+from src.models import Character, AttackBuild, CombatState
 from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
-
-# Pre-generate random number cache for performance
-_DICE_CACHE_SIZE = 10000
-_d20_cache = [random.randint(1, 20) for _ in range(_DICE_CACHE_SIZE)]
-_d6_cache = [random.randint(1, 6) for _ in range(_DICE_CACHE_SIZE)]
-_cache_index = [0]  # Use list to allow modification in nested scope
-
-
-def _get_cached_d20() -> int:
-    """Get a cached d20 roll"""
-    idx = _cache_index[0]
-    _cache_index[0] = (idx + 1) % _DICE_CACHE_SIZE
-    return _d20_cache[idx]
-
-
-def _get_cached_d6() -> int:
-    """Get a cached d6 roll"""
-    idx = _cache_index[0]
-    _cache_index[0] = (idx + 1) % _DICE_CACHE_SIZE
-    return _d6_cache[idx]
-
-
-def roll_d20() -> int:
-    """Roll a single d20"""
-    return _get_cached_d20()
+from src.dice import roll_d20, roll_d6, roll_3d6_exploding_total, roll_3d6_exploding_5_6_total
+from src.tracer import (
+    CombatTracer, as_tracer, EVENT_ATTACK, EVENT_LIMIT, EVENT_ROLL, EVENT_DAMAGE, EVENT_EFFECT,
+)
+from src.compiled_build import (
+    CompiledBuild, LIMIT_PREDICATES, LIMIT_RULES, limit_rule,
+    LIMIT_ATTRITION, LIMIT_CHARGES, LIMIT_COOLDOWN, LIMIT_DC,
+    DICE_FLAT_15, DICE_EXPLODE_5_6,
+    FLAT_ACCURACY_PENALTY_UPGRADES, FLAT_DAMAGE_PENALTY_UPGRADES,
+)
 
 
 def roll_3d6_exploding() -> Tuple[int, List[str]]:
@@ -40,19 +23,75 @@ def roll_3d6_exploding() -> Tuple[int, List[str]]:
     dice_detail = []
     for _ in range(3):
         die_total = 0
-        die = _get_cached_d6()
+        die = roll_d6()
         die_total += die
         dice_detail.append(str(die))
         while die == 6:
-            die = _get_cached_d6()
+            die = roll_d6()
             die_total += die
             dice_detail[-1] += f"+{die}"
         total += die_total
     return total, dice_detail
 
 
+def sample_3d6_exploding() -> int:
+    """Draw a 3d6 exploding-on-6 total from the exact table (no per-die detail)"""
+    return roll_3d6_exploding_total()
+
+
+def sample_3d6_exploding_5_6() -> int:
+    """Draw a 3d6 exploding-on-5/6 total from the exact table (no per-die detail)"""
+    return roll_3d6_exploding_5_6_total()
+
+
+def split_exploding_total(total: int, explode_on: int = 6) -> List[str]:
+    """
+    Break a 3d6 exploding total into per-die detail for combat logs.
+
+    Traced attacks draw the same table totals as untraced ones (so a seeded
+    log replays the ranked combats); the dice shown are one valid way of
+    rolling that total, with as few explosions as possible.
+
+    Args:
+        total: 3d6 exploding total drawn from the table
+        explode_on: Lowest face that explodes (6, or 5 for exploding 5s and 6s)
+
+    Returns:
+        Detail per die in roll_3d6_exploding format, e.g. ["6+2", "4", "3"]
+    """
+    top_final = explode_on - 1
+    explosions = 0
+    while total - 6 * explosions > 3 * top_final:
+        explosions += 1
+    final_sum = min(3 * top_final, total - explosions * explode_on)
+    exploded_sum = total - final_sum
+
+    def spread(amount, count, low):
+        # count faces of at least low summing to amount, as even as possible
+        base, extra = divmod(amount - low * count, count) if count else (0, 0)
+        return [low + base + (1 if index < extra else 0) for index in range(count)]
+
+    finals = spread(final_sum, 3, 1)
+    chains = [[] for _ in range(3)]
+    for index, face in enumerate(spread(exploded_sum, explosions, explode_on)):
+        chains[index % 3].append(face)
+    return ['+'.join(str(face) for face in chain + [final]) for chain, final in zip(chains, finals)]
+
+
+def sample_3d6_exploding_detail() -> Tuple[int, List[str]]:
+    """Draw a 3d6 exploding-on-6 total from the exact table, with display detail"""
+    total = roll_3d6_exploding_total()
+    return total, split_exploding_total(total)
+
+
+def sample_3d6_exploding_5_6_detail() -> Tuple[int, List[str]]:
+    """Draw a 3d6 exploding-on-5/6 total from the exact table, with display detail"""
+    total = roll_3d6_exploding_5_6_total()
+    return total, split_exploding_total(total, explode_on=5)
+
+
 def can_activate_limit(limit_name: str, turn_number: int, attacker_hp: int, attacker_max_hp: int,
-                       combat_state: dict, charge_history: List[bool] = None,
+                       combat_state: CombatState, charge_history: List[bool] = None,
                        cooldown_history: dict = None) -> bool:
     """
     Check if a limit's conditions are met for activation on this turn.
@@ -62,7 +101,7 @@ def can_activate_limit(limit_name: str, turn_number: int, attacker_hp: int, atta
         turn_number: Current turn number (1-indexed)
         attacker_hp: Current HP of the attacker
         attacker_max_hp: Maximum HP of the attacker
-        combat_state: Dictionary tracking combat state (last turn events, charges, etc.)
+        combat_state: CombatState (or legacy dict) tracking last turn events, charges, etc.
         charge_history: List of charging actions (for charge_up limits)
         cooldown_history: Dictionary tracking cooldown timers
 
@@ -76,164 +115,159 @@ def can_activate_limit(limit_name: str, turn_number: int, attacker_hp: int, atta
         charge_history = []
     if cooldown_history is None:
         cooldown_history = {}
-    if combat_state is None:
-        combat_state = {}
+    combat_state = CombatState.coerce(combat_state)
 
-    # Initialize combat_state fields if missing
-    if 'charges_used' not in combat_state:
-        combat_state['charges_used'] = {}
+    # Dispatch on the compiled limit kind instead of comparing limit names
+    kind, param, _ = limit_rule(limit_name)
+    return LIMIT_PREDICATES[kind](param, limit_name, turn_number, attacker_hp, attacker_max_hp,
+                                  combat_state, charge_history, cooldown_history)
 
-    # Check HP-based limits
-    if limit_name == 'near_death' and attacker_hp > 25:
-        return False
-    elif limit_name == 'bloodied' and attacker_hp > 50:
-        return False
-    elif limit_name == 'timid' and attacker_hp < attacker_max_hp:
-        return False
-    elif limit_name == 'attrition' and attacker_hp < 25:
-        return False  # Not enough HP to pay cost
-
-    # Check charge limits (single-use per combat, recharges between encounters)
-    elif limit_name in ['charges_1', 'charges_2']:
-        max_charges = 1 if limit_name == 'charges_1' else 2
-        charges_used = combat_state['charges_used'].get(limit_name, 0)
-        if charges_used >= max_charges:
-            return False
 
-    # Check turn-tracking limits
-    elif limit_name == 'slaughter' and not combat_state.get('defeated_enemy_last_turn', False):
-        return False
-    elif limit_name == 'relentless' and not combat_state.get('dealt_damage_last_turn', False):
-        return False
-    elif limit_name == 'combo_move' and not combat_state.get('hit_same_target_last_turn', False):
-        return False
-    elif limit_name == 'revenge' and not combat_state.get('was_damaged_last_turn', False):
-        return False
-    elif limit_name == 'vengeful' and not combat_state.get('was_hit_last_turn', False):
-        return False
-    elif limit_name == 'untouchable' and not combat_state.get('all_attacks_missed_last_turn', False):
-        return False
-    elif limit_name == 'unbreakable' and not combat_state.get('was_hit_no_damage_last_turn', False):
-        return False
-    elif limit_name == 'passive' and combat_state.get('dealt_damage_last_turn', False):
-        return False
-    elif limit_name == 'careful' and combat_state.get('was_damaged_last_turn', False):
-        return False
+def can_activate_build(compiled: CompiledBuild, turn_number: int, attacker_hp: int, attacker_max_hp: int,
+                       combat_state: CombatState, charge_history: List[bool] = None,
+                       cooldown_history: dict = None) -> bool:
+    """
+    Check every non-charge_up limit of a compiled build with the can_activate_limit rules.
 
-    # Check turn-based limits
-    elif limit_name == 'quickdraw' and turn_number > 2:
-        return False  # Turn 1 or 2 only
+    charge_up limits are not checked: a build that still needs to charge uses
+    its own attack to charge rather than switching to a fallback.
 
-    elif limit_name == 'patient' and turn_number < 4:
-        return False  # Turn 4 or later
-    elif limit_name == 'finale' and turn_number < 7:
-        return False  # Turn 7 or later
+    Returns:
+        True if all checked limits can activate this turn
+    """
+    if charge_history is None:
+        charge_history = []
+    if cooldown_history is None:
+        cooldown_history = {}
+    combat_state = CombatState.coerce(combat_state)
 
-    # Check charge_up limits
-    elif limit_name == 'charge_up':
-        # Need to have charged on previous turn
-        if len(charge_history) < 1 or not charge_history[-1]:
-            return False
-    elif limit_name == 'charge_up_2':
-        # Need to have charged on previous two turns
-        if len(charge_history) < 2 or not (charge_history[-1] and charge_history[-2]):
+    for limit_name, kind, param, predicate, _ in compiled.limit_checks:
+        if not predicate(param, limit_name, turn_number, attacker_hp, attacker_max_hp,
+                         combat_state, charge_history, cooldown_history):
             return False
+    return True
 
-    # Check cooldown limit
-    elif limit_name == 'cooldown':
-        # Check if still on cooldown
-        last_used_turn = cooldown_history.get(limit_name, -999)
-        if turn_number - last_used_turn <= 3:  # 3-turn cooldown
-            return False
 
-    # All checks passed
-    return True
+def _charging_in_progress(charge_up_turns: int, charge_history: List[bool]) -> bool:
+    """True if a charge_up build charged on the previous turn (charge_up_2: previous two turns)"""
+    if not charge_history or not charge_up_turns:
+        return False
+    if charge_up_turns == 2:
+        return len(charge_history) >= 2 and charge_history[-1] and charge_history[-2]
+    return charge_history[-1]
 
 
-def roll_3d6_exploding_5_6() -> Tuple[int, List[str]]:
-    """Roll 3d6 with exploding 5s and 6s"""
-    total = 0
-    dice_detail = []
-    for _ in range(3):
-        die_total = 0
-        die = _get_cached_d6()
-        die_total += die
-        dice_detail.append(str(die))
-        while die >= 5:
-            die = _get_cached_d6()
-            die_total += die
-            dice_detail[-1] += f"+{die}"
-        total += die_total
-    return total, dice_detail
+def preview_activation(build: AttackBuild, turn_number: int, attacker_hp: int, attacker_max_hp: int,
+                       combat_state: CombatState, charge_history: List[bool] = None,
+                       cooldown_history: dict = None) -> str:
+    """
+    Predict how make_attack would resolve this build's limits, without side effects.
+
+    Applies the same two-pass limit checks as make_attack (action-based limits
+    skipped while charging, charge_up last) but rolls no dice and consumes no
+    charges or cooldowns, so it replaces a throwaway attack on a copied state.
+    Unreliable (DC) limits are rolled by the attack itself and count as
+    available here.
+
+    Returns:
+        'attack' if the build's limits allow it to attack, 'charge' if it must
+        charge instead, or 'basic_attack' if a limit condition is not met
+    """
+    compiled = build.compiled
+    if charge_history is None:
+        charge_history = []
+    if cooldown_history is None:
+        cooldown_history = {}
+    combat_state = CombatState.coerce(combat_state)
+
+    is_currently_charging = _charging_in_progress(compiled.charge_up_turns, charge_history)
+    for limit_name, kind, param, predicate, is_action_based in compiled.limit_checks:
+        if is_currently_charging and is_action_based:
+            continue
+        if kind == LIMIT_ATTRITION:
+            # Same HP floor make_attack applies (can_activate_limit keeps a planning margin)
+            if attacker_hp < param:
+                return 'basic_attack'
+        elif not predicate(param, limit_name, turn_number, attacker_hp, attacker_max_hp,
+                           combat_state, charge_history, cooldown_history):
+            return 'basic_attack'
+
+    charge_up_turns = compiled.charge_up_turns
+    if charge_up_turns and (len(charge_history) < charge_up_turns or
+                            not all(charge_history[-charge_up_turns:])):
+        return 'charge'
+    return 'attack'
 
 
 def make_aoe_attack(attacker: Character, defender: Character, build: AttackBuild,
-                   targets: List[Tuple[int, dict]], log_file=None, turn_number: int = 1,
+                   targets: List[Tuple[int, int]], log_file=None, turn_number: int = 1,
                    charge_history: List[bool] = None, cooldown_history: dict = None,
-                   attacker_hp: int = None, attacker_max_hp: int = 100, combat_state: dict = None,
+                   attacker_hp: int = None, attacker_max_hp: int = 100, combat_state: CombatState = None,
                    tier_bonus: int = 0) -> Tuple[List[Tuple[int, int, List[str]]], int]:
     """Make an AOE attack against multiple targets with shared damage roll
 
+    Args:
+        targets: (target_index, enemy_max_hp) for each alive enemy (EnemyGroup.targets())
+
     Returns:
         List of (target_index, damage_dealt, conditions_applied) for each target,
         and total damage dealt
     """
-    attack_type = ATTACK_TYPES[build.attack_type]
+    compiled = build.compiled
+    tracer = as_tracer(log_file)
     results = []
     total_damage = 0
     shared_dice_roll = None
 
-    if log_file:
-        log_file.write(f"  AOE Attack targeting {len(targets)} enemies\n")
+    if tracer is not None:
+        tracer.emit(EVENT_ATTACK, 'aoe_targets', len(targets))
+
+    # All targets share one state so a charge consumed on the first target is seen by the rest
+    combat_state = CombatState.coerce(combat_state)
 
     # Check charge up limits first (before doing any attack work)
-    # Do a test attack to see if we need to charge instead
-    # IMPORTANT: Use a deep copy of combat_state so the test doesn't consume charges/cooldowns
-    test_combat_state = copy.deepcopy(combat_state) if combat_state else None
-    test_damage, test_conditions, _ = make_attack(attacker, defender, build, log_file=None,
-                                             turn_number=turn_number, charge_history=charge_history,
-                                             is_aoe=False, aoe_damage_roll=None, cooldown_history=cooldown_history,
-                                             attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=test_combat_state,
-                                             tier_bonus=tier_bonus)
-
-    # If we got a charge condition, return it for all targets
-    if test_damage == 0 and 'charge' in test_conditions:
+    # If the build still needs to charge, return it for all targets
+    if preview_activation(build, turn_number, attacker_hp, attacker_max_hp, combat_state,
+                          charge_history, cooldown_history) == 'charge':
         # Return charge condition for all targets
-        for target_idx, enemy_data in targets:
+        for target_idx, _ in targets:
             results.append((target_idx, 0, ['charge']))
         return results, 0
 
     # Pre-roll damage dice once for all targets (if not direct attack)
-    if not attack_type.is_direct:
-        use_high_impact = 'high_impact' in build.upgrades
-        use_critical_effect = 'critical_effect' in build.upgrades
-
-        if use_high_impact:
+    if not compiled.is_direct:
+        if compiled.dice_mode == DICE_FLAT_15:
             shared_dice_roll = (15, ["15 (flat)"])
-        elif use_critical_effect:
-            shared_dice_roll = roll_3d6_exploding_5_6()
+        elif tracer is None:
+            # Untraced path: draw the total straight from the exact PMF table
+            if compiled.dice_mode == DICE_EXPLODE_5_6:
+                shared_dice_roll = (sample_3d6_exploding_5_6(), [])
+            else:
+                shared_dice_roll = (sample_3d6_exploding(), [])
+        elif compiled.dice_mode == DICE_EXPLODE_5_6:
+            shared_dice_roll = sample_3d6_exploding_5_6_detail()
         else:
-            shared_dice_roll = roll_3d6_exploding()
+            shared_dice_roll = sample_3d6_exploding_detail()
 
-        if log_file:
+        if tracer is not None:
             dice_damage, dice_detail = shared_dice_roll
-            log_file.write(f"  Shared damage roll: {dice_detail} = {dice_damage}\n")
+            tracer.emit(EVENT_DAMAGE, 'aoe_shared_roll', dice_detail, dice_damage)
 
     # For AOE attacks with charge limits: consume charge once on first target,
     # then skip consumption for remaining targets (but still apply the bonus)
-    for i, (target_idx, enemy_data) in enumerate(targets):
-        if log_file:
-            log_file.write(f"\n  --- Targeting Enemy {target_idx+1} ---\n")
+    for i, (target_idx, enemy_max_hp) in enumerate(targets):
+        if tracer is not None:
+            tracer.emit(EVENT_ATTACK, 'aoe_target', target_idx + 1)
 
         # First target (i=0) consumes the charge, subsequent targets skip consumption
         skip_consumption = (i > 0)
 
         # All targets use the shared dice roll
-        damage, conditions, _ = make_attack(attacker, defender, build, log_file=log_file,
+        damage, conditions, _ = make_attack(attacker, defender, build, log_file=tracer,
                                        turn_number=turn_number, charge_history=charge_history,
                                        is_aoe=True, aoe_damage_roll=shared_dice_roll, cooldown_history=cooldown_history,
                                        attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=combat_state,
-                                       enemy_max_hp=enemy_data['max_hp'], tier_bonus=tier_bonus,
+                                       enemy_max_hp=enemy_max_hp, tier_bonus=tier_bonus,
                                        skip_limit_consumption=skip_consumption)
 
         results.append((target_idx, damage, conditions))
@@ -244,7 +278,7 @@ def make_aoe_attack(attacker: Character, defender: Character, build: AttackBuild
 
 def make_single_attack_damage(attacker: Character, defender: Character, build: AttackBuild,
                              log_file, turn_number: int = 1, charge_history: List[bool] = None, cooldown_history: dict = None,
-                             attacker_hp: int = None, attacker_max_hp: int = 100, combat_state: dict = None) -> int:
+                             attacker_hp: int = None, attacker_max_hp: int = 100, combat_state: CombatState = None) -> int:
     """Make a single attack and return only damage (for multi-attacks)"""
     damage, _, _ = make_attack(attacker, defender, build, allow_multi=False,
                            log_file=log_file, turn_number=turn_number, charge_history=charge_history,
@@ -258,7 +292,7 @@ def make_attack(attacker: Character, defender: Character, build: AttackBuild,
                charge_history: List[bool] = None, is_aoe: bool = False,
                aoe_damage_roll: Tuple[int, List[str]] = None, cooldown_history: dict = None,
                attacker_hp: int = None, attacker_max_hp: int = 100,
-               combat_state: dict = None, enemy_max_hp: int = None, tier_bonus: int = 0,
+               combat_state: CombatState = None, enemy_max_hp: int = None, tier_bonus: int = 0,
                skip_limit_consumption: bool = False) -> Tuple[int, List[str], bool]:
     """Make one attack and return damage dealt, conditions applied, and hit status
 
@@ -268,6 +302,11 @@ def make_attack(attacker: Character, defender: Character, build: AttackBuild,
         - conditions: List[str] - conditions applied (bleed, charge, basic_attack, etc.)
         - did_hit: bool - True if attack hit (accuracy roll succeeded), False otherwise
 
+    Tracing:
+    - log_file: None runs the untraced resolution (no logging code at all).
+      A log file or CombatTracer runs the traced resolution, which records
+      typed events (rendered to the log file as they happen)
+
     For AOE attacks:
     - is_aoe: True if this is part of an AOE attack
     - aoe_damage_roll: Shared damage roll result (dice_total, dice_detail) for all AOE targets
@@ -275,620 +314,551 @@ def make_attack(attacker: Character, defender: Character, build: AttackBuild,
     For new limits:
     - attacker_hp: Current HP of attacker (for HP-based limits)
     - attacker_max_hp: Max HP of attacker (for HP-based limits)
-    - combat_state: Dict tracking combat state for turn-based limits
-      - 'last_target_hit': Index of last enemy hit
-      - 'defeated_enemy_last_turn': bool
-      - 'dealt_damage_last_turn': bool
-      - 'was_hit_last_turn': bool
-      - 'was_damaged_last_turn': bool
-      - 'attacks_missed_last_turn': bool (all attacks missed)
-      - 'was_hit_no_damage_last_turn': bool
-      - 'was_attacked_last_turn': bool
-      - 'channeled_turns': int (consecutive turns using same attack)
-      - 'charges_used': dict of limit_name -> uses_count
+    - combat_state: CombatState tracking combat state for turn-based limits (a dict is copied into one)
+      - last_target_hit: Index of last enemy hit
+      - defeated_enemy_last_turn: bool
+      - dealt_damage_last_turn: bool
+      - was_hit_last_turn: bool
+      - was_damaged_last_turn: bool
+      - all_attacks_missed_last_turn: bool (all attacks missed)
+      - was_hit_no_damage_last_turn: bool
+      - was_attacked_last_turn: bool
+      - channeled_turns: int (consecutive turns using same attack)
+      - charges_used: dict of limit_name -> uses_count
     """
+    if log_file is not None:
+        return _resolve_attack_traced(attacker, defender, build, allow_multi, as_tracer(log_file), turn_number,
+                                      charge_history, is_aoe, aoe_damage_roll, cooldown_history, attacker_hp,
+                                      attacker_max_hp, combat_state, enemy_max_hp, tier_bonus, skip_limit_consumption)
+
+    # Untraced resolution: same rules and dice draws as _resolve_attack_traced, no logging code
+    # Summed modifiers, effect flags and limit checks were resolved once when the build was compiled
+    compiled = build.compiled
+    tier = attacker.tier
+    combat_state = CombatState.coerce(combat_state)
+    if attacker_hp is None:
+        attacker_hp = attacker_max_hp
+
+    # PASS 1: non-charge_up limits in build order
+    charge_up_turns = compiled.charge_up_turns
+    is_currently_charging = _charging_in_progress(charge_up_turns, charge_history)
+    for limit_name, kind, param, predicate, is_action_based in compiled.limit_checks:
+        if is_currently_charging and is_action_based:
+            continue
+        if kind == LIMIT_DC and param > 0:
+            if roll_d20() < param:
+                return 0, [], False  # Attack fails due to unreliability
+        elif kind == LIMIT_CHARGES:
+            charges_used = combat_state.charges_used.get(limit_name, 0)
+            effective_charges_used = charges_used - 1 if skip_limit_consumption else charges_used
+            if effective_charges_used >= param:
+                return 0, ['basic_attack'], False
+            if not skip_limit_consumption:
+                combat_state.charges_used[limit_name] = charges_used + 1
+        elif kind == LIMIT_COOLDOWN:
+            if cooldown_history is None:
+                cooldown_history = {}
+            last_used = cooldown_history.get(limit_name, -999)
+            if skip_limit_consumption and last_used == turn_number:
+                continue
+            if turn_number - last_used <= param:
+                return 0, ['basic_attack'], False
+            cooldown_history[limit_name] = turn_number
+        elif kind == LIMIT_ATTRITION:
+            if attacker_hp < param:
+                return 0, ['basic_attack'], False
+            combat_state.attrition_cost += 25
+        elif not predicate(param, limit_name, turn_number, attacker_hp, attacker_max_hp,
+                           combat_state, charge_history, cooldown_history):
+            return 0, ['basic_attack'], False
+
+    # PASS 2: charge_up limits
+    if charge_up_turns and (not charge_history or len(charge_history) < charge_up_turns or
+                            not all(charge_history[-charge_up_turns:])):
+        return 0, ['charge'], False
+
+    total_accuracy = attacker.focus + tier * compiled.accuracy_tier_coef - compiled.accuracy_flat_penalty + tier_bonus
+    slayer_bonus = 0
+    if compiled.slayer_target_hps:
+        target_max_hp = enemy_max_hp if enemy_max_hp is not None else defender.max_hp
+        if target_max_hp in compiled.slayer_target_hps:
+            slayer_bonus = tier
+    channeled_bonus = 0
+    if compiled.has_channeled:
+        channeled_bonus = min(combat_state.channeled_turns - 3, 5) * tier
+    total_accuracy += slayer_bonus + channeled_bonus
+
+    is_critical = False
+    accuracy_roll = 0
+    if not compiled.is_direct:
+        if compiled.has_advantage:
+            roll1 = roll_d20()
+            roll2 = roll_d20()
+            accuracy_roll = roll1 if roll1 > roll2 else roll2
+        else:
+            accuracy_roll = roll_d20()
+        is_critical = accuracy_roll >= compiled.crit_threshold
+        avoidance = defender.avoidance
+        total_attack_roll = accuracy_roll + total_accuracy
+        if total_attack_roll < avoidance:
+            return 0, [], False
+
+    overhit_bonus = 0
+    if compiled.has_overhit and not compiled.is_direct:
+        if total_attack_roll >= avoidance + 3 * tier:
+            overhit_bonus = (total_attack_roll - avoidance) // 2
+
+    if compiled.is_direct:
+        base_damage = compiled.direct_damage_base + compiled.direct_damage_tier_coef * tier
+    elif is_aoe and aoe_damage_roll is not None:
+        base_damage = aoe_damage_roll[0]
+    elif compiled.dice_mode == DICE_FLAT_15:
+        base_damage = 15
+    elif compiled.dice_mode == DICE_EXPLODE_5_6:
+        base_damage = sample_3d6_exploding_5_6()
+    else:
+        base_damage = sample_3d6_exploding()
+
+    flat_bonus = attacker.power + tier * compiled.damage_tier_coef - compiled.damage_flat_penalty + channeled_bonus
+    critical_damage_bonus = 0
+    if is_critical:
+        critical_damage_bonus = tier * 2 if compiled.has_powerful_critical else tier
+
+    empower_bonus = combat_state.empower_bonus
+    damage = base_damage + flat_bonus + slayer_bonus + critical_damage_bonus + overhit_bonus + tier_bonus + empower_bonus
+    if empower_bonus > 0:
+        combat_state.empower_bonus = 0
+
+    effective_durability = defender.tier if compiled.has_armor_piercing else defender.durability
+    damage_dealt = max(0, damage - effective_durability)
+
+    if compiled.has_brutal:
+        brutal_threshold = 5 * tier
+        if damage > effective_durability + brutal_threshold:
+            damage_dealt += int((damage - effective_durability - brutal_threshold) * 0.5)
+
+    if compiled.has_leech and damage_dealt > 0:
+        combat_state.leech_hp += damage_dealt // 2
+
+    conditions_applied = list(compiled.hit_conditions)
+
+    if allow_multi:
+        if accuracy_roll >= 15:
+            if compiled.has_explosive_critical:
+                conditions_applied.append('explosive_critical')
+            if compiled.has_double_tap:
+                damage_dealt += make_single_attack_damage(attacker, defender, build, None, turn_number, charge_history,
+                                                          cooldown_history, attacker_hp, attacker_max_hp, combat_state)
+            if compiled.has_ricochet:
+                conditions_applied.append('ricochet')
+                conditions_applied.append('ricochet')
+        if compiled.has_extra_attack and damage_dealt > 0 and conditions_applied:
+            damage_dealt += make_single_attack_damage(attacker, defender, build, None, turn_number, charge_history,
+                                                      cooldown_history, attacker_hp, attacker_max_hp, combat_state)
+        if compiled.has_barrage and damage_dealt > 0 and conditions_applied:
+            second_damage = make_single_attack_damage(attacker, defender, build, None, turn_number, charge_history,
+                                                      cooldown_history, attacker_hp, attacker_max_hp, combat_state)
+            damage_dealt += second_damage
+            if second_damage > 0:
+                damage_dealt += make_single_attack_damage(attacker, defender, build, None, turn_number, charge_history,
+                                                          cooldown_history, attacker_hp, attacker_max_hp, combat_state)
+
+    return damage_dealt, conditions_applied, True
+
+
+def _emit_limit_failure(tracer: CombatTracer, limit_name: str, turn_number: int, attacker_hp: int,
+                        attacker_max_hp: int, charges_used: int = 0):
+    """Record the 'using basic attack' event for a limit whose condition is not met"""
+    kind, param, reason = limit_rule(limit_name)
+    reason = reason.format(hp=attacker_hp, max_hp=attacker_max_hp, turn=turn_number,
+                           param=param, charges_used=charges_used)
+    tracer.emit(EVENT_LIMIT, 'limit_failed', limit_name, reason)
+
+
+def _accuracy_parts(attacker: Character, build: AttackBuild, accuracy_roll: int,
+                    slayer_bonus: int, channeled_bonus: int) -> Tuple[str, ...]:
+    """Per-modifier accuracy breakdown of an attack roll"""
+    attack_type = ATTACK_TYPES[build.attack_type]
+    accuracy_parts = [f"{accuracy_roll} [Roll]", f"{attacker.tier} [Tier]", f"{attacker.focus} [Focus]"]
+
+    # Add attack type modifier
+    if attack_type.accuracy_mod != 0:
+        mod_value = attack_type.accuracy_mod * attacker.tier
+        accuracy_parts.append(f"{mod_value:+d} [{build.attack_type.title()}]")
+
+    # Add upgrade modifiers
+    for upgrade_name in build.upgrades:
+        upgrade = UPGRADES[upgrade_name]
+        if upgrade.accuracy_mod != 0:
+            mod_value = upgrade.accuracy_mod * attacker.tier
+            accuracy_parts.append(f"{mod_value:+d} [{upgrade_name}]")
+        if upgrade.accuracy_penalty != 0:
+            # Reliable Accuracy and Armor Piercing have flat penalties, others are tier-scaled
+            if upgrade_name in FLAT_ACCURACY_PENALTY_UPGRADES:
+                penalty_value = -upgrade.accuracy_penalty
+            else:
+                penalty_value = -(upgrade.accuracy_penalty * attacker.tier)
+            accuracy_parts.append(f"{penalty_value:+d} [{upgrade_name}]")
+
+    # Add slayer bonus
+    if slayer_bonus > 0:
+        accuracy_parts.append(f"+{slayer_bonus} [Slayer]")
+
+    # Add melee accuracy bonus
+    if build.attack_type == 'melee_ac' and attacker.tier > 0:
+        accuracy_parts.append(f"+{attacker.tier} [Melee]")
+
+    # Add limit accuracy bonus (ALL limits apply to accuracy)
+    limit_bonuses = [(limit_name, LIMITS[limit_name].damage_bonus * attacker.tier) for limit_name in build.limits]
+    if sum(bonus for _, bonus in limit_bonuses) > 0:
+        for limit_name, bonus_value in limit_bonuses:
+            accuracy_parts.append(f"+{bonus_value} [{limit_name}]")
+
+    # Add channeled accuracy bonus
+    if channeled_bonus != 0:
+        accuracy_parts.append(f"{channeled_bonus:+d} [Channeled]")
+
+    return tuple(accuracy_parts)
 
+
+def _flat_bonus_parts(attacker: Character, build: AttackBuild) -> Tuple[str, ...]:
+    """Per-modifier breakdown of the flat damage bonus"""
     attack_type = ATTACK_TYPES[build.attack_type]
+    flat_parts = [f"{attacker.tier} [Tier]", f"{attacker.power} [Power]"]
+
+    # Add attack type damage modifier (only shown for dice attacks)
+    if not attack_type.is_direct and attack_type.damage_mod != 0:
+        mod_value = attack_type.damage_mod * attacker.tier
+        flat_parts.append(f"{mod_value:+d} [{build.attack_type.title()}]")
+
+    # Melee damage bonus
+    if build.attack_type == 'melee_dg':
+        flat_parts.append(f"+{attacker.tier} [Melee]")
+
+    # Upgrade damage modifiers
+    for upgrade_name in build.upgrades:
+        upgrade = UPGRADES[upgrade_name]
+        if upgrade.damage_mod != 0:
+            mod_value = upgrade.damage_mod * attacker.tier
+            flat_parts.append(f"{mod_value:+d} [{upgrade_name}]")
+        if upgrade.damage_penalty != 0:
+            # Critical Effect has flat penalty, others are tier-scaled
+            if upgrade_name in FLAT_DAMAGE_PENALTY_UPGRADES:
+                penalty_value = -upgrade.damage_penalty
+            else:
+                penalty_value = -(upgrade.damage_penalty * attacker.tier)
+            flat_parts.append(f"{penalty_value:+d} [{upgrade_name}]")
+
+    # Limit damage bonuses
+    for limit_name in build.limits:
+        limit = LIMITS[limit_name]
+        if limit.damage_bonus > 0:
+            bonus_value = limit.damage_bonus * attacker.tier
+            flat_parts.append(f"+{bonus_value} [{limit_name}]")
+
+    return tuple(flat_parts)
+
 
-    if log_file:
-        log_file.write(f"    Making {build.attack_type} attack with {build.upgrades}\n")
+def _resolve_attack_traced(attacker: Character, defender: Character, build: AttackBuild, allow_multi: bool,
+                           tracer: CombatTracer, turn_number: int, charge_history: List[bool], is_aoe: bool,
+                           aoe_damage_roll: Tuple[int, List[str]], cooldown_history: dict, attacker_hp: int,
+                           attacker_max_hp: int, combat_state: CombatState, enemy_max_hp: int, tier_bonus: int,
+                           skip_limit_consumption: bool) -> Tuple[int, List[str], bool]:
+    """Traced make_attack: records a typed event for every roll, limit check, damage step and effect"""
+    compiled = build.compiled
+    tier = attacker.tier
 
-    # Initialize combat state if not provided
-    if combat_state is None:
-        combat_state = {}
-    if 'charges_used' not in combat_state:
-        combat_state['charges_used'] = {}
-    if 'channeled_turns' not in combat_state:
-        combat_state['channeled_turns'] = 0
+    tracer.emit(EVENT_ATTACK, 'attack', build.attack_type, list(build.upgrades))
+
+    combat_state = CombatState.coerce(combat_state)
 
     # Set attacker_hp to max if not provided
     if attacker_hp is None:
         attacker_hp = attacker_max_hp
 
     # Determine if we're currently charging (charged on previous turn/s)
-    is_currently_charging = False
-    if charge_history and len(charge_history) > 0:
-        # If we have charge_up, check if we charged last turn
-        # If we have charge_up_2, check if we charged last 2 turns
-        if 'charge_up_2' in build.limits:
-            is_currently_charging = len(charge_history) >= 2 and charge_history[-1] and charge_history[-2]
-        elif 'charge_up' in build.limits:
-            is_currently_charging = charge_history[-1]
-
-    # Define action-based limits (only checked on first charge turn, not during charging)
-    action_based_limits = {'slaughter', 'relentless', 'combo_move'}
+    charge_up_turns = compiled.charge_up_turns
+    is_currently_charging = _charging_in_progress(charge_up_turns, charge_history)
 
     # Check limits first - TWO PASSES to ensure charge_up limits are checked AFTER all other limits
-    # PASS 1: Check all non-charge_up limits
-    for limit_name in build.limits:
-        # Skip charge_up limits in first pass - they will be checked in second pass
-        if limit_name in ['charge_up', 'charge_up_2']:
-            continue
-
+    # PASS 1: Check all non-charge_up limits (compiled in build order)
+    for limit_name, kind, param, predicate, is_action_based in compiled.limit_checks:
         # Skip action-based limits if we're currently charging (only check them on first charge turn)
-        if is_currently_charging and limit_name in action_based_limits:
-            if log_file:
-                log_file.write(f"      {limit_name} skipped: currently charging (only checked on first charge turn)\n")
+        if is_currently_charging and is_action_based:
+            tracer.emit(EVENT_LIMIT, 'limit_skipped_charging', limit_name)
             continue
 
-        limit = LIMITS[limit_name]
-
-        # Check HP-based limits
-        if limit_name == 'near_death' and attacker_hp > 25:
-            if log_file:
-                log_file.write(f"      {limit_name} failed: HP too high ({attacker_hp} > 25) - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'bloodied' and attacker_hp > 50:
-            if log_file:
-                log_file.write(f"      {limit_name} failed: HP too high ({attacker_hp} > 50) - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'timid' and attacker_hp < attacker_max_hp:
-            if log_file:
-                log_file.write(f"      {limit_name} failed: not at max HP ({attacker_hp} < {attacker_max_hp}) - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'attrition':
-            # Costs 20 HP to use
-            if attacker_hp < 20:
-                if log_file:
-                    log_file.write(f"      {limit_name} failed: not enough HP ({attacker_hp} < 20) - using basic attack\n")
-                return 0, ['basic_attack'], False
-            # HP cost will be tracked in combat_state for simulation to apply
-            if log_file:
-                log_file.write(f"      {limit_name} activated: will cost 25 HP\n")
-            if 'attrition_cost' not in combat_state:
-                combat_state['attrition_cost'] = 0
-            combat_state['attrition_cost'] += 25
+        # Handle unreliable DC checks
+        if kind == LIMIT_DC and param > 0:
+            limit_roll = roll_d20()
+            tracer.emit(EVENT_LIMIT, 'limit_dc_roll', limit_name, limit_roll, param)
+            if limit_roll < param:
+                tracer.emit(EVENT_LIMIT, 'limit_dc_failed', limit_name)
+                return 0, [], False  # Attack fails due to unreliability
 
         # Check charge limits (single-use per combat, recharges between encounters)
-        elif limit_name in ['charges_1', 'charges_2']:
-            max_charges = 1 if limit_name == 'charges_1' else 2
-            charges_used = combat_state['charges_used'].get(limit_name, 0)
+        elif kind == LIMIT_CHARGES:
+            charges_used = combat_state.charges_used.get(limit_name, 0)
 
             # For AOE subsequent targets (skip_limit_consumption=True), check against pre-consumption state
             # by subtracting 1 from charges_used (since target 1 already consumed it)
             effective_charges_used = charges_used - 1 if skip_limit_consumption else charges_used
 
-            if effective_charges_used >= max_charges:
-                if log_file:
-                    log_file.write(f"      {limit_name} failed: all charges used ({charges_used}/{max_charges}) - using basic attack\n")
+            if effective_charges_used >= param:
+                _emit_limit_failure(tracer, limit_name, turn_number, attacker_hp, attacker_max_hp, charges_used)
                 return 0, ['basic_attack'], False
             # Track charge use (only if not skipping consumption for AOE subsequent targets)
-            if not skip_limit_consumption:
-                combat_state['charges_used'][limit_name] = charges_used + 1
-            if log_file:
-                if skip_limit_consumption:
-                    log_file.write(f"      {limit_name} activated (AOE shared charge): bonus applied\n")
-                else:
-                    log_file.write(f"      {limit_name} activated: charge {charges_used + 1}/{max_charges} used\n")
-
-        # Check turn-tracking limits
-        elif limit_name == 'slaughter' and not combat_state.get('defeated_enemy_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: did not defeat enemy last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'relentless' and not combat_state.get('dealt_damage_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: did not deal damage last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'combo_move' and not combat_state.get('hit_same_target_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: did not hit same target last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'revenge' and not combat_state.get('was_damaged_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: was not damaged last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'vengeful' and not combat_state.get('was_hit_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: was not hit last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'untouchable' and not combat_state.get('all_attacks_missed_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: not all attacks missed last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'unbreakable' and not combat_state.get('was_hit_no_damage_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: was not hit without damage last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'passive' and combat_state.get('dealt_damage_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: made an attack last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
-        elif limit_name == 'careful' and combat_state.get('was_damaged_last_turn', False):
-            if log_file:
-                log_file.write(f"      {limit_name} failed: was damaged last turn - using basic attack\n")
-            return 0, ['basic_attack'], False
+            if skip_limit_consumption:
+                tracer.emit(EVENT_LIMIT, 'charge_shared', limit_name)
+            else:
+                combat_state.charges_used[limit_name] = charges_used + 1
+                tracer.emit(EVENT_LIMIT, 'charge_used', limit_name, charges_used + 1, param)
 
-        # Check turn-based limits first
-        if limit_name == 'quickdraw' and turn_number > 2:
-            if log_file:
-                log_file.write(f"      {limit_name} failed: not turn 1 or 2 (turn {turn_number}) - using basic attack\n")
-            return 0, ['basic_attack'], False  # Use basic attack - not turn 1 or 2
-        elif limit_name == 'patient' and turn_number < 4:
-            if log_file:
-                log_file.write(f"      {limit_name} failed: too early (turn {turn_number}, need turn 4+) - using basic attack\n")
-            return 0, ['basic_attack'], False  # Use basic attack - too early
-        elif limit_name == 'finale' and turn_number < 7:
-            if log_file:
-                log_file.write(f"      {limit_name} failed: too early (turn {turn_number}, need turn 7+) - using basic attack\n")
-            return 0, ['basic_attack'], False  # Use basic attack - too early
-        elif limit_name == 'cooldown':
+        elif kind == LIMIT_COOLDOWN:
             # Check if cooldown is still active
             if cooldown_history is None:
                 cooldown_history = {}
-            last_used = cooldown_history.get('cooldown', -999)
-            turns_since_use = turn_number - last_used
-            if turns_since_use <= 3:
-                if log_file:
-                    log_file.write(f"      {limit_name} failed: still on cooldown (used on turn {last_used}, need 3 turns, currently turn {turn_number}) - using basic attack\n")
+            last_used = cooldown_history.get(limit_name, -999)
+            if skip_limit_consumption and last_used == turn_number:
+                # AOE subsequent targets share the activation the first target just used
+                tracer.emit(EVENT_LIMIT, 'cooldown_shared', limit_name)
+                continue
+            if turn_number - last_used <= param:
+                tracer.emit(EVENT_LIMIT, 'cooldown_failed', limit_name, last_used, turn_number)
                 return 0, ['basic_attack'], False  # Use basic attack - still on cooldown
-            else:
-                # Mark that cooldown was used this turn
-                cooldown_history['cooldown'] = turn_number
-                if log_file:
-                    log_file.write(f"      {limit_name} activated (last used on turn {last_used}, now used on turn {turn_number})\n")
+            # Mark that cooldown was used this turn
+            cooldown_history[limit_name] = turn_number
+            tracer.emit(EVENT_LIMIT, 'cooldown_used', limit_name, last_used, turn_number)
 
-        # Handle unreliable DC checks
-        elif limit.dc > 0:
-            limit_roll = roll_d20()
-            if log_file:
-                log_file.write(f"      {limit_name} check: rolled {limit_roll} vs DC {limit.dc}\n")
-            if limit_roll < limit.dc:
-                if log_file:
-                    log_file.write(f"      Attack failed due to {limit_name}!\n")
-                return 0, [], False  # Attack fails due to unreliability
+        elif kind == LIMIT_ATTRITION:
+            # Costs 20 HP to use
+            if attacker_hp < param:
+                _emit_limit_failure(tracer, limit_name, turn_number, attacker_hp, attacker_max_hp)
+                return 0, ['basic_attack'], False
+            # HP cost will be tracked in combat_state for simulation to apply
+            tracer.emit(EVENT_LIMIT, 'attrition_used', limit_name)
+            combat_state.attrition_cost += 25
+
+        # HP-based, turn-tracking and turn-based limits are pure predicates
+        elif not predicate(param, limit_name, turn_number, attacker_hp, attacker_max_hp,
+                           combat_state, charge_history, cooldown_history):
+            _emit_limit_failure(tracer, limit_name, turn_number, attacker_hp, attacker_max_hp)
+            return 0, ['basic_attack'], False
 
     # PASS 2: Check charge_up limits (only after all other limits have passed)
     # This ensures that limits like passive/careful must be met on the turn you START charging
-    for limit_name in build.limits:
-        if limit_name == 'charge_up':
-            # Need to have charged on previous turn
-            if charge_history is None or len(charge_history) == 0 or not charge_history[-1]:
-                if log_file:
-                    log_file.write(f"      {limit_name} failed: need to charge on previous turn (charging instead)\n")
-                return 0, ['charge'], False  # Return special 'charge' condition instead of attacking
-        elif limit_name == 'charge_up_2':
-            # Need to have charged on previous 2 turns
-            if (charge_history is None or len(charge_history) < 2 or
-                not charge_history[-1] or not charge_history[-2]):
-                if log_file:
-                    log_file.write(f"      {limit_name} failed: need to charge on previous 2 turns (charging instead)\n")
-                return 0, ['charge'], False  # Return special 'charge' condition instead of attacking
-
-    # Calculate accuracy
-    base_accuracy = attacker.tier + attacker.focus
-    accuracy_mod = attack_type.accuracy_mod * attacker.tier
-
-
-
-    # Apply upgrade modifiers (optimized with set checks)
-    upgrades_set = set(build.upgrades)  # Convert to set for O(1) membership testing
-    for upgrade_name in build.upgrades:
-        upgrade = UPGRADES[upgrade_name]
-        accuracy_mod += upgrade.accuracy_mod * attacker.tier
-        # Reliable Accuracy and Armor Piercing have flat accuracy penalties, not tier-scaled
-        if upgrade_name in ['reliable_accuracy', 'armor_piercing']:
-            accuracy_mod -= upgrade.accuracy_penalty
-        else:
-            accuracy_mod -= upgrade.accuracy_penalty * attacker.tier
-
-    # Apply slayer bonuses to accuracy (optimized with cached set)
-    slayer_accuracy_bonus = 0
-    slayer_upgrades = {'minion_slayer', 'captain_slayer', 'elite_slayer', 'boss_slayer'}
-    if upgrades_set & slayer_upgrades:  # Fast set intersection
+    if charge_up_turns:
+        # Need to have charged on the previous charge_up_turns turns
+        if (not charge_history or len(charge_history) < charge_up_turns or
+                not all(charge_history[-charge_up_turns:])):
+            limit_name = 'charge_up_2' if charge_up_turns == 2 else 'charge_up'
+            tracer.emit(EVENT_LIMIT, 'charge_up_failed', limit_name, LIMIT_RULES[limit_name][2])
+            return 0, ['charge'], False  # Return special 'charge' condition instead of attacking
+
+    # Calculate accuracy: Tier + Focus + summed modifiers (attack type, upgrades, melee, limits)
+    total_accuracy = attacker.focus + tier * compiled.accuracy_tier_coef - compiled.accuracy_flat_penalty + tier_bonus
+
+    # Apply slayer bonuses to accuracy (and damage, below)
+    slayer_bonus = 0
+    target_max_hp = None
+    if compiled.slayer_target_hps:
         # Use enemy_max_hp if provided, otherwise fall back to defender.max_hp
         target_max_hp = enemy_max_hp if enemy_max_hp is not None else defender.max_hp
-        if 'minion_slayer' in upgrades_set and target_max_hp == 10:
-            slayer_accuracy_bonus += attacker.tier
-        elif 'captain_slayer' in upgrades_set and target_max_hp == 25:
-            slayer_accuracy_bonus += attacker.tier
-        elif 'elite_slayer' in upgrades_set and target_max_hp == 50:
-            slayer_accuracy_bonus += attacker.tier
-        elif 'boss_slayer' in upgrades_set and target_max_hp == 100:
-            slayer_accuracy_bonus += attacker.tier
-
-    # Apply melee accuracy bonus for melee_ac variant
-    melee_accuracy_bonus = 0
-    if build.attack_type == 'melee_ac':
-        melee_accuracy_bonus = attacker.tier
-
-    # Apply limit bonuses to accuracy (ALL limits now apply to both accuracy and damage)
-    limit_accuracy_bonus = 0
-    for limit_name in build.limits:
-        limit = LIMITS[limit_name]
-        limit_accuracy_bonus += limit.damage_bonus * attacker.tier
+        if target_max_hp in compiled.slayer_target_hps:
+            slayer_bonus = tier
 
-    # Apply channeled bonus to accuracy (optimized with cached set)
-    channeled_accuracy_bonus = 0
-    if 'channeled' in upgrades_set:
-        channeled_turns = combat_state.get('channeled_turns', 0)
-        # Starts at -3×Tier penalty, gains +Tier per turn, max +5×Tier total
-        channeled_accuracy_bonus = min(channeled_turns - 3, 5) * attacker.tier
+    # Apply channeled bonus to accuracy (and damage, below)
+    channeled_bonus = 0
+    if compiled.has_channeled:
+        channeled_turns = combat_state.channeled_turns
+        # Starts at -3×Tier penalty, gains +Tier per turn, max +5×Tier total (updated 2025-10-21)
+        # Turn 0: -3, Turn 1: -2, Turn 2: -1, Turn 3: 0, Turn 4: +1, ..., Turn 8+: +5
+        channeled_bonus = min(channeled_turns - 3, 5) * tier
 
-    total_accuracy = base_accuracy + accuracy_mod + slayer_accuracy_bonus + melee_accuracy_bonus + limit_accuracy_bonus + channeled_accuracy_bonus + tier_bonus
+    total_accuracy += slayer_bonus + channeled_bonus
 
     # Hit check (unless direct attack)
     is_critical = False
     accuracy_roll = 0
-    if not attack_type.is_direct:
-        # Handle advantage from reliable accuracy - optimized with cached set
-        if 'reliable_accuracy' in upgrades_set:
+    if not compiled.is_direct:
+        # Handle advantage from reliable accuracy
+        if compiled.has_advantage:
             roll1 = roll_d20()
             roll2 = roll_d20()
             accuracy_roll = max(roll1, roll2)
-            if log_file:
-                log_file.write(f"      Reliable Accuracy: rolled {roll1} and {roll2}, taking {accuracy_roll}\n")
+            tracer.emit(EVENT_ROLL, 'advantage_roll', roll1, roll2, accuracy_roll)
         else:
             accuracy_roll = roll_d20()
 
-        # Check for critical hit (optimized with cached set)
-        crit_upgrades = {'double_tap', 'powerful_critical', 'explosive_critical', 'ricochet'}
-        has_crit_accuracy = bool(upgrades_set & crit_upgrades)
-        if has_crit_accuracy and accuracy_roll >= 15:
-            is_critical = True
-        elif accuracy_roll == 20:  # Natural 20 is always critical
-            is_critical = True
-
-        if log_file:
-            # Build detailed accuracy breakdown
-            accuracy_parts = [f"{accuracy_roll} [Roll]", f"{attacker.tier} [Tier]", f"{attacker.focus} [Focus]"]
-
-            # Add attack type modifier
-            if attack_type.accuracy_mod != 0:
-                mod_value = attack_type.accuracy_mod * attacker.tier
-                accuracy_parts.append(f"{mod_value:+d} [{build.attack_type.title()}]")
-
-            # Add upgrade modifiers
-            for upgrade_name in build.upgrades:
-                upgrade = UPGRADES[upgrade_name]
-                if upgrade.accuracy_mod != 0:
-                    mod_value = upgrade.accuracy_mod * attacker.tier
-                    accuracy_parts.append(f"{mod_value:+d} [{upgrade_name}]")
-                if upgrade.accuracy_penalty != 0:
-                    # Reliable Accuracy and Armor Piercing have flat penalties, others are tier-scaled
-                    if upgrade_name in ['reliable_accuracy', 'armor_piercing']:
-                        penalty_value = -upgrade.accuracy_penalty
-                    else:
-                        penalty_value = -(upgrade.accuracy_penalty * attacker.tier)
-                    accuracy_parts.append(f"{penalty_value:+d} [{upgrade_name}]")
-
-            # Add slayer bonus
-            if slayer_accuracy_bonus > 0:
-                accuracy_parts.append(f"+{slayer_accuracy_bonus} [Slayer]")
-
-            # Add melee accuracy bonus
-            if melee_accuracy_bonus > 0:
-                accuracy_parts.append(f"+{melee_accuracy_bonus} [Melee]")
-
-            # Add limit accuracy bonus (ALL limits now apply to accuracy)
-            if limit_accuracy_bonus > 0:
-                for limit_name in build.limits:
-                    limit = LIMITS[limit_name]
-                    bonus_value = limit.damage_bonus * attacker.tier
-                    accuracy_parts.append(f"+{bonus_value} [{limit_name}]")
-
-            # Add channeled accuracy bonus
-            if channeled_accuracy_bonus != 0:
-                accuracy_parts.append(f"{channeled_accuracy_bonus:+d} [Channeled]")
-
-            accuracy_breakdown = " + ".join(accuracy_parts).replace(" + -", " - ")
-            log_file.write(f"      Accuracy: {accuracy_breakdown} = {accuracy_roll + total_accuracy} vs {defender.avoidance}\n")
-
-            if is_critical:
-                log_file.write(f"      CRITICAL HIT! (rolled {accuracy_roll})\n")
+        # Critical hit on 15+ with crit-range upgrades, otherwise natural 20
+        is_critical = accuracy_roll >= compiled.crit_threshold
+
+        avoidance = defender.avoidance
+        tracer.emit(EVENT_ROLL, 'accuracy',
+                    _accuracy_parts(attacker, build, accuracy_roll, slayer_bonus, channeled_bonus),
+                    accuracy_roll + total_accuracy, avoidance)
+        if is_critical:
+            tracer.emit(EVENT_ROLL, 'critical', accuracy_roll)
 
         # Check if this attack hits
-        attack_hits = accuracy_roll + total_accuracy >= defender.avoidance
-        if not attack_hits:
-            if log_file:
-                log_file.write(f"      Miss!\n")
+        total_attack_roll = accuracy_roll + total_accuracy
+        if total_attack_roll < avoidance:
+            tracer.emit(EVENT_ROLL, 'miss')
             return 0, [], False  # Early return for misses
 
-    # For missed attacks, set damage to 0 but continue for multi-attacks
-    damage_dealt = 0
-    conditions_applied = []
-
-    if attack_type.is_direct or attack_hits:
-        # Calculate overhit bonus (only if attack hit and non-direct) - optimized with cached set
-        overhit_bonus = 0
-        if not attack_type.is_direct and 'overhit' in upgrades_set:
-            total_attack_roll = accuracy_roll + total_accuracy
-            overhit_threshold = 3 * attacker.tier
-            if total_attack_roll >= defender.avoidance + overhit_threshold:
-                overhit_bonus = (total_attack_roll - defender.avoidance) // 2
-                if log_file:
-                    log_file.write(f"      Overhit! Exceeded avoidance by {total_attack_roll - defender.avoidance}, adding {overhit_bonus} to damage\n")
-
-        # Calculate base damage (either dice roll or direct damage)
-        if attack_type.is_direct:
-            # Direct attacks: fixed base damage
-            base_damage = attack_type.direct_damage_base + (attack_type.damage_mod * attacker.tier)
-            dice_detail = []
-        else:
-            # Dice-based attacks: roll damage dice (use shared roll for AOE) - optimized with cached set
-            use_high_impact = 'high_impact' in upgrades_set
-            use_critical_effect = 'critical_effect' in upgrades_set
+    # Calculate overhit bonus (only if attack hit and non-direct)
+    overhit_bonus = 0
+    if compiled.has_overhit and not compiled.is_direct:
+        overhit_threshold = 3 * tier
+        if total_attack_roll >= avoidance + overhit_threshold:
+            overhit_bonus = (total_attack_roll - avoidance) // 2
+            tracer.emit(EVENT_DAMAGE, 'overhit', total_attack_roll - avoidance, overhit_bonus)
 
-            if is_aoe and aoe_damage_roll is not None:
-                # Use shared AOE damage roll
-                base_damage, dice_detail = aoe_damage_roll
-            else:
-                # Roll new damage dice
-                if use_high_impact:
-                    base_damage = 15  # Flat 15
-                    dice_detail = ["15 (flat)"]
-                elif use_critical_effect:
-                    base_damage, dice_detail = roll_3d6_exploding_5_6()
-                else:
-                    base_damage, dice_detail = roll_3d6_exploding()
-
-        # Calculate flat bonuses (applies to BOTH direct and dice attacks)
-        flat_bonus = attacker.tier + attacker.power
-
-        # Add attack type damage modifier (only for dice attacks, already in base_damage for direct)
-        if not attack_type.is_direct:
-            flat_bonus += attack_type.damage_mod * attacker.tier
-
-        # Melee damage bonus for melee_dg variant
-        if build.attack_type in ['melee_dg']:
-            flat_bonus += attacker.tier
-
-        # Apply upgrade bonuses/penalties
+    # Calculate base damage (either dice roll or direct damage); the traced path draws the same table
+    # totals as make_attack and shows them split into dice
+    dice_detail = []
+    dice_mode = compiled.dice_mode
+    if compiled.is_direct:
+        # Direct attacks: fixed base damage
+        base_damage = compiled.direct_damage_base + compiled.direct_damage_tier_coef * tier
+    elif is_aoe and aoe_damage_roll is not None:
+        # Use shared AOE damage roll
+        base_damage, dice_detail = aoe_damage_roll
+    elif dice_mode == DICE_FLAT_15:
+        base_damage = 15  # Flat 15
+        dice_detail = ["15 (flat)"]
+    elif dice_mode == DICE_EXPLODE_5_6:
+        base_damage, dice_detail = sample_3d6_exploding_5_6_detail()
+    else:
+        base_damage, dice_detail = sample_3d6_exploding_detail()
+
+    # Flat bonuses: Tier + Power + summed modifiers (attack type, melee, upgrades, limits) + channeled
+    flat_bonus = attacker.power + tier * compiled.damage_tier_coef - compiled.damage_flat_penalty + channeled_bonus
+    if compiled.has_channeled:
+        tracer.emit(EVENT_DAMAGE, 'channeled', combat_state.channeled_turns, channeled_bonus)
+
+    # Apply critical hit damage bonus (only for non-direct attacks)
+    critical_damage_bonus = 0
+    if is_critical:
+        # Base critical hit bonus
+        critical_damage_bonus = tier
+        # Additional bonus if they have powerful critical
+        if compiled.has_powerful_critical:
+            critical_damage_bonus += tier
+
+    # Apply empower bonus if available
+    empower_bonus = combat_state.empower_bonus
+
+    # Calculate total damage
+    damage = base_damage + flat_bonus + slayer_bonus + critical_damage_bonus + overhit_bonus + tier_bonus + empower_bonus
+
+    # Clear empower bonus after applying (one-time use)
+    if empower_bonus > 0:
+        combat_state.empower_bonus = 0
+        tracer.emit(EVENT_DAMAGE, 'empower', empower_bonus)
+
+    if compiled.is_direct:
+        tracer.emit(EVENT_DAMAGE, 'direct_base', base_damage)
+    else:
+        tracer.emit(EVENT_DAMAGE, 'damage_dice', dice_detail, base_damage)
+    tracer.emit(EVENT_DAMAGE, 'flat_bonus', _flat_bonus_parts(attacker, build), flat_bonus)
+    if slayer_bonus > 0:
+        slayer_type = ""
         for upgrade_name in build.upgrades:
-            upgrade = UPGRADES[upgrade_name]
-            flat_bonus += upgrade.damage_mod * attacker.tier
-            # Critical Effect has flat damage penalty, not tier-scaled
-            if upgrade_name == 'critical_effect':
-                flat_bonus -= upgrade.damage_penalty
-            else:
-                flat_bonus -= upgrade.damage_penalty * attacker.tier
-
-        # Apply limit bonuses
-        for limit_name in build.limits:
-            limit = LIMITS[limit_name]
-            flat_bonus += limit.damage_bonus * attacker.tier
-
-        # Apply channeled bonus (optimized with cached set)
-        channeled_bonus = 0
-        if 'channeled' in upgrades_set:
-            channeled_turns = combat_state.get('channeled_turns', 0)
-            # Starts at -3×Tier penalty, gains +Tier per turn, max +5×Tier total (updated 2025-10-21)
-            # Turn 0: -3, Turn 1: -2, Turn 2: -1, Turn 3: 0, Turn 4: +1, ..., Turn 8+: +5
-            channeled_bonus = min(channeled_turns - 3, 5) * attacker.tier
-            flat_bonus += channeled_bonus
-            if log_file:
-                log_file.write(f"      Channeled: turn {channeled_turns}, bonus {channeled_bonus:+d}\n")
-
-        # Apply slayer damage bonuses (applies to BOTH direct and dice attacks) - optimized with cached set
-        slayer_damage_bonus = 0
-        slayer_damage_upgrades = {'minion_slayer', 'captain_slayer', 'elite_slayer', 'boss_slayer'}
-        if upgrades_set & slayer_damage_upgrades:
-            # Use enemy_max_hp if provided, otherwise fall back to defender.max_hp
-            target_max_hp = enemy_max_hp if enemy_max_hp is not None else defender.max_hp
-            if 'minion_slayer' in upgrades_set and target_max_hp == 10:
-                slayer_damage_bonus += attacker.tier
-            elif 'captain_slayer' in upgrades_set and target_max_hp == 25:
-                slayer_damage_bonus += attacker.tier
-            elif 'elite_slayer' in upgrades_set and target_max_hp == 50:
-                slayer_damage_bonus += attacker.tier
-            elif 'boss_slayer' in upgrades_set and target_max_hp == 100:
-                slayer_damage_bonus += attacker.tier
-
-        # Apply critical hit damage bonus (only for non-direct attacks) - optimized with cached set
-        critical_damage_bonus = 0
-        if not attack_type.is_direct and is_critical:
-            # Base critical hit bonus
-            critical_damage_bonus = attacker.tier
-            # Additional bonus if they have powerful critical
-            if 'powerful_critical' in upgrades_set:
-                critical_damage_bonus += attacker.tier
-
-        # Apply empower bonus if available
-        empower_bonus = combat_state.get('empower_bonus', 0) if combat_state else 0
-
-        # Calculate total damage
-        damage = base_damage + flat_bonus + slayer_damage_bonus + critical_damage_bonus + overhit_bonus + tier_bonus + empower_bonus
-
-        # Clear empower bonus after applying (one-time use)
-        if combat_state and 'empower_bonus' in combat_state and empower_bonus > 0:
-            combat_state['empower_bonus'] = 0
-            if log_file:
-                log_file.write(f"      Empower bonus applied: +{empower_bonus}\n")
-
-        # Logging
-        if log_file:
-            if attack_type.is_direct:
-                log_file.write(f"      Direct damage base: {base_damage}\n")
-            else:
-                log_file.write(f"      Damage dice: {dice_detail} = {base_damage}\n")
-
-            # Enhanced flat bonus breakdown
-            flat_parts = [f"{attacker.tier} [Tier]", f"{attacker.power} [Power]"]
-
-            # Add attack type damage modifier (only shown for dice attacks)
-            if not attack_type.is_direct and attack_type.damage_mod != 0:
-                mod_value = attack_type.damage_mod * attacker.tier
-                flat_parts.append(f"{mod_value:+d} [{build.attack_type.title()}]")
-
-            # Melee damage bonus
-            if build.attack_type in ['melee_dg']:
-                flat_parts.append(f"+{attacker.tier} [Melee]")
-
-            # Upgrade damage modifiers
-            for upgrade_name in build.upgrades:
-                upgrade = UPGRADES[upgrade_name]
-                if upgrade.damage_mod != 0:
-                    mod_value = upgrade.damage_mod * attacker.tier
-                    flat_parts.append(f"{mod_value:+d} [{upgrade_name}]")
-                if upgrade.damage_penalty != 0:
-                    # Critical Effect has flat penalty, others are tier-scaled
-                    if upgrade_name == 'critical_effect':
-                        penalty_value = -upgrade.damage_penalty
-                    else:
-                        penalty_value = -(upgrade.damage_penalty * attacker.tier)
-                    flat_parts.append(f"{penalty_value:+d} [{upgrade_name}]")
-
-            # Limit damage bonuses
-            for limit_name in build.limits:
-                limit = LIMITS[limit_name]
-                if limit.damage_bonus > 0:
-                    bonus_value = limit.damage_bonus * attacker.tier
-                    flat_parts.append(f"+{bonus_value} [{limit_name}]")
-
-            flat_breakdown = " + ".join(flat_parts).replace(" + -", " - ")
-            log_file.write(f"      Flat bonus: {flat_breakdown} = {flat_bonus}\n")
-
-            if slayer_damage_bonus > 0:
-                slayer_type = ""
-                for upgrade_name in build.upgrades:
-                    if 'slayer' in upgrade_name:
-                        slayer_type = upgrade_name.replace('_slayer', '').title()
-                        break
-                log_file.write(f"      Slayer bonus: +{slayer_damage_bonus} [{slayer_type} vs {target_max_hp}HP]\n")
-
-            if critical_damage_bonus > 0:
-                if 'powerful_critical' in build.upgrades:
-                    log_file.write(f"      Critical bonus: +{critical_damage_bonus} [Critical Hit +{attacker.tier} + Powerful Critical +{attacker.tier}]\n")
-                else:
-                    log_file.write(f"      Critical bonus: +{critical_damage_bonus} [Critical Hit]\n")
-
-            if overhit_bonus > 0:
-                log_file.write(f"      Overhit bonus: +{overhit_bonus} [Exceeded avoidance by {accuracy_roll + total_accuracy - defender.avoidance}]\n")
-
-            log_file.write(f"      Total damage: {damage}\n")
-
-        # Apply durability (ALL attacks subtract durability) - optimized with cached set
-        effective_durability = defender.durability
-        if 'armor_piercing' in upgrades_set:
-            effective_durability = defender.tier  # Ignore endurance bonus
-            if log_file:
-                log_file.write(f"      Armor piercing: reducing durability from {defender.durability} to {effective_durability}\n")
-
-        damage_dealt = max(0, damage - effective_durability)
-
-        if log_file:
-            if attack_type.is_direct:
-                log_file.write(f"      Direct attack: {damage} - durability {effective_durability} = {damage_dealt} damage\n")
-            else:
-                log_file.write(f"      After durability ({effective_durability}): {damage_dealt} damage\n")
-
-        # Handle brutal (only for non-direct attacks) - optimized with cached set
-        brutal_threshold = 5 * attacker.tier
-        if not attack_type.is_direct and 'brutal' in upgrades_set and damage > effective_durability + brutal_threshold:
+            if 'slayer' in upgrade_name:
+                slayer_type = upgrade_name.replace('_slayer', '').title()
+                break
+        tracer.emit(EVENT_DAMAGE, 'slayer_bonus', slayer_bonus, slayer_type, target_max_hp)
+    if critical_damage_bonus > 0:
+        if compiled.has_powerful_critical:
+            tracer.emit(EVENT_DAMAGE, 'powerful_critical_bonus', critical_damage_bonus, tier, tier)
+        else:
+            tracer.emit(EVENT_DAMAGE, 'critical_bonus', critical_damage_bonus)
+    if overhit_bonus > 0:
+        tracer.emit(EVENT_DAMAGE, 'overhit_bonus', overhit_bonus, accuracy_roll + total_accuracy - defender.avoidance)
+    tracer.emit(EVENT_DAMAGE, 'total_damage', damage)
+
+    # Apply durability (ALL attacks subtract durability)
+    effective_durability = defender.durability
+    if compiled.has_armor_piercing:
+        effective_durability = defender.tier  # Ignore endurance bonus
+        tracer.emit(EVENT_DAMAGE, 'armor_piercing', defender.durability, effective_durability)
+
+    damage_dealt = max(0, damage - effective_durability)
+
+    if compiled.is_direct:
+        tracer.emit(EVENT_DAMAGE, 'direct_after_durability', damage, effective_durability, damage_dealt)
+    else:
+        tracer.emit(EVENT_DAMAGE, 'after_durability', effective_durability, damage_dealt)
+
+    # Handle brutal (only for non-direct attacks)
+    if compiled.has_brutal:
+        brutal_threshold = 5 * tier
+        if damage > effective_durability + brutal_threshold:
             brutal_bonus = int((damage - effective_durability - brutal_threshold) * 0.5)
             damage_dealt += brutal_bonus
-            if log_file:
-                log_file.write(f"      Brutal bonus: +{brutal_bonus} damage\n")
-
-        # Handle leech (HP recovery) - optimized with cached set
-        if 'leech' in upgrades_set and damage_dealt > 0:
-            leech_hp = damage_dealt // 2
-            if 'leech_hp' not in combat_state:
-                combat_state['leech_hp'] = 0
-            combat_state['leech_hp'] += leech_hp
-            if log_file:
-                log_file.write(f"      Leech: recover {leech_hp} HP (half of {damage_dealt} damage)\n")
-
-        # Handle conditions for successful attacks - optimized with cached set
-        if 'bleed' in upgrades_set:
-            conditions_applied.append('bleed')
-            if log_file:
-                log_file.write(f"      Applied bleed condition\n")
-
-        # Handle finishing blow threshold - optimized with cached set
-        finishing_threshold = 0
-        if 'finishing_blow_1' in upgrades_set:
-            finishing_threshold = 5
-        elif 'finishing_blow_3' in upgrades_set:
-            finishing_threshold = 15
-
-        if finishing_threshold > 0:
-            conditions_applied.append(f'finishing_{finishing_threshold}')
-
-        # Handle culling strike (defeat if below 1/5 max HP) - optimized with cached set
-        if 'culling_strike' in upgrades_set:
-            conditions_applied.append('culling_strike')
-
-        # Handle splinter (triggers another attack if enemy is defeated) - optimized with cached set
-        if 'splinter' in upgrades_set:
-            conditions_applied.append('splinter')
-
-    # Handle explosive critical (15-20 triggers attack against all enemies in range) - optimized with cached set
-    if allow_multi and 'explosive_critical' in upgrades_set and accuracy_roll >= 15:
+            tracer.emit(EVENT_DAMAGE, 'brutal', brutal_bonus)
+
+    # Handle leech (HP recovery)
+    if compiled.has_leech and damage_dealt > 0:
+        leech_hp = damage_dealt // 2
+        combat_state.leech_hp += leech_hp
+        tracer.emit(EVENT_DAMAGE, 'leech', leech_hp, damage_dealt)
+
+    # Conditions for successful attacks: bleed, finishing blow, culling strike, splinter
+    conditions_applied = list(compiled.hit_conditions)
+    if 'bleed' in conditions_applied:
+        tracer.emit(EVENT_EFFECT, 'bleed')
+
+    # Crit-range triggers (15-20) only fire on the initial attack of a turn
+    triggers_on_roll = allow_multi and accuracy_roll >= 15
+
+    # Handle explosive critical (15-20 triggers attack against all enemies in range)
+    if triggers_on_roll and compiled.has_explosive_critical:
         conditions_applied.append('explosive_critical')
-        if log_file:
-            log_file.write(f"      Explosive Critical triggered! (will splash to other enemies in range)\n")
-
-    # Handle double-tap (15-20 triggers same attack again) - optimized with cached set
-    if allow_multi and 'double_tap' in upgrades_set and accuracy_roll >= 15:
-        if log_file:
-            log_file.write(f"      Double-Tap triggered! Making identical attack:\n")
-        extra_damage = make_single_attack_damage(attacker, defender, build, log_file, turn_number, charge_history, cooldown_history,
+        tracer.emit(EVENT_EFFECT, 'explosive_critical')
+
+    # Handle double-tap (15-20 triggers same attack again)
+    if triggers_on_roll and compiled.has_double_tap:
+        tracer.emit(EVENT_EFFECT, 'double_tap')
+        extra_damage = make_single_attack_damage(attacker, defender, build, tracer, turn_number, charge_history, cooldown_history,
                                                 attacker_hp, attacker_max_hp, combat_state)
         damage_dealt += extra_damage
-        if log_file:
-            log_file.write(f"      Total with double-tap: {damage_dealt} damage\n")
+        tracer.emit(EVENT_EFFECT, 'double_tap_total', damage_dealt)
 
-    # Handle ricochet (15-20 triggers attack on up to 2 different targets) - optimized with cached set
-    if allow_multi and 'ricochet' in upgrades_set and accuracy_roll >= 15:
+    # Handle ricochet (15-20 triggers attack on up to 2 different targets)
+    if triggers_on_roll and compiled.has_ricochet:
         # Mark for ricochet - actual targeting handled by simulation layer
         conditions_applied.append('ricochet')
         conditions_applied.append('ricochet')  # Add twice for 2 targets
-        if log_file:
-            log_file.write(f"      Ricochet triggered! (will attack up to 2 different targets)\n")
-
-    # Handle extra attack (successful hit + effect allows identical attack) - optimized with cached set
-    if allow_multi and 'extra_attack' in upgrades_set and damage_dealt > 0 and len(conditions_applied) > 0:
-        if log_file:
-            log_file.write(f"      Extra Attack triggered! (hit + effect success)\n")
-        extra_damage = make_single_attack_damage(attacker, defender, build, log_file, turn_number, charge_history, cooldown_history,
+        tracer.emit(EVENT_EFFECT, 'ricochet')
+
+    # Handle extra attack (successful hit + effect allows identical attack)
+    if allow_multi and compiled.has_extra_attack and damage_dealt > 0 and len(conditions_applied) > 0:
+        tracer.emit(EVENT_EFFECT, 'extra_attack')
+        extra_damage = make_single_attack_damage(attacker, defender, build, tracer, turn_number, charge_history, cooldown_history,
                                                 attacker_hp, attacker_max_hp, combat_state)
         damage_dealt += extra_damage
-        if log_file:
-            log_file.write(f"      Total with extra attack: {damage_dealt} damage\n")
+        tracer.emit(EVENT_EFFECT, 'extra_attack_total', damage_dealt)
 
-    # Handle barrage (chained attacks - hit + effect on each attack enables the next) - optimized with cached set
-    if allow_multi and 'barrage' in upgrades_set and damage_dealt > 0 and len(conditions_applied) > 0:
-        if log_file:
-            log_file.write(f"      Barrage - first attack succeeded, attempting second attack:\n")
+    # Handle barrage (chained attacks - hit + effect on each attack enables the next)
+    if allow_multi and compiled.has_barrage and damage_dealt > 0 and len(conditions_applied) > 0:
+        tracer.emit(EVENT_EFFECT, 'barrage_second')
         # Second attack
-        second_damage = make_single_attack_damage(attacker, defender, build, log_file, turn_number, charge_history, cooldown_history,
+        second_damage = make_single_attack_damage(attacker, defender, build, tracer, turn_number, charge_history, cooldown_history,
                                                  attacker_hp, attacker_max_hp, combat_state)
         damage_dealt += second_damage
 
         # If second attack also hit and caused an effect, attempt third attack
         if second_damage > 0:  # Simplified: if damage was dealt, assume hit + effect
-            if log_file:
-                log_file.write(f"      Barrage - second attack succeeded, attempting third attack:\n")
-            third_damage = make_single_attack_damage(attacker, defender, build, log_file, turn_number, charge_history, cooldown_history,
+            tracer.emit(EVENT_EFFECT, 'barrage_third')
+            third_damage = make_single_attack_damage(attacker, defender, build, tracer, turn_number, charge_history, cooldown_history,
                                                     attacker_hp, attacker_max_hp, combat_state)
             damage_dealt += third_damage
-            if log_file:
-                log_file.write(f"      Total with barrage (3 attacks): {damage_dealt} damage\n")
+            tracer.emit(EVENT_EFFECT, 'barrage_total', 3, damage_dealt)
         else:
-            if log_file:
-                log_file.write(f"      Total with barrage (2 attacks): {damage_dealt} damage\n")
+            tracer.emit(EVENT_EFFECT, 'barrage_total', 2, damage_dealt)
 
     # Attack hit successfully (either direct attack or passed accuracy check)
     # Direct attacks auto-hit, regular attacks that reach here have passed the hit check
-    return damage_dealt, conditions_applied, True
\ No newline at end of file
+    return damage_dealt, conditions_applied, True
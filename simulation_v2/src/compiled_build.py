@@ -0,0 +1,299 @@
+"""
+Precompiled hot-path form of an AttackBuild.
+
+make_attack runs millions of times per build test, and the AttackBuild it
+receives only holds string lists. Resolving those strings against
+ATTACK_TYPES/UPGRADES/LIMITS on every attack (summing modifiers, testing
+`'brutal' in upgrades`, walking an elif chain per limit) dominated the
+simulation profile. A CompiledBuild does that work once per build:
+
+- Accuracy and damage modifiers are summed into tier coefficients plus flat
+  parts, so an attack only needs `focus + tier * coef - flat`
+- Upgrades and limits are also encoded as bitmasks (UPGRADE_BITS, LIMIT_BITS)
+- Every special effect the attack loop checks is a precomputed attribute
+- Limits are compiled to (name, kind, param, predicate, is_action_based)
+  entries where the predicate comes from the LIMIT_PREDICATES dispatch table
+
+Builds are never mutated after construction, so AttackBuild.compiled caches
+its CompiledBuild on first use.
+"""
+
+from typing import Dict, FrozenSet, Tuple
+# UPGRADE_BITS / LIMIT_BITS: bit of every upgrade and limit (game_data declaration order)
+from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS, UPGRADE_BITS, LIMIT_BITS
+
+# Upgrades whose accuracy penalty is flat rather than tier-scaled
+FLAT_ACCURACY_PENALTY_UPGRADES = {'reliable_accuracy', 'armor_piercing'}
+
+# Upgrades whose damage penalty is flat rather than tier-scaled
+FLAT_DAMAGE_PENALTY_UPGRADES = {'critical_effect'}
+
+# Upgrades that widen the critical range to 15-20
+CRIT_RANGE_UPGRADES = {'double_tap', 'powerful_critical', 'explosive_critical', 'ricochet'}
+
+# Slayer upgrade -> enemy max HP it applies to
+SLAYER_TARGET_HP = {
+    'minion_slayer': 10,
+    'captain_slayer': 25,
+    'elite_slayer': 50,
+    'boss_slayer': 100,
+}
+
+# Finishing blow upgrade -> HP threshold
+FINISHING_THRESHOLDS = {
+    'finishing_blow_1': 5,
+    'finishing_blow_3': 15,
+}
+
+# Limits only checked on the first charge turn (skipped while charging)
+ACTION_BASED_LIMITS = {'slaughter', 'relentless', 'combo_move'}
+
+# Damage dice modes
+DICE_FLAT_15 = 0        # High Impact
+DICE_EXPLODE_5_6 = 1    # Critical Effect
+DICE_EXPLODE_6 = 2      # Standard 3d6 exploding on 6
+
+# Limit kinds (how a limit decides whether it can activate)
+LIMIT_HP_MAX = 1            # Attacker HP must be at or below param
+LIMIT_FULL_HP = 2           # Attacker must be at max HP
+LIMIT_ATTRITION = 3         # Costs HP to use
+LIMIT_CHARGES = 4           # param uses per combat
+LIMIT_STATE_REQUIRED = 5    # CombatState attribute param must be set
+LIMIT_STATE_FORBIDDEN = 6   # CombatState attribute param must not be set
+LIMIT_TURN_MAX = 7          # Turn number must be at most param
+LIMIT_TURN_MIN = 8          # Turn number must be at least param
+LIMIT_COOLDOWN = 9          # param turns between uses
+LIMIT_DC = 10               # d20 roll must meet the limit's DC
+LIMIT_CHARGE_UP = 11        # Must have charged for param previous turns
+
+# Limit name -> (kind, param, failure reason used in combat logs)
+# Reasons are formatted with hp, max_hp, turn, param and charges_used
+LIMIT_RULES: Dict[str, Tuple[int, object, str]] = {
+    'near_death': (LIMIT_HP_MAX, 25, "HP too high ({hp} > 25)"),
+    'bloodied': (LIMIT_HP_MAX, 50, "HP too high ({hp} > 50)"),
+    'timid': (LIMIT_FULL_HP, None, "not at max HP ({hp} < {max_hp})"),
+    'attrition': (LIMIT_ATTRITION, 20, "not enough HP ({hp} < 20)"),
+    'charges_1': (LIMIT_CHARGES, 1, "all charges used ({charges_used}/{param})"),
+    'charges_2': (LIMIT_CHARGES, 2, "all charges used ({charges_used}/{param})"),
+    'slaughter': (LIMIT_STATE_REQUIRED, 'defeated_enemy_last_turn', "did not defeat enemy last turn"),
+    'relentless': (LIMIT_STATE_REQUIRED, 'dealt_damage_last_turn', "did not deal damage last turn"),
+    'combo_move': (LIMIT_STATE_REQUIRED, 'hit_same_target_last_turn', "did not hit same target last turn"),
+    'revenge': (LIMIT_STATE_REQUIRED, 'was_damaged_last_turn', "was not damaged last turn"),
+    'vengeful': (LIMIT_STATE_REQUIRED, 'was_hit_last_turn', "was not hit last turn"),
+    'untouchable': (LIMIT_STATE_REQUIRED, 'all_attacks_missed_last_turn', "not all attacks missed last turn"),
+    'unbreakable': (LIMIT_STATE_REQUIRED, 'was_hit_no_damage_last_turn', "was not hit without damage last turn"),
+    'passive': (LIMIT_STATE_FORBIDDEN, 'dealt_damage_last_turn', "made an attack last turn"),
+    'careful': (LIMIT_STATE_FORBIDDEN, 'was_damaged_last_turn', "was damaged last turn"),
+    'quickdraw': (LIMIT_TURN_MAX, 2, "not turn 1 or 2 (turn {turn})"),
+    'patient': (LIMIT_TURN_MIN, 4, "too early (turn {turn}, need turn 4+)"),
+    'finale': (LIMIT_TURN_MIN, 7, "too early (turn {turn}, need turn 7+)"),
+    'cooldown': (LIMIT_COOLDOWN, 3, "still on cooldown"),
+    'charge_up': (LIMIT_CHARGE_UP, 1, "need to charge on previous turn (charging instead)"),
+    'charge_up_2': (LIMIT_CHARGE_UP, 2, "need to charge on previous 2 turns (charging instead)"),
+}
+
+
+# Limit predicates: (param, name, turn_number, attacker_hp, attacker_max_hp,
+# combat_state, charge_history, cooldown_history) -> can activate
+# combat_state is a models.CombatState (callers coerce legacy dicts)
+def _hp_max_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return attacker_hp <= param
+
+
+def _full_hp_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return attacker_hp >= attacker_max_hp
+
+
+def _attrition_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    # Planning check keeps a margin over the 20 HP make_attack requires (the cost is 25 HP)
+    return attacker_hp >= 25
+
+
+def _charges_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return combat_state.charges_used.get(name, 0) < param
+
+
+def _state_required_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return bool(getattr(combat_state, param))
+
+
+def _state_forbidden_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return not getattr(combat_state, param)
+
+
+def _turn_max_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return turn_number <= param
+
+
+def _turn_min_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return turn_number >= param
+
+
+def _cooldown_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return turn_number - cooldown_history.get(name, -999) > param
+
+
+def _dc_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    # The DC is rolled when attacking; planning treats the limit as available
+    return True
+
+
+def _charge_up_ok(param, name, turn_number, attacker_hp, attacker_max_hp, combat_state, charge_history, cooldown_history):
+    return len(charge_history) >= param and all(charge_history[-param:])
+
+
+LIMIT_PREDICATES = {
+    LIMIT_HP_MAX: _hp_max_ok,
+    LIMIT_FULL_HP: _full_hp_ok,
+    LIMIT_ATTRITION: _attrition_ok,
+    LIMIT_CHARGES: _charges_ok,
+    LIMIT_STATE_REQUIRED: _state_required_ok,
+    LIMIT_STATE_FORBIDDEN: _state_forbidden_ok,
+    LIMIT_TURN_MAX: _turn_max_ok,
+    LIMIT_TURN_MIN: _turn_min_ok,
+    LIMIT_COOLDOWN: _cooldown_ok,
+    LIMIT_DC: _dc_ok,
+    LIMIT_CHARGE_UP: _charge_up_ok,
+}
+
+
+def limit_rule(limit_name: str) -> Tuple[int, object, str]:
+    """(kind, param, failure reason) for a limit; unknown DC limits are treated as LIMIT_DC"""
+    rule = LIMIT_RULES.get(limit_name)
+    if rule is not None:
+        return rule
+    return (LIMIT_DC, LIMITS[limit_name].dc, "")
+
+
+class CompiledBuild:
+    """Attacker-independent, precomputed view of an AttackBuild used by make_attack."""
+
+    __slots__ = (
+        'attack_type', 'is_direct', 'is_area', 'upgrade_mask', 'limit_mask',
+        'accuracy_tier_coef', 'accuracy_flat_penalty', 'damage_tier_coef', 'damage_flat_penalty',
+        'direct_damage_base', 'direct_damage_tier_coef', 'dice_mode', 'has_advantage', 'crit_threshold',
+        'has_overhit', 'has_powerful_critical', 'has_armor_piercing', 'has_brutal', 'has_leech',
+        'has_channeled', 'has_explosive_critical', 'has_double_tap', 'has_ricochet',
+        'has_extra_attack', 'has_barrage', 'slayer_target_hps', 'hit_conditions',
+        'limit_checks', 'charge_up_turns',
+    )
+
+    def __init__(self, build):
+        attack_type = ATTACK_TYPES[build.attack_type]
+        upgrades = set(build.upgrades)
+
+        self.attack_type = build.attack_type
+        self.is_direct = attack_type.is_direct
+        self.is_area = attack_type.is_area
+
+        self.upgrade_mask = 0
+        for upgrade_name in build.upgrades:
+            self.upgrade_mask |= UPGRADE_BITS.get(upgrade_name, 0)
+        self.limit_mask = 0
+        for limit_name in build.limits:
+            self.limit_mask |= LIMIT_BITS.get(limit_name, 0)
+
+        # Accuracy: Tier + Focus + tier-scaled modifiers - flat penalties
+        accuracy_tier_coef = 1 + attack_type.accuracy_mod
+        accuracy_flat_penalty = 0
+        # Damage: Tier + Power + tier-scaled modifiers - flat penalties
+        damage_tier_coef = 1
+        damage_flat_penalty = 0
+        if not attack_type.is_direct:
+            damage_tier_coef += attack_type.damage_mod
+
+        if build.attack_type == 'melee_ac':
+            accuracy_tier_coef += 1
+        elif build.attack_type == 'melee_dg':
+            damage_tier_coef += 1
+
+        for upgrade_name in build.upgrades:
+            upgrade = UPGRADES[upgrade_name]
+            accuracy_tier_coef += upgrade.accuracy_mod
+            if upgrade_name in FLAT_ACCURACY_PENALTY_UPGRADES:
+                accuracy_flat_penalty += upgrade.accuracy_penalty
+            else:
+                accuracy_tier_coef -= upgrade.accuracy_penalty
+            damage_tier_coef += upgrade.damage_mod
+            if upgrade_name in FLAT_DAMAGE_PENALTY_UPGRADES:
+                damage_flat_penalty += upgrade.damage_penalty
+            else:
+                damage_tier_coef -= upgrade.damage_penalty
+
+        # Every limit adds its bonus to both accuracy and damage
+        for limit_name in build.limits:
+            limit_bonus = LIMITS[limit_name].damage_bonus
+            accuracy_tier_coef += limit_bonus
+            damage_tier_coef += limit_bonus
+
+        self.accuracy_tier_coef = accuracy_tier_coef
+        self.accuracy_flat_penalty = accuracy_flat_penalty
+        self.damage_tier_coef = damage_tier_coef
+        self.damage_flat_penalty = damage_flat_penalty
+        # Direct base damage is 15 + damage_mod x Tier (tier part added per attacker)
+        self.direct_damage_base = attack_type.direct_damage_base
+        self.direct_damage_tier_coef = attack_type.damage_mod
+
+        # Damage dice
+        if 'high_impact' in upgrades:
+            self.dice_mode = DICE_FLAT_15
+        elif 'critical_effect' in upgrades:
+            self.dice_mode = DICE_EXPLODE_5_6
+        else:
+            self.dice_mode = DICE_EXPLODE_6
+
+        # Accuracy roll effects
+        self.has_advantage = 'reliable_accuracy' in upgrades
+        self.crit_threshold = 15 if upgrades & CRIT_RANGE_UPGRADES else 20
+
+        # Special effects checked by the attack loop
+        self.has_overhit = 'overhit' in upgrades
+        self.has_powerful_critical = 'powerful_critical' in upgrades
+        self.has_armor_piercing = 'armor_piercing' in upgrades
+        self.has_brutal = 'brutal' in upgrades and not attack_type.is_direct
+        self.has_leech = 'leech' in upgrades
+        self.has_channeled = 'channeled' in upgrades
+        self.has_explosive_critical = 'explosive_critical' in upgrades
+        self.has_double_tap = 'double_tap' in upgrades
+        self.has_ricochet = 'ricochet' in upgrades
+        self.has_extra_attack = 'extra_attack' in upgrades
+        self.has_barrage = 'barrage' in upgrades
+
+        # Enemy max HP values that trigger a slayer bonus
+        self.slayer_target_hps: FrozenSet[int] = frozenset(
+            hp for name, hp in SLAYER_TARGET_HP.items() if name in upgrades
+        )
+
+        # Conditions applied on every successful attack, in make_attack order
+        hit_conditions = []
+        if 'bleed' in upgrades:
+            hit_conditions.append('bleed')
+        for name, threshold in FINISHING_THRESHOLDS.items():
+            if name in upgrades:
+                hit_conditions.append(f'finishing_{threshold}')
+                break
+        if 'culling_strike' in upgrades:
+            hit_conditions.append('culling_strike')
+        if 'splinter' in upgrades:
+            hit_conditions.append('splinter')
+        self.hit_conditions = tuple(hit_conditions)
+
+        # PASS 1 limit checks in build order (charge_up limits are checked separately, last)
+        limit_checks = []
+        self.charge_up_turns = 0
+        for limit_name in build.limits:
+            kind, param, _ = limit_rule(limit_name)
+            if kind == LIMIT_CHARGE_UP:
+                self.charge_up_turns = max(self.charge_up_turns, param)
+                continue
+            limit_checks.append((limit_name, kind, param, LIMIT_PREDICATES[kind],
+                                 limit_name in ACTION_BASED_LIMITS))
+        self.limit_checks = tuple(limit_checks)
+
+    def has_upgrade(self, upgrade_name: str) -> bool:
+        """Bitmask membership test for an upgrade"""
+        return bool(self.upgrade_mask & UPGRADE_BITS.get(upgrade_name, 0))
+
+    def has_limit(self, limit_name: str) -> bool:
+        """Bitmask membership test for a limit"""
+        return bool(self.limit_mask & LIMIT_BITS.get(limit_name, 0))
@@ -1,12 +1,381 @@
 """
 Expected damage calculation for intelligent attack selection in combat simulation.
 
-This module provides simple math-based damage calculations without running full simulations.
+This module provides math-based damage calculations without running full simulations.
 Used for per-turn attack selection in dual_natured builds.
+
+Expectations are exact: the accuracy roll is enumerated over the d20 (or
+advantage) table and the damage roll over the exploding-dice tables in
+src/dice_tables.py, applying the same modifiers, overhit, critical, brutal,
+durability and multi-attack rules as combat.make_attack. Situational bonuses
+that depend on combat state (channeled ramp, empower) are not modelled.
 """
 
-from typing import List
+from functools import lru_cache
+from typing import Dict, List, Tuple
 from src.models import Character, AttackBuild
+from src.dice_tables import D20, accuracy_table, damage_dice_table
+
+# Upgrades that widen the critical range to natural 15-20
+CRIT_RANGE_UPGRADES = {'double_tap', 'powerful_critical', 'explosive_critical', 'ricochet'}
+
+# Slayer upgrades and the enemy max HP they trigger against
+SLAYER_TARGET_HP = {
+    'minion_slayer': 10,
+    'captain_slayer': 25,
+    'elite_slayer': 50,
+    'boss_slayer': 100,
+}
+
+# Upgrades that always add a condition on hit (enables extra_attack / barrage)
+CONDITION_UPGRADES = {'bleed', 'finishing_blow_1', 'finishing_blow_3', 'culling_strike', 'splinter'}
+
+
+def _character_key(character: Character) -> Tuple[int, int, int, int, int, int]:
+    """Hashable key for a character's stats"""
+    return (character.focus, character.power, character.mobility,
+            character.endurance, character.tier, character.max_hp)
+
+
+def _build_key(build: AttackBuild) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+    """Hashable key for an attack build"""
+    return (build.attack_type, tuple(build.upgrades), tuple(build.limits))
+
+
+def _dc_pass_probability(limits: Tuple[str, ...]) -> float:
+    """Probability that every unreliable limit passes its DC check"""
+    from src.game_data import LIMITS
+
+    pass_prob = 1.0
+    for limit_name in limits:
+        limit = LIMITS[limit_name]
+        if limit.dc > 0:
+            pass_prob *= D20.prob_at_least(limit.dc)
+    return pass_prob
+
+
+def _attack_modifiers(attacker: Character, build_key, defender: Character,
+                      tier_bonus: int, enemy_max_hp) -> Tuple[int, int]:
+    """
+    Static accuracy and flat damage modifiers for one attack, as in make_attack.
+
+    Returns:
+        Tuple of (total_accuracy, flat_damage) where flat_damage includes the
+        direct damage base for direct attacks, slayer and tier bonuses.
+    """
+    from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
+
+    attack_type_name, upgrades, limits = build_key
+    attack_type = ATTACK_TYPES[attack_type_name]
+    tier = attacker.tier
+
+    # Accuracy
+    accuracy_mod = attack_type.accuracy_mod * tier
+    for upgrade_name in upgrades:
+        upgrade = UPGRADES[upgrade_name]
+        accuracy_mod += upgrade.accuracy_mod * tier
+        # Reliable Accuracy and Armor Piercing have flat accuracy penalties, not tier-scaled
+        if upgrade_name in ['reliable_accuracy', 'armor_piercing']:
+            accuracy_mod -= upgrade.accuracy_penalty
+        else:
+            accuracy_mod -= upgrade.accuracy_penalty * tier
+
+    # Slayer bonus applies to both accuracy and damage
+    target_max_hp = enemy_max_hp if enemy_max_hp is not None else defender.max_hp
+    slayer_bonus = 0
+    for upgrade_name, slayer_hp in SLAYER_TARGET_HP.items():
+        if upgrade_name in upgrades:
+            if target_max_hp == slayer_hp:
+                slayer_bonus = tier
+            break
+
+    melee_accuracy_bonus = tier if attack_type_name == 'melee_ac' else 0
+
+    # ALL limits apply to both accuracy and damage
+    limit_bonus = sum(LIMITS[limit_name].damage_bonus * tier for limit_name in limits)
+
+    total_accuracy = (tier + attacker.focus + accuracy_mod + slayer_bonus +
+                      melee_accuracy_bonus + limit_bonus + tier_bonus)
+
+    # Damage
+    flat_damage = tier + attacker.power
+    if attack_type.is_direct:
+        flat_damage += attack_type.direct_damage_base + attack_type.damage_mod * tier
+    else:
+        flat_damage += attack_type.damage_mod * tier
+    if attack_type_name == 'melee_dg':
+        flat_damage += tier
+    for upgrade_name in upgrades:
+        upgrade = UPGRADES[upgrade_name]
+        flat_damage += upgrade.damage_mod * tier
+        # Critical Effect has flat damage penalty, not tier-scaled
+        if upgrade_name == 'critical_effect':
+            flat_damage -= upgrade.damage_penalty
+        else:
+            flat_damage -= upgrade.damage_penalty * tier
+    flat_damage += limit_bonus + slayer_bonus + tier_bonus
+
+    return total_accuracy, flat_damage
+
+
+def _hit_outcomes(attacker: Character, build_key, defender: Character,
+                  tier_bonus: int, enemy_max_hp) -> List[Tuple[float, int, int]]:
+    """
+    Enumerate the accuracy roll of one attack.
+
+    Returns:
+        List of (probability, natural_roll, damage_offset) for every roll that
+        hits. damage_offset is added to the damage dice and already includes the
+        critical and overhit bonuses for that roll. Direct attacks always hit and
+        report a natural roll of 0, like make_attack.
+    """
+    from src.game_data import ATTACK_TYPES
+
+    attack_type_name, upgrades, _ = build_key
+    total_accuracy, flat_damage = _attack_modifiers(attacker, build_key, defender, tier_bonus, enemy_max_hp)
+
+    if ATTACK_TYPES[attack_type_name].is_direct:
+        return [(1.0, 0, flat_damage)]
+
+    has_crit_range = bool(CRIT_RANGE_UPGRADES.intersection(upgrades))
+    overhit_threshold = 3 * attacker.tier
+    outcomes = []
+    for roll, prob in accuracy_table('reliable_accuracy' in upgrades).items():
+        total_attack_roll = roll + total_accuracy
+        if total_attack_roll < defender.avoidance:
+            continue
+
+        offset = flat_damage
+        if (has_crit_range and roll >= 15) or roll == 20:
+            offset += attacker.tier
+            if 'powerful_critical' in upgrades:
+                offset += attacker.tier
+        if 'overhit' in upgrades and total_attack_roll >= defender.avoidance + overhit_threshold:
+            offset += (total_attack_roll - defender.avoidance) // 2
+        outcomes.append((prob, roll, offset))
+    return outcomes
+
+
+def _damage_distribution(attacker: Character, build_key, defender: Character,
+                         offset: int, dice_total: int = None) -> Dict[int, float]:
+    """
+    Distribution of damage dealt after durability and brutal for a fixed damage offset.
+
+    dice_total fixes the damage dice (shared AOE roll); otherwise the build's dice table is used.
+    """
+    from src.game_data import ATTACK_TYPES
+
+    attack_type_name, upgrades, _ = build_key
+    is_direct = ATTACK_TYPES[attack_type_name].is_direct
+
+    effective_durability = defender.tier if 'armor_piercing' in upgrades else defender.durability
+    use_brutal = not is_direct and 'brutal' in upgrades
+    brutal_threshold = 5 * attacker.tier
+
+    if is_direct:
+        dice_items = [(0, 1.0)]
+    elif dice_total is not None:
+        dice_items = [(dice_total, 1.0)]
+    else:
+        dice_items = damage_dice_table(upgrades).items()
+    dealt_pmf = {}
+    for dice_value, prob in dice_items:
+        damage = dice_value + offset
+        dealt = max(0, damage - effective_durability)
+        if use_brutal and damage > effective_durability + brutal_threshold:
+            dealt += int((damage - effective_durability - brutal_threshold) * 0.5)
+        dealt_pmf[dealt] = dealt_pmf.get(dealt, 0.0) + prob
+    return dealt_pmf
+
+
+@lru_cache(maxsize=65536)
+def _single_attack_distribution(attacker_key, build_key, defender_key,
+                                tier_bonus: int, enemy_max_hp) -> Tuple[Tuple[int, float], ...]:
+    """
+    Distribution of damage dealt by one attack without multi-attack effects.
+
+    Includes the unreliable DC checks and the accuracy roll. Probability mass
+    for a failed DC or a miss sits at 0 damage.
+    """
+    attacker = Character(*attacker_key)
+    defender = Character(*defender_key)
+
+    pass_prob = _dc_pass_probability(build_key[2])
+    dealt_pmf = {}
+    for hit_prob, _, offset in _hit_outcomes(attacker, build_key, defender, tier_bonus, enemy_max_hp):
+        for dealt, prob in _damage_distribution(attacker, build_key, defender, offset).items():
+            dealt_pmf[dealt] = dealt_pmf.get(dealt, 0.0) + pass_prob * hit_prob * prob
+    dealt_pmf[0] = dealt_pmf.get(0, 0.0) + (1.0 - sum(dealt_pmf.values()))
+    return tuple(sorted(dealt_pmf.items()))
+
+
+@lru_cache(maxsize=65536)
+def _expected_attack_damage(attacker_key, build_key, defender_key,
+                            tier_bonus: int, enemy_max_hp, include_bleed: bool) -> float:
+    """Exact expected damage of one attack action against a single target (cached)"""
+    attacker = Character(*attacker_key)
+    defender = Character(*defender_key)
+    _, upgrades, limits = build_key
+
+    # Follow-up attacks go through make_single_attack_damage, which passes
+    # neither the enemy max HP nor the tier bonus and disables multi-attacks
+    follow_up = _single_attack_distribution(attacker_key, build_key, defender_key, 0, None)
+    follow_up_mean = sum(dealt * prob for dealt, prob in follow_up)
+    follow_up_zero = sum(prob for dealt, prob in follow_up if dealt == 0)
+
+    has_conditions = bool(CONDITION_UPGRADES.intersection(upgrades))
+    on_trigger_conditions = bool({'explosive_critical', 'ricochet'}.intersection(upgrades))
+
+    expected = 0.0
+    for hit_prob, roll, offset in _hit_outcomes(attacker, build_key, defender, tier_bonus, enemy_max_hp):
+        dealt_pmf = _damage_distribution(attacker, build_key, defender, offset)
+        primary_mean = sum(dealt * prob for dealt, prob in dealt_pmf.items())
+        primary_zero = dealt_pmf.get(0, 0.0)
+
+        outcome_damage = primary_mean
+        if include_bleed and 'bleed' in upgrades:
+            # Bleed repeats the hit's damage, reduced by tier, on the next turn
+            outcome_damage += sum(max(0, dealt - attacker.tier) * prob for dealt, prob in dealt_pmf.items())
+
+        # Double-tap: identical follow-up attack on natural 15-20
+        any_damage_zero = primary_zero
+        if 'double_tap' in upgrades and roll >= 15:
+            outcome_damage += follow_up_mean
+            any_damage_zero *= follow_up_zero
+
+        # Extra attack / barrage need damage dealt and at least one condition
+        conditions = has_conditions or (on_trigger_conditions and roll >= 15)
+        if conditions:
+            trigger_prob = 1.0 - any_damage_zero
+            if 'extra_attack' in upgrades:
+                outcome_damage += trigger_prob * follow_up_mean
+            if 'barrage' in upgrades:
+                # Third attack only follows a second attack that dealt damage
+                outcome_damage += trigger_prob * follow_up_mean * (1.0 + (1.0 - follow_up_zero))
+
+        expected += hit_prob * outcome_damage
+
+    return expected * _dc_pass_probability(limits)
+
+
+def _cap_distribution(pmf: Dict[int, float], cap: int) -> Dict[int, float]:
+    """Lump every value at or above cap into cap"""
+    if cap is None:
+        return pmf
+    capped = {}
+    for value, prob in pmf.items():
+        value = min(value, cap)
+        capped[value] = capped.get(value, 0.0) + prob
+    return capped
+
+
+def _add_distributions(pmf_a: Dict[int, float], pmf_b: Dict[int, float], cap: int) -> Dict[int, float]:
+    """Distribution of the (capped) sum of two independent damage amounts"""
+    result = {}
+    for value_a, prob_a in pmf_a.items():
+        if cap is not None and value_a >= cap:
+            result[cap] = result.get(cap, 0.0) + prob_a
+            continue
+        for value_b, prob_b in pmf_b.items():
+            total = value_a + value_b
+            if cap is not None:
+                total = min(total, cap)
+            result[total] = result.get(total, 0.0) + prob_a * prob_b
+    return result
+
+
+def _add_if_positive(pmf: Dict[int, float], follow_up: Dict[int, float], cap: int) -> Dict[int, float]:
+    """Add an independent follow-up only to outcomes that already dealt damage"""
+    zero_prob = pmf.get(0, 0.0)
+    positive = {value: prob for value, prob in pmf.items() if value > 0}
+    result = _add_distributions(positive, follow_up, cap)
+    if zero_prob > 0:
+        result[0] = result.get(0, 0.0) + zero_prob
+    return result
+
+
+@lru_cache(maxsize=65536)
+def _attack_outcome_distribution(attacker_key, build_key, defender_key, enemy_max_hp, tier_bonus: int,
+                                 dice_total, include_dc: bool, cap) -> Tuple[Tuple[Tuple[int, bool], float], ...]:
+    """Cached core of attack_outcome_distribution"""
+    attacker = Character(*attacker_key)
+    defender = Character(*defender_key)
+    _, upgrades, limits = build_key
+
+    follow_up = _cap_distribution(
+        dict(_single_attack_distribution(attacker_key, build_key, defender_key, 0, None)), cap)
+    # Barrage: second attack, plus a third one when the second dealt damage
+    barrage_follow_up = _add_if_positive(follow_up, follow_up, cap)
+
+    has_conditions = bool(CONDITION_UPGRADES.intersection(upgrades))
+    on_trigger_conditions = bool({'explosive_critical', 'ricochet'}.intersection(upgrades))
+
+    outcomes = {}
+    total_hit_prob = 0.0
+    for hit_prob, roll, offset in _hit_outcomes(attacker, build_key, defender, tier_bonus, enemy_max_hp):
+        total_hit_prob += hit_prob
+        dealt_pmf = _cap_distribution(
+            _damage_distribution(attacker, build_key, defender, offset, dice_total), cap)
+
+        if 'double_tap' in upgrades and roll >= 15:
+            dealt_pmf = _add_distributions(dealt_pmf, follow_up, cap)
+
+        if has_conditions or (on_trigger_conditions and roll >= 15):
+            if 'extra_attack' in upgrades:
+                dealt_pmf = _add_if_positive(dealt_pmf, follow_up, cap)
+            if 'barrage' in upgrades:
+                dealt_pmf = _add_if_positive(dealt_pmf, barrage_follow_up, cap)
+
+        for dealt, prob in dealt_pmf.items():
+            outcomes[(dealt, True)] = outcomes.get((dealt, True), 0.0) + hit_prob * prob
+
+    miss_prob = max(0.0, 1.0 - total_hit_prob)
+    if include_dc:
+        pass_prob = _dc_pass_probability(limits)
+        outcomes = {outcome: prob * pass_prob for outcome, prob in outcomes.items()}
+        miss_prob = miss_prob * pass_prob + (1.0 - pass_prob)
+    if miss_prob > 0:
+        outcomes[(0, False)] = outcomes.get((0, False), 0.0) + miss_prob
+
+    return tuple(sorted(outcomes.items()))
+
+
+def attack_outcome_distribution(
+    attacker: Character,
+    build: AttackBuild,
+    defender: Character,
+    enemy_max_hp: int = None,
+    tier_bonus: int = 0,
+    dice_total: int = None,
+    include_dc: bool = True,
+    cap: int = None
+) -> List[Tuple[Tuple[int, bool], float]]:
+    """
+    Exact distribution of one make_attack call against a single target.
+
+    Mirrors make_attack with allow_multi=True: accuracy roll, critical/overhit,
+    damage dice, durability, brutal, and double-tap / extra attack / barrage
+    follow-ups (which, like make_single_attack_damage, ignore the enemy max HP
+    and tier bonus and re-roll their own DC checks).
+
+    Args:
+        attacker: The attacking character
+        build: The attack build
+        defender: The defending character
+        enemy_max_hp: Max HP of the target for slayer bonuses (defaults to defender.max_hp)
+        tier_bonus: Bonus to accuracy and damage from fallback system
+        dice_total: Fix the primary damage dice to this total (shared AOE roll)
+        include_dc: Fold the unreliable DC checks into the distribution
+        cap: Lump damage at or above this value together (e.g. the target's HP)
+
+    Returns:
+        List of ((damage_dealt, hit), probability). hit is True when the
+        primary attack landed, i.e. when make_attack returned its conditions.
+    """
+    return list(_attack_outcome_distribution(
+        _character_key(attacker), _build_key(build), _character_key(defender),
+        enemy_max_hp, tier_bonus, dice_total, include_dc, cap
+    ))
 
 
 def calculate_expected_damage(
@@ -14,10 +383,12 @@ def calculate_expected_damage(
     build: AttackBuild,
     defender: Character,
     num_alive_targets: int = 1,
-    tier_bonus: int = 0
+    tier_bonus: int = 0,
+    enemy_max_hp: int = None,
+    include_bleed: bool = True
 ) -> float:
     """
-    Calculate expected damage output for a build using average dice values.
+    Calculate exact expected damage output for a build from the dice tables.
 
     Args:
         attacker: The attacking character
@@ -25,78 +396,60 @@ def calculate_expected_damage(
         defender: The defending character
         num_alive_targets: Number of alive enemies (for AOE calculations)
         tier_bonus: Bonus to accuracy and damage from fallback system
+        enemy_max_hp: Max HP of the target for slayer bonuses (defaults to defender.max_hp)
+        include_bleed: Count the follow-up bleed tick in the expectation
 
     Returns:
         Expected damage per attack (float)
     """
-    from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
+    from src.game_data import ATTACK_TYPES
 
-    # Get attack type data
-    attack_type_data = ATTACK_TYPES.get(build.attack_type)
-    if not attack_type_data:
+    if build.attack_type not in ATTACK_TYPES:
         return 0.0
 
-    # Calculate base accuracy (d20 average = 10.5, using 10 for simplicity)
-    base_accuracy = 10 + attacker.tier + attacker.focus
-    accuracy_mod = attack_type_data.accuracy_mod
-
-    # Add upgrade accuracy modifiers
-    for upgrade_name in build.upgrades:
-        if upgrade_name in UPGRADES:
-            accuracy_mod += UPGRADES[upgrade_name].accuracy_mod
-            accuracy_mod -= UPGRADES[upgrade_name].accuracy_penalty
-
-    # Add limit accuracy bonuses (ALL limits apply to both accuracy and damage)
-    limit_bonus = 0
-    for limit_name in build.limits:
-        if limit_name in LIMITS:
-            limit_bonus += LIMITS[limit_name].damage_bonus * attacker.tier
-
-    total_accuracy = base_accuracy + accuracy_mod + tier_bonus + limit_bonus
-
-    # Calculate base damage (3d6 exploding average ≈ 10.5)
-    base_damage = 10.5 + attacker.tier + attacker.power
-    damage_mod = attack_type_data.damage_mod
+    expected_single_target = _expected_attack_damage(
+        _character_key(attacker), _build_key(build), _character_key(defender),
+        tier_bonus, enemy_max_hp, include_bleed
+    )
 
-    # Add upgrade damage modifiers
-    for upgrade_name in build.upgrades:
-        if upgrade_name in UPGRADES:
-            damage_mod += UPGRADES[upgrade_name].damage_mod
-            damage_mod -= UPGRADES[upgrade_name].damage_penalty
-
-    # Add limit damage bonuses (ALL limits apply to both accuracy and damage)
-    limit_bonus = 0
-    for limit_name in build.limits:
-        if limit_name in LIMITS:
-            limit_bonus += LIMITS[limit_name].damage_bonus * attacker.tier
-
-    total_damage = base_damage + damage_mod + tier_bonus + limit_bonus
-
-    # Calculate hit chance (simplified d20 probability)
-    # hit_chance = (21 - (defender.avoidance - total_accuracy)) / 20
-    # Clamped between 5% (natural 1 always misses) and 95% (natural 20 always hits)
-    defender_avoidance = defender.avoidance
-    hit_chance = max(0.05, min(0.95, (21 - (defender_avoidance - total_accuracy)) / 20))
+    # For AOE attacks, multiply by number of alive targets
+    # (the shared damage roll does not change the per-target expectation)
+    if is_aoe_attack(build):
+        return expected_single_target * num_alive_targets
+    return expected_single_target
 
-    # Calculate damage after soak (defender durability reduces damage)
-    damage_after_soak = max(0, total_damage - defender.durability)
 
-    # Calculate expected damage for single target
-    expected_single_target = hit_chance * damage_after_soak
+def prob_damage_at_least(
+    attacker: Character,
+    build: AttackBuild,
+    defender: Character,
+    threshold: int,
+    tier_bonus: int = 0,
+    enemy_max_hp: int = None
+) -> float:
+    """
+    Probability that a single attack (no multi-attack effects) deals at least threshold damage.
 
-    # Apply complexity multiplier for upgrades (1.2x per upgrade for special effects)
-    num_upgrades = len(build.upgrades)
-    upgrade_multiplier = 1.2 ** num_upgrades
-    expected_single_target *= upgrade_multiplier
+    Useful for one-shot probabilities, e.g. threshold = remaining enemy HP.
 
-    # For AOE attacks, multiply by number of alive targets
-    is_aoe = build.attack_type in ['area', 'direct_area_damage']
-    if is_aoe:
-        expected_damage = expected_single_target * num_alive_targets
-    else:
-        expected_damage = expected_single_target
+    Args:
+        attacker: The attacking character
+        build: The attack build
+        defender: The defending character
+        threshold: Damage needed
+        tier_bonus: Bonus to accuracy and damage from fallback system
+        enemy_max_hp: Max HP of the target for slayer bonuses (defaults to defender.max_hp)
 
-    return expected_damage
+    Returns:
+        Probability in [0, 1]
+    """
+    if threshold <= 0:
+        return 1.0
+    distribution = _single_attack_distribution(
+        _character_key(attacker), _build_key(build), _character_key(defender),
+        tier_bonus, enemy_max_hp
+    )
+    return sum(prob for dealt, prob in distribution if dealt >= threshold)
 
 
 def calculate_all_expected_damages(
@@ -0,0 +1,276 @@
+"""
+Seedable block random number generation for the Vitality System dice.
+
+The combat loop draws dice one at a time, so this module keeps large blocks of
+pre-generated values from a NumPy PCG64 generator and hands them out by index.
+When a block runs out it is refilled from the same generator, so the stream
+never repeats (unlike a fixed cycling cache) and d20, d6 and uniform draws come
+from separate blocks instead of sharing one index.
+
+Seeding:
+- seed(run_seed, *keys) reseeds the default stream. The same run seed and keys
+  always reproduce the same rolls, and different keys (worker, build,
+  enhancement) give statistically independent streams.
+- seed(None) reseeds from OS entropy.
+- seed_common(run_seed, *keys) is the common-random-numbers variant: callers
+  comparing builds key it by scenario only, so every build replays the same dice.
+- seed_worker is a multiprocessing Pool initializer so forked workers do not
+  inherit identical generator states from the parent.
+- seed_substream(*keys) branches the current seeded stream (used by the result
+  cache so a cached batch does not depend on what was drawn before it).
+
+Vectorized callers can draw whole arrays with draw_d20(n), draw_d6(n) and
+draw_3d6_exploding(n).
+"""
+
+import os
+import zlib
+from typing import Optional
+import numpy as np
+from src.dice_tables import DicePMF, EXPLODING_3D6, EXPLODING_3D6_5_6
+
+# Values generated per refill (per block type)
+DEFAULT_BLOCK_SIZE = 65536
+
+
+def build_seed_key(build) -> str:
+    """Stable text key for an AttackBuild or MultiAttackBuild (order-independent)"""
+    if hasattr(build, 'builds'):
+        parts = [build_seed_key(sub_build) for sub_build in build.builds]
+        parts.append(f"{build.archetype}:{build.fallback_type}+{build.tier_bonus}")
+        return ' / '.join(parts)
+    return f"{build.attack_type}|{','.join(sorted(build.upgrades))}|{','.join(sorted(build.limits))}"
+
+
+def _key_to_int(key) -> int:
+    """Convert a seed key (int, string or build) to a stable non-negative integer"""
+    if isinstance(key, (int, np.integer)) and key >= 0:
+        return int(key)
+    # crc32 is stable across processes, unlike the built-in hash() of strings
+    text = key if isinstance(key, str) else build_seed_key(key)
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def make_seed_sequence(run_seed: Optional[int] = None, *keys) -> np.random.SeedSequence:
+    """
+    Build the SeedSequence for a run seed and optional sub-stream keys.
+
+    Args:
+        run_seed: Base seed for the run (None = fresh OS entropy)
+        keys: Sub-stream identifiers such as a worker index, build or enhancement name
+
+    Returns:
+        SeedSequence for the requested stream
+    """
+    spawn_key = tuple(_key_to_int(key) for key in keys)
+    return np.random.SeedSequence(run_seed, spawn_key=spawn_key)
+
+
+class _AliasArrays:
+    """NumPy view of a DicePMF alias table for vectorized sampling"""
+
+    def __init__(self, table: DicePMF):
+        sampler = table.sampler
+        self.n = sampler.n
+        self.values = np.asarray(sampler.values, dtype=np.int64)
+        self.threshold = np.asarray(sampler.threshold, dtype=np.float64)
+        self.alias = np.asarray(sampler.alias, dtype=np.int64)
+
+    def sample(self, uniforms: np.ndarray) -> np.ndarray:
+        """Map an array of uniform draws in [0, 1) to values (same mapping as AliasTable.sample)"""
+        scaled = uniforms * self.n
+        columns = scaled.astype(np.int64)
+        keep = (scaled - columns) < self.threshold[columns]
+        return np.where(keep, self.values[columns], self.alias[columns])
+
+
+_ALIAS_3D6 = _AliasArrays(EXPLODING_3D6)
+_ALIAS_3D6_5_6 = _AliasArrays(EXPLODING_3D6_5_6)
+
+
+class DiceStream:
+    """
+    Block-buffered PCG64 dice stream.
+
+    Scalar draws (d20, d6, uniform, exploding 3d6 totals) read from Python
+    lists filled a block at a time; batch draws (draw_*) go straight to the
+    generator.
+    """
+
+    def __init__(self, run_seed: Optional[int] = None, *keys, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.block_size = block_size
+        self.reseed(run_seed, *keys)
+
+    def reseed(self, run_seed: Optional[int] = None, *keys):
+        """Restart the stream from a run seed and sub-stream keys, discarding buffered values"""
+        self.generator = np.random.Generator(np.random.PCG64(make_seed_sequence(run_seed, *keys)))
+        # Remembered so substreams can be derived from it (None = OS entropy, not reproducible)
+        self.seed_key = None if run_seed is None else (run_seed,) + tuple(_key_to_int(key) for key in keys)
+        # Exhausted indices force a refill on the next draw of each kind
+        self._d20_block, self._d20_index = [], self.block_size
+        self._d6_block, self._d6_index = [], self.block_size
+        self._uniform_block, self._uniform_index = [], self.block_size
+        self._3d6_block, self._3d6_index = [], self.block_size
+        self._3d6_5_6_block, self._3d6_5_6_index = [], self.block_size
+
+    def d20(self) -> int:
+        """Single d20 roll"""
+        index = self._d20_index
+        if index >= self.block_size:
+            self._d20_block = self.draw_d20(self.block_size).tolist()
+            index = 0
+        self._d20_index = index + 1
+        return self._d20_block[index]
+
+    def d6(self) -> int:
+        """Single d6 roll"""
+        index = self._d6_index
+        if index >= self.block_size:
+            self._d6_block = self.draw_d6(self.block_size).tolist()
+            index = 0
+        self._d6_index = index + 1
+        return self._d6_block[index]
+
+    def uniform(self) -> float:
+        """Single uniform draw in [0, 1)"""
+        index = self._uniform_index
+        if index >= self.block_size:
+            self._uniform_block = self.draw_uniform(self.block_size).tolist()
+            index = 0
+        self._uniform_index = index + 1
+        return self._uniform_block[index]
+
+    def exploding_3d6(self) -> int:
+        """Single 3d6 exploding-on-6 total (no per-die detail)"""
+        index = self._3d6_index
+        if index >= self.block_size:
+            self._3d6_block = self.draw_3d6_exploding(self.block_size).tolist()
+            index = 0
+        self._3d6_index = index + 1
+        return self._3d6_block[index]
+
+    def exploding_3d6_5_6(self) -> int:
+        """Single 3d6 exploding-on-5/6 total (no per-die detail)"""
+        index = self._3d6_5_6_index
+        if index >= self.block_size:
+            self._3d6_5_6_block = self.draw_3d6_exploding(self.block_size, explode_on_5=True).tolist()
+            index = 0
+        self._3d6_5_6_index = index + 1
+        return self._3d6_5_6_block[index]
+
+    def draw_d20(self, n: int) -> np.ndarray:
+        """Array of n d20 rolls"""
+        return self.generator.integers(1, 21, size=n)
+
+    def draw_d6(self, n: int) -> np.ndarray:
+        """Array of n d6 rolls"""
+        return self.generator.integers(1, 7, size=n)
+
+    def draw_uniform(self, n: int) -> np.ndarray:
+        """Array of n uniform draws in [0, 1)"""
+        return self.generator.random(n)
+
+    def draw_3d6_exploding(self, n: int, explode_on_5: bool = False) -> np.ndarray:
+        """
+        Array of n 3d6 exploding totals drawn from the exact dice tables.
+
+        Args:
+            n: Number of totals to draw
+            explode_on_5: Explode on 5-6 (Critical Effect) instead of 6 only
+        """
+        alias = _ALIAS_3D6_5_6 if explode_on_5 else _ALIAS_3D6
+        return alias.sample(self.generator.random(n))
+
+
+_COMMON_KEY = _key_to_int('common')
+
+# Default stream used by combat.py
+_default_stream = DiceStream()
+
+
+def get_stream() -> DiceStream:
+    """The default dice stream shared by the combat functions"""
+    return _default_stream
+
+
+def seed(run_seed: Optional[int] = None, *keys):
+    """
+    Reseed the default dice stream.
+
+    Args:
+        run_seed: Base seed for the run (None = fresh OS entropy)
+        keys: Optional sub-stream keys (worker index, build, enhancement name, ...)
+    """
+    _default_stream.reseed(run_seed, *keys)
+
+
+def seed_common(run_seed: int, *keys):
+    """
+    Reseed the default stream for common random numbers.
+
+    Keys name what is shared (scenario, elimination round), never the build, so
+    every build tested under the same keys consumes an identical dice stream and
+    build-vs-build differences are not dominated by dice noise.
+    """
+    _default_stream.reseed(run_seed, 'common', *keys)
+
+
+def stream_key() -> Optional[tuple]:
+    """(run_seed, *keys) of the default stream's last reseed, or None if it is unseeded"""
+    return _default_stream.seed_key
+
+
+def is_common_stream() -> bool:
+    """Whether the default stream was last reseeded by seed_common"""
+    key = _default_stream.seed_key
+    return key is not None and len(key) > 1 and key[1] == _COMMON_KEY
+
+
+def seed_substream(*keys):
+    """
+    Reseed the default stream to a substream of its current seed.
+
+    Does nothing for unseeded streams. The substream depends only on the last
+    seed()/seed_common() call and these keys, not on how many values were drawn
+    since, and stream_key() keeps returning the parent key so sibling
+    substreams branch from the same point.
+    """
+    key = _default_stream.seed_key
+    if key is not None:
+        _default_stream.reseed(key[0], *key[1:], *keys)
+        _default_stream.seed_key = key
+
+
+def seed_worker(run_seed: Optional[int] = None):
+    """
+    Pool initializer giving each worker process its own stream.
+
+    Forked workers would otherwise continue from an identical copy of the
+    parent's generator. Per-build reseeding (seed(run_seed, build)) still
+    takes over for reproducible runs.
+    """
+    _default_stream.reseed(run_seed, 'worker', os.getpid())
+
+
+# Scalar draws are bound methods of the default stream (reseeding keeps the same
+# object, so these stay valid) to avoid an extra call layer in the combat loop
+roll_d20 = _default_stream.d20
+roll_d6 = _default_stream.d6
+random_uniform = _default_stream.uniform
+roll_3d6_exploding_total = _default_stream.exploding_3d6
+roll_3d6_exploding_5_6_total = _default_stream.exploding_3d6_5_6
+
+
+def draw_d20(n: int) -> np.ndarray:
+    """Array of n d20 rolls from the default stream"""
+    return _default_stream.draw_d20(n)
+
+
+def draw_d6(n: int) -> np.ndarray:
+    """Array of n d6 rolls from the default stream"""
+    return _default_stream.draw_d6(n)
+
+
+def draw_3d6_exploding(n: int, explode_on_5: bool = False) -> np.ndarray:
+    """Array of n 3d6 exploding totals from the default stream"""
+    return _default_stream.draw_3d6_exploding(n, explode_on_5)
@@ -0,0 +1,253 @@
+"""
+Exact probability tables for the Vitality System dice.
+
+Every damage roll in the simulator is one of a small number of dice expressions
+(3d6 exploding on 6, 3d6 exploding on 5-6, flat 15) and every accuracy roll is a
+d20 with or without advantage. This module precomputes the exact probability
+mass functions (PMFs) for those expressions once at import time so that:
+
+- The Monte Carlo path can draw a damage total with a single alias-table lookup
+  instead of rolling and re-rolling individual d6s.
+- The analytic path (expected damage, hit/crit chances, tail probabilities)
+  reads exact values instead of hard-coded averages.
+
+Exploding dice have an unbounded support, so the tables are truncated once the
+remaining tail mass drops below TAIL_CUTOFF and then renormalized. At the
+default cutoff the discarded mass is far below anything a simulation could
+ever observe.
+"""
+
+from typing import Dict, List, Tuple
+
+# Tail mass discarded when truncating exploding-dice distributions
+TAIL_CUTOFF = 1e-12
+
+
+def _single_die_exploding_pmf(explode_on: int, cutoff: float = TAIL_CUTOFF * 1e-6) -> Dict[int, float]:
+    """
+    PMF of one d6 that re-rolls and adds whenever it shows explode_on or higher.
+
+    Args:
+        explode_on: Lowest face that explodes (6 = explode on 6, 5 = explode on 5-6)
+        cutoff: Stop expanding explosions once the mass still exploding is below this
+
+    Returns:
+        Dictionary mapping die total -> probability
+    """
+    pmf = {}
+    # Running totals that are still exploding, merged by total: running_total -> probability
+    pending = {0: 1.0}
+    while sum(pending.values()) >= cutoff:
+        next_pending = {}
+        for running_total, chain_prob in pending.items():
+            for face in range(1, 7):
+                prob = chain_prob / 6
+                total = running_total + face
+                if face >= explode_on:
+                    next_pending[total] = next_pending.get(total, 0.0) + prob
+                else:
+                    pmf[total] = pmf.get(total, 0.0) + prob
+        pending = next_pending
+    return pmf
+
+
+def _convolve(pmf_a: Dict[int, float], pmf_b: Dict[int, float]) -> Dict[int, float]:
+    """Distribution of the sum of two independent random variables."""
+    result = {}
+    for value_a, prob_a in pmf_a.items():
+        for value_b, prob_b in pmf_b.items():
+            total = value_a + value_b
+            result[total] = result.get(total, 0.0) + prob_a * prob_b
+    return result
+
+
+def _truncate(pmf: Dict[int, float], cutoff: float = TAIL_CUTOFF) -> Dict[int, float]:
+    """Drop the upper tail whose total mass is below cutoff and renormalize."""
+    values = sorted(pmf)
+    tail_mass = 0.0
+    keep_until = len(values)
+    # Walk down from the largest value while the accumulated tail stays below cutoff
+    while keep_until > 1 and tail_mass + pmf[values[keep_until - 1]] < cutoff:
+        tail_mass += pmf[values[keep_until - 1]]
+        keep_until -= 1
+    kept = {value: pmf[value] for value in values[:keep_until]}
+    total = sum(kept.values())
+    return {value: prob / total for value, prob in kept.items()}
+
+
+class DicePMF:
+    """Exact, truncated probability mass function over integer outcomes."""
+
+    def __init__(self, name: str, pmf: Dict[int, float]):
+        self.name = name
+        self.values: List[int] = sorted(pmf)
+        self.probs: List[float] = [pmf[value] for value in self.values]
+        self.min_value = self.values[0]
+        self.max_value = self.values[-1]
+        self.mean = sum(value * prob for value, prob in zip(self.values, self.probs))
+
+        # Survival function: _at_least[i] = P(X >= values[i])
+        self._at_least = [0.0] * len(self.values)
+        running = 0.0
+        for i in range(len(self.values) - 1, -1, -1):
+            running += self.probs[i]
+            self._at_least[i] = running
+
+        self._sampler = None
+
+    def items(self) -> List[Tuple[int, float]]:
+        """List of (value, probability) pairs in ascending value order."""
+        return list(zip(self.values, self.probs))
+
+    def prob(self, value: int) -> float:
+        """P(X == value)"""
+        if value < self.min_value or value > self.max_value:
+            return 0.0
+        # Supports are dense for every table in this module, but stay safe for sparse ones
+        offset = value - self.min_value
+        if offset < len(self.values) and self.values[offset] == value:
+            return self.probs[offset]
+        return dict(zip(self.values, self.probs)).get(value, 0.0)
+
+    def prob_at_least(self, threshold: int) -> float:
+        """Tail probability P(X >= threshold)"""
+        if threshold <= self.min_value:
+            return 1.0
+        if threshold > self.max_value:
+            return 0.0
+        # Binary search for the first value >= threshold
+        lo, hi = 0, len(self.values)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.values[mid] < threshold:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self._at_least[lo]
+
+    def expected_excess(self, threshold: float) -> float:
+        """E[max(0, X - threshold)], the expected damage left after a flat soak."""
+        return sum((value - threshold) * prob
+                   for value, prob in zip(self.values, self.probs)
+                   if value > threshold)
+
+    def shifted(self, offset: int) -> Dict[int, float]:
+        """PMF of X + offset as a plain dictionary."""
+        return {value + offset: prob for value, prob in zip(self.values, self.probs)}
+
+    @property
+    def sampler(self) -> 'AliasTable':
+        """Alias-method sampler for this distribution (built on first use)."""
+        if self._sampler is None:
+            self._sampler = AliasTable(self.values, self.probs)
+        return self._sampler
+
+    def __repr__(self) -> str:
+        return f"DicePMF({self.name}, {self.min_value}..{self.max_value}, mean={self.mean:.4f})"
+
+
+class AliasTable:
+    """
+    Vose alias table for O(1) sampling from a discrete distribution.
+
+    A single uniform draw u in [0, 1) picks a column (int(u * n)) and the
+    fractional remainder decides between the column's own value and its alias.
+    """
+
+    def __init__(self, values: List[int], probs: List[float]):
+        n = len(values)
+        self.n = n
+        self.values = list(values)
+        self.threshold = [0.0] * n
+        self.alias = list(values)
+
+        scaled = [prob * n for prob in probs]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.threshold[s] = scaled[s]
+            self.alias[s] = values[l]
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # Leftovers are 1.0 up to floating point error
+        for i in large + small:
+            self.threshold[i] = 1.0
+            self.alias[i] = values[i]
+
+    def sample(self, u: float) -> int:
+        """Map one uniform draw in [0, 1) to a value of the distribution."""
+        scaled = u * self.n
+        column = int(scaled)
+        if scaled - column < self.threshold[column]:
+            return self.values[column]
+        return self.alias[column]
+
+
+def _build_d20_pmf(advantage: bool) -> Dict[int, float]:
+    """PMF of a d20 roll, or of the higher of two d20s when advantage is set."""
+    if not advantage:
+        return {face: 1 / 20 for face in range(1, 21)}
+    # P(max(a, b) == k) = (2k - 1) / 400
+    return {face: (2 * face - 1) / 400 for face in range(1, 21)}
+
+
+def _build_3d6_exploding_pmf(explode_on: int) -> Dict[int, float]:
+    """PMF of 3d6 where each die explodes independently."""
+    die = _single_die_exploding_pmf(explode_on)
+    return _truncate(_convolve(_convolve(die, die), die))
+
+
+# Damage dice
+EXPLODING_3D6 = DicePMF('3d6_exploding', _build_3d6_exploding_pmf(6))
+EXPLODING_3D6_5_6 = DicePMF('3d6_exploding_5_6', _build_3d6_exploding_pmf(5))
+FLAT_15 = DicePMF('flat_15', {15: 1.0})
+
+# Accuracy dice
+D20 = DicePMF('d20', _build_d20_pmf(advantage=False))
+D20_ADVANTAGE = DicePMF('d20_advantage', _build_d20_pmf(advantage=True))
+
+# Natural roll needed for a critical hit: 15+ with crit-range upgrades, otherwise natural 20
+CRIT_RANGE_THRESHOLD = 15
+NATURAL_CRIT_THRESHOLD = 20
+
+
+def damage_dice_table(upgrades) -> DicePMF:
+    """
+    Select the damage dice table used by a build.
+
+    Mirrors make_attack: High Impact replaces the roll with a flat 15, Critical
+    Effect explodes on 5-6, everything else explodes on 6 only.
+    """
+    if 'high_impact' in upgrades:
+        return FLAT_15
+    if 'critical_effect' in upgrades:
+        return EXPLODING_3D6_5_6
+    return EXPLODING_3D6
+
+
+def accuracy_table(advantage: bool) -> DicePMF:
+    """Select the d20 table (Reliable Accuracy rolls with advantage)."""
+    return D20_ADVANTAGE if advantage else D20
+
+
+def hit_probability(required_roll: int, advantage: bool = False) -> float:
+    """
+    Probability that the natural d20 meets or exceeds required_roll.
+
+    make_attack has no automatic miss on a natural 1 or automatic hit on a
+    natural 20, so this is a plain tail probability of the d20 table.
+    """
+    return accuracy_table(advantage).prob_at_least(required_roll)
+
+
+def crit_probability(has_crit_range: bool, advantage: bool = False) -> float:
+    """Probability of rolling a critical (15+ with crit-range upgrades, else natural 20)."""
+    threshold = CRIT_RANGE_THRESHOLD if has_crit_range else NATURAL_CRIT_THRESHOLD
+    return accuracy_table(advantage).prob_at_least(threshold)
@@ -0,0 +1,160 @@
+"""
+Analytical dominance pruning of AttackBuilds before simulation.
+
+Some upgrades provably do nothing under a given set of scenarios and
+defenders. A build carrying one is never better than its sibling without it,
+which is always valid (dropping an upgrade cannot break an exclusion group or
+restriction) and costs less, so simulating it only spends budget. Rules:
+
+- inert_slayer: no scenario enemy and no defender has the slayer's target max
+  HP (follow-up attacks such as double tap or splinter use defender.max_hp).
+  The slayer has no other effect, so the build behaves exactly like its sibling
+- inert_brutal: brutal on a direct attack (make_attack only applies it to
+  attacks that roll). Brutal has no penalties, so again the builds are identical
+- inert_splinter: splinter only fires when another enemy is alive, so with one
+  enemy in every scenario it is just its -2/-2 accuracy and damage penalty.
+  "Weaker" rule: only applied when the build has no extra attack/barrage (the
+  splinter condition would enable them) and every limit activates independently
+  of how the fight goes (turn, cooldown, charge, DC and charge-up limits), so
+  more accuracy and damage can only kill sooner
+
+Weaker rules assume the build is the only attack in play. Multi-attack
+archetypes pick between attacks by expected damage, so they should use
+equivalent rules only (allow_weaker=False).
+
+Example:
+    analyzer = DominanceAnalyzer(config.scenarios, [defender])
+    audit = []
+    builds = list(analyzer.prune(all_builds, audit))
+    write_dominance_audit(audit, 'dominance_audit.md')
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from src.models import AttackBuild, Character
+from src.game_data import ATTACK_TYPES
+from src.compiled_build import (SLAYER_TARGET_HP, limit_rule, LIMIT_CHARGES, LIMIT_TURN_MAX, LIMIT_TURN_MIN,
+                                LIMIT_COOLDOWN, LIMIT_DC, LIMIT_CHARGE_UP)
+
+# Limits whose activation does not depend on damage dealt, hits taken or HP
+OUTCOME_INDEPENDENT_LIMIT_KINDS = {LIMIT_CHARGES, LIMIT_TURN_MAX, LIMIT_TURN_MIN, LIMIT_COOLDOWN, LIMIT_DC,
+                                   LIMIT_CHARGE_UP}
+
+# Upgrades that turn the splinter condition into extra attacks
+CONDITION_TRIGGERED_UPGRADES = {'extra_attack', 'barrage'}
+
+EQUIVALENT = 'equivalent'
+WEAKER = 'weaker'
+
+
+@dataclass(frozen=True)
+class DominatedBuild:
+    """A build dropped before simulation, with the sibling that dominates it."""
+    build: AttackBuild
+    dominated_by: AttackBuild
+    kind: str                   # EQUIVALENT (same behavior) or WEAKER (never better)
+    rules: Tuple[str, ...]
+    reason: str
+
+
+def scenario_hp_list(scenario) -> List[int]:
+    """Enemy max HPs of a ScenarioConfig or a Simulation V3 scenario dict"""
+    if hasattr(scenario, 'get_hp_list'):
+        return list(scenario.get_hp_list())
+    if scenario.get('enemy_hp_list'):
+        return list(scenario['enemy_hp_list'])
+    return [scenario.get('enemy_hp', 100)] * scenario.get('num_enemies', 1)
+
+
+class DominanceAnalyzer:
+    """Finds builds that are provably never better than a cheaper sibling."""
+
+    def __init__(self, scenarios: Iterable, defenders: Iterable[Character] = (), allow_weaker: bool = True):
+        """
+        Args:
+            scenarios: ScenarioConfig objects or V3 scenario dicts the builds will face
+            defenders: Defender Characters (profiles) the builds will face
+            allow_weaker: Also drop builds that are strictly weaker, not just equivalent
+        """
+        hp_lists = [scenario_hp_list(scenario) for scenario in scenarios]
+        self.target_hps = {hp for hp_list in hp_lists for hp in hp_list}
+        self.target_hps.update(defender.max_hp for defender in defenders)
+        self.single_enemy = bool(hp_lists) and all(len(hp_list) == 1 for hp_list in hp_lists)
+        self.allow_weaker = allow_weaker
+
+    def _inert_upgrades(self, build: AttackBuild) -> List[Tuple[str, str, str, str]]:
+        """(upgrade, rule, kind, reason) for every upgrade of the build that cannot help"""
+        inert = []
+        upgrades = set(build.upgrades)
+        for upgrade_name in build.upgrades:
+            target_hp = SLAYER_TARGET_HP.get(upgrade_name)
+            if target_hp is not None and target_hp not in self.target_hps:
+                inert.append((upgrade_name, 'inert_slayer', EQUIVALENT,
+                              f"{upgrade_name} needs a {target_hp} HP target; none is configured"))
+            elif upgrade_name == 'brutal' and ATTACK_TYPES[build.attack_type].is_direct:
+                inert.append((upgrade_name, 'inert_brutal', EQUIVALENT,
+                              f"brutal is never applied to direct attacks ({build.attack_type})"))
+            elif (upgrade_name == 'splinter' and self.allow_weaker and self.single_enemy
+                  and not upgrades & CONDITION_TRIGGERED_UPGRADES
+                  and all(limit_rule(limit_name)[0] in OUTCOME_INDEPENDENT_LIMIT_KINDS
+                          for limit_name in build.limits)):
+                inert.append((upgrade_name, 'inert_splinter', WEAKER,
+                              "splinter needs a second enemy; every scenario has one (only its penalties apply)"))
+        return inert
+
+    def dominating_sibling(self, build: AttackBuild) -> Optional[DominatedBuild]:
+        """The cheaper sibling without the build's inert upgrades, or None if the build is not dominated"""
+        inert = self._inert_upgrades(build)
+        if not inert:
+            return None
+        removed = {upgrade_name for upgrade_name, _, _, _ in inert}
+        sibling = AttackBuild(build.attack_type,
+                              [name for name in build.upgrades if name not in removed],
+                              build.limits)
+        kind = WEAKER if any(entry[2] == WEAKER for entry in inert) else EQUIVALENT
+        return DominatedBuild(build, sibling, kind,
+                              tuple(rule for _, rule, _, _ in inert),
+                              '; '.join(reason for _, _, _, reason in inert))
+
+    def prune(self, builds: Iterable[AttackBuild], audit: List[DominatedBuild] = None):
+        """
+        Yield the builds that are not dominated.
+
+        Args:
+            builds: AttackBuilds to filter (consumed lazily)
+            audit: Optional list that receives a DominatedBuild for every dropped build
+        """
+        for build in builds:
+            dominated = self.dominating_sibling(build)
+            if dominated is None:
+                yield build
+            elif audit is not None:
+                audit.append(dominated)
+
+
+def write_dominance_audit(audit: List[DominatedBuild], output_path: str):
+    """Write the dropped builds and the reason for each as a markdown table"""
+    from collections import Counter
+
+    by_rule = Counter(rule for dominated in audit for rule in dominated.rules)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("# Dominance Pruning Audit\n\n")
+        f.write(f"Builds dropped before simulation: {len(audit):,}\n\n")
+        if by_rule:
+            f.write("| Rule | Builds |\n|------|--------|\n")
+            for rule, count in by_rule.most_common():
+                f.write(f"| {rule} | {count:,} |\n")
+            f.write("\n")
+        f.write("| Dropped Build | Cost | Dominated By | Cost | Kind | Reason |\n")
+        f.write("|---------------|------|--------------|------|------|--------|\n")
+        for dominated in audit:
+            f.write(f"| {_describe(dominated.build)} | {dominated.build.total_cost}p "
+                    f"| {_describe(dominated.dominated_by)} | {dominated.dominated_by.total_cost}p "
+                    f"| {dominated.kind} | {dominated.reason} |\n")
+
+
+def _describe(build: AttackBuild) -> str:
+    """Compact build description for the audit table"""
+    parts = [build.attack_type] + list(build.upgrades) + list(build.limits)
+    return ' + '.join(parts)
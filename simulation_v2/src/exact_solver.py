@@ -0,0 +1,589 @@
+"""
+Exact turns-to-kill solver for history-independent builds.
+
+For an AttackBuild whose limits only depend on the turn number or on a fresh
+d20 roll (quickdraw, patient, finale, unreliable_1-3), the combat in
+simulate_combat_verbose is an absorbing Markov chain over enemy HP states. This
+module propagates the exact probability distribution over those states turn by
+turn and returns the full turns-to-kill distribution, replacing repeated
+Monte Carlo runs with one deterministic computation.
+
+The solver mirrors simulate_combat_verbose:
+- Single-target attacks hit the first alive enemy
+- AOE attacks hit every alive enemy with one shared damage roll
+- Bleed deals its damage at the start of the next turn
+- Finishing blow and culling strike apply after damage
+- Failed turn-based limits fall back to a basic attack (no action for focused)
+
+Builds with history-dependent state (charge_up, cooldown, charges, HP and
+defensive limits, slaughter/relentless/combo_move, passive, channeled),
+MultiAttackBuilds, splinter/explosive critical against several enemies and
+rolled AOE damage against several enemies are not solved; solve_or_simulate_batch
+falls back to run_simulation_batch for them.
+"""
+
+from dataclasses import dataclass
+from itertools import combinations_with_replacement
+from math import factorial
+from typing import Dict, List, Optional, Tuple
+from src.models import Character, AttackBuild
+from src.game_data import ATTACK_TYPES, LIMITS
+from src.damage_calculator import attack_outcome_distribution, is_aoe_attack, _attack_modifiers, _build_key
+from src.dice_tables import damage_dice_table, D20
+from src.result_cache import get_result_cache
+
+# Limits whose activation depends only on the turn number
+TURN_LIMITS = {
+    'quickdraw': lambda turn: turn <= 2,
+    'patient': lambda turn: turn >= 4,
+    'finale': lambda turn: turn >= 7,
+}
+
+# Limits the solver can model exactly (turn-based and unreliable DC checks)
+SOLVABLE_LIMITS = set(TURN_LIMITS) | {'unreliable_1', 'unreliable_2', 'unreliable_3'}
+
+# Upgrades that carry state across turns
+STATEFUL_UPGRADES = {'channeled'}
+
+# Upgrades that retarget other enemies (inert when only one enemy exists)
+MULTI_TARGET_UPGRADES = {'splinter', 'explosive_critical'}
+
+# Abort and fall back to simulation when the state space grows beyond this
+DEFAULT_MAX_STATES = 50000
+
+# Abort and fall back to simulation when the transition work exceeds this
+# (roughly the cost of a few hundred simulated combats)
+DEFAULT_MAX_WORK = 300000
+
+# States whose probability falls below this are dropped (mass is tracked)
+STATE_PROB_FLOOR = 1e-15
+
+# Stop propagating once the probability of combat still running is below this
+REMAINING_MASS_CUTOFF = 1e-12
+
+
+# How a transition ends: enemies remain, all dead after the attack, all dead after next bleed
+CONTINUES, DEFEATED, BLEEDS_OUT = 0, 1, 2
+
+
+class _WorkBudgetExceeded(Exception):
+    """Raised internally when a solve grows too expensive to beat simulation"""
+    pass
+
+
+@dataclass
+class TurnsDistribution:
+    """Exact distribution of combat length for one build in one scenario."""
+    win_probabilities: Dict[int, float]  # turns -> P(all enemies defeated on that turn)
+    timeout_probability: float           # P(combat reaches max_turns with enemies alive)
+    max_turns: int
+    truncated_mass: float = 0.0          # Probability dropped by the state and mass cutoffs
+    states_visited: int = 0
+
+    @property
+    def mean_turns(self) -> float:
+        """Expected number of turns (timeouts count as max_turns, like run_simulation_batch)"""
+        total = sum(turns * prob for turns, prob in self.win_probabilities.items())
+        total += self.max_turns * self.timeout_probability
+        covered = 1.0 - self.truncated_mass
+        return total / covered if covered > 0 else float(self.max_turns)
+
+    @property
+    def win_rate(self) -> float:
+        """Probability of winning before the turn limit"""
+        return sum(self.win_probabilities.values())
+
+    def prob_within(self, turns: int) -> float:
+        """Probability that all enemies are defeated within the given number of turns"""
+        return sum(prob for t, prob in self.win_probabilities.items() if t <= turns)
+
+    def as_list(self) -> List[float]:
+        """Probability mass by turn: index t holds P(combat ends on turn t) (timeouts at max_turns)"""
+        masses = [0.0] * (self.max_turns + 1)
+        for turns, prob in self.win_probabilities.items():
+            masses[turns] += prob
+        masses[self.max_turns] += self.timeout_probability
+        return masses
+
+
+def get_unsupported_reason(build, num_enemies: int) -> Optional[str]:
+    """
+    Check whether a build can be solved exactly.
+
+    Args:
+        build: Build to check
+        num_enemies: Number of enemies in the scenario
+
+    Returns:
+        None if the build is solvable, otherwise a short reason string
+    """
+    if not isinstance(build, AttackBuild):
+        return "multi-attack build"
+
+    for limit_name in build.limits:
+        if limit_name not in SOLVABLE_LIMITS:
+            return f"stateful limit {limit_name}"
+
+    for upgrade_name in build.upgrades:
+        if upgrade_name in STATEFUL_UPGRADES:
+            return f"stateful upgrade {upgrade_name}"
+        if num_enemies > 1 and upgrade_name in MULTI_TARGET_UPGRADES:
+            return f"{upgrade_name} against multiple enemies"
+
+    # AOE attacks roll DC per target but decide basic-attack fallback from the first target only
+    has_turn_limit = any(limit_name in TURN_LIMITS for limit_name in build.limits)
+    has_dc_limit = any(LIMITS[limit_name].dc > 0 for limit_name in build.limits)
+    if is_aoe_attack(build) and num_enemies > 1 and has_turn_limit and has_dc_limit:
+        return "AOE with turn-based and unreliable limits"
+
+    # A shared exploding roll against several enemies spreads into too many joint HP states
+    if is_aoe_attack(build) and num_enemies > 1 and not ATTACK_TYPES[build.attack_type].is_direct:
+        return "rolled AOE damage against multiple enemies"
+
+    return None
+
+
+def _action_distribution(build: AttackBuild, turn: int, archetype: str,
+                         include_dc: bool) -> List[Tuple[float, Optional[AttackBuild]]]:
+    """
+    Which attack is made this turn, following the PASS 1 limit order in make_attack.
+
+    Returns:
+        List of (probability, build_used) where build_used is the primary build,
+        the basic fallback build, or None when no attack is made.
+    """
+    fallback = None if archetype == 'focused' else AttackBuild(build.attack_type, [], [])
+    actions = []
+    remaining = 1.0
+    for limit_name in build.limits:
+        if limit_name in TURN_LIMITS:
+            if not TURN_LIMITS[limit_name](turn):
+                actions.append((remaining, fallback))
+                return actions
+        elif include_dc and LIMITS[limit_name].dc > 0:
+            pass_prob = D20.prob_at_least(LIMITS[limit_name].dc)
+            actions.append((remaining * (1.0 - pass_prob), None))
+            remaining *= pass_prob
+    actions.append((remaining, build))
+    return actions
+
+
+class _ExactSolver:
+    """State propagation for one (attacker, build, defender, enemy group) combination."""
+
+    def __init__(self, attacker: Character, build: AttackBuild, defender: Character,
+                 hp_list: List[int], archetype: str, max_turns: int, max_states: int,
+                 max_work: int):
+        self.attacker = attacker
+        self.build = build
+        self.defender = defender
+        self.max_hp_list = list(hp_list)
+        self.archetype = archetype
+        self.max_turns = max_turns
+        self.max_states = max_states
+        self.max_work = max_work
+        self.work = 0
+        # With a single enemy the shared AOE roll is just a single-target attack
+        self.is_aoe = is_aoe_attack(build) and len(hp_list) > 1
+        # Any damage at or above the largest HP kills, so outcomes can be capped there
+        self.cap = max(hp_list)
+
+        # AOE attacks treat enemies with the same max HP interchangeably, so their
+        # HP values are kept sorted within each group to collapse symmetric states
+        self.groups = []
+        if self.is_aoe:
+            for max_hp in hp_list:
+                if max_hp not in [group_hp for group_hp, _ in self.groups]:
+                    self.groups.append((max_hp, hp_list.count(max_hp)))
+
+        self._target_cache = {}
+        self._group_cache = {}
+        self._shared_roll_cache = {}
+        self._transition_cache = {}
+
+    def _spend(self, amount: int):
+        """Account for transition work and abort once the budget is exhausted"""
+        self.work += amount
+        if self.work > self.max_work:
+            raise _WorkBudgetExceeded()
+
+    def initial_state(self) -> Tuple[int, ...]:
+        """Enemy HP at the start of combat in the solver's state layout"""
+        if self.is_aoe:
+            return tuple(max_hp for max_hp, size in self.groups for _ in range(size))
+        return tuple(self.max_hp_list)
+
+    def _target_outcomes(self, attack_build: AttackBuild, max_hp: int, hp: int,
+                         dice_total, include_dc: bool) -> List[Tuple[Tuple[int, int], float]]:
+        """
+        Per-target result of one attack as (hp_after_attack, hp_after_next_bleed) pairs.
+        """
+        key = (_build_key(attack_build), max_hp, hp, dice_total, include_dc)
+        cached = self._target_cache.get(key)
+        if cached is not None:
+            return cached
+
+        upgrades = set(attack_build.upgrades)
+        finishing_threshold = 0
+        if 'finishing_blow_1' in upgrades:
+            finishing_threshold = 5
+        elif 'finishing_blow_3' in upgrades:
+            finishing_threshold = 15
+        culling_threshold = max_hp // 5 if 'culling_strike' in upgrades else -1
+        applies_bleed = 'bleed' in upgrades
+
+        results = {}
+        distribution = attack_outcome_distribution(
+            self.attacker, attack_build, self.defender, enemy_max_hp=max_hp,
+            dice_total=dice_total, include_dc=include_dc, cap=self.cap
+        )
+        for (dealt, hit), prob in distribution:
+            hp_after = max(0, hp - dealt)
+            hp_after_bleed = hp_after
+            if hit and hp_after > 0:
+                # Finishing blow and culling strike check after damage is applied
+                if hp_after <= finishing_threshold or hp_after <= culling_threshold:
+                    hp_after = 0
+                    hp_after_bleed = 0
+                elif applies_bleed:
+                    # Bleed repeats the damage (reduced by tier) at the start of next turn
+                    hp_after_bleed = max(0, hp_after - max(0, dealt - self.attacker.tier))
+            outcome = (hp_after, hp_after_bleed)
+            results[outcome] = results.get(outcome, 0.0) + prob
+
+        cached = list(results.items())
+        self._target_cache[key] = cached
+        return cached
+
+    def _group_outcomes(self, attack_build: AttackBuild, max_hp: int, group_state: Tuple[int, ...],
+                        dice_total, include_dc: bool) -> List[Tuple[Tuple[Tuple[int, ...], bool], float]]:
+        """
+        Joint result of one AOE attack on a group of enemies sharing the same max HP.
+
+        Targets with equal HP are exchangeable, so their joint outcome is enumerated
+        as a multiset with multinomial weights instead of every ordering.
+
+        Returns:
+            List of ((sorted_hp_after_bleed, all_dead_after_attack), probability)
+        """
+        key = (_build_key(attack_build), max_hp, group_state, dice_total, include_dc)
+        cached = self._group_cache.get(key)
+        if cached is not None:
+            return cached
+
+        partial = {((), True): 1.0}
+        for hp in sorted(set(group_state), reverse=True):
+            count = group_state.count(hp)
+            if hp <= 0:
+                partial = {(hps + (0,) * count, all_dead): prob for (hps, all_dead), prob in partial.items()}
+                continue
+
+            outcomes = self._target_outcomes(attack_build, max_hp, hp, dice_total, include_dc)
+            combined = []
+            for combo in combinations_with_replacement(range(len(outcomes)), count):
+                self._spend(1)
+                weight = factorial(count)
+                prob = 1.0
+                for outcome_idx in set(combo):
+                    weight //= factorial(combo.count(outcome_idx))
+                for outcome_idx in combo:
+                    prob *= outcomes[outcome_idx][1]
+                hps_after = tuple(outcomes[outcome_idx][0][1] for outcome_idx in combo)
+                combo_dead = all(outcomes[outcome_idx][0][0] == 0 for outcome_idx in combo)
+                combined.append((hps_after, combo_dead, weight * prob))
+
+            self._spend(len(partial) * len(combined))
+            next_partial = {}
+            for (hps, all_dead), prob in partial.items():
+                for hps_after, combo_dead, combo_prob in combined:
+                    new_key = (hps + hps_after, all_dead and combo_dead)
+                    next_partial[new_key] = next_partial.get(new_key, 0.0) + prob * combo_prob
+            partial = next_partial
+
+        outcomes = {}
+        for (hps, all_dead), prob in partial.items():
+            new_key = (tuple(sorted(hps, reverse=True)), all_dead)
+            outcomes[new_key] = outcomes.get(new_key, 0.0) + prob
+
+        cached = list(outcomes.items())
+        self._group_cache[key] = cached
+        return cached
+
+    def _shared_rolls(self, attack_build: AttackBuild) -> List[Tuple[Optional[int], float]]:
+        """
+        Shared AOE damage roll values, with every roll that kills any target on a hit lumped together.
+        """
+        key = _build_key(attack_build)
+        cached = self._shared_roll_cache.get(key)
+        if cached is not None:
+            return cached
+
+        attack_type = ATTACK_TYPES[attack_build.attack_type]
+        if attack_type.is_direct:
+            rolls = [(None, 1.0)]
+        elif 'high_impact' in attack_build.upgrades:
+            rolls = [(15, 1.0)]
+        else:
+            table = damage_dice_table(attack_build.upgrades)
+            # Lowest damage offset on a hit (no slayer, crit or overhit bonus)
+            _, min_offset = _attack_modifiers(self.attacker, key, self.defender, 0, -1)
+            durability = self.defender.tier if 'armor_piercing' in attack_build.upgrades else self.defender.durability
+            kill_roll = max(table.min_value, self.cap + durability - min_offset)
+            rolls = [(value, prob) for value, prob in table.items() if value < kill_roll]
+            rolls.append((kill_roll, table.prob_at_least(kill_roll)))
+
+        self._shared_roll_cache[key] = rolls
+        return rolls
+
+    def _attack_transitions(self, attack_build: AttackBuild, state: Tuple[int, ...],
+                            include_dc: bool) -> List[Tuple[Tuple[int, ...], int, float]]:
+        """
+        Distribution of (state_after_bleed, result, probability) for one attack from a state,
+        where result is CONTINUES, DEFEATED or BLEEDS_OUT.
+        """
+        cache_key = (_build_key(attack_build), state, include_dc)
+        cached = self._transition_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        transitions = {}
+        if self.is_aoe:
+            # Split the state into its max-HP groups
+            group_states = []
+            start = 0
+            for max_hp, size in self.groups:
+                group_states.append(state[start:start + size])
+                start += size
+
+            for dice_total, roll_prob in self._shared_rolls(attack_build):
+                # Groups are independent given the shared roll: fold them in one at a time
+                partial = {((), True): roll_prob}
+                for (max_hp, _), group_state in zip(self.groups, group_states):
+                    outcomes = self._group_outcomes(attack_build, max_hp, group_state, dice_total, include_dc)
+                    self._spend(len(partial) * len(outcomes))
+                    next_partial = {}
+                    for (prefix, all_dead), prob in partial.items():
+                        for (group_after, group_dead), outcome_prob in outcomes:
+                            new_key = (prefix + group_after, all_dead and group_dead)
+                            next_partial[new_key] = next_partial.get(new_key, 0.0) + prob * outcome_prob
+                    partial = next_partial
+                for new_key, prob in partial.items():
+                    transitions[new_key] = transitions.get(new_key, 0.0) + prob
+        else:
+            target_idx = next(i for i, hp in enumerate(state) if hp > 0)
+            others_dead = all(hp <= 0 for i, hp in enumerate(state) if i != target_idx)
+            outcomes = self._target_outcomes(attack_build, self.max_hp_list[target_idx],
+                                             state[target_idx], None, include_dc)
+            self._spend(len(outcomes))
+            for (hp_after, hp_after_bleed), prob in outcomes:
+                new_state = state[:target_idx] + (hp_after_bleed,) + state[target_idx + 1:]
+                new_key = (new_state, others_dead and hp_after == 0)
+                transitions[new_key] = transitions.get(new_key, 0.0) + prob
+
+        # Classify each outcome once so the propagation loop only does dictionary updates
+        results = []
+        for (new_state, all_dead_after_attack), prob in transitions.items():
+            if all_dead_after_attack:
+                result = DEFEATED
+            elif all(hp <= 0 for hp in new_state):
+                result = BLEEDS_OUT
+            else:
+                result = CONTINUES
+            results.append((new_state, result, prob))
+
+        transitions = results
+        self._transition_cache[cache_key] = transitions
+        return transitions
+
+    def solve(self) -> Optional[TurnsDistribution]:
+        """Propagate the state distribution until absorption or the turn limit"""
+        win_probabilities = {}
+        timeout_probability = 0.0
+        truncated_mass = 0.0
+        states_visited = 0
+
+        # State: HP of each enemy at the start of a turn (after the bleed phase)
+        distribution = {self.initial_state(): 1.0}
+
+        for turn in range(1, self.max_turns + 1):
+            # Single-target attacks fold the DC check into the action, AOE rolls it per target
+            actions = _action_distribution(self.build, turn, self.archetype, include_dc=not self.is_aoe)
+            next_distribution = {}
+            defeated_mass = 0.0
+            bleed_out_mass = 0.0
+
+            for state, state_prob in distribution.items():
+                for action_prob, attack_build in actions:
+                    if action_prob <= 0:
+                        continue
+                    if attack_build is None:
+                        # No attack this turn (unreliable failure or focused archetype)
+                        transitions = [(state, CONTINUES, 1.0)]
+                    else:
+                        include_dc = self.is_aoe and attack_build is self.build
+                        try:
+                            transitions = self._attack_transitions(attack_build, state, include_dc)
+                        except _WorkBudgetExceeded:
+                            return None
+
+                    weight = state_prob * action_prob
+                    for new_state, result, prob in transitions:
+                        if result == CONTINUES:
+                            next_distribution[new_state] = next_distribution.get(new_state, 0.0) + weight * prob
+                        elif result == DEFEATED:
+                            defeated_mass += weight * prob
+                        else:
+                            bleed_out_mass += weight * prob
+
+            if defeated_mass > 0:
+                win_probabilities[turn] = win_probabilities.get(turn, 0.0) + defeated_mass
+            if turn == self.max_turns:
+                # Enemies still standing (or only finished by next turn's bleed) time out
+                timeout_probability += bleed_out_mass + sum(next_distribution.values())
+                break
+            if bleed_out_mass > 0:
+                # Bleed finishes the last enemies at the start of next turn
+                win_probabilities[turn + 1] = win_probabilities.get(turn + 1, 0.0) + bleed_out_mass
+
+            # Drop negligible states to keep the state space bounded
+            distribution = {}
+            for state, prob in next_distribution.items():
+                if prob < STATE_PROB_FLOOR:
+                    truncated_mass += prob
+                else:
+                    distribution[state] = prob
+
+            states_visited += len(distribution)
+            if len(distribution) > self.max_states:
+                return None
+            remaining_mass = sum(distribution.values())
+            if remaining_mass < REMAINING_MASS_CUTOFF:
+                truncated_mass += remaining_mass
+                break
+
+        return TurnsDistribution(
+            win_probabilities=win_probabilities,
+            timeout_probability=timeout_probability,
+            max_turns=self.max_turns,
+            truncated_mass=truncated_mass,
+            states_visited=states_visited
+        )
+
+
+def solve_turns_distribution(attacker: Character, build: AttackBuild, defender: Character = None,
+                             scenario=None, num_enemies: int = 1, enemy_hp: int = 100,
+                             enemy_hp_list: List[int] = None, archetype: str = None,
+                             max_turns: int = 100,
+                             max_states: int = DEFAULT_MAX_STATES,
+                             max_work: int = DEFAULT_MAX_WORK) -> Optional[TurnsDistribution]:
+    """
+    Solve the exact turns-to-kill distribution for a build.
+
+    Args:
+        attacker: The attacking character
+        build: The attack build
+        defender: The defending character (same default as simulate_combat_verbose)
+        scenario: Optional ScenarioConfig; overrides num_enemies/enemy_hp/enemy_hp_list
+        num_enemies: Number of enemies (homogeneous groups)
+        enemy_hp: HP per enemy (homogeneous groups)
+        enemy_hp_list: HP of each enemy for mixed groups
+        archetype: Archetype name ('focused' builds make no attack when a limit fails)
+        max_turns: Combat length limit
+        max_states: Give up (return None) if the state space grows beyond this
+        max_work: Give up (return None) if the transition work grows beyond this
+
+    Returns:
+        TurnsDistribution, or None if the build is not solvable exactly
+    """
+    if defender is None:
+        defender = Character(focus=0, power=0, mobility=3, endurance=0, tier=attacker.tier)
+
+    if scenario is not None:
+        hp_list = scenario.get_hp_list()
+    elif enemy_hp_list is not None:
+        hp_list = list(enemy_hp_list)
+    else:
+        hp_list = [enemy_hp] * num_enemies
+
+    if not hp_list or get_unsupported_reason(build, len(hp_list)) is not None:
+        return None
+
+    solver = _ExactSolver(attacker, build, defender, hp_list, archetype, max_turns, max_states, max_work)
+    return solver.solve()
+
+
+def solve_or_simulate_batch(attacker: Character, build, num_runs: int = 10,
+                            target_hp: int = 100, defender: Character = None,
+                            num_enemies: int = 1, enemy_hp: int = None, max_turns: int = 100,
+                            enemy_hp_list: List[int] = None, archetype: str = None,
+                            use_exact_solver: bool = True,
+                            use_batch_engine: bool = False) -> Tuple[List[int], float, float, dict]:
+    """
+    Drop-in replacement for run_simulation_batch that solves exactly when possible.
+
+    Returns the same (results, avg_turns, dpt, outcome_stats) tuple. For exact
+    solves results is empty (there are no individual runs), avg_turns is the
+    exact mean and outcome_stats counts are the expected counts over num_runs.
+    Unsolvable builds fall back to simulation automatically: the NumPy lockstep
+    engine if use_batch_engine is set and num_runs is large enough to pay for
+    it, otherwise run_simulation_batch.
+
+    When a result cache is open (src.result_cache.open_result_cache) batches
+    are read from and stored in it.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return _solve_or_simulate_batch(attacker, build, num_runs, target_hp, defender, num_enemies,
+                                        enemy_hp, max_turns, enemy_hp_list, archetype,
+                                        use_exact_solver, use_batch_engine)
+
+    inputs = {
+        'attacker': attacker, 'defender': defender, 'runs': num_runs, 'target_hp': target_hp,
+        'num_enemies': num_enemies, 'enemy_hp': enemy_hp, 'enemy_hp_list': enemy_hp_list,
+        'max_turns': max_turns, 'archetype': archetype,
+        'exact_solver': use_exact_solver, 'batch_engine': use_batch_engine
+    }
+    return cache.get_or_compute(build, inputs, lambda: _solve_or_simulate_batch(
+        attacker, build, num_runs, target_hp, defender, num_enemies, enemy_hp, max_turns,
+        enemy_hp_list, archetype, use_exact_solver, use_batch_engine
+    ))
+
+
+def _solve_or_simulate_batch(attacker, build, num_runs, target_hp, defender, num_enemies, enemy_hp,
+                             max_turns, enemy_hp_list, archetype, use_exact_solver, use_batch_engine):
+    """Uncached solve_or_simulate_batch"""
+    from src.simulation import run_simulation_batch
+    from src.batch_engine import run_simulation_batch_vectorized, BATCH_ENGINE_MIN_RUNS
+
+    distribution = None
+    if use_exact_solver:
+        distribution = solve_turns_distribution(
+            attacker, build, defender,
+            num_enemies=num_enemies, enemy_hp=enemy_hp if enemy_hp else target_hp,
+            enemy_hp_list=enemy_hp_list, archetype=archetype, max_turns=max_turns
+        )
+
+    if distribution is None:
+        if use_batch_engine and num_runs >= BATCH_ENGINE_MIN_RUNS:
+            return run_simulation_batch_vectorized(attacker, build, num_runs, target_hp, defender,
+                                                   num_enemies=num_enemies, enemy_hp=enemy_hp, max_turns=max_turns,
+                                                   enemy_hp_list=enemy_hp_list, archetype=archetype)
+        return run_simulation_batch(attacker, build, num_runs, target_hp, defender,
+                                    num_enemies=num_enemies, enemy_hp=enemy_hp, max_turns=max_turns,
+                                    enemy_hp_list=enemy_hp_list, archetype=archetype)
+
+    if enemy_hp_list:
+        total_hp_pool = sum(enemy_hp_list)
+    else:
+        total_hp_pool = (enemy_hp if enemy_hp else target_hp) * num_enemies
+
+    avg_turns = distribution.mean_turns
+    dpt = total_hp_pool / avg_turns if avg_turns > 0 else 0
+    win_rate = distribution.win_rate
+    outcome_stats = {
+        "wins": round(win_rate * num_runs),
+        "losses": 0,
+        "timeouts": round(distribution.timeout_probability * num_runs),
+        "win_rate": win_rate * 100
+    }
+    return [], avg_turns, dpt, outcome_stats
@@ -2,8 +2,9 @@
 Game data constants and rule definitions for the Vitality System.
 """
 
+import numpy as np
 from src.models import AttackType, Upgrade, Limit
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 
 # Attack Types
@@ -147,9 +148,106 @@ AOE_RESTRICTIONS = [
 ]
 
 
+# Compiled rule tables
+# Bits follow declaration order, the same as AttackBuild.upgrade_mask / limit_mask.
+# Exclusion groups span upgrades and limits, so they use a combined mask with
+# the limit bits shifted above the upgrade bits (upgrade_mask | limit_mask << LIMIT_SHIFT).
+ATTACK_TYPE_IDS: Dict[str, int] = {name: index for index, name in enumerate(ATTACK_TYPES)}
+UPGRADE_BITS: Dict[str, int] = {name: 1 << index for index, name in enumerate(UPGRADES)}
+LIMIT_BITS: Dict[str, int] = {name: 1 << index for index, name in enumerate(LIMITS)}
+LIMIT_SHIFT = len(UPGRADES)
+
+
+def combined_bit(name: str) -> int:
+    """Bit of an upgrade or limit in the combined upgrade/limit mask (0 if unknown)"""
+    if name in UPGRADE_BITS:
+        return UPGRADE_BITS[name]
+    return LIMIT_BITS.get(name, 0) << LIMIT_SHIFT
+
+
+def _forbidden_upgrade_masks() -> List[int]:
+    """Per attack type id: upgrades the type may not take (type and AOE restrictions)"""
+    masks = []
+    for attack_type, attack in ATTACK_TYPES.items():
+        mask = 0
+        for upgrade, allowed_types in ATTACK_TYPE_RESTRICTIONS.items():
+            if upgrade in UPGRADE_BITS and attack_type not in allowed_types:
+                mask |= UPGRADE_BITS[upgrade]
+        if attack_type in ['area', 'direct_area_damage']:
+            for upgrade in AOE_RESTRICTIONS:
+                mask |= UPGRADE_BITS.get(upgrade, 0)
+        masks.append(mask)
+    return masks
+
+
+FORBIDDEN_UPGRADE_MASKS: List[int] = _forbidden_upgrade_masks()
+# Combined mask of each MUTUAL_EXCLUSIONS group (at most one bit may be set)
+EXCLUSION_GROUP_MASKS: List[int] = [
+    sum(combined_bit(name) for name in set(group)) for group in MUTUAL_EXCLUSIONS
+]
+# (upgrade bit, mask of the upgrades it requires)
+PREREQUISITE_MASKS: List[Tuple[int, int]] = [
+    (UPGRADE_BITS[upgrade], sum(UPGRADE_BITS.get(name, 0) for name in required))
+    for upgrade, required in PREREQUISITES.items() if upgrade in UPGRADE_BITS
+]
+_FORBIDDEN_UPGRADE_ARRAY = np.array(FORBIDDEN_UPGRADE_MASKS, dtype=np.uint64)
+
+
 class RuleValidator:
     """Validates upgrade combinations according to Vitality System rules"""
 
+    @staticmethod
+    def is_valid_mask(attack_type_id: int, upgrade_mask: int, limit_mask: int) -> bool:
+        """
+        Fast boolean validation of a combination given as bitmasks (no error strings).
+
+        Args:
+            attack_type_id: Index into ATTACK_TYPES (ATTACK_TYPE_IDS)
+            upgrade_mask: OR of UPGRADE_BITS (AttackBuild.upgrade_mask)
+            limit_mask: OR of LIMIT_BITS (AttackBuild.limit_mask)
+        """
+        if upgrade_mask & FORBIDDEN_UPGRADE_MASKS[attack_type_id]:
+            return False
+        for bit, required in PREREQUISITE_MASKS:
+            if upgrade_mask & bit and upgrade_mask & required != required:
+                return False
+        combined = upgrade_mask | limit_mask << LIMIT_SHIFT
+        for group in EXCLUSION_GROUP_MASKS:
+            present = combined & group
+            if present & (present - 1):
+                return False
+        return True
+
+    @staticmethod
+    def validate_masks(attack_type_ids, upgrade_masks, limit_masks) -> np.ndarray:
+        """
+        Batch version of is_valid_mask over NumPy arrays of candidates.
+
+        Args:
+            attack_type_ids: Integer array of ATTACK_TYPE_IDS values
+            upgrade_masks: Integer array of upgrade masks
+            limit_masks: Integer array of limit masks
+
+        Returns:
+            Boolean array, True where the combination follows every rule
+        """
+        if LIMIT_SHIFT + len(LIMITS) > 64:
+            raise ValueError("Combined upgrade/limit masks no longer fit in uint64")
+        attack_type_ids = np.asarray(attack_type_ids, dtype=np.intp)
+        upgrade_masks = np.asarray(upgrade_masks, dtype=np.uint64)
+        limit_masks = np.asarray(limit_masks, dtype=np.uint64)
+
+        valid = (upgrade_masks & _FORBIDDEN_UPGRADE_ARRAY[attack_type_ids]) == 0
+        for bit, required in PREREQUISITE_MASKS:
+            bit, required = np.uint64(bit), np.uint64(required)
+            valid &= ((upgrade_masks & bit) == 0) | ((upgrade_masks & required) == required)
+        combined = upgrade_masks | (limit_masks << np.uint64(LIMIT_SHIFT))
+        one = np.uint64(1)
+        for group in EXCLUSION_GROUP_MASKS:
+            present = combined & np.uint64(group)
+            valid &= (present & (present - one)) == 0
+        return valid
+
     @staticmethod
     def check_prerequisites(upgrades: List[str]) -> Tuple[bool, List[str]]:
         """Check if all prerequisites are met for the given upgrades"""
@@ -215,7 +313,7 @@ class RuleValidator:
         all_errors.extend(errors)
 
         # Check mutual exclusions with both upgrades and limits combined
-        combined = upgrades + limits
+        combined = list(upgrades) + list(limits)
         valid, errors = RuleValidator.check_mutual_exclusions(combined)
         all_errors.extend(errors)
 
@@ -2,8 +2,12 @@
 Core data models for the Vitality System combat simulator.
 """
 
+import weakref
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from src.compiled_build import CompiledBuild
 
 
 @dataclass
@@ -54,32 +58,232 @@ class Limit:
     dc: int
 
 
+class _OptionTable:
+    """
+    Bit positions of upgrade and limit names (UPGRADES / LIMITS order).
+
+    Filled from game_data on first use (game_data imports this module). Names
+    outside game_data get bits past the static ones on demand; those are local
+    to the process, so builds using them pickle by name.
+    """
+    __slots__ = ('bits', 'names', 'static_count', 'costs', 'encoded', 'unpacked')
+
+    def __init__(self, names: List[str], costs: Dict[str, int]):
+        self.bits = {name: 1 << index for index, name in enumerate(names)}
+        self.names = list(names)
+        self.static_count = len(names)
+        self.costs = costs
+        self.encoded = {}  # names tuple -> (mask, cost, no repeated names)
+        self.unpacked = {}  # mask -> names tuple
+
+    def encode(self, names: Tuple[str, ...]) -> Tuple[int, int, bool]:
+        """(bitmask, summed cost, whether every name is distinct) of a names tuple"""
+        encoded = self.encoded.get(names)
+        if encoded is None:
+            mask = 0
+            for name in names:
+                bit = self.bits.get(name)
+                if bit is None:
+                    bit = self.bits[name] = 1 << len(self.names)
+                    self.names.append(name)
+                mask |= bit
+            cost = sum(self.costs.get(name, 0) for name in names)
+            encoded = self.encoded[names] = (mask, cost, mask.bit_count() == len(names))
+        return encoded
+
+    def is_static(self, mask: int) -> bool:
+        return mask >> self.static_count == 0
+
+    def unpack(self, mask: int) -> Tuple[str, ...]:
+        names = self.unpacked.get(mask)
+        if names is None:
+            names = self.unpacked[mask] = tuple(name for index, name in enumerate(self.names) if mask >> index & 1)
+        return names
+
+
+_UPGRADE_TABLE: _OptionTable = None
+_LIMIT_TABLE: _OptionTable = None
+_ATTACK_TYPE_NAMES: List[str] = None
+_ATTACK_TYPE_INDEX: Dict[str, int] = None
+_ATTACK_TYPE_COSTS: Dict[str, int] = None
+AOE_ATTACK_TYPES = ('area', 'direct_area_damage')
+
+# Flyweight table: build key -> weak reference to the live build. Dead references
+# are swept whenever the table has doubled since the last sweep, which is cheaper
+# than a callback (and its key) per build.
+_INTERNED_BUILDS: Dict[object, weakref.ref] = {}
+_sweep_at = 1024
+
+
+def _load_option_tables():
+    global _UPGRADE_TABLE, _LIMIT_TABLE, _ATTACK_TYPE_NAMES, _ATTACK_TYPE_INDEX, _ATTACK_TYPE_COSTS
+    from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
+    _UPGRADE_TABLE = _OptionTable(list(UPGRADES), {name: u.cost for name, u in UPGRADES.items()})
+    _LIMIT_TABLE = _OptionTable(list(LIMITS), {name: limit.cost for name, limit in LIMITS.items()})
+    _ATTACK_TYPE_NAMES = list(ATTACK_TYPES)
+    _ATTACK_TYPE_INDEX = {name: index for index, name in enumerate(ATTACK_TYPES)}
+    _ATTACK_TYPE_COSTS = {name: attack.cost for name, attack in ATTACK_TYPES.items()}
+
+
+def _build_key(attack_type: str, upgrade_mask: int, limit_mask: int):
+    """Flyweight key: one packed int for game_data options, a tuple otherwise"""
+    type_index = _ATTACK_TYPE_INDEX.get(attack_type)
+    if type_index is None or upgrade_mask >> 32 or limit_mask >> 32:
+        return attack_type, upgrade_mask, limit_mask
+    return (upgrade_mask << 32 | limit_mask) << 8 | type_index
+
+
+def _interned_build(key) -> 'AttackBuild':
+    """The live interned build for a key, or None"""
+    ref = _INTERNED_BUILDS.get(key)
+    return ref() if ref is not None else None
+
+
+def _intern_build(key, build: 'AttackBuild'):
+    global _sweep_at
+    _INTERNED_BUILDS[key] = weakref.ref(build)
+    if len(_INTERNED_BUILDS) >= _sweep_at:
+        for dead_key in [k for k, ref in _INTERNED_BUILDS.items() if ref() is None]:
+            del _INTERNED_BUILDS[dead_key]
+        _sweep_at = max(1024, 2 * len(_INTERNED_BUILDS))
+
+
+def interned_build_count() -> int:
+    """Number of live builds in the flyweight table"""
+    return sum(1 for ref in _INTERNED_BUILDS.values() if ref() is not None)
+
+
+def options_from_masks(upgrade_mask: int, limit_mask: int) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """(upgrades, limits) named by option masks (game_data order)"""
+    if _UPGRADE_TABLE is None:
+        _load_option_tables()
+    return _UPGRADE_TABLE.unpack(upgrade_mask), _LIMIT_TABLE.unpack(limit_mask)
+
+
+def build_from_masks(attack_type_index: int, upgrade_mask: int, limit_mask: int) -> 'AttackBuild':
+    """
+    The AttackBuild with an attack type index and option masks (game_data order).
+
+    Returns the live interned build when there is one.
+    """
+    if _UPGRADE_TABLE is None:
+        _load_option_tables()
+    attack_type = _ATTACK_TYPE_NAMES[attack_type_index]
+    build = _interned_build(_build_key(attack_type, upgrade_mask, limit_mask))
+    if build is not None:
+        return build
+    return AttackBuild(attack_type, _UPGRADE_TABLE.unpack(upgrade_mask), _LIMIT_TABLE.unpack(limit_mask))
+
+
+def build_masks(build: 'AttackBuild') -> Tuple[int, int, int]:
+    """
+    (attack type index, upgrade mask, limit mask) of a build, the inverse of build_from_masks.
+
+    Raises:
+        ValueError: If the build uses an attack type or option outside game_data
+    """
+    if _UPGRADE_TABLE is None:
+        _load_option_tables()
+    if not (build.attack_type in _ATTACK_TYPE_INDEX and _UPGRADE_TABLE.is_static(build.upgrade_mask)
+            and _LIMIT_TABLE.is_static(build.limit_mask)):
+        raise ValueError(f"build has options outside game_data: {build.attack_type} "
+                         f"{build.upgrades} {build.limits}")
+    return _ATTACK_TYPE_INDEX[build.attack_type], build.upgrade_mask, build.limit_mask
+
+
+def _unpickle_build(attack_type_index: int, upgrade_mask: int, limit_mask: int) -> 'AttackBuild':
+    """Rebuild a pickled AttackBuild from its attack type index and option masks"""
+    return build_from_masks(attack_type_index, upgrade_mask, limit_mask)
+
+
 class AttackBuild:
-    """Represents a complete attack build with type, upgrades, and limits"""
+    """
+    Represents a complete attack build with type, upgrades, and limits.
+
+    Builds are immutable and interned: constructing a build with the same
+    attack type, upgrade set and limit set as a live build returns that
+    instance (keeping its upgrade/limit order). Upgrades and limits are tuples
+    plus integer bitmasks, so hashing and equality are O(1) and a build pickles
+    as three integers.
+    """
+    __slots__ = ('attack_type', 'upgrades', 'limits', 'upgrade_mask', 'limit_mask',
+                 'total_cost', '_key', '_compiled', '__weakref__')
+
+    def __new__(cls, attack_type: str = None, upgrades: List[str] = None, limits: List[str] = None):
+        if attack_type is None:
+            # Unpickling a build saved before interning; __setstate__ fills it in
+            return super().__new__(cls)
+        if _UPGRADE_TABLE is None:
+            _load_option_tables()
+        upgrades = tuple(upgrades) if upgrades else ()
+        limits = tuple(limits) if limits else ()
+        upgrade_mask, upgrade_cost, upgrades_distinct = _UPGRADE_TABLE.encode(upgrades)
+        limit_mask, limit_cost, limits_distinct = _LIMIT_TABLE.encode(limits)
+        key = _build_key(attack_type, upgrade_mask, limit_mask)
+
+        # Repeated names cannot be told apart by the masks, so such builds are not shared
+        interned = upgrades_distinct and limits_distinct
+        if interned:
+            ref = _INTERNED_BUILDS.get(key)
+            if ref is not None:
+                build = ref()
+                if build is not None:
+                    return build
+
+        build = super().__new__(cls)
+        build.attack_type = attack_type
+        build.upgrades = upgrades
+        build.limits = limits
+        build.upgrade_mask = upgrade_mask
+        build.limit_mask = limit_mask
+        # AOE builds pay double for upgrades and limits
+        aoe_multiplier = 2 if attack_type in AOE_ATTACK_TYPES else 1
+        build.total_cost = _ATTACK_TYPE_COSTS[attack_type] + (upgrade_cost + limit_cost) * aoe_multiplier
+        build._key = key
+        build._compiled = None
+        if interned:
+            _intern_build(key, build)
+        return build
 
-    def __init__(self, attack_type: str, upgrades: List[str] = None, limits: List[str] = None):
-        self.attack_type = attack_type
-        self.upgrades = upgrades or []
-        self.limits = limits or []
-        self.total_cost = self.calculate_total_cost()
+    @property
+    def compiled(self) -> 'CompiledBuild':
+        """Precompiled hot-path form of this build (built on first use)"""
+        if self._compiled is None:
+            from src.compiled_build import CompiledBuild
+            self._compiled = CompiledBuild(self)
+        return self._compiled
+
+    def __reduce__(self):
+        """Pickle as (attack type index, upgrade mask, limit mask) when every name is in game_data"""
+        if (self.attack_type in _ATTACK_TYPE_INDEX and _UPGRADE_TABLE.is_static(self.upgrade_mask)
+                and _LIMIT_TABLE.is_static(self.limit_mask) and _interned_build(self._key) is self):
+            return _unpickle_build, (_ATTACK_TYPE_INDEX[self.attack_type], self.upgrade_mask, self.limit_mask)
+        return AttackBuild, (self.attack_type, self.upgrades, self.limits)
+
+    def __setstate__(self, state):
+        """Restore a build pickled before interning (from its instance dict)"""
+        build = AttackBuild(state['attack_type'], state['upgrades'], state['limits'])
+        for name in ('attack_type', 'upgrades', 'limits', 'upgrade_mask', 'limit_mask', 'total_cost', '_key'):
+            setattr(self, name, getattr(build, name))
+        self._compiled = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
     def calculate_total_cost(self) -> int:
         """Calculate the total point cost of this build"""
-        from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
-
-        cost = ATTACK_TYPES[self.attack_type].cost
+        cost = _ATTACK_TYPE_COSTS[self.attack_type]
 
         # AOE builds pay double for upgrades and limits
-        is_aoe_build = self.attack_type in ['area', 'direct_area_damage']
-        aoe_multiplier = 2 if is_aoe_build else 1
+        aoe_multiplier = 2 if self.attack_type in AOE_ATTACK_TYPES else 1
 
         for upgrade in self.upgrades:
-            if upgrade in UPGRADES:
-                cost += UPGRADES[upgrade].cost * aoe_multiplier
-
+            cost += _UPGRADE_TABLE.costs.get(upgrade, 0) * aoe_multiplier
         for limit in self.limits:
-            if limit in LIMITS:
-                cost += LIMITS[limit].cost * aoe_multiplier
+            cost += _LIMIT_TABLE.costs.get(limit, 0) * aoe_multiplier
 
         return cost
 
@@ -90,9 +294,15 @@ class AttackBuild:
 
     def is_valid(self, max_points: int) -> bool:
         """Check if build is valid (within budget and follows rules)"""
-        cost_valid = self.total_cost <= max_points and self.total_cost >= 0
+        if not 0 <= self.total_cost <= max_points:
+            return False
+        # Bitmask rule tables unless a name is outside game_data
+        if (self.attack_type in _ATTACK_TYPE_INDEX and _UPGRADE_TABLE.is_static(self.upgrade_mask)
+                and _LIMIT_TABLE.is_static(self.limit_mask)):
+            from src.game_data import RuleValidator
+            return RuleValidator.is_valid_mask(_ATTACK_TYPE_INDEX[self.attack_type], self.upgrade_mask, self.limit_mask)
         rule_valid, _ = self.is_valid_combination()
-        return cost_valid and rule_valid
+        return rule_valid
 
     def get_rule_errors(self) -> List[str]:
         """Get any rule validation errors for this build"""
@@ -110,21 +320,19 @@ class AttackBuild:
         return " | ".join(parts)
 
     def __repr__(self) -> str:
-        return f"AttackBuild({self.attack_type}, {self.upgrades}, {self.limits})"
+        return f"AttackBuild({self.attack_type}, {list(self.upgrades)}, {list(self.limits)})"
 
     def __eq__(self, other) -> bool:
-        """Check if two builds are equivalent"""
+        """Check if two builds are equivalent (same type, upgrade set and limit set)"""
+        if self is other:
+            return True
         if not isinstance(other, AttackBuild):
             return False
-        return (self.attack_type == other.attack_type and
-                set(self.upgrades) == set(other.upgrades) and
-                set(self.limits) == set(other.limits))
+        return self._key == other._key
 
     def __hash__(self) -> int:
         """Make builds hashable for use in sets/dicts"""
-        return hash((self.attack_type,
-                    tuple(sorted(self.upgrades)),
-                    tuple(sorted(self.limits))))
+        return hash(self._key)
 
 
 class MultiAttackBuild:
@@ -147,6 +355,7 @@ class MultiAttackBuild:
         self.scenario_results = {}  # Maps scenario_name -> {build_idx: avg_turns}
         self.optimal_selections = {}  # Maps scenario_name -> build_idx
         self.attack_usage_counts = {}  # Maps attack_idx -> usage_count (tracks actual combat usage)
+        self._hash = None  # Computed on first use (builds are not changed after construction)
 
     def record_scenario_result(self, scenario_name: str, build_idx: int, avg_turns: float):
         """Record the average turns for a specific build in a specific scenario"""
@@ -215,6 +424,12 @@ class MultiAttackBuild:
     def __repr__(self) -> str:
         return f"MultiAttackBuild({len(self.builds)} builds, {self.archetype})"
 
+    def __getstate__(self):
+        """Drop the cached hash when pickling - string hashes differ between processes"""
+        state = self.__dict__.copy()
+        state['_hash'] = None
+        return state
+
     def __eq__(self, other) -> bool:
         """Check if two multi-attack builds are equivalent"""
         if not isinstance(other, MultiAttackBuild):
@@ -226,4 +441,211 @@ class MultiAttackBuild:
 
     def __hash__(self) -> int:
         """Make multi-attack builds hashable for use in sets/dicts"""
-        return hash((self.archetype, tuple(sorted(self.builds, key=lambda b: hash(b))), self.fallback_type, self.tier_bonus))
+        if self._hash is None:
+            self._hash = hash((self.archetype, tuple(sorted(self.builds, key=hash)), self.fallback_type,
+                               self.tier_bonus))
+        return self._hash
+
+
+class CombatState:
+    """
+    Per-combat state read by turn-based limits and written by the combat loop.
+
+    Holds what happened last turn (for slaughter, revenge, unbreakable, ...),
+    charge usage, channeled turn count and the HP changes (leech, attrition)
+    the simulation applies at the end of a turn. Uses __slots__ so the hot
+    loop reads attributes instead of dict keys; snapshot()/restore() copy the
+    whole state in one tuple for callers that need to roll back a turn.
+
+    Dict-style access (state['charges_used'], state.get(...)) is kept for
+    code written against the old combat_state dict.
+    """
+
+    __slots__ = (
+        'last_target_hit',
+        'defeated_enemy_last_turn',
+        'defeated_enemy_this_turn',
+        'dealt_damage_last_turn',
+        'was_hit_last_turn',
+        'was_damaged_last_turn',
+        'all_attacks_missed_last_turn',
+        'was_hit_no_damage_last_turn',
+        'was_attacked_last_turn',
+        'hit_same_target_last_turn',
+        'channeled_turns',
+        'charges_used',
+        'leech_hp',
+        'attrition_cost',
+        'empower_bonus',
+    )
+
+    def __init__(self, **fields):
+        self.last_target_hit = None
+        self.defeated_enemy_last_turn = False
+        self.defeated_enemy_this_turn = False
+        self.dealt_damage_last_turn = False
+        self.was_hit_last_turn = False
+        self.was_damaged_last_turn = False
+        self.all_attacks_missed_last_turn = False
+        self.was_hit_no_damage_last_turn = False
+        self.was_attacked_last_turn = False
+        self.hit_same_target_last_turn = False
+        self.channeled_turns = 0
+        self.charges_used = {}
+        self.leech_hp = 0
+        self.attrition_cost = 0
+        self.empower_bonus = 0
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    @classmethod
+    def coerce(cls, state) -> 'CombatState':
+        """Return state as a CombatState (None -> fresh state, dict -> copied fields)"""
+        if state is None:
+            return cls()
+        if isinstance(state, cls):
+            return state
+        return cls(**{key: value for key, value in state.items() if key in cls.__slots__})
+
+    def snapshot(self) -> tuple:
+        """Capture every field (charges_used is copied so later uses don't leak in)"""
+        values = tuple(getattr(self, name) for name in self.__slots__)
+        return values, dict(self.charges_used)
+
+    def restore(self, snapshot: tuple):
+        """Reset every field to a snapshot taken with snapshot() (a snapshot can be restored repeatedly)"""
+        values, charges_used = snapshot
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+        self.charges_used = dict(charges_used)
+
+    def copy(self) -> 'CombatState':
+        """Independent copy of this state"""
+        state = CombatState.__new__(CombatState)
+        state.restore(self.snapshot())
+        return state
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"CombatState({fields})"
+
+
+class EnemyGroup:
+    """
+    Struct-of-arrays state for the enemies of one combat.
+
+    HP, max HP and bleed live in parallel lists indexed by enemy. The alive
+    indices (in enemy order), alive count and total alive HP are updated by
+    every HP change, so the combat loops never rescan the group to find
+    targets or check for the end of combat.
+
+    An enemy carries at most one bleed stack (new bleed replaces the old one):
+    bleed_turns[i] is the turns left on it, or -1 when there is none. A stack
+    at 0 turns deals no more damage and is cleared on the next bleed tick.
+    """
+
+    __slots__ = ('hp', 'max_hp', 'bleed_damage', 'bleed_turns', 'alive', 'alive_count', 'total_hp')
+
+    def __init__(self, hp_values: List[int]):
+        self.hp = list(hp_values)
+        self.max_hp = list(hp_values)
+        self.bleed_damage = [0] * len(self.hp)
+        self.bleed_turns = [-1] * len(self.hp)
+        self.alive = [i for i, hp in enumerate(self.hp) if hp > 0]
+        self.alive_count = len(self.alive)
+        self.total_hp = sum(self.hp[i] for i in self.alive)
+
+    @classmethod
+    def from_scenario(cls, num_enemies: int = 1, enemy_hp: int = 100,
+                      enemy_hp_list: List[int] = None) -> 'EnemyGroup':
+        """Build a mixed group from enemy_hp_list, or num_enemies enemies of enemy_hp each"""
+        if enemy_hp_list is not None:
+            return cls(enemy_hp_list)
+        return cls([enemy_hp] * num_enemies)
+
+    def __len__(self) -> int:
+        return len(self.hp)
+
+    def damage(self, index: int, amount: int) -> int:
+        """Apply damage (HP floors at 0) and return the enemy's new HP"""
+        old_hp = self.hp[index]
+        if old_hp <= 0 or amount <= 0:
+            return old_hp
+        new_hp = old_hp - amount if amount < old_hp else 0
+        self.hp[index] = new_hp
+        self.total_hp -= old_hp - new_hp
+        if new_hp == 0:
+            self.alive.remove(index)
+            self.alive_count -= 1
+        return new_hp
+
+    def kill(self, index: int):
+        """Defeat an enemy outright (finishing blow, culling strike)"""
+        self.damage(index, self.hp[index])
+
+    def first_alive(self, exclude: int = None):
+        """Index of the first alive enemy (skipping exclude), or None"""
+        for index in self.alive:
+            if index != exclude:
+                return index
+        return None
+
+    def targets(self) -> List[Tuple[int, int]]:
+        """(index, max_hp) for every alive enemy, in enemy order (for make_aoe_attack)"""
+        max_hp = self.max_hp
+        return [(index, max_hp[index]) for index in self.alive]
+
+    def apply_bleed(self, index: int, damage: int, turns: int) -> int:
+        """Replace the enemy's bleed with a new stack and return how many stacks it replaced"""
+        replaced = 1 if self.bleed_turns[index] >= 0 else 0
+        self.bleed_damage[index] = damage
+        self.bleed_turns[index] = turns
+        return replaced
+
+    def has_bleed(self, index: int = None) -> bool:
+        """Whether the enemy (or any enemy, alive or not) carries a bleed stack"""
+        if index is None:
+            return any(turns >= 0 for turns in self.bleed_turns)
+        return self.bleed_turns[index] >= 0
+
+    def pending_bleed(self) -> int:
+        """Total damage of every bleed stack still carried"""
+        return sum(damage for damage, turns in zip(self.bleed_damage, self.bleed_turns) if turns >= 0)
+
+    def tick_bleed(self) -> List[Tuple[int, int, int]]:
+        """
+        Run the bleed phase for alive enemies.
+
+        Returns:
+            (index, bleed_damage, turns_left_before) for every stack that dealt damage
+        """
+        ticks = []
+        bleed_turns = self.bleed_turns
+        for index in list(self.alive):
+            turns_left = bleed_turns[index]
+            if turns_left > 0:
+                bleed_damage = self.bleed_damage[index]
+                bleed_turns[index] = turns_left - 1
+                ticks.append((index, bleed_damage, turns_left))
+                self.damage(index, bleed_damage)
+            elif turns_left == 0:
+                bleed_turns[index] = -1
+        return ticks
+
+    def __repr__(self) -> str:
+        return f"EnemyGroup(hp={self.hp}, max_hp={self.max_hp}, alive={self.alive})"
@@ -0,0 +1,182 @@
+"""
+Index-based spaces of MultiAttackBuilds for the dual_natured and versatile_master archetypes.
+
+The archetype generators used to create every MultiAttackBuild up front. A
+versatile master set of k attacks drawn (with replacement) from n candidates
+gives C(n + k - 1, k) sets, so the objects alone ran out of memory long before
+simulation started. A MultiBuildSpace keeps only the candidate AttackBuilds
+and addresses each set by a tuple of candidate IDs:
+- dual_natured: (primary ID, fallback ID), primary-major
+- versatile_master: a non-decreasing tuple of k candidate IDs, in the order of
+  itertools.combinations_with_replacement, ranked and unranked combinatorially
+
+A MultiAttackBuild is only created when a set is requested (nth, iteration or
+indexing), which gives:
+- count(): size of the space without materializing it
+- nth_ids(i) / rank(ids): ID tuple at an index and back
+- nth(i): the MultiAttackBuild at an index
+- ids(start, stop) / builds(start, stop): an index range, streamed in order
+
+Spaces are Sequences, so BuildTester's racing and progressive elimination can
+index them like a list; slicing returns a list of that range's builds only.
+"""
+
+from collections.abc import Sequence
+from math import comb
+from typing import Generator, List, Tuple
+
+from src.models import AttackBuild, MultiAttackBuild
+
+DUAL_NATURED = 'dual_natured'
+VERSATILE_MASTER = 'versatile_master'
+
+
+class MultiBuildSpace(Sequence):
+    """
+    Lazy, randomly accessible space of MultiAttackBuilds over candidate AttackBuilds.
+
+    Example:
+        space = MultiBuildSpace.versatile_master(curated_builds, set_size=3)
+        total = space.count()
+        for build in space.builds(0, total // 2):
+            ...
+    """
+
+    def __init__(self, archetype: str, candidates: List[AttackBuild], set_size: int,
+                 fallback_types: List[str] = None, tier_bonus: int = 0):
+        self.archetype = archetype
+        self.candidates = list(candidates)
+        self.set_size = set_size
+        self.fallback_types = list(fallback_types) if fallback_types else []
+        self.tier_bonus = tier_bonus
+        self._fallback_builds = [AttackBuild(fallback_type, [], []) for fallback_type in self.fallback_types]
+
+        if archetype == DUAL_NATURED:
+            self._count = len(self.candidates) * len(self.fallback_types)
+        elif archetype == VERSATILE_MASTER:
+            self._count = comb(len(self.candidates) + set_size - 1, set_size) if self.candidates else 0
+        else:
+            raise ValueError(f"unknown multi-attack archetype '{archetype}'")
+
+    @classmethod
+    def dual_natured(cls, primaries: List[AttackBuild], fallback_types: List[str],
+                     tier_bonus: int) -> 'MultiBuildSpace':
+        """Every primary build paired with a basic attack of each fallback type"""
+        return cls(DUAL_NATURED, primaries, 2, fallback_types, tier_bonus)
+
+    @classmethod
+    def versatile_master(cls, candidates: List[AttackBuild], set_size: int = 3) -> 'MultiBuildSpace':
+        """Every multiset of set_size candidate builds"""
+        return cls(VERSATILE_MASTER, candidates, set_size)
+
+    def count(self) -> int:
+        """Number of MultiAttackBuilds in the space (nothing is materialized)"""
+        return self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _completions(self, values: int, slots: int) -> int:
+        """Non-decreasing fillings of slots positions from values remaining candidates"""
+        return comb(values + slots - 1, slots) if slots else 1
+
+    def nth_ids(self, index: int) -> Tuple[int, ...]:
+        """The candidate ID tuple at a position of the space"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"build index {index} out of range for {self._count} builds")
+
+        if self.archetype == DUAL_NATURED:
+            return divmod(index, len(self.fallback_types))
+
+        n = len(self.candidates)
+        ids = []
+        value = 0
+        for position in range(self.set_size):
+            slots_left = self.set_size - position - 1
+            while True:
+                block = self._completions(n - value, slots_left)
+                if index < block:
+                    break
+                index -= block
+                value += 1
+            ids.append(value)
+        return tuple(ids)
+
+    def rank(self, ids: Tuple[int, ...]) -> int:
+        """The position of a candidate ID tuple (inverse of nth_ids)"""
+        if self.archetype == DUAL_NATURED:
+            primary, fallback = ids
+            return primary * len(self.fallback_types) + fallback
+
+        n = len(self.candidates)
+        index = 0
+        value = 0
+        for position, target in enumerate(ids):
+            slots_left = self.set_size - position - 1
+            for skipped in range(value, target):
+                index += self._completions(n - skipped, slots_left)
+            value = target
+        return index
+
+    def ids(self, start: int = 0, stop: int = None) -> Generator[Tuple[int, ...], None, None]:
+        """
+        Candidate ID tuples with indices in [start, stop), in order.
+
+        Only start is unranked; the rest follow by successor steps.
+        """
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return
+        current = list(self.nth_ids(start))
+        last_value = len(self.candidates) - 1
+        last_fallback = len(self.fallback_types) - 1
+        for _ in range(start, stop):
+            yield tuple(current)
+            if self.archetype == DUAL_NATURED:
+                if current[1] < last_fallback:
+                    current[1] += 1
+                else:
+                    current = [current[0] + 1, 0]
+            else:
+                # Rightmost position that can still grow; everything after it restarts at its new value
+                position = self.set_size - 1
+                while position >= 0 and current[position] == last_value:
+                    position -= 1
+                if position < 0:
+                    return
+                value = current[position] + 1
+                current[position:] = [value] * (self.set_size - position)
+
+    def build(self, ids: Tuple[int, ...]) -> MultiAttackBuild:
+        """Create the MultiAttackBuild for a candidate ID tuple"""
+        if self.archetype == DUAL_NATURED:
+            primary, fallback = ids
+            return MultiAttackBuild(
+                builds=[self.candidates[primary], self._fallback_builds[fallback]],
+                archetype=DUAL_NATURED,
+                fallback_type=self.fallback_types[fallback],
+                tier_bonus=self.tier_bonus
+            )
+        return MultiAttackBuild([self.candidates[candidate] for candidate in ids], VERSATILE_MASTER)
+
+    def nth(self, index: int) -> MultiAttackBuild:
+        """The MultiAttackBuild at a position of the space"""
+        return self.build(self.nth_ids(index))
+
+    def builds(self, start: int = 0, stop: int = None) -> Generator[MultiAttackBuild, None, None]:
+        """MultiAttackBuilds with indices in [start, stop), created one at a time"""
+        for ids in self.ids(start, stop):
+            yield self.build(ids)
+
+    def __iter__(self):
+        return self.builds()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step != 1:
+                return [self.nth(position) for position in range(start, stop, step)]
+            return list(self.builds(start, stop))
+        return self.nth(index)
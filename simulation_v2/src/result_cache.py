@@ -0,0 +1,277 @@
+"""
+Persistent content-addressed cache of simulation batch results.
+
+Each batch is keyed by a SHA-256 of its canonical inputs: engine version,
+attacker, defender, build, buffs, scenario, runs, archetype, solver flags and
+the dice stream it was drawn from. IndividualTester, BuildTester (focused and
+dual_natured), versatile_master pruning and Simulation V3 stage 1 therefore
+reuse each other's batches, and a re-run after a config tweak only simulates
+the inputs that actually changed.
+
+Storage is a single SQLite file in WAL mode, so pool workers read concurrently
+while one process writes. Every process opens its own connection (forked
+workers reopen rather than share the parent's). Entries hold the per-run turn
+distribution and the outcome counts; the least recently used entries are
+evicted once the live data grows past max_size_mb.
+
+Seeded runs draw every missed batch from a substream of the current dice
+stream keyed by the batch inputs, so a batch has the same result whether it was
+simulated this run or read back from the cache.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from src.dice import build_seed_key, stream_key, is_common_stream, seed_substream
+
+# Bump whenever a combat rule or engine change alters simulation results
+ENGINE_VERSION = 1
+
+DEFAULT_MAX_SIZE_MB = 512
+
+# Hits are stamped in batches so reads do not each take the write lock
+TOUCH_BATCH = 256
+# Size check interval (in writes)
+EVICT_INTERVAL = 512
+# Fraction of entries dropped per eviction pass
+EVICT_FRACTION = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    turns BLOB NOT NULL,
+    avg_turns REAL NOT NULL,
+    dpt REAL NOT NULL,
+    outcomes TEXT NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+
+def _json_default(value):
+    """Canonical JSON form of Characters, buff configs and NumPy scalars"""
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    raise TypeError(f"Cannot use {type(value).__name__} in a result cache key")
+
+
+def _canonical_json(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=_json_default)
+
+
+def result_key(build, inputs: dict, stream: Optional[tuple]) -> str:
+    """
+    Content hash identifying one simulation batch.
+
+    Args:
+        build: AttackBuild or MultiAttackBuild (upgrade/limit order does not matter)
+        inputs: Every other input that affects the result (characters, scenario, runs, flags)
+        stream: Dice stream key (dice.stream_key()), None for unseeded runs
+    """
+    payload = {
+        'engine': ENGINE_VERSION,
+        'build': build_seed_key(build),
+        'inputs': inputs,
+        'stream': list(stream) if stream is not None else None
+    }
+    return hashlib.sha256(_canonical_json(payload).encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed (results, avg_turns, dpt, outcome_stats) store with LRU eviction."""
+
+    def __init__(self, path: str, max_size_mb: float = DEFAULT_MAX_SIZE_MB):
+        self.path = path
+        self.max_size_mb = max_size_mb
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._pending_touches = []
+        self._writes_since_evict = 0
+
+    def __getstate__(self):
+        # Connections cannot cross process boundaries; workers reconnect lazily
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        state['_pid'] = None
+        state['_pending_touches'] = []
+        return state
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(_SCHEMA)
+            connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+            self._connection = connection
+            self._pid = os.getpid()
+            self._pending_touches = []
+            self._writes_since_evict = 0
+        return self._connection
+
+    def get(self, key: str) -> Optional[Tuple]:
+        """Cached (results, avg_turns, dpt, outcome_stats) for a key, or None"""
+        row = self._connect().execute(
+            'SELECT turns, avg_turns, dpt, outcomes FROM results WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._pending_touches.append(key)
+        if len(self._pending_touches) >= TOUCH_BATCH:
+            self.flush()
+        turns, avg_turns, dpt, outcomes = row
+        return np.frombuffer(turns, dtype=np.int32).tolist(), avg_turns, dpt, json.loads(outcomes)
+
+    def put(self, key: str, result: Tuple):
+        """Store a (results, avg_turns, dpt, outcome_stats) tuple"""
+        results, avg_turns, dpt, outcome_stats = result
+        turns = np.asarray(results, dtype=np.int32).tobytes()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO results (key, turns, avg_turns, dpt, outcomes, last_used) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (key, turns, float(avg_turns), float(dpt), _canonical_json(outcome_stats), time.time())
+        )
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= EVICT_INTERVAL:
+            self.evict()
+
+    def flush(self):
+        """Write pending last-used stamps for cache hits"""
+        if not self._pending_touches:
+            return
+        now = time.time()
+        self._connect().executemany(
+            'UPDATE results SET last_used = ? WHERE key = ?',
+            [(now, key) for key in self._pending_touches]
+        )
+        self._pending_touches = []
+
+    def size_bytes(self) -> int:
+        """Bytes of live (non-free) pages in the database"""
+        connection = self._connect()
+        page_size = connection.execute('PRAGMA page_size').fetchone()[0]
+        page_count = connection.execute('PRAGMA page_count').fetchone()[0]
+        free_pages = connection.execute('PRAGMA freelist_count').fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def evict(self) -> int:
+        """
+        Drop least recently used entries until the cache fits max_size_mb.
+
+        Freed pages are reused by later writes, so the file stops growing
+        rather than shrinking.
+
+        Returns:
+            Number of entries removed
+        """
+        self.flush()
+        self._writes_since_evict = 0
+        connection = self._connect()
+        max_bytes = self.max_size_mb * 1024 * 1024
+        removed = 0
+        while self.size_bytes() > max_bytes:
+            count = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            if count == 0:
+                break
+            batch = max(1, int(count * EVICT_FRACTION))
+            connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)',
+                (batch,)
+            )
+            removed += batch
+        return removed
+
+    def __len__(self) -> int:
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def get_or_compute(self, build, inputs: dict, compute: Callable[[], Tuple]) -> Tuple:
+        """
+        Return the cached batch for (build, inputs, dice stream), simulating it on a miss.
+
+        On a miss in a seeded run the dice stream is first reseeded to a
+        substream keyed by the inputs (and the build, unless the stream is a
+        common-random-numbers stream shared by every build), so the stored
+        result is a pure function of its key.
+
+        Args:
+            build: AttackBuild or MultiAttackBuild being simulated
+            inputs: Every other input that affects the result
+            compute: Callable running the batch, returning (results, avg_turns, dpt, outcome_stats)
+        """
+        stream = stream_key()
+        key = result_key(build, inputs, stream)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        if stream is not None:
+            inputs_key = zlib.crc32(_canonical_json(inputs).encode('utf-8'))
+            if is_common_stream():
+                seed_substream('cache', inputs_key)
+            else:
+                seed_substream('cache', inputs_key, build)
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def close(self):
+        """Flush pending stamps and close this process's connection"""
+        if self._connection is not None and self._pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+
+# Cache shared by every batch call in this process (None = caching disabled)
+_active_cache: Optional[ResultCache] = None
+
+
+def open_result_cache(path: str, max_size_mb: float = DEFAULT_MAX_SIZE_MB) -> ResultCache:
+    """
+    Enable the process-wide result cache (reuses the open one for the same path).
+
+    Args:
+        path: SQLite file (created with its directory if missing)
+        max_size_mb: Live data size above which LRU entries are evicted
+    """
+    global _active_cache
+    if _active_cache is not None and _active_cache.path == path:
+        _active_cache.max_size_mb = max_size_mb
+        return _active_cache
+    close_result_cache()
+    _active_cache = ResultCache(path, max_size_mb)
+    return _active_cache
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """The process-wide result cache, or None if caching is disabled"""
+    return _active_cache
+
+
+def close_result_cache():
+    """Disable the process-wide result cache"""
+    global _active_cache
+    if _active_cache is not None:
+        _active_cache.close()
+    _active_cache = None
@@ -0,0 +1,366 @@
+"""
+Columnar, memory-mapped build results.
+
+Reports used to work on a Python list of (build, avg_dpt, avg_turns) tuples,
+sorted in place; at millions of builds the tuples and build objects alone
+took gigabytes, and every ad-hoc analysis had to re-run or unpickle them.
+ResultColumnsWriter stores a run's results as one .npy file per column in a
+directory instead, a batch of rows at a time (write_result_columns for a
+list), and ResultColumns memory-maps them, so the reporter and ad-hoc scripts
+only read the columns they touch:
+- builds.npy: dictionary table of the distinct AttackBuilds (attack type index,
+  upgrade mask, limit mask in game_data order)
+- build_ids.npy: int32 (rows, attacks) row -> dictionary entries; one attack
+  for focused builds, every attack of a MultiAttackBuild otherwise
+- avg_dpt.npy, avg_turns.npy: float64 per row
+- scenario_turns.npy: float32 (rows, scenarios) avg turns per scenario (optional)
+- outcomes.npy: uint32 (rows, 3) wins/losses/timeouts over all scenarios (optional)
+- usage.npy: uint32 (rows, attacks) combat turns each attack was used
+  (MultiAttackBuild.attack_usage_counts; multi-attack archetypes only)
+- rank.npy: rows ordered by avg turns (best first, ties in row order)
+- meta.json: archetype, scenario names, tier bonus and row count; written
+  last, so a directory without it is incomplete
+
+Builds are only created when a row is read (ResultColumns.build), and
+ranked() gives the rows in report order as a lazy sequence of the familiar
+(build, avg_dpt, avg_turns) tuples.
+
+Example:
+    columns = ResultColumns('reports/<timestamp>/focused/results')
+    turns = columns.column('scenario_turns')          # memory-mapped, nothing read yet
+    best = columns.column('rank')[:10]
+    print(turns[best].mean(axis=0), columns.build(int(best[0])))
+"""
+
+import json
+import os
+from collections.abc import Sequence
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
+from src.models import AttackBuild, MultiAttackBuild, build_from_masks, build_masks, options_from_masks
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+
+_BUILD_DTYPE = np.dtype([('attack_type', np.uint8), ('upgrade_mask', np.uint64), ('limit_mask', np.uint64)])
+
+
+def _game_data_names() -> Dict[str, List[str]]:
+    """Names the dictionary table's indices and mask bits refer to"""
+    return {'attack_types': list(ATTACK_TYPES), 'upgrades': list(UPGRADES), 'limits': list(LIMITS)}
+
+
+class ResultColumnsWriter:
+    """
+    Writes result columns a batch of rows at a time, in row order.
+
+    Row columns are preallocated .npy files written through memory maps, so a
+    run's rows never have to be held in memory together. close() writes the
+    rank and build dictionary columns and meta.json.
+
+    Args:
+        directory: Output directory (created; existing column files are replaced)
+        rows: Total number of rows that will be appended
+        archetype: Archetype of the builds
+        scenario_names: Scenario names, in scenario_turns column order
+    """
+
+    def __init__(self, directory: str, rows: int, archetype: str, scenario_names: List[str]):
+        self.directory = directory
+        self.rows = rows
+        self.archetype = archetype
+        self.scenario_names = list(scenario_names)
+        self.written = 0
+        self.attacks_per_build = 1
+        self.tier_bonus = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        self._dictionary: Dict[Tuple[int, int, int], int] = {}
+        self._entries: List[Tuple[int, int, int]] = []
+
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+    def _open(self, name: str, dtype, width: int = None) -> np.ndarray:
+        shape = (self.rows,) if width is None else (self.rows, width)
+        path = os.path.join(self.directory, f"{name}.npy")
+        if self.rows == 0:
+            values = np.zeros(shape, dtype=dtype)
+        else:
+            values = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        self._columns[name] = values
+        return values
+
+    def _open_columns(self, build, scenario_turns, outcome_counts):
+        """Create the row columns from the first batch (attacks per build, optional columns)"""
+        multi = isinstance(build, MultiAttackBuild)
+        self.attacks_per_build = len(build.builds) if multi else 1
+        self.tier_bonus = getattr(build, 'tier_bonus', 0)
+        self._open('build_ids', np.int32, self.attacks_per_build)
+        self._open('avg_dpt', np.float64)
+        self._open('avg_turns', np.float64)
+        if scenario_turns is not None:
+            self._open('scenario_turns', np.float32, len(self.scenario_names))
+        if outcome_counts is not None:
+            self._open('outcomes', np.uint32, 3)
+        if multi:
+            self._open('usage', np.uint32, self.attacks_per_build)
+
+    def append(self, builds: Sequence, avg_dpt, avg_turns, scenario_turns=None, outcome_counts=None):
+        """
+        Write the next rows.
+
+        Args:
+            builds: AttackBuild or MultiAttackBuild per row (usage read from attack_usage_counts)
+            avg_dpt, avg_turns: Per row
+            scenario_turns: Optional (rows, scenarios) avg turns
+            outcome_counts: Optional (rows, 3) wins/losses/timeouts
+        """
+        count = len(builds)
+        if not count:
+            return
+        if not self._columns:
+            self._open_columns(builds[0], scenario_turns, outcome_counts)
+        rows = slice(self.written, self.written + count)
+
+        ids = []
+        for build in builds:
+            for attack in (build.builds if isinstance(build, MultiAttackBuild) else [build]):
+                masks = build_masks(attack)
+                entry = self._dictionary.get(masks)
+                if entry is None:
+                    entry = self._dictionary[masks] = len(self._entries)
+                    self._entries.append(masks)
+                ids.append(entry)
+        self._columns['build_ids'][rows] = np.array(ids, dtype=np.int32).reshape(count, self.attacks_per_build)
+        self._columns['avg_dpt'][rows] = avg_dpt
+        self._columns['avg_turns'][rows] = avg_turns
+        if 'scenario_turns' in self._columns:
+            self._columns['scenario_turns'][rows] = np.asarray(scenario_turns).reshape(count, -1)
+        if 'outcomes' in self._columns:
+            self._columns['outcomes'][rows] = np.asarray(outcome_counts).reshape(count, 3)
+        if 'usage' in self._columns:
+            self._columns['usage'][rows] = [[build.attack_usage_counts.get(attack_idx, 0)
+                                             for attack_idx in range(self.attacks_per_build)] for build in builds]
+        self.written += count
+
+    def close(self) -> str:
+        """
+        Write the rank, the build dictionary and meta.json.
+
+        Returns:
+            The directory
+
+        Raises:
+            ValueError: If fewer or more rows were appended than announced
+        """
+        if self.written != self.rows:
+            raise ValueError(f"{self.written} of {self.rows} result rows written")
+        if not self._columns:
+            self._open('build_ids', np.int32, 1)
+            self._open('avg_dpt', np.float64)
+            self._open('avg_turns', np.float64)
+
+        columns = self._columns
+        columns['builds'] = np.array(self._entries, dtype=_BUILD_DTYPE)
+        columns['rank'] = np.argsort(np.asarray(columns['avg_turns']), kind='stable').astype(
+            np.int32 if self.rows < 2 ** 31 else np.int64)
+        for name, values in columns.items():
+            if isinstance(values, np.memmap):
+                values.flush()
+            else:
+                np.save(os.path.join(self.directory, f"{name}.npy"), values)
+
+        meta = {
+            'format': FORMAT_VERSION,
+            'archetype': self.archetype,
+            'rows': self.rows,
+            'attacks_per_build': self.attacks_per_build,
+            'tier_bonus': self.tier_bonus,
+            'scenario_names': self.scenario_names,
+            'columns': sorted(columns),
+            **_game_data_names()
+        }
+        self._columns = {}
+        with open(os.path.join(self.directory, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+        return self.directory
+
+
+def write_result_columns(directory: str, results: List[Tuple], archetype: str, scenario_names: List[str],
+                         scenario_turns=None, outcome_counts=None) -> str:
+    """
+    Write a list of build results as memory-mappable columns (see ResultColumnsWriter for streams).
+
+    Args:
+        directory: Output directory (created; existing column files are replaced)
+        results: (build, avg_dpt, avg_turns) per build, in any order
+        archetype: Archetype of the builds
+        scenario_names: Scenario names, in scenario_turns column order
+        scenario_turns: Optional (builds, scenarios) avg turns, in results order
+        outcome_counts: Optional (builds, 3) wins/losses/timeouts, in results order
+
+    Returns:
+        The directory
+    """
+    writer = ResultColumnsWriter(directory, len(results), archetype, scenario_names)
+    writer.append([build for build, _, _ in results],
+                  [avg_dpt for _, avg_dpt, _ in results],
+                  [avg_turns for _, _, avg_turns in results],
+                  scenario_turns, outcome_counts)
+    return writer.close()
+
+
+class ResultColumns:
+    """
+    Read access to a directory written by write_result_columns.
+
+    Raises:
+        FileNotFoundError: If the directory has no meta.json (missing or incomplete)
+        ValueError: If it was written by another format version or other game data
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"result columns format {self.meta.get('format')} is not {FORMAT_VERSION}")
+        current = _game_data_names()
+        if any(self.meta[name] != names for name, names in current.items()):
+            raise ValueError(f"result columns in {directory} were written with other game data")
+        self._columns: Dict[str, np.ndarray] = {}
+
+    @property
+    def archetype(self) -> str:
+        return self.meta['archetype']
+
+    @property
+    def scenario_names(self) -> List[str]:
+        return self.meta['scenario_names']
+
+    def __len__(self) -> int:
+        return self.meta['rows']
+
+    def has_column(self, name: str) -> bool:
+        return name in self.meta['columns']
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        A column as a read-only memory-mapped array (loaded on first use).
+
+        Raises:
+            KeyError: If the column was not written
+        """
+        values = self._columns.get(name)
+        if values is None:
+            if name not in self.meta['columns']:
+                raise KeyError(f"no '{name}' column in {self.directory}")
+            values = self._columns[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode='r')
+        return values
+
+    def _combine(self, attacks: List[AttackBuild]):
+        """The build of a row from its attacks"""
+        if self.archetype == 'focused':
+            return attacks[0]
+        fallback_type = attacks[1].attack_type if self.archetype == 'dual_natured' else None
+        return MultiAttackBuild(attacks, self.archetype, fallback_type=fallback_type,
+                                tier_bonus=self.meta['tier_bonus'])
+
+    def builds(self, rows) -> List:
+        """
+        The AttackBuild (focused) or MultiAttackBuild of each row.
+
+        Each distinct dictionary entry is decoded once per call, as the live
+        interned AttackBuild if there is one. Multi-attack builds get their
+        attack usage counts from the usage column.
+        """
+        ids = np.asarray(self.column('build_ids')[rows])
+        entries, inverse = np.unique(ids, return_inverse=True)
+        attacks = [build_from_masks(*entry) for entry in self.column('builds')[entries].tolist()]
+        builds = [self._combine([attacks[index] for index in row])
+                  for row in inverse.reshape(ids.shape).tolist()]
+        for build, counts in zip(builds, self.usage(rows)):
+            if counts is not None:
+                build.attack_usage_counts = {attack_idx: count for attack_idx, count in enumerate(counts) if count}
+        return builds
+
+    def usage(self, rows) -> List:
+        """Attack usage counts (one per attack) of each row, or None where the run has no usage column"""
+        if not self.has_column('usage'):
+            return [None] * len(np.atleast_1d(rows))
+        return [tuple(counts) for counts in np.asarray(self.column('usage')[rows]).tolist()]
+
+    def attacks(self, rows) -> List[Tuple[Tuple[str, Tuple[str, ...], Tuple[str, ...]], ...]]:
+        """(attack_type, upgrades, limits) of every attack of each row, without creating builds"""
+        ids = np.asarray(self.column('build_ids')[rows])
+        entries, inverse = np.unique(ids, return_inverse=True)
+        attack_types = self.meta['attack_types']
+        options = [(attack_types[attack_type], *options_from_masks(upgrade_mask, limit_mask))
+                   for attack_type, upgrade_mask, limit_mask in self.column('builds')[entries].tolist()]
+        return [tuple(options[index] for index in row) for row in inverse.reshape(ids.shape).tolist()]
+
+    def build(self, row: int):
+        """The AttackBuild (focused) or MultiAttackBuild of a row"""
+        return self.builds([row])[0]
+
+    def row(self, row: int) -> Tuple:
+        """(build, avg_dpt, avg_turns) of a row"""
+        return self.build(row), float(self.column('avg_dpt')[row]), float(self.column('avg_turns')[row])
+
+    def ranked(self) -> 'RankedResults':
+        """Rows in report order (ascending avg turns)"""
+        return RankedResults(self)
+
+
+class RankedResults(Sequence):
+    """
+    (build, avg_dpt, avg_turns) tuples ordered by avg turns, read from ResultColumns on access.
+
+    Stands in for the sorted results list: indexing, slicing (returns a list)
+    and iteration create builds only for the rows they touch.
+    """
+
+    BLOCK_ROWS = 4096
+
+    def __init__(self, columns: ResultColumns):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def _rows(self, rows: np.ndarray) -> List[Tuple]:
+        builds = self.columns.builds(rows)
+        avg_dpt = self.columns.column('avg_dpt')[rows].tolist()
+        avg_turns = self.columns.column('avg_turns')[rows].tolist()
+        return list(zip(builds, avg_dpt, avg_turns))
+
+    def __getitem__(self, index):
+        rank = self.columns.column('rank')
+        if isinstance(index, slice):
+            return self._rows(np.asarray(rank[index]))
+        return self.columns.row(int(rank[index]))
+
+    def __iter__(self):
+        rank = self.columns.column('rank')
+        for start in range(0, len(rank), self.BLOCK_ROWS):
+            yield from self._rows(np.asarray(rank[start:start + self.BLOCK_ROWS]))
+
+    def attack_rows(self):
+        """
+        (avg_turns, attacks, usage) in rank order, attacks as in ResultColumns.attacks and
+        usage as in ResultColumns.usage (no builds created)
+        """
+        rank = self.columns.column('rank')
+        avg_turns = self.columns.column('avg_turns')
+        for start in range(0, len(rank), self.BLOCK_ROWS):
+            rows = np.asarray(rank[start:start + self.BLOCK_ROWS])
+            yield from zip(avg_turns[rows].tolist(), self.columns.attacks(rows), self.columns.usage(rows))
+
+    def column(self, name: str) -> np.ndarray:
+        """A column of ResultColumns in rank order, e.g. column('avg_turns') ascending (no builds created)"""
+        return self.columns.column(name)[self.columns.column('rank')]
@@ -0,0 +1,222 @@
+"""
+Durable, resumable store of build test results.
+
+BuildTester used to stream results to a temporary pickle that was deleted at
+the end, so a crash, OOM or Ctrl-C late in a long run lost every result. The
+store is an append-only SQLite table in WAL mode instead:
+- Rows hold avg DPT, avg turns, avg turns per scenario, outcome counts and
+  the attack usage of multi-attack builds, keyed by run and build ID. The run key is a hash of every setting
+  that affects results (see run_key), the build ID is the build's position
+  in the run's build sequence, and the build's text key is stored alongside
+  it, so a row is only reused for the same build.
+- Results are appended in batches as they complete, each batch one transaction.
+- A restarted run with the same settings reads the completed rows back and
+  only tests the builds that are missing.
+- Once every build has a row, batches() reads them back in build order a
+  batch at a time, so the result columns are written without holding the
+  whole run in memory.
+
+The store file is shared by every run (one row set per run key); delete it,
+or the run's rows with clear(), to start over.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from src.dice import build_seed_key
+from src.result_cache import ENGINE_VERSION, _canonical_json
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS build_results (
+    run TEXT NOT NULL,
+    build_id INTEGER NOT NULL,
+    build_key TEXT NOT NULL,
+    avg_dpt REAL NOT NULL,
+    avg_turns REAL NOT NULL,
+    scenario_turns BLOB NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    timeouts INTEGER NOT NULL,
+    usage BLOB NOT NULL DEFAULT x'',
+    PRIMARY KEY (run, build_id)
+)
+"""
+
+_RUNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    archetype TEXT NOT NULL,
+    total_builds INTEGER NOT NULL,
+    started REAL NOT NULL,
+    completed REAL
+)
+"""
+
+
+def usage_bytes(build) -> bytes:
+    """A multi-attack build's attack usage counts as uint32 per attack (empty for single attacks)"""
+    usage = getattr(build, 'attack_usage_counts', None)
+    if not usage:
+        return b''
+    return np.array([usage.get(attack_idx, 0) for attack_idx in range(len(build.builds))],
+                    dtype=np.uint32).tobytes()
+
+
+def run_key(settings: dict) -> str:
+    """
+    Hash identifying a results run.
+
+    Args:
+        settings: Every setting that changes which builds are tested or their
+            results (archetype, point budget, characters, scenarios, runs, seeds, ...)
+    """
+    payload = {'engine': ENGINE_VERSION, 'settings': settings}
+    return hashlib.sha256(_canonical_json(payload).encode('utf-8')).hexdigest()
+
+
+class ResultsStore:
+    """Append-only SQLite store of per-build result rows for one run."""
+
+    def __init__(self, path: str, run: str):
+        self.path = path
+        self.run = run
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(_SCHEMA)
+            connection.execute(_RUNS_SCHEMA)
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(build_results)')]
+            if 'usage' not in columns:
+                # Stores written before attack usage was kept
+                connection.execute("ALTER TABLE build_results ADD COLUMN usage BLOB NOT NULL DEFAULT x''")
+            self._connection = connection
+        return self._connection
+
+    def begin(self, archetype: str, total_builds: int):
+        """Register the run (kept as is when resuming)"""
+        self._connect().execute(
+            'INSERT OR IGNORE INTO runs (run, archetype, total_builds, started) VALUES (?, ?, ?, ?)',
+            (self.run, archetype, total_builds, time.time())
+        )
+
+    def append(self, rows: Iterable[Tuple]):
+        """
+        Store completed builds in one transaction.
+
+        Args:
+            rows: (build_id, build, avg_dpt, avg_turns, avg turns per scenario, (wins, losses, timeouts))
+                per completed build
+        """
+        records = [(self.run, build_id, build_seed_key(build), float(avg_dpt), float(avg_turns),
+                    np.asarray(scenario_turns, dtype=np.float64).tobytes(), *(int(count) for count in outcomes),
+                    usage_bytes(build))
+                   for build_id, build, avg_dpt, avg_turns, scenario_turns, outcomes in rows]
+        if not records:
+            return
+        connection = self._connect()
+        connection.execute('BEGIN')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO build_results (run, build_id, build_key, avg_dpt, avg_turns, '
+                'scenario_turns, wins, losses, timeouts, usage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                records
+            )
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def completed(self) -> Dict[int, Tuple[str, float, float]]:
+        """build_id -> (build_key, avg_dpt, avg_turns) of every stored build of the run"""
+        rows = self._connect().execute(
+            'SELECT build_id, build_key, avg_dpt, avg_turns FROM build_results WHERE run = ?', (self.run,)
+        )
+        return {build_id: (build_key, avg_dpt, avg_turns) for build_id, build_key, avg_dpt, avg_turns in rows}
+
+    def missing(self, builds) -> List[int]:
+        """
+        IDs of the builds without a stored result, in order.
+
+        Args:
+            builds: The run's build sequence (list or MultiBuildSpace)
+        """
+        completed = self.completed()
+        if not completed:
+            return list(range(len(builds)))
+        return [build_id for build_id, build in enumerate(builds)
+                if build_id not in completed or completed[build_id][0] != build_seed_key(build)]
+
+    def batches(self, builds, batch_size: int = 4096) -> Iterator[Tuple]:
+        """
+        Every build's stored result in build order, batch_size builds at a time.
+
+        Only one batch of rows and builds is in memory at once. Multi-attack
+        builds get their stored attack usage counts back (builds from a
+        MultiBuildSpace are created afresh, and resumed builds were tested by
+        an earlier process).
+
+        Args:
+            builds: The run's build sequence (list or MultiBuildSpace)
+            batch_size: Builds per batch
+
+        Yields:
+            (builds, avg_dpt, avg_turns, scenario_turns, outcome_counts) per batch: a list of
+            builds, float64 arrays, float64 (batch, scenarios) and int64 (batch, 3) arrays
+
+        Raises:
+            KeyError: If a build has no stored result
+        """
+        cursor = self._connect().execute(
+            'SELECT build_id, avg_dpt, avg_turns, scenario_turns, wins, losses, timeouts, usage '
+            'FROM build_results WHERE run = ? AND build_id < ? ORDER BY build_id', (self.run, len(builds))
+        )
+        start = 0
+        while start < len(builds):
+            rows = cursor.fetchmany(batch_size)
+            # IDs are unique and ascending, so the batch is contiguous if it ends where it should
+            if not rows or rows[-1][0] != start + len(rows) - 1:
+                raise KeyError(f"results store is missing builds from build {start} on")
+            batch = []
+            for row in rows:
+                build = builds[row[0]]
+                if row[7]:
+                    build.attack_usage_counts = {attack_idx: int(count) for attack_idx, count
+                                                 in enumerate(np.frombuffer(row[7], dtype=np.uint32)) if count}
+                batch.append(build)
+            scenario_turns = np.frombuffer(b''.join(row[3] for row in rows), dtype=np.float64).reshape(len(rows), -1)
+            yield (batch, np.array([row[1] for row in rows], dtype=np.float64),
+                   np.array([row[2] for row in rows], dtype=np.float64), scenario_turns,
+                   np.array([row[4:7] for row in rows], dtype=np.int64))
+            start += len(rows)
+
+    def mark_complete(self):
+        """Record that every build of the run has a result"""
+        self._connect().execute('UPDATE runs SET completed = ? WHERE run = ?', (time.time(), self.run))
+
+    def clear(self):
+        """Delete the run's rows"""
+        connection = self._connect()
+        connection.execute('DELETE FROM build_results WHERE run = ?', (self.run,))
+        connection.execute('DELETE FROM runs WHERE run = ?', (self.run,))
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            'SELECT COUNT(*) FROM build_results WHERE run = ?', (self.run,)
+        ).fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = None
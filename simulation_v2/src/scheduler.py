@@ -0,0 +1,221 @@
+"""
+Balanced scheduling of simulation work units over a process pool.
+
+Parallel testing used to hand each worker a whole build (every scenario, and
+in Simulation V3 every defensive profile and buff too) as one task. A swarm
+scenario or an AOE build takes ten times as long as a single-target boss
+fight, so every chunk ended with a few workers finishing long builds while
+the rest sat idle. The scheduler splits tasks into units instead:
+- WorkUnit: one task (build) x one part (scenario, profile x buff x scenario)
+- CostModel: seconds per unit, learned per cost key from the timings of
+  finished units, with a prior for keys that have not run yet
+- TaskScheduler.run: orders units longest-first, bundles them into grains
+  that shrink as the remaining work shrinks (guided self-scheduling), and
+  keeps only a small window of grains in flight, so an idle worker always
+  takes the next grain from the shared queue. Per-task aggregates are
+  reassembled and yielded as soon as every part of a task has finished.
+- TaskScheduler.run_batches: the same over a stream of unit batches (chunks),
+  planning the next batch while the last grains of the previous one run
+
+Example:
+    scheduler = TaskScheduler(workers=8, cost_model=CostModel(scenario_cost_prior(scenarios)))
+    units = [WorkUnit(task, index, scenario_cost_key(build, index))
+             for task, build in enumerate(builds) for index in range(len(scenarios))]
+    for task, aggregate in scheduler.run(pool, worker, units, make_args, combine, parts_per_task):
+        ...
+
+The worker receives make_args(grain) and must return one (value, seconds)
+pair per unit of the grain, in grain order.
+"""
+
+import queue
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+from src.game_data import ATTACK_TYPES
+from src.dominance import scenario_hp_list
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """One schedulable piece of a task."""
+    task: int            # Position of the task (build, attack) in the batch being scheduled
+    part: int            # Position of the unit within its task (scenario, profile x buff x scenario)
+    cost_key: Hashable   # Units with the same key are expected to take the same time
+
+
+class CostModel:
+    """
+    Expected seconds per work unit, learned from observed timings.
+
+    Keys that have run use the mean of their timings. Keys that have not use
+    prior(key), rescaled by how the observed timings compare to their priors,
+    so the prior only needs to get relative costs right.
+    """
+
+    def __init__(self, prior: Callable[[Hashable], float] = None):
+        self.prior = prior or (lambda key: 1.0)
+        self._seconds: Dict[Hashable, float] = {}
+        self._counts: Dict[Hashable, int] = {}
+        self._observed_seconds = 0.0
+        self._observed_prior = 0.0
+
+    def observe(self, key: Hashable, seconds: float) -> bool:
+        """Record the timing of one unit. Returns True if the key had no timings before."""
+        first = key not in self._counts
+        self._seconds[key] = self._seconds.get(key, 0.0) + seconds
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self._observed_seconds += seconds
+        self._observed_prior += self.prior(key)
+        return first
+
+    def estimate(self, key: Hashable) -> float:
+        """Expected seconds for a unit with this key"""
+        count = self._counts.get(key)
+        if count:
+            return self._seconds[key] / count
+        scale = self._observed_seconds / self._observed_prior if self._observed_prior > 0 else 1.0
+        return self.prior(key) * scale
+
+    @property
+    def keys_learned(self) -> int:
+        """Number of cost keys with at least one timing"""
+        return len(self._counts)
+
+
+def scenario_cost_key(build, scenario_index: int) -> Tuple[int, Tuple[str, ...]]:
+    """Cost key of a build x scenario unit: the scenario and the build's attack types"""
+    builds = getattr(build, 'builds', None) or [build]
+    return scenario_index, tuple(sorted({attack.attack_type for attack in builds}))
+
+
+def scenario_cost_prior(scenarios: Sequence) -> Callable[[Tuple[int, Tuple[str, ...]]], float]:
+    """
+    Prior cost of scenario_cost_key keys before any timings exist.
+
+    Combat length grows with the enemies' total HP, and area attacks resolve
+    every living enemy each turn.
+    """
+    hp_lists = [scenario_hp_list(scenario) for scenario in scenarios]
+
+    def prior(key) -> float:
+        scenario_index, attack_types = key
+        hp_list = hp_lists[scenario_index]
+        area = any(ATTACK_TYPES[attack_type].is_area for attack_type in attack_types)
+        return sum(hp_list) * (len(hp_list) if area else 1)
+
+    return prior
+
+
+class TaskScheduler:
+    """
+    Longest-first, dynamically dispatched execution of work units on a pool.
+
+    Args:
+        workers: Number of pool processes
+        cost_model: Shared CostModel (kept across runs, so later chunks start with learned costs)
+        grains_per_worker: Grains each worker should still get from the remaining work;
+            higher = smaller grains (better balance, more dispatch overhead)
+        in_flight_per_worker: Grains queued per worker at any time
+    """
+
+    def __init__(self, workers: int, cost_model: CostModel = None,
+                 grains_per_worker: int = 4, in_flight_per_worker: int = 2):
+        self.workers = max(1, workers)
+        self.cost_model = cost_model or CostModel()
+        self.grains_per_worker = max(1, grains_per_worker)
+        self.in_flight = self.workers * max(1, in_flight_per_worker)
+        self.grains_dispatched = 0
+
+    def _longest_first(self, units) -> Tuple[deque, float]:
+        """Units ordered by estimated cost (descending) and their total estimated cost"""
+        estimate = self.cost_model.estimate
+        costed = sorted(((estimate(unit.cost_key), unit) for unit in units),
+                        key=lambda pair: pair[0], reverse=True)
+        return deque(costed), sum(cost for cost, _ in costed)
+
+    def _next_grain(self, remaining: deque, remaining_cost: float) -> Tuple[List[WorkUnit], float]:
+        """Take the longest remaining units up to the guided grain size"""
+        target = remaining_cost / (self.workers * self.grains_per_worker)
+        grain = []
+        grain_cost = 0.0
+        while remaining and (not grain or grain_cost + remaining[0][0] <= target):
+            cost, unit = remaining.popleft()
+            grain.append(unit)
+            grain_cost += cost
+        return grain, grain_cost
+
+    def run(self, pool, worker: Callable, units: List[WorkUnit], make_args: Callable[[List[WorkUnit]], object],
+            combine: Callable[[int, list], object], parts_per_task: int) -> Iterator[Tuple[int, object]]:
+        """
+        Run every unit and yield (task, combine(task, values by part)) as tasks complete.
+
+        Args:
+            pool: multiprocessing Pool
+            worker: Module-level function taking make_args(grain), returning [(value, seconds), ...]
+            units: Work units of all tasks
+            make_args: Picklable worker argument for a grain of units
+            combine: Aggregate of one task from its unit values (indexed by part)
+            parts_per_task: Units per task
+
+        Yields:
+            (task, aggregate) in completion order
+        """
+        return self.run_batches(pool, worker, [units], make_args, combine, parts_per_task)
+
+    def run_batches(self, pool, worker: Callable, batches: Iterable[List[WorkUnit]],
+                    make_args: Callable[[List[WorkUnit]], object], combine: Callable[[int, list], object],
+                    parts_per_task: int) -> Iterator[Tuple[int, object]]:
+        """
+        Like run(), over units that arrive in batches (e.g. one per chunk of builds).
+
+        The next batch is planned as soon as the current one has been dispatched,
+        while its last grains are still running, so batch boundaries never leave
+        workers waiting. Task numbers must be unique across batches.
+        """
+        batches = iter(batches)
+        exhausted = False
+        remaining, remaining_cost = deque(), 0.0
+        finished = queue.Queue()
+        parts: Dict[int, list] = {}
+        in_flight = 0
+
+        while True:
+            # Keep a small window queued: idle workers pull the next grain, nothing is pre-assigned
+            while in_flight < self.in_flight:
+                if not remaining:
+                    batch = None if exhausted else next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    remaining, remaining_cost = self._longest_first(batch)
+                    continue
+                grain, grain_cost = self._next_grain(remaining, remaining_cost)
+                remaining_cost -= grain_cost
+                pool.apply_async(worker, (make_args(grain),),
+                                 callback=lambda values, grain=grain: finished.put((grain, values)),
+                                 error_callback=lambda error: finished.put((None, error)))
+                in_flight += 1
+                self.grains_dispatched += 1
+
+            if not in_flight:
+                return
+
+            grain, values = finished.get()
+            in_flight -= 1
+            if grain is None:
+                raise values
+
+            relearned = False
+            for unit, (value, seconds) in zip(grain, values):
+                relearned |= self.cost_model.observe(unit.cost_key, seconds)
+                task_parts = parts.setdefault(unit.task, [None] * parts_per_task)
+                task_parts[unit.part] = value
+                if all(part is not None for part in task_parts):
+                    del parts[unit.task]
+                    yield unit.task, combine(unit.task, task_parts)
+
+            # A new cost key changes the estimates: reorder what has not been dispatched yet
+            if relearned and remaining:
+                remaining, remaining_cost = self._longest_first(unit for _, unit in remaining)
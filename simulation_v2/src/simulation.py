@@ -2,21 +2,24 @@
 Combat simulation logic for the Vitality System.
 """
 
-import copy
 from typing import List, Tuple
-from src.models import Character, AttackBuild, MultiAttackBuild
-from src.combat import make_attack, make_aoe_attack
+from src.models import Character, AttackBuild, MultiAttackBuild, CombatState, EnemyGroup
+from src.combat import make_attack, make_aoe_attack, preview_activation
+from src.tracer import as_tracer
 
 
-def rank_attacks_by_scenario(builds: List[AttackBuild], enemies: List[dict]) -> List[int]:
+def rank_attacks_by_scenario(builds: List[AttackBuild], num_alive: int, total_hp: int) -> List[int]:
     """
     Rank attacks for versatile_master based on current combat scenario.
 
+    Args:
+        builds: Attacks to rank
+        num_alive: Number of alive enemies
+        total_hp: Total HP of the alive enemies
+
     Returns:
         List of attack indices in priority order (best to worst)
     """
-    num_alive = sum(1 for e in enemies if e['hp'] > 0)
-    total_hp = sum(e['hp'] for e in enemies if e['hp'] > 0)
     avg_hp_per_enemy = total_hp / num_alive if num_alive > 0 else 0
 
     scores = []
@@ -98,23 +101,21 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
     Returns:
         Tuple of (turns, outcome) where outcome is "win", "loss", or "timeout"
     """
+    # Combat logs are rendered from trace events (None keeps every attack on the untraced path)
+    log_file = as_tracer(log_file)
 
     # Use provided defender or create dummy defender for the test case
     if defender is None:
         defender = Character(focus=0, power=0, mobility=3, endurance=0, tier=attacker.tier)
 
     # Initialize enemies - support both homogeneous and mixed HP groups
-    # Optimization: Avoid dictionary copies by creating separate dictionaries
     if enemy_hp_list is not None:
         # Mixed enemy groups - each enemy can have different HP
-        enemies = [{'hp': hp, 'max_hp': hp, 'bleed_stacks': []} for hp in enemy_hp_list]
         num_enemies = len(enemy_hp_list)
-    else:
+    elif enemy_hp is None:
         # Homogeneous enemy groups - all enemies have same HP (backward compatible)
-        if enemy_hp is None:
-            enemy_hp = target_hp
-        # Create each dictionary separately to avoid .copy() overhead
-        enemies = [{'hp': enemy_hp, 'max_hp': enemy_hp, 'bleed_stacks': []} for _ in range(num_enemies)]
+        enemy_hp = target_hp
+    enemies = EnemyGroup.from_scenario(num_enemies, enemy_hp, enemy_hp_list)
 
     # Track attacker HP for win/loss determination
     attacker_hp = attacker.max_hp
@@ -175,28 +176,18 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
         expected_damages = calculate_all_expected_damages(build.builds, attacker, defender, build.tier_bonus)
 
     # Initialize combat state for new limit mechanics
-    combat_state = {
-        'last_target_hit': None,
-        'defeated_enemy_last_turn': False,
-        'defeated_enemy_this_turn': False,  # Track if any enemy defeated this turn (for slaughter)
-        'dealt_damage_last_turn': False,
-        'was_hit_last_turn': False,
-        'was_damaged_last_turn': False,
-        'all_attacks_missed_last_turn': False,
-        'was_hit_no_damage_last_turn': False,
-        'was_attacked_last_turn': False,
-        'channeled_turns': 0,
-        'charges_used': {},
-        'leech_hp': 0,
-        'attrition_cost': 0,
-        'hit_same_target_last_turn': False,
-    }
+    combat_state = CombatState()
 
-    while any(enemy['hp'] > 0 for enemy in enemies) and turns < max_turns:
+    # Set once a basic-attack fallback defeats an enemy (feeds defeated_enemy_last_turn from then on)
+    fallback_defeat = False
+    # Defeats already reported in a turn summary (dropped from the log's max HP total)
+    defeat_logged = [False] * num_enemies
+
+    while enemies.alive_count and turns < max_turns:
         turns += 1
 
         # Reset defeated_enemy_this_turn at start of each turn
-        combat_state['defeated_enemy_this_turn'] = False
+        combat_state.defeated_enemy_this_turn = False
 
         # Track if we actually made a channeled attack this turn
         # (not basic attack fallback, not no attack due to focused archetype)
@@ -207,60 +198,35 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
             log_file.write(f"TURN {turns} - START\n")
             log_file.write(f"{'='*60}\n")
             log_file.write(f"Attacker HP: {attacker_hp}/{attacker_max_hp} ({attacker_hp/attacker_max_hp*100:.1f}%)\n")
-            alive_enemies = [i for i, enemy in enumerate(enemies) if enemy['hp'] > 0]
-            total_hp = sum(enemy['hp'] for enemy in enemies)
-            max_total_hp = sum(enemy['max_hp'] for enemy in enemies)
-            log_file.write(f"Alive Enemies: {len(alive_enemies)}/{num_enemies}\n")
+            total_hp = enemies.total_hp
+            max_total_hp = sum(max_hp for max_hp, logged in zip(enemies.max_hp, defeat_logged) if not logged)
+            log_file.write(f"Alive Enemies: {enemies.alive_count}/{num_enemies}\n")
             log_file.write(f"Total HP: {total_hp}/{max_total_hp} ({total_hp/max_total_hp*100:.1f}%)\n")
-            for i, enemy in enumerate(enemies):
-                if enemy['hp'] > 0:
-                    log_file.write(f"  Enemy {i+1}: {enemy['hp']}/{enemy['max_hp']} HP")
-                    if enemy['bleed_stacks']:
-                        log_file.write(f" ({len(enemy['bleed_stacks'])} bleed stacks)")
-                    log_file.write(f"\n")
+            for i in enemies.alive:
+                log_file.write(f"  Enemy {i+1}: {enemies.hp[i]}/{enemies.max_hp[i]} HP")
+                if enemies.has_bleed(i):
+                    log_file.write(f" (1 bleed stacks)")
+                log_file.write(f"\n")
 
         # Apply bleed damage to all enemies
-        if log_file and any(enemy['bleed_stacks'] for enemy in enemies):
+        if log_file and enemies.has_bleed():
             log_file.write(f"\nBLEED PHASE:\n")
 
-        enemies_killed_by_bleed = []
-        for i, enemy in enumerate(enemies):
-            if enemy['hp'] <= 0:
-                continue
-
-            bleed_stacks = enemy['bleed_stacks']
-            if not bleed_stacks:
-                continue
-
-            total_bleed_damage = 0
-            # Process bleed in-place to avoid creating new lists
-            active_bleeds = 0
-
-            for j in range(len(bleed_stacks)):
-                bleed_damage, turns_left = bleed_stacks[j]
-                if turns_left > 0:
-                    total_bleed_damage += bleed_damage
-                    bleed_stacks[active_bleeds] = (bleed_damage, turns_left - 1)
-                    active_bleeds += 1
-                    if log_file:
-                        log_file.write(f"  Enemy {i+1} bleed: {bleed_damage} damage ({turns_left} -> {turns_left-1} turns remaining)\n")
-
-            # Trim the list to active bleeds only
-            bleed_stacks[:] = bleed_stacks[:active_bleeds]
-            enemy['hp'] = max(0, enemy['hp'] - total_bleed_damage)
-
-            if log_file and total_bleed_damage > 0:
-                log_file.write(f"  Enemy {i+1} takes {total_bleed_damage} bleed damage: {enemy['hp'] + total_bleed_damage} -> {enemy['hp']} HP\n")
-
-            if enemy['hp'] <= 0:
-                enemies_killed_by_bleed.append(i+1)
-
-        if enemies_killed_by_bleed:
-            if log_file:
+        bleed_ticks = enemies.tick_bleed()
+
+        if log_file and bleed_ticks:
+            enemies_killed_by_bleed = []
+            for i, bleed_damage, turns_left in bleed_ticks:
+                log_file.write(f"  Enemy {i+1} bleed: {bleed_damage} damage ({turns_left} -> {turns_left-1} turns remaining)\n")
+                if bleed_damage > 0:
+                    log_file.write(f"  Enemy {i+1} takes {bleed_damage} bleed damage: {enemies.hp[i] + bleed_damage} -> {enemies.hp[i]} HP\n")
+                if enemies.hp[i] <= 0:
+                    enemies_killed_by_bleed.append(i+1)
+            if enemies_killed_by_bleed:
                 log_file.write(f"\n ENEMIES {', '.join(map(str, enemies_killed_by_bleed))} DIE FROM BLEED DAMAGE!\n")
 
         # Check if all enemies are dead
-        if not any(enemy['hp'] > 0 for enemy in enemies):
+        if not enemies.alive_count:
             break
 
         # Make attack
@@ -282,22 +248,17 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                 fallback_build = build.builds[1]
                 tier_bonus = build.tier_bonus  # Apply tier bonus to fallback
 
-                # Test if primary can be used (including charging)
-                # Use deep copy of combat_state so test doesn't consume charges/cooldowns
-                test_combat_state = copy.deepcopy(combat_state) if combat_state else None
-                test_damage, test_conditions, _ = make_attack(
-                    attacker, defender, primary_build, allow_multi=False, log_file=None,
-                    turn_number=turns, charge_history=charge_history,
-                    cooldown_history=cooldown_history,
-                    attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp,
-                    combat_state=test_combat_state
+                # Test if primary can be used (including charging) without consuming charges/cooldowns
+                primary_activation = preview_activation(
+                    primary_build, turns, attacker_hp, attacker_max_hp, combat_state,
+                    charge_history, cooldown_history
                 )
 
                 # Calculate current enemy state
-                num_alive = sum(1 for e in enemies if e['hp'] > 0)
+                num_alive = enemies.alive_count
 
                 # Check if primary needs to charge
-                if test_damage == 0 and 'charge' in test_conditions:
+                if primary_activation == 'charge':
                     # Primary needs to charge - always use it
                     active_build = primary_build
                     active_build_idx = 0
@@ -305,7 +266,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                     if log_file:
                         log_file.write(f"  Primary needs to charge - using primary\n")
                 # Check if primary can attack
-                elif test_damage > 0 or len(test_conditions) > 0:
+                elif primary_activation == 'attack':
                     # Primary can attack - compare with fallback using expected damage
                     primary_exp = expected_damages[0]
                     if is_aoe_attack(primary_build):
@@ -328,35 +289,28 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                         if log_file:
                             log_file.write(f"  Using fallback attack (exp dmg: {fallback_exp:.1f} vs primary: {primary_exp:.1f})\n")
                 else:
-                    # Primary failed completely (e.g., unreliable check) - use fallback
+                    # Primary limit conditions not met - use fallback
                     active_build = fallback_build
                     active_build_idx = 1
                     if log_file:
                         log_file.write(f"  Primary failed (unreliable/conditions not met) - using fallback\n")
             else:
                 # For versatile_master - use intelligent scenario-based attack selection
-                attack_priority = rank_attacks_by_scenario(build.builds, enemies)
+                attack_priority = rank_attacks_by_scenario(build.builds, enemies.alive_count, enemies.total_hp)
 
                 # Try attacks in priority order, falling back if unavailable
                 active_build = None
                 for priority_idx in attack_priority:
                     candidate_build = build.builds[priority_idx]
 
-                    # Test if this attack can be used this turn
-                    try:
-                        test_damage, test_conditions, _ = make_attack(
-                            attacker, defender, candidate_build, allow_multi=False, log_file=None,
-                            turn_number=turns, charge_history=charge_history if charge_history is not None else [],
-                            cooldown_history=cooldown_history if cooldown_history is not None else {},
-                            attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=combat_state
-                        )
-                    except Exception as e:
-                        # If test fails, try next attack
-                        test_damage = 0
-                        test_conditions = []
-
-                    # If attack succeeds (or would charge), use it
-                    if test_damage > 0 or 'charge' in test_conditions:
+                    # Test if this attack can be used this turn (no charges/cooldowns consumed)
+                    activation = preview_activation(
+                        candidate_build, turns, attacker_hp, attacker_max_hp, combat_state,
+                        charge_history, cooldown_history
+                    )
+
+                    # If attack can go ahead (or would charge), use it
+                    if activation != 'basic_attack':
                         active_build = candidate_build
                         active_build_idx = priority_idx
                         if log_file:
@@ -388,7 +342,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
 
         if is_aoe:
             # AOE attacks hit all alive enemies
-            alive_enemies = [(i, enemy) for i, enemy in enumerate(enemies) if enemy['hp'] > 0]
+            alive_enemies = enemies.targets()
 
             # Use the AOE attack function for proper shared damage rolls
             attack_results, total_damage_dealt = make_aoe_attack(
@@ -418,9 +372,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                     if log_file:
                         log_file.write(f"  Limit failed (passive) - taking EMPOWER ACTION (+Tier to next damage roll)\n")
                     # Set empower flag in combat_state
-                    if 'empower_bonus' not in combat_state:
-                        combat_state['empower_bonus'] = 0
-                    combat_state['empower_bonus'] += attacker.tier
+                    combat_state.empower_bonus += attacker.tier
                     # No attack this turn - just empower
                     total_damage_dealt = 0
                     attack_results = []
@@ -441,14 +393,10 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                     # Mark that we used basic attack fallback this turn
                     used_basic_attack_this_turn = True
                 # Apply damage from basic attack
-                enemies_hit = []
                 for enemy_idx, damage, conditions in attack_results:
-                    if damage > 0:
-                        enemies[enemy_idx]['hp'] = max(0, enemies[enemy_idx]['hp'] - damage)
-                        enemies_hit.append(enemy_idx)
-                        if enemies[enemy_idx]['hp'] <= 0:
-                            enemies[enemy_idx]['defeated_this_turn'] = True
-                            combat_state['defeated_enemy_this_turn'] = True  # Activate slaughter for subsequent attacks
+                    if damage > 0 and enemies.damage(enemy_idx, damage) <= 0:
+                        fallback_defeat = True
+                        combat_state.defeated_enemy_this_turn = True  # Activate slaughter for subsequent attacks
             else:
                 # Normal AOE attack case - check if channeled was used
                 if 'channeled' in active_build.upgrades:
@@ -458,34 +406,32 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
 
                 # Apply results to each target
                 for target_idx, damage, conditions in attack_results:
-                    enemy = enemies[target_idx]
-                    enemy['hp'] = max(0, enemy['hp'] - damage)
+                    target_hp_left = enemies.damage(target_idx, damage)
 
                     if damage > 0:
                         enemies_hit.append(target_idx+1)
 
                     # Check for finishing blow after damage is applied
                     finishing_conditions = [c for c in conditions if c.startswith('finishing_')]
-                    if finishing_conditions and enemy['hp'] > 0:  # Only check if enemy still alive
+                    if finishing_conditions and target_hp_left > 0:  # Only check if enemy still alive
                         threshold = int(finishing_conditions[0].split('_')[1])
-                        if enemy['hp'] <= threshold:
+                        if target_hp_left <= threshold:
                             if log_file:
-                                log_file.write(f"     FINISHING BLOW! Enemy {target_idx+1} at {enemy['hp']} HP (<={threshold}) - DEFEATED!\n")
-                            enemy['hp'] = 0  # Enemy is defeated
+                                log_file.write(f"     FINISHING BLOW! Enemy {target_idx+1} at {target_hp_left} HP (<={threshold}) - DEFEATED!\n")
+                            enemies.kill(target_idx)  # Enemy is defeated
 
                     # Check for culling strike after damage is applied
-                    if 'culling_strike' in conditions and enemy['hp'] > 0:  # Only check if enemy still alive
-                        culling_threshold = enemy['max_hp'] // 5  # 1/5 of maximum HP
-                        if enemy['hp'] <= culling_threshold:
+                    if 'culling_strike' in conditions and enemies.hp[target_idx] > 0:  # Only check if enemy still alive
+                        culling_threshold = enemies.max_hp[target_idx] // 5  # 1/5 of maximum HP
+                        if enemies.hp[target_idx] <= culling_threshold:
                             if log_file:
-                                log_file.write(f"     CULLING STRIKE! Enemy {target_idx+1} at {enemy['hp']} HP (<={culling_threshold}, 1/5 of {enemy['max_hp']}) - DEFEATED!\n")
-                            enemy['hp'] = 0  # Enemy is defeated
+                                log_file.write(f"     CULLING STRIKE! Enemy {target_idx+1} at {enemies.hp[target_idx]} HP (<={culling_threshold}, 1/5 of {enemies.max_hp[target_idx]}) - DEFEATED!\n")
+                            enemies.kill(target_idx)  # Enemy is defeated
 
                     # Apply conditions to this enemy
                     if 'bleed' in conditions:
-                        old_bleed_count = len(enemy['bleed_stacks'])
                         bleed_damage = max(0, damage - attacker.tier)  # Reduce by tier
-                        enemy['bleed_stacks'] = [(bleed_damage, 1)]  # Same damage for 1 more turn
+                        old_bleed_count = enemies.apply_bleed(target_idx, bleed_damage, 1)  # Same damage for 1 more turn
                         if log_file:
                             log_file.write(f"     BLEED APPLIED to Enemy {target_idx+1}: {bleed_damage} damage for 1 turn (reduced from {damage} by tier {attacker.tier})\n")
                             if old_bleed_count > 0:
@@ -494,20 +440,15 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                 # Check for splinter effects after all damage processing
                 splinter_attacks = 0
                 max_splinter_attacks = attacker.tier // 2 if attacker.tier % 2 == 0 else (attacker.tier + 1) // 2  # Tier/2 rounded up
-                enemies_defeated_this_attack = [i for i, enemy in enumerate(enemies) if enemy['hp'] <= 0 and enemy['max_hp'] > 0]
+                enemies_defeated_this_attack = {target_idx for target_idx, _, _ in attack_results
+                                                if enemies.hp[target_idx] <= 0}
 
                 for target_idx, damage, conditions in attack_results:
                     if 'splinter' in conditions and target_idx in enemies_defeated_this_attack and splinter_attacks < max_splinter_attacks:
                         # Find next alive enemy for splinter attack
-                        next_target = None
-                        next_target_idx = None
-                        for i, enemy in enumerate(enemies):
-                            if enemy['hp'] > 0 and i != target_idx:
-                                next_target = enemy
-                                next_target_idx = i
-                                break
-
-                        if next_target:
+                        next_target_idx = enemies.first_alive(exclude=target_idx)
+
+                        if next_target_idx is not None:
                             splinter_attacks += 1
                             if log_file:
                                 log_file.write(f"     SPLINTER! Enemy {target_idx+1} defeated, attacking Enemy {next_target_idx+1} (attack {splinter_attacks}/{max_splinter_attacks})\n")
@@ -517,14 +458,13 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                                                                               turn_number=turns, charge_history=charge_history, cooldown_history=cooldown_history,
                                                                               attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=combat_state,
                                                                               tier_bonus=tier_bonus)
-                            next_target['hp'] = max(0, next_target['hp'] - splinter_damage)
+                            enemies.damage(next_target_idx, splinter_damage)
                             total_damage_dealt += splinter_damage
 
                             # Apply splinter attack conditions
                             if 'bleed' in splinter_conditions:
-                                old_bleed_count = len(next_target['bleed_stacks'])
                                 bleed_damage = max(0, splinter_damage - attacker.tier)
-                                next_target['bleed_stacks'] = [(bleed_damage, 1)]
+                                enemies.apply_bleed(next_target_idx, bleed_damage, 1)
                                 if log_file:
                                     log_file.write(f"     BLEED APPLIED to Enemy {next_target_idx+1}: {bleed_damage} damage for 1 turn\n")
 
@@ -536,22 +476,16 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
 
         else:
             # Single target attack - target first alive enemy
-            target_enemy = None
-            target_idx = None
-            for i, enemy in enumerate(enemies):
-                if enemy['hp'] > 0:
-                    target_enemy = enemy
-                    target_idx = i
-                    break
+            target_idx = enemies.first_alive()
 
-            if target_enemy:
+            if target_idx is not None:
                 if log_file:
                     log_file.write(f"  Single target attack on Enemy {target_idx+1}\n")
 
                 damage, conditions, _ = make_attack(attacker, defender, active_build, log_file=log_file,
                                                 turn_number=turns, charge_history=charge_history, cooldown_history=cooldown_history,
                                                 attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=combat_state,
-                                                enemy_max_hp=target_enemy['max_hp'], tier_bonus=tier_bonus)
+                                                enemy_max_hp=enemies.max_hp[target_idx], tier_bonus=tier_bonus)
 
                 # Check if we got a charge condition instead of doing damage
                 if damage == 0 and 'charge' in conditions:
@@ -578,9 +512,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                         if log_file:
                             log_file.write(f"  Limit failed (passive) - taking EMPOWER ACTION (+Tier to next damage roll)\n")
                         # Set empower flag in combat_state
-                        if 'empower_bonus' not in combat_state:
-                            combat_state['empower_bonus'] = 0
-                        combat_state['empower_bonus'] += attacker.tier
+                        combat_state.empower_bonus += attacker.tier
                         # No attack this turn - just empower
                         damage = 0
                         conditions = []
@@ -594,52 +526,51 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                         damage, conditions, _ = make_attack(attacker, defender, basic_build, log_file=log_file,
                                                         turn_number=turns, charge_history=charge_history, cooldown_history=cooldown_history,
                                                     attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=combat_state,
-                                                    enemy_max_hp=target_enemy['max_hp'], tier_bonus=tier_bonus)
+                                                    enemy_max_hp=enemies.max_hp[target_idx], tier_bonus=tier_bonus)
                     # Apply damage from basic attack
-                    target_enemy['hp'] = max(0, target_enemy['hp'] - damage)
+                    target_hp_left = enemies.damage(target_idx, damage)
                     total_damage_dealt = damage
                     if log_file:
                         log_file.write(f"\n  BASIC ATTACK RESULT:\n")
                         log_file.write(f"    Damage dealt to Enemy {target_idx+1}: {damage}\n")
-                        log_file.write(f"    Enemy {target_idx+1} HP: {target_enemy['hp'] + damage} -> {target_enemy['hp']}\n")
-                    if target_enemy['hp'] <= 0:
-                        target_enemy['defeated_this_turn'] = True
-                        combat_state['defeated_enemy_this_turn'] = True  # Activate slaughter for subsequent attacks
+                        log_file.write(f"    Enemy {target_idx+1} HP: {target_hp_left + damage} -> {target_hp_left}\n")
+                    if target_hp_left <= 0:
+                        fallback_defeat = True
+                        combat_state.defeated_enemy_this_turn = True  # Activate slaughter for subsequent attacks
                 else:
                     # Normal attack case - check if channeled was used
                     if 'channeled' in active_build.upgrades:
                         made_channeled_attack_this_turn = True
 
-                    target_enemy['hp'] = max(0, target_enemy['hp'] - damage)
+                    target_hp_left = enemies.damage(target_idx, damage)
                     total_damage_dealt = damage
 
                     if log_file:
                         log_file.write(f"\n  ATTACK RESULT:\n")
                         log_file.write(f"    Damage dealt to Enemy {target_idx+1}: {damage}\n")
-                        log_file.write(f"    Enemy {target_idx+1} HP: {target_enemy['hp'] + damage} -> {target_enemy['hp']}\n")
+                        log_file.write(f"    Enemy {target_idx+1} HP: {target_hp_left + damage} -> {target_hp_left}\n")
 
                     # Check for finishing blow after damage is applied
                     finishing_conditions = [c for c in conditions if c.startswith('finishing_')]
-                    if finishing_conditions and target_enemy['hp'] > 0:  # Only check if enemy still alive
+                    if finishing_conditions and target_hp_left > 0:  # Only check if enemy still alive
                         threshold = int(finishing_conditions[0].split('_')[1])
-                        if target_enemy['hp'] <= threshold:
+                        if target_hp_left <= threshold:
                             if log_file:
-                                log_file.write(f"     FINISHING BLOW! Enemy {target_idx+1} at {target_enemy['hp']} HP (<={threshold}) - DEFEATED!\n")
-                            target_enemy['hp'] = 0  # Enemy is defeated
+                                log_file.write(f"     FINISHING BLOW! Enemy {target_idx+1} at {target_hp_left} HP (<={threshold}) - DEFEATED!\n")
+                            enemies.kill(target_idx)  # Enemy is defeated
 
                     # Check for culling strike after damage is applied
-                    if 'culling_strike' in conditions and target_enemy['hp'] > 0:  # Only check if enemy still alive
-                        culling_threshold = target_enemy['max_hp'] // 5  # 1/5 of maximum HP
-                        if target_enemy['hp'] <= culling_threshold:
+                    if 'culling_strike' in conditions and enemies.hp[target_idx] > 0:  # Only check if enemy still alive
+                        culling_threshold = enemies.max_hp[target_idx] // 5  # 1/5 of maximum HP
+                        if enemies.hp[target_idx] <= culling_threshold:
                             if log_file:
-                                log_file.write(f"     CULLING STRIKE! Enemy {target_idx+1} at {target_enemy['hp']} HP (<={culling_threshold}, 1/5 of {target_enemy['max_hp']}) - DEFEATED!\n")
-                            target_enemy['hp'] = 0  # Enemy is defeated
+                                log_file.write(f"     CULLING STRIKE! Enemy {target_idx+1} at {enemies.hp[target_idx]} HP (<={culling_threshold}, 1/5 of {enemies.max_hp[target_idx]}) - DEFEATED!\n")
+                            enemies.kill(target_idx)  # Enemy is defeated
 
                     # Apply conditions to target
                     if 'bleed' in conditions:
-                        old_bleed_count = len(target_enemy['bleed_stacks'])
                         bleed_damage = max(0, damage - attacker.tier)  # Reduce by tier
-                        target_enemy['bleed_stacks'] = [(bleed_damage, 1)]  # Same damage for 1 more turn
+                        old_bleed_count = enemies.apply_bleed(target_idx, bleed_damage, 1)  # Same damage for 1 more turn
                         if log_file:
                             log_file.write(f"     BLEED APPLIED to Enemy {target_idx+1}: {bleed_damage} damage for 1 turn (reduced from {damage} by tier {attacker.tier})\n")
                             if old_bleed_count > 0:
@@ -647,62 +578,53 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
 
                     # Check for explosive critical - splash to all other enemies in range
                     if 'explosive_critical' in conditions:
-                        explosive_targets = []
-                        for i, enemy in enumerate(enemies):
-                            if i != target_idx and enemy['hp'] > 0:
-                                explosive_targets.append((i, enemy))
+                        explosive_targets = [i for i in enemies.alive if i != target_idx]
 
                         if explosive_targets:
                             if log_file:
                                 log_file.write(f"     EXPLOSIVE CRITICAL! Splashing to {len(explosive_targets)} other enemies:\n")
 
-                            for splash_idx, splash_enemy in explosive_targets:
+                            for splash_idx in explosive_targets:
                                 # Make splash attack against this enemy
                                 splash_damage, splash_conditions, _ = make_attack(
                                     attacker, defender, active_build, log_file=log_file,
                                     turn_number=turns, charge_history=charge_history,
                                     cooldown_history=cooldown_history,
                                     attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp,
-                                    combat_state=combat_state, enemy_max_hp=splash_enemy['max_hp'],
+                                    combat_state=combat_state, enemy_max_hp=enemies.max_hp[splash_idx],
                                     tier_bonus=tier_bonus
                                 )
 
-                                splash_enemy['hp'] = max(0, splash_enemy['hp'] - splash_damage)
+                                splash_hp_left = enemies.damage(splash_idx, splash_damage)
                                 total_damage_dealt += splash_damage
 
                                 if log_file:
-                                    log_file.write(f"       Enemy {splash_idx+1}: {splash_damage} damage (HP: {splash_enemy['hp'] + splash_damage} -> {splash_enemy['hp']})\n")
+                                    log_file.write(f"       Enemy {splash_idx+1}: {splash_damage} damage (HP: {splash_hp_left + splash_damage} -> {splash_hp_left})\n")
 
                                 # Apply splash attack conditions (bleed, culling strike, etc.)
                                 if 'bleed' in splash_conditions:
                                     bleed_damage = max(0, splash_damage - attacker.tier)
-                                    splash_enemy['bleed_stacks'] = [(bleed_damage, 1)]
+                                    enemies.apply_bleed(splash_idx, bleed_damage, 1)
                                     if log_file:
                                         log_file.write(f"        BLEED APPLIED: {bleed_damage} damage for 1 turn\n")
 
-                                if 'culling_strike' in splash_conditions and splash_enemy['hp'] > 0:
-                                    culling_threshold = splash_enemy['max_hp'] // 5
-                                    if splash_enemy['hp'] <= culling_threshold:
-                                        splash_enemy['hp'] = 0
+                                if 'culling_strike' in splash_conditions and splash_hp_left > 0:
+                                    culling_threshold = enemies.max_hp[splash_idx] // 5
+                                    if splash_hp_left <= culling_threshold:
+                                        enemies.kill(splash_idx)
                                         if log_file:
                                             log_file.write(f"        CULLING STRIKE! Enemy defeated\n")
 
                     # Check for splinter effects if target was defeated
-                    if 'splinter' in conditions and target_enemy['hp'] <= 0:
+                    if 'splinter' in conditions and enemies.hp[target_idx] <= 0:
                         splinter_attacks = 0
                         max_splinter_attacks = attacker.tier // 2 if attacker.tier % 2 == 0 else (attacker.tier + 1) // 2  # Tier/2 rounded up
 
                         while splinter_attacks < max_splinter_attacks:
                             # Find next alive enemy for splinter attack
-                            next_target = None
-                            next_target_idx = None
-                            for i, enemy in enumerate(enemies):
-                                if enemy['hp'] > 0:
-                                    next_target = enemy
-                                    next_target_idx = i
-                                    break
-
-                            if not next_target:
+                            next_target_idx = enemies.first_alive()
+
+                            if next_target_idx is None:
                                 break  # No more alive enemies
 
                             splinter_attacks += 1
@@ -714,19 +636,18 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                                                                               turn_number=turns, charge_history=charge_history, cooldown_history=cooldown_history,
                                                                               attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp, combat_state=combat_state,
                                                                               tier_bonus=tier_bonus)
-                            next_target['hp'] = max(0, next_target['hp'] - splinter_damage)
+                            next_hp_left = enemies.damage(next_target_idx, splinter_damage)
                             total_damage_dealt += splinter_damage
 
                             # Apply splinter attack conditions
                             if 'bleed' in splinter_conditions:
-                                old_bleed_count = len(next_target['bleed_stacks'])
                                 bleed_damage = max(0, splinter_damage - attacker.tier)
-                                next_target['bleed_stacks'] = [(bleed_damage, 1)]
+                                enemies.apply_bleed(next_target_idx, bleed_damage, 1)
                                 if log_file:
                                     log_file.write(f"     BLEED APPLIED to Enemy {next_target_idx+1}: {bleed_damage} damage for 1 turn\n")
 
                             # Check if this splinter attack also defeated an enemy (recursive splinter)
-                            if next_target['hp'] <= 0:
+                            if next_hp_left <= 0:
                                 if log_file:
                                     log_file.write(f"     Splinter attack defeated Enemy {next_target_idx+1}!\n")
                                 # Continue the loop to potentially trigger more splinter attacks
@@ -744,7 +665,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
         attacks_made = 0  # Initialize before conditional block
         defender_hits = 0  # Initialize before conditional block
 
-        if any(enemy['hp'] > 0 for enemy in enemies):
+        if enemies.alive_count:
             if log_file:
                 log_file.write(f"\nDEFENDER ATTACK PHASE:\n")
 
@@ -753,7 +674,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
             defender_build = AttackBuild('ranged', [], [])
 
             # Count alive enemies and scale attacks based on enemy count
-            alive_enemies_count = sum(1 for enemy in enemies if enemy['hp'] > 0)
+            alive_enemies_count = enemies.alive_count
 
             # Scale attacks based on number of alive enemies:
             # 1 enemy: 1 attack, 2 enemies: 2 attacks, 3+ enemies: 3 attacks
@@ -764,10 +685,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
             else:
                 max_attacks_per_turn = min(3, alive_enemies_count)
 
-            for i, enemy in enumerate(enemies):
-                if enemy['hp'] <= 0:
-                    continue  # Dead enemies don't attack
-
+            for i in enemies.alive:  # Dead enemies don't attack
                 # Limit to 1 attack per turn when there are multiple enemies
                 if attacks_made >= max_attacks_per_turn:
                     if log_file and alive_enemies_count > max_attacks_per_turn:
@@ -785,7 +703,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                     mobility=defender.mobility,
                     endurance=defender.endurance,
                     tier=defender.tier,
-                    max_hp=enemy['max_hp']
+                    max_hp=enemies.max_hp[i]
                 )
 
                 # Make the attack (enemy attacking player, so pass player's max_hp)
@@ -813,81 +731,81 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
                 log_file.write(f"  Total defender damage this turn: {total_defender_damage}\n")
 
         # Apply HP costs and recovery from combat_state
-        if combat_state.get('attrition_cost', 0) > 0:
-            attacker_hp -= combat_state['attrition_cost']
+        if combat_state.attrition_cost > 0:
+            attacker_hp -= combat_state.attrition_cost
             if log_file:
-                log_file.write(f"\n  Attrition cost: -{combat_state['attrition_cost']} HP\n")
-                log_file.write(f"  Attacker HP: {attacker_hp + combat_state['attrition_cost']} -> {attacker_hp}\n")
-            combat_state['attrition_cost'] = 0
+                log_file.write(f"\n  Attrition cost: -{combat_state.attrition_cost} HP\n")
+                log_file.write(f"  Attacker HP: {attacker_hp + combat_state.attrition_cost} -> {attacker_hp}\n")
+            combat_state.attrition_cost = 0
 
-        if combat_state.get('leech_hp', 0) > 0:
-            attacker_hp = min(attacker_hp + combat_state['leech_hp'], attacker_max_hp)
+        if combat_state.leech_hp > 0:
+            attacker_hp = min(attacker_hp + combat_state.leech_hp, attacker_max_hp)
             if log_file:
-                log_file.write(f"\n  Leech recovery: +{combat_state['leech_hp']} HP (capped at max)\n")
-                log_file.write(f"  Attacker HP: {attacker_hp - combat_state['leech_hp']} -> {attacker_hp}\n")
-            combat_state['leech_hp'] = 0
+                log_file.write(f"\n  Leech recovery: +{combat_state.leech_hp} HP (capped at max)\n")
+                log_file.write(f"  Attacker HP: {attacker_hp - combat_state.leech_hp} -> {attacker_hp}\n")
+            combat_state.leech_hp = 0
 
         # Update combat state for next turn (track what happened this turn)
         # Reset "last turn" trackers
-        combat_state['defeated_enemy_last_turn'] = any(enemy['hp'] <= 0 and enemy.get('defeated_this_turn', False) for enemy in enemies)
-        combat_state['dealt_damage_last_turn'] = total_damage_dealt > 0 and not charged_this_turn
+        combat_state.defeated_enemy_last_turn = fallback_defeat
+        combat_state.dealt_damage_last_turn = total_damage_dealt > 0 and not charged_this_turn
 
         # Clear empower bonus if it wasn't used this turn (expires if not used on next turn)
-        if 'empower_bonus' in combat_state and combat_state['empower_bonus'] > 0:
+        if combat_state.empower_bonus > 0:
             if log_file:
-                log_file.write(f"  Empower bonus expired (not used this turn): {combat_state['empower_bonus']}\n")
-            combat_state['empower_bonus'] = 0
+                log_file.write(f"  Empower bonus expired (not used this turn): {combat_state.empower_bonus}\n")
+            combat_state.empower_bonus = 0
 
         # Track if same target was hit (simplified: single target attacks only)
         current_target = None
         if not is_aoe and target_idx is not None:
             current_target = target_idx
-        combat_state['hit_same_target_last_turn'] = (current_target is not None and
-                                                      current_target == combat_state.get('last_target_hit'))
-        combat_state['last_target_hit'] = current_target
+        combat_state.hit_same_target_last_turn = (current_target is not None and
+                                                      current_target == combat_state.last_target_hit)
+        combat_state.last_target_hit = current_target
 
         # Defender attack tracking - properly distinguish between miss, hit-no-damage, and hit-with-damage
         if attacks_made > 0:
             # Enemies attempted attacks
-            combat_state['was_attacked_last_turn'] = True
+            combat_state.was_attacked_last_turn = True
 
             if defender_hits > 0:
                 # At least one attack hit
-                combat_state['was_hit_last_turn'] = True
-                combat_state['all_attacks_missed_last_turn'] = False
+                combat_state.was_hit_last_turn = True
+                combat_state.all_attacks_missed_last_turn = False
 
                 if total_defender_damage > 0:
                     # Hit and dealt damage
-                    combat_state['was_damaged_last_turn'] = True
-                    combat_state['was_hit_no_damage_last_turn'] = False
+                    combat_state.was_damaged_last_turn = True
+                    combat_state.was_hit_no_damage_last_turn = False
                 else:
                     # Hit but dealt no damage (durability absorbed all damage)
-                    combat_state['was_damaged_last_turn'] = False
-                    combat_state['was_hit_no_damage_last_turn'] = True  # FIX: This is the key change!
+                    combat_state.was_damaged_last_turn = False
+                    combat_state.was_hit_no_damage_last_turn = True  # FIX: This is the key change!
             else:
                 # All attacks missed
-                combat_state['was_hit_last_turn'] = False
-                combat_state['was_damaged_last_turn'] = False
-                combat_state['all_attacks_missed_last_turn'] = True
-                combat_state['was_hit_no_damage_last_turn'] = False
+                combat_state.was_hit_last_turn = False
+                combat_state.was_damaged_last_turn = False
+                combat_state.all_attacks_missed_last_turn = True
+                combat_state.was_hit_no_damage_last_turn = False
         else:
             # No enemies alive to attack
-            combat_state['was_attacked_last_turn'] = False
-            combat_state['was_hit_last_turn'] = False
-            combat_state['was_damaged_last_turn'] = False
-            combat_state['all_attacks_missed_last_turn'] = False
-            combat_state['was_hit_no_damage_last_turn'] = False
+            combat_state.was_attacked_last_turn = False
+            combat_state.was_hit_last_turn = False
+            combat_state.was_damaged_last_turn = False
+            combat_state.all_attacks_missed_last_turn = False
+            combat_state.was_hit_no_damage_last_turn = False
 
         # Increment channeled turns only if channeled attack was actually made this turn
         # (not if we fell back to basic attack or did nothing due to focused archetype)
         if made_channeled_attack_this_turn:
-            combat_state['channeled_turns'] += 1
+            combat_state.channeled_turns += 1
         else:
-            combat_state['channeled_turns'] = 0
+            combat_state.channeled_turns = 0
 
         if log_file:
             log_file.write(f"\nTURN {turns} SUMMARY:\n")
-            total_bleed_damage = sum(sum(bleed_dmg for bleed_dmg, _ in enemy['bleed_stacks']) for enemy in enemies)
+            total_bleed_damage = enemies.pending_bleed()
             total_attack_damage = total_damage_dealt
             if charged_this_turn:
                 log_file.write(f"  Action taken: CHARGED UP\n")
@@ -895,16 +813,15 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
             log_file.write(f"  Total attack damage: {total_attack_damage}\n")
             log_file.write(f"  Total damage this turn: {total_bleed_damage + total_attack_damage}\n")
 
-            alive_count = sum(1 for enemy in enemies if enemy['hp'] > 0)
-            log_file.write(f"  Enemies remaining: {alive_count}/{num_enemies}\n")
+            log_file.write(f"  Enemies remaining: {enemies.alive_count}/{num_enemies}\n")
 
-            for i, enemy in enumerate(enemies):
-                if enemy['hp'] <= 0 and enemy['max_hp'] > 0:  # Recently killed
+            for i in range(num_enemies):
+                if enemies.hp[i] <= 0 and not defeat_logged[i]:  # Recently killed
                     log_file.write(f"   Enemy {i+1} DEFEATED!\n")
-                    enemy['max_hp'] = 0  # Mark as logged
+                    defeat_logged[i] = True
 
     # Determine combat outcome (only win or timeout - attacker can go negative)
-    if all(enemy['hp'] <= 0 for enemy in enemies):
+    if not enemies.alive_count:
         outcome = "win"
         if log_file:
             log_file.write(f"\nCombat ended in {turns} turns\n")
@@ -922,8 +839,7 @@ def simulate_combat_verbose(attacker: Character, build: AttackBuild, target_hp:
             if attacker_hp <= 0:
                 log_file.write(f" (went negative)")
             log_file.write(f"\n")
-            alive_count = sum(1 for enemy in enemies if enemy['hp'] > 0)
-            log_file.write(f"Enemies remaining: {alive_count}/{num_enemies}\n")
+            log_file.write(f"Enemies remaining: {enemies.alive_count}/{num_enemies}\n")
             log_file.write("="*50 + "\n")
 
     return turns, outcome
@@ -956,20 +872,22 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
             - fallback_activations: Number of turns fallback build was used
             - activation_percentage: % of turns primary build was active
     """
-    from src.combat import can_activate_limit, make_attack, make_aoe_attack
+    from src.combat import can_activate_build, make_attack, make_aoe_attack
+
+    # Combat logs are rendered from trace events (None keeps every attack on the untraced path)
+    log_file = as_tracer(log_file)
 
     # Use provided defender or create dummy defender
     if defender is None:
         defender = Character(focus=0, power=0, mobility=3, endurance=0, tier=attacker.tier)
 
     # Initialize enemies - support both homogeneous and mixed HP groups
-    if enemy_hp_list is not None:
-        enemies = [{'hp': hp, 'max_hp': hp, 'bleed_stacks': []} for hp in enemy_hp_list]
-        num_enemies = len(enemy_hp_list)
-    else:
-        if enemy_hp is None:
-            enemy_hp = target_hp
-        enemies = [{'hp': enemy_hp, 'max_hp': enemy_hp, 'bleed_stacks': []} for _ in range(num_enemies)]
+    if enemy_hp_list is None and enemy_hp is None:
+        enemy_hp = target_hp
+    enemies = EnemyGroup.from_scenario(num_enemies, enemy_hp, enemy_hp_list)
+
+    # Limit checks for build switching use the compiled form of the primary build
+    primary_compiled = primary_build.compiled
 
     # Track attacker HP
     attacker_hp = attacker.max_hp
@@ -980,71 +898,30 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
     cooldown_history = {}
 
     # Initialize combat state
-    combat_state = {
-        'last_target_hit': None,
-        'defeated_enemy_last_turn': False,
-        'defeated_enemy_this_turn': False,  # Track if any enemy defeated this turn (for slaughter)
-        'dealt_damage_last_turn': False,
-        'was_hit_last_turn': False,
-        'was_damaged_last_turn': False,
-        'all_attacks_missed_last_turn': False,
-        'was_hit_no_damage_last_turn': False,
-        'was_attacked_last_turn': False,
-        'channeled_turns': 0,
-        'charges_used': {},
-        'leech_hp': 0,
-        'attrition_cost': 0,
-        'hit_same_target_last_turn': False,
-    }
+    combat_state = CombatState()
 
     # Track activation stats
     primary_activations = 0
     fallback_activations = 0
 
-    while any(enemy['hp'] > 0 for enemy in enemies) and turns < max_turns:
+    while enemies.alive_count and turns < max_turns:
         turns += 1
 
+        # Every defeat this turn (bleed, attack) feeds defeated_enemy_last_turn
+        alive_at_turn_start = enemies.alive_count
+
         # Apply bleed damage to all enemies
-        enemies_killed_by_bleed = []
-        for i, enemy in enumerate(enemies):
-            if enemy['hp'] <= 0:
-                continue
-
-            bleed_stacks = enemy['bleed_stacks']
-            if not bleed_stacks:
-                continue
-
-            total_bleed_damage = 0
-            active_bleeds = 0
-
-            for j in range(len(bleed_stacks)):
-                bleed_damage, turns_left = bleed_stacks[j]
-                if turns_left > 0:
-                    total_bleed_damage += bleed_damage
-                    bleed_stacks[active_bleeds] = (bleed_damage, turns_left - 1)
-                    active_bleeds += 1
-
-            # Remove expired bleeds
-            del bleed_stacks[active_bleeds:]
-
-            enemy['hp'] = max(0, enemy['hp'] - total_bleed_damage)
-            if enemy['hp'] <= 0:
-                enemies_killed_by_bleed.append(i)
-                enemy['defeated_this_turn'] = True
-                combat_state['defeated_enemy_this_turn'] = True  # Activate slaughter for subsequent attacks
+        enemies.tick_bleed()
+        if enemies.alive_count < alive_at_turn_start:
+            combat_state.defeated_enemy_this_turn = True  # Activate slaughter for subsequent attacks
 
         # DECIDE WHICH BUILD TO USE THIS TURN
         can_use_primary = True
 
-        # Check each limit in primary build
-        for limit_name in primary_build.limits:
-            if not can_activate_limit(limit_name, turns, attacker_hp, attacker_max_hp,
-                                     combat_state, charge_history, cooldown_history):
-                # For charge_up limits, we still want to use primary build (it will charge)
-                # For other limits, use fallback
-                if limit_name not in ['charge_up', 'charge_up_2']:
-                    can_use_primary = False
-                    break
+        # Check each limit in primary build (charge_up limits still use the primary build to charge)
+        if not can_activate_build(primary_compiled, turns, attacker_hp, attacker_max_hp,
+                                  combat_state, charge_history, cooldown_history):
+            can_use_primary = False
 
         # Select the build to use this turn
         if can_use_primary:
@@ -1062,8 +939,8 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
 
         if is_aoe:
             # AOE attack - hit all alive enemies
-            # Build targets list: (index, enemy_dict) for alive enemies
-            alive_enemies = [(i, enemy) for i, enemy in enumerate(enemies) if enemy['hp'] > 0]
+            # Build targets list: (index, max_hp) for alive enemies
+            alive_enemies = enemies.targets()
 
             # Use the AOE attack function for proper shared damage rolls
             attack_results, total_damage_dealt = make_aoe_attack(
@@ -1074,27 +951,20 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
 
             # Process results
             for target_idx, damage, conditions in attack_results:
-                enemy = enemies[target_idx]
-                enemy['hp'] = max(0, enemy['hp'] - damage)
+                target_hp_left = enemies.damage(target_idx, damage)
 
                 # Apply bleed
                 if 'bleed' in conditions:
                     bleed_damage = max(0, damage - attacker.tier)
-                    enemy['bleed_stacks'] = [(bleed_damage, 2)]
+                    enemies.apply_bleed(target_idx, bleed_damage, 2)
 
-                if enemy['hp'] <= 0:
-                    enemy['defeated_this_turn'] = True
-                    combat_state['defeated_enemy_this_turn'] = True  # Activate slaughter for subsequent attacks
+                if target_hp_left <= 0:
+                    combat_state.defeated_enemy_this_turn = True  # Activate slaughter for subsequent attacks
         else:
             # Single target attack
-            target_enemy = None
-            for i, enemy in enumerate(enemies):
-                if enemy['hp'] > 0:
-                    target_enemy = enemy
-                    target_idx = i
-                    break
+            target_idx = enemies.first_alive()
 
-            if target_enemy:
+            if target_idx is not None:
                 damage, conditions, _ = make_attack(attacker, defender, active_build,
                                                 turn_number=turns,
                                                 charge_history=charge_history,
@@ -1107,17 +977,16 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
                 if damage == 0 and 'charge' in conditions:
                     charged_this_turn = True
                 else:
-                    target_enemy['hp'] = max(0, target_enemy['hp'] - damage)
+                    target_hp_left = enemies.damage(target_idx, damage)
                     total_damage_dealt = damage
 
                     # Apply bleed
                     if 'bleed' in conditions:
                         bleed_damage = max(0, damage - attacker.tier)
-                        target_enemy['bleed_stacks'] = [(bleed_damage, 2)]
+                        enemies.apply_bleed(target_idx, bleed_damage, 2)
 
-                    if target_enemy['hp'] <= 0:
-                        target_enemy['defeated_this_turn'] = True
-                        combat_state['defeated_enemy_this_turn'] = True  # Activate slaughter for subsequent attacks
+                    if target_hp_left <= 0:
+                        combat_state.defeated_enemy_this_turn = True  # Activate slaughter for subsequent attacks
 
         # Update charge history
         charge_history.append(charged_this_turn)
@@ -1129,12 +998,12 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
         attacks_made = 0  # Initialize before conditional block
         defender_hits = 0  # Initialize before conditional block
 
-        if any(enemy['hp'] > 0 for enemy in enemies):
+        if enemies.alive_count:
             from src.models import AttackBuild as AB
             defender_build = AB('ranged', [], [])
 
             # Count alive enemies and scale attacks based on enemy count
-            alive_enemies_count = sum(1 for enemy in enemies if enemy['hp'] > 0)
+            alive_enemies_count = enemies.alive_count
 
             # Scale attacks based on number of alive enemies:
             # 1 enemy: 1 attack, 2 enemies: 2 attacks, 3+ enemies: 3 attacks
@@ -1145,10 +1014,7 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
             else:
                 max_attacks_per_turn = min(3, alive_enemies_count)
 
-            for i, enemy in enumerate(enemies):
-                if enemy['hp'] <= 0:
-                    continue
-
+            for i in enemies.alive:
                 # Limit to 1 attack per turn when there are multiple enemies
                 if attacks_made >= max_attacks_per_turn:
                     break
@@ -1159,7 +1025,7 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
                     mobility=defender.mobility,
                     endurance=defender.endurance,
                     tier=defender.tier,
-                    max_hp=enemy['max_hp']
+                    max_hp=enemies.max_hp[i]
                 )
 
                 damage, _, did_hit = make_attack(enemy_attacker, attacker, defender_build,
@@ -1172,71 +1038,66 @@ def simulate_combat_with_fallback(attacker: Character, primary_build: AttackBuil
                 attacks_made += 1
 
         # Apply HP costs and recovery
-        if combat_state.get('attrition_cost', 0) > 0:
-            attacker_hp -= combat_state['attrition_cost']
-            combat_state['attrition_cost'] = 0
+        if combat_state.attrition_cost > 0:
+            attacker_hp -= combat_state.attrition_cost
+            combat_state.attrition_cost = 0
 
-        if combat_state.get('leech_hp', 0) > 0:
-            attacker_hp = min(attacker_hp + combat_state['leech_hp'], attacker_max_hp)
-            combat_state['leech_hp'] = 0
+        if combat_state.leech_hp > 0:
+            attacker_hp = min(attacker_hp + combat_state.leech_hp, attacker_max_hp)
+            combat_state.leech_hp = 0
 
         # Update combat state for next turn
-        combat_state['defeated_enemy_last_turn'] = any(enemy.get('defeated_this_turn', False) for enemy in enemies)
-        combat_state['dealt_damage_last_turn'] = total_damage_dealt > 0 and not charged_this_turn
+        combat_state.defeated_enemy_last_turn = enemies.alive_count < alive_at_turn_start
+        combat_state.dealt_damage_last_turn = total_damage_dealt > 0 and not charged_this_turn
 
         # Clear empower bonus if it wasn't used this turn (expires if not used on next turn)
-        if 'empower_bonus' in combat_state and combat_state['empower_bonus'] > 0:
+        if combat_state.empower_bonus > 0:
             if log_file:
-                log_file.write(f"  Empower bonus expired (not used this turn): {combat_state['empower_bonus']}\n")
-            combat_state['empower_bonus'] = 0
+                log_file.write(f"  Empower bonus expired (not used this turn): {combat_state.empower_bonus}\n")
+            combat_state.empower_bonus = 0
 
         # Track target hits
         current_target = None
         if not is_aoe and target_idx is not None:
             current_target = target_idx
-        combat_state['hit_same_target_last_turn'] = (current_target is not None and
-                                                      current_target == combat_state.get('last_target_hit'))
-        combat_state['last_target_hit'] = current_target
+        combat_state.hit_same_target_last_turn = (current_target is not None and
+                                                      current_target == combat_state.last_target_hit)
+        combat_state.last_target_hit = current_target
 
         # Defender attack tracking - properly distinguish between miss, hit-no-damage, and hit-with-damage
         if attacks_made > 0:
             # Enemies attempted attacks
-            combat_state['was_attacked_last_turn'] = True
+            combat_state.was_attacked_last_turn = True
 
             if defender_hits > 0:
                 # At least one attack hit
-                combat_state['was_hit_last_turn'] = True
-                combat_state['all_attacks_missed_last_turn'] = False
+                combat_state.was_hit_last_turn = True
+                combat_state.all_attacks_missed_last_turn = False
 
                 if total_defender_damage > 0:
                     # Hit and dealt damage
-                    combat_state['was_damaged_last_turn'] = True
-                    combat_state['was_hit_no_damage_last_turn'] = False
+                    combat_state.was_damaged_last_turn = True
+                    combat_state.was_hit_no_damage_last_turn = False
                 else:
                     # Hit but dealt no damage (durability absorbed all damage)
-                    combat_state['was_damaged_last_turn'] = False
-                    combat_state['was_hit_no_damage_last_turn'] = True  # FIX: This is the key change!
+                    combat_state.was_damaged_last_turn = False
+                    combat_state.was_hit_no_damage_last_turn = True  # FIX: This is the key change!
             else:
                 # All attacks missed
-                combat_state['was_hit_last_turn'] = False
-                combat_state['was_damaged_last_turn'] = False
-                combat_state['all_attacks_missed_last_turn'] = True
-                combat_state['was_hit_no_damage_last_turn'] = False
+                combat_state.was_hit_last_turn = False
+                combat_state.was_damaged_last_turn = False
+                combat_state.all_attacks_missed_last_turn = True
+                combat_state.was_hit_no_damage_last_turn = False
         else:
             # No enemies alive to attack
-            combat_state['was_attacked_last_turn'] = False
-            combat_state['was_hit_last_turn'] = False
-            combat_state['was_damaged_last_turn'] = False
-            combat_state['all_attacks_missed_last_turn'] = False
-            combat_state['was_hit_no_damage_last_turn'] = False
-
-        # Clear defeated_this_turn flags
-        for enemy in enemies:
-            if 'defeated_this_turn' in enemy:
-                del enemy['defeated_this_turn']
+            combat_state.was_attacked_last_turn = False
+            combat_state.was_hit_last_turn = False
+            combat_state.was_damaged_last_turn = False
+            combat_state.all_attacks_missed_last_turn = False
+            combat_state.was_hit_no_damage_last_turn = False
 
     # Determine outcome
-    if all(enemy['hp'] <= 0 for enemy in enemies):
+    if not enemies.alive_count:
         outcome = "win"
     else:
         outcome = "timeout"
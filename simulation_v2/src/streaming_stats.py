@@ -0,0 +1,179 @@
+"""
+Constant-memory streaming summaries of result streams.
+
+Medians, percentiles and top lists used to need every result in memory and a
+full sort at the end of a run. These accumulators are updated one result at
+a time, as results arrive, and stay the same size however many results there
+are (V3 Stage 2 keeps its best pairs and an all-pairs sketch with them):
+- TopK: bounded heap of the k best (lowest key) items; ties keep the order
+  given (e.g. pair index), so it matches the first k of a stable sort
+- TDigest: merging t-digest quantile sketch. Centroids are small near the
+  tails and capped at about compression / 2 in total, so extreme percentiles
+  stay accurate; digests from several workers merge
+
+Quantiles are estimates (typically within 0.1% of the exact rank for
+compression 200); V2 reports use ReportIndex on the result columns, which is
+exact.
+
+Example:
+    top, turns = TopK(5000), TDigest()
+    for index, (pair, avg_turns) in enumerate(results):
+        top.push(avg_turns, pair, index)
+        turns.add(avg_turns)
+    print(turns.median(), turns.quantile(0.05), top.sorted()[:10])
+"""
+
+import heapq
+import math
+from typing import Iterable, List
+
+import numpy as np
+
+DEFAULT_COMPRESSION = 200
+
+
+class TopK:
+    """The k items with the lowest keys seen so far."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap = []  # (-key, -order, -sequence, item): the root is the worst item kept
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, key: float, item, order: float = None):
+        """
+        Offer an item.
+
+        Args:
+            key: Sort key (lower is better)
+            item: Item to keep
+            order: Tie-break between equal keys (lower wins); defaults to arrival order
+        """
+        self._sequence += 1
+        entry = (-key, -(self._sequence if order is None else order), -self._sequence, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:3] > self._heap[0][:3]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other: 'TopK') -> 'TopK':
+        """Add another TopK's items (with their keys and orders)"""
+        for key, order, _, item in other._heap:
+            self.push(-key, item, -order)
+        return self
+
+    def threshold(self) -> float:
+        """Key an item must beat to be kept (inf until k items are kept)"""
+        return -self._heap[0][0] if len(self._heap) == self.k else math.inf
+
+    def sorted(self) -> List:
+        """Items kept, best first"""
+        return [entry[3] for entry in sorted(self._heap, key=lambda entry: entry[:3], reverse=True)]
+
+
+class TDigest:
+    """
+    Merging t-digest of a stream of values.
+
+    Values are buffered and merged into the sorted centroids in one NumPy
+    pass when the buffer fills, using the arcsine scale function.
+    """
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._buffer = []
+        self._buffer_size = int(compression * 10)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self._buffer.append(value)
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Add another digest's values (as its centroids)"""
+        other._compress()
+        self._compress(other._means, other._weights)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _compress(self, extra_means=None, extra_weights=None):
+        """Merge buffered values (and extra centroids) into the centroids"""
+        if self._buffer:
+            means = np.concatenate((self._means, self._buffer))
+            weights = np.concatenate((self._weights, np.ones(len(self._buffer))))
+            self._buffer = []
+        elif extra_means is not None and len(extra_means):
+            means, weights = self._means, self._weights
+        else:
+            return
+        if extra_means is not None and len(extra_means):
+            means = np.concatenate((means, extra_means))
+            weights = np.concatenate((weights, extra_weights))
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total_weight = weights.sum()
+        # Each centroid spans at most one unit of k(q) = compression / (2 pi) * asin(2q - 1)
+        quantiles = (np.cumsum(weights) - weights / 2) / total_weight
+        scale = self.compression / (2 * math.pi) * np.arcsin(np.clip(2 * quantiles - 1, -1, 1))
+        groups = np.floor(scale - scale[0]).astype(np.int64)
+        group_weights = np.bincount(groups, weights=weights)
+        group_sums = np.bincount(groups, weights=means * weights)
+        used = group_weights > 0
+        self._weights = group_weights[used]
+        self._means = group_sums[used] / self._weights
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile (0..1), interpolated between centroid centers"""
+        self._compress()
+        if not self.count:
+            return math.nan
+        if len(self._means) == 1:
+            return float(self._means[0])
+        target = min(max(q, 0.0), 1.0) * self.count
+        centers = np.cumsum(self._weights) - self._weights / 2
+        if target <= centers[0]:
+            return self._interpolate(target, 0.0, centers[0], self.min, self._means[0])
+        if target >= centers[-1]:
+            return self._interpolate(target, centers[-1], self.count, self._means[-1], self.max)
+        right = int(np.searchsorted(centers, target, side='right'))
+        return self._interpolate(target, centers[right - 1], centers[right],
+                                 self._means[right - 1], self._means[right])
+
+    @staticmethod
+    def _interpolate(target, left, right, left_value, right_value) -> float:
+        if right <= left:
+            return float(right_value)
+        return float(left_value + (right_value - left_value) * (target - left) / (right - left))
+
+    def median(self) -> float:
+        return self.quantile(0.5)
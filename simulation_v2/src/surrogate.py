@@ -0,0 +1,430 @@
+"""
+Surrogate model that pre-screens AttackBuilds before full simulation.
+
+Most of the simulation budget goes to builds that end up in the bottom half.
+The surrogate simulates a seeded training sample, fits a model of log avg
+turns per scenario (one output per scenario) and predicts every other build
+in microseconds. Only the predicted top keep_fraction, plus a random
+exploration sample of the rest, goes on to full simulation. Two NumPy models:
+- "boosted" (default): gradient-boosted depth-3 regression trees with one leaf
+  vector per output. Turns are driven by which limits combine (an attack
+  whose limits rarely activate together never fires), which trees pick up
+  from a few hundred training builds
+- "ridge": closed-form ridge regression, cheaper but additive only
+
+Features per build:
+- attack type one-hot, upgrade and limit bits (game_data's compiled tables)
+- point cost and static accuracy/damage modifiers, limit damage bonus and DC
+- log exact expected damage (calculate_expected_damage) of the build without
+  its limits against every defender and target HP. Limits only add a damage
+  bonus and a DC check, which the limit bits capture, so the expectation is
+  cached per (attack type, upgrades) - a few thousand per budget instead of
+  one per build
+- a naive turns estimate per scenario: enemy HP over expected damage per turn
+
+Calibration:
+- holdout: part of the training sample is predicted by a model fit on the rest,
+  giving R^2, Spearman rank correlation and how often a true top build (top
+  top_fraction) would have been screened out
+- exploration: once the screened builds are simulated, the share of the
+  exploration sample that reaches the true top estimates how many top builds
+  the screen dropped
+
+Example:
+    encoder = FeatureEncoder(attacker, [defender], config.scenarios)
+    screen = SurrogateScreen(encoder, keep_fraction=0.3, explore_fraction=0.05, seed=1)
+    result = screen.run(builds, simulate_per_scenario)
+    to_test = [builds[i] for i in result.tested_indices]
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.models import AttackBuild, Character
+from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS, ATTACK_TYPE_IDS
+from src.damage_calculator import calculate_expected_damage
+from src.dominance import scenario_hp_list
+
+UPGRADE_NAMES = list(UPGRADES)
+LIMIT_NAMES = list(LIMITS)
+_UPGRADE_INDEX = {name: index for index, name in enumerate(UPGRADE_NAMES)}
+_LIMIT_INDEX = {name: index for index, name in enumerate(LIMIT_NAMES)}
+
+# Floor for expected damage and turns before taking logs
+MIN_EXPECTED_DAMAGE = 0.01
+MIN_TURNS = 0.01
+MAX_TURNS = 100
+
+
+class FeatureEncoder:
+    """Turns AttackBuilds into surrogate feature rows for fixed attacker, defenders and scenarios."""
+
+    def __init__(self, attacker: Character, defenders: Sequence[Character], scenarios: Sequence):
+        """
+        Args:
+            attacker: Attacking Character
+            defenders: Defender Characters (profiles) the builds face
+            scenarios: ScenarioConfig objects or V3 scenario dicts
+        """
+        self.attacker = attacker
+        self.defenders = list(defenders)
+        self.hp_lists = [scenario_hp_list(scenario) for scenario in scenarios]
+        self.target_hps = sorted({hp for hp_list in self.hp_lists for hp in hp_list})
+        self._core_cache: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+
+        self.num_features = (len(ATTACK_TYPE_IDS) + len(UPGRADE_NAMES) + len(LIMIT_NAMES) + 5
+                             + len(self.defenders) * len(self.target_hps) + len(self.hp_lists))
+
+    def _expected_damage(self, attack_type: str, upgrades: Tuple[str, ...]) -> np.ndarray:
+        """Expected damage of the limit-free build per (defender, target HP), cached"""
+        key = (attack_type, upgrades)
+        damage = self._core_cache.get(key)
+        if damage is None:
+            core = AttackBuild(attack_type, upgrades, ())
+            damage = np.array([calculate_expected_damage(self.attacker, core, defender, enemy_max_hp=hp)
+                               for defender in self.defenders for hp in self.target_hps])
+            self._core_cache[key] = damage
+        return damage
+
+    def encode(self, builds: Sequence[AttackBuild]) -> np.ndarray:
+        """Feature matrix with one row per build"""
+        num_types = len(ATTACK_TYPE_IDS)
+        num_options = len(UPGRADE_NAMES) + len(LIMIT_NAMES)
+        hp_column = {hp: index for index, hp in enumerate(self.target_hps)}
+        features = np.zeros((len(builds), self.num_features))
+
+        for row, build in enumerate(builds):
+            attack_type = ATTACK_TYPES[build.attack_type]
+            type_id = ATTACK_TYPE_IDS[build.attack_type]
+            options = ([_UPGRADE_INDEX[name] for name in build.upgrades] +
+                       [len(UPGRADE_NAMES) + _LIMIT_INDEX[name] for name in build.limits])
+
+            features[row, type_id] = 1.0
+            features[row, [num_types + option for option in options]] = 1.0
+
+            column = num_types + num_options
+            upgrades = [UPGRADES[name] for name in build.upgrades]
+            limits = [LIMITS[name] for name in build.limits]
+            features[row, column] = build.total_cost
+            features[row, column + 1] = attack_type.accuracy_mod + sum(u.accuracy_mod - u.accuracy_penalty
+                                                                       for u in upgrades)
+            features[row, column + 2] = attack_type.damage_mod + sum(u.damage_mod - u.damage_penalty
+                                                                     for u in upgrades)
+            features[row, column + 3] = sum(limit.damage_bonus for limit in limits)
+            features[row, column + 4] = max((limit.dc for limit in limits), default=0)
+            column += 5
+
+            damage = np.maximum(self._expected_damage(build.attack_type, tuple(build.upgrades)),
+                                MIN_EXPECTED_DAMAGE)
+            features[row, column:column + len(damage)] = np.log(damage)
+            column += len(damage)
+
+            # Naive turns: total enemy HP over damage per turn (AOE hits every enemy), averaged over defenders
+            per_defender = damage.reshape(len(self.defenders), len(self.target_hps))
+            for hp_list in self.hp_lists:
+                per_turn = per_defender[:, hp_column[hp_list[0]]] * (len(hp_list) if attack_type.is_area else 1)
+                turns = np.clip(sum(hp_list) / per_turn, MIN_TURNS, MAX_TURNS)
+                features[row, column] = np.log(turns).mean()
+                column += 1
+
+        return features
+
+
+class RidgeSurrogate:
+    """Closed-form ridge regression of log turns on standardized features (one output per column of Y)."""
+
+    def __init__(self, alpha: float = 10.0):
+        self.alpha = alpha
+        self._mean = None
+        self._scale = None
+        self._offset = None
+        self._coef = None
+
+    def fit(self, features: np.ndarray, turns: np.ndarray) -> 'RidgeSurrogate':
+        """
+        Args:
+            features: (builds, features) matrix from FeatureEncoder.encode
+            turns: (builds, outputs) simulated avg turns, e.g. one column per scenario
+        """
+        self._mean = features.mean(axis=0)
+        self._scale = features.std(axis=0)
+        self._scale[self._scale == 0] = 1.0
+        standardized = (features - self._mean) / self._scale
+
+        targets = np.log(np.maximum(turns, MIN_TURNS))
+        self._offset = targets.mean(axis=0)
+        gram = standardized.T @ standardized + self.alpha * np.eye(standardized.shape[1])
+        self._coef = np.linalg.solve(gram, standardized.T @ (targets - self._offset))
+        return self
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predicted avg turns, (builds, outputs)"""
+        standardized = (features - self._mean) / self._scale
+        return np.exp(standardized @ self._coef + self._offset)
+
+
+class BoostedTreeSurrogate:
+    """
+    Gradient-boosted regression trees on log turns (squared loss).
+
+    Every tree splits on "feature <= threshold" with candidate thresholds at the
+    midpoints of each feature's values (at most max_thresholds quantiles), and
+    stores one leaf value per output, so all scenarios share the tree shape.
+    """
+
+    def __init__(self, rounds: int = 150, learning_rate: float = 0.1, depth: int = 3, min_leaf: int = 5,
+                 max_thresholds: int = 16):
+        self.rounds = rounds
+        self.learning_rate = learning_rate
+        self.depth = depth
+        self.min_leaf = min_leaf
+        self.max_thresholds = max_thresholds
+        self._offset = None
+        self._trees = []
+
+    def _candidate_splits(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(feature column, threshold) of every candidate split"""
+        columns = []
+        thresholds = []
+        for column in range(features.shape[1]):
+            values = np.unique(features[:, column])
+            if len(values) > self.max_thresholds:
+                values = np.unique(np.quantile(features[:, column], np.linspace(0, 1, self.max_thresholds + 1)))
+            midpoints = (values[:-1] + values[1:]) / 2
+            columns.extend([column] * len(midpoints))
+            thresholds.extend(midpoints)
+        return np.array(columns, dtype=int), np.array(thresholds)
+
+    def _fit_tree(self, features: np.ndarray, residuals: np.ndarray, columns: np.ndarray,
+                  thresholds: np.ndarray, depth: int):
+        """Leaf value vector, or (column, threshold, left subtree, right subtree)"""
+        count = len(residuals)
+        if depth == 0 or count < 2 * self.min_leaf or not len(columns):
+            return residuals.mean(axis=0)
+
+        goes_left = features[:, columns] <= thresholds             # (rows, splits)
+        left_count = goes_left.sum(axis=0)
+        left_sum = residuals.T @ goes_left                         # (outputs, splits)
+        right_sum = residuals.sum(axis=0)[:, None] - left_sum
+        allowed = (left_count >= self.min_leaf) & (count - left_count >= self.min_leaf)
+        if not allowed.any():
+            return residuals.mean(axis=0)
+
+        # Squared-loss reduction, summed over outputs
+        gain = ((left_sum ** 2).sum(axis=0) / np.maximum(left_count, 1) +
+                (right_sum ** 2).sum(axis=0) / np.maximum(count - left_count, 1))
+        best = int(np.argmax(np.where(allowed, gain, -np.inf)))
+        left = goes_left[:, best]
+        return (columns[best], thresholds[best],
+                self._fit_tree(features[left], residuals[left], columns, thresholds, depth - 1),
+                self._fit_tree(features[~left], residuals[~left], columns, thresholds, depth - 1))
+
+    def _predict_tree(self, tree, features: np.ndarray) -> np.ndarray:
+        if not isinstance(tree, tuple):
+            return np.broadcast_to(tree, (len(features), len(tree)))
+        column, threshold, left_tree, right_tree = tree
+        left = features[:, column] <= threshold
+        predicted = np.empty((len(features), len(self._offset)))
+        predicted[left] = self._predict_tree(left_tree, features[left])
+        predicted[~left] = self._predict_tree(right_tree, features[~left])
+        return predicted
+
+    def fit(self, features: np.ndarray, turns: np.ndarray) -> 'BoostedTreeSurrogate':
+        """
+        Args:
+            features: (builds, features) matrix from FeatureEncoder.encode
+            turns: (builds, outputs) simulated avg turns, e.g. one column per scenario
+        """
+        targets = np.log(np.maximum(turns, MIN_TURNS))
+        self._offset = targets.mean(axis=0)
+        self._trees = []
+        columns, thresholds = self._candidate_splits(features)
+        fitted = np.broadcast_to(self._offset, targets.shape).copy()
+        for _ in range(self.rounds):
+            tree = self._fit_tree(features, targets - fitted, columns, thresholds, self.depth)
+            self._trees.append(tree)
+            fitted += self.learning_rate * self._predict_tree(tree, features)
+        return self
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Predicted avg turns, (builds, outputs)"""
+        predicted = np.broadcast_to(self._offset, (len(features), len(self._offset))).copy()
+        for tree in self._trees:
+            predicted += self.learning_rate * self._predict_tree(tree, features)
+        return np.exp(predicted)
+
+
+SURROGATE_MODELS = {'boosted': BoostedTreeSurrogate, 'ridge': RidgeSurrogate}
+
+
+def _rank_correlation(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman rank correlation (ties broken by order)"""
+    if len(a) < 2:
+        return 0.0
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+@dataclass
+class SurrogateCalibration:
+    """How well the surrogate ranks builds, from the holdout and exploration samples."""
+    train_size: int
+    holdout_size: int
+    r2: float                    # Of mean turns on the holdout
+    spearman: float              # Rank correlation of mean turns on the holdout
+    top_fraction: float          # Share of builds that counts as the true top
+    keep_fraction: float
+    top_miss_rate: float         # Holdout true-top builds predicted outside keep_fraction
+    screened_out: int = 0        # Builds never simulated in full
+    explored: int = 0            # Exploration builds simulated in full
+    explored_in_top: int = 0     # Exploration builds that reached the true top
+
+    @property
+    def estimated_missed_top(self) -> float:
+        """Estimated true-top builds among those screened out (from the exploration sample)"""
+        if not self.explored:
+            return 0.0
+        return self.explored_in_top / self.explored * self.screened_out
+
+    def summary(self) -> str:
+        """One-line summary for progress output"""
+        text = (f"holdout R^2 {self.r2:.3f}, Spearman {self.spearman:.3f}, "
+                f"{self.top_miss_rate * 100:.1f}% of top {self.top_fraction * 100:.0f}% missed")
+        if self.explored:
+            text += (f"; exploration {self.explored_in_top}/{self.explored} in top "
+                     f"(~{self.estimated_missed_top:.0f} of {self.screened_out:,} screened out)")
+        return text
+
+
+@dataclass
+class ScreenResult:
+    """Outcome of SurrogateScreen.run (indices refer to the screened build list)."""
+    train_indices: np.ndarray
+    train_turns: np.ndarray      # Simulated turns of the training builds, (train, outputs)
+    kept_indices: np.ndarray     # Predicted top keep_fraction of the other builds
+    explore_indices: np.ndarray  # Random sample of the rest
+    scores: np.ndarray           # Mean turns per build: simulated for training builds, predicted otherwise
+    calibration: SurrogateCalibration
+
+    @property
+    def tested_indices(self) -> np.ndarray:
+        """Training, kept and exploration builds, in build order"""
+        return np.sort(np.concatenate([self.train_indices, self.kept_indices, self.explore_indices]))
+
+    def record_exploration(self, explored_builds: Sequence, top_builds: set):
+        """Count the exploration builds (builds[explore_indices]) among the true top after full simulation"""
+        self.calibration.explored = len(explored_builds)
+        self.calibration.explored_in_top = sum(1 for build in explored_builds if build in top_builds)
+
+
+class SurrogateScreen:
+    """Simulates a training sample, fits RidgeSurrogate and picks the builds worth simulating."""
+
+    def __init__(self, encoder: FeatureEncoder, keep_fraction: float = 0.3, explore_fraction: float = 0.05,
+                 train_size: int = 500, model: str = 'boosted', top_fraction: float = 0.1,
+                 holdout_fraction: float = 0.2, seed: int = None):
+        """
+        Args:
+            encoder: FeatureEncoder for the attacker, defenders and scenarios being tested
+            keep_fraction: Share of the non-training builds kept by prediction
+            explore_fraction: Share of the non-training builds added at random
+            train_size: Builds simulated to fit the model
+            model: "boosted" or "ridge" (see SURROGATE_MODELS)
+            top_fraction: Share of builds that counts as the true top for calibration
+            holdout_fraction: Share of the training sample held out for calibration
+            seed: Seed for the training and exploration samples (None = fresh entropy)
+        """
+        self.encoder = encoder
+        self.keep_fraction = keep_fraction
+        self.explore_fraction = explore_fraction
+        self.train_size = train_size
+        if model not in SURROGATE_MODELS:
+            raise ValueError(f"unknown surrogate model '{model}' (expected one of {sorted(SURROGATE_MODELS)})")
+        self.model = model
+        self.top_fraction = top_fraction
+        self.holdout_fraction = holdout_fraction
+        self.seed = seed
+
+    def _calibrate(self, features: np.ndarray, turns: np.ndarray, rng: np.random.Generator) -> SurrogateCalibration:
+        """Fit on part of the training sample and score the held-out rest"""
+        holdout_size = int(len(features) * self.holdout_fraction)
+        if holdout_size < 2:
+            return SurrogateCalibration(len(features), 0, 0.0, 0.0, self.top_fraction, self.keep_fraction, 0.0)
+
+        order = rng.permutation(len(features))
+        holdout, fit = order[:holdout_size], order[holdout_size:]
+        actual = turns[holdout].mean(axis=1)
+        predicted = SURROGATE_MODELS[self.model]().fit(features[fit], turns[fit]).predict(features[holdout]).mean(axis=1)
+
+        residual = np.sum((actual - predicted) ** 2)
+        total = np.sum((actual - actual.mean()) ** 2)
+        r2 = 1.0 - residual / total if total > 0 else 0.0
+
+        top_count = max(1, int(holdout_size * self.top_fraction))
+        keep_count = max(1, int(np.ceil(holdout_size * self.keep_fraction)))
+        true_top = np.argsort(actual, kind='stable')[:top_count]
+        kept = set(np.argsort(predicted, kind='stable')[:keep_count].tolist())
+        missed = sum(1 for index in true_top if index not in kept)
+
+        return SurrogateCalibration(len(features), holdout_size, float(r2), _rank_correlation(actual, predicted),
+                                    self.top_fraction, self.keep_fraction, missed / top_count)
+
+    def run(self, builds: Sequence[AttackBuild],
+            simulate: Callable[[List[AttackBuild]], np.ndarray]) -> ScreenResult:
+        """
+        Screen builds.
+
+        Args:
+            builds: AttackBuilds to screen
+            simulate: Callable taking a list of builds and returning their simulated avg
+                      turns as a (builds, outputs) array, e.g. one column per scenario
+
+        Returns:
+            ScreenResult
+        """
+        rng = np.random.default_rng(self.seed)
+        total = len(builds)
+        train_indices = np.sort(rng.choice(total, min(self.train_size, total), replace=False))
+        train_turns = np.asarray(simulate([builds[index] for index in train_indices]), dtype=float)
+        train_features = self.encoder.encode([builds[index] for index in train_indices])
+
+        calibration = self._calibrate(train_features, train_turns, rng)
+        model = SURROGATE_MODELS[self.model]().fit(train_features, train_turns)
+
+        rest = np.setdiff1d(np.arange(total), train_indices)
+        scores = np.empty(total)
+        scores[train_indices] = train_turns.mean(axis=1)
+        if len(rest):
+            scores[rest] = model.predict(self.encoder.encode([builds[index] for index in rest])).mean(axis=1)
+
+        keep_count = int(np.ceil(len(rest) * self.keep_fraction))
+        by_score = rest[np.argsort(scores[rest], kind='stable')]
+        kept_indices = np.sort(by_score[:keep_count])
+        remaining = by_score[keep_count:]
+        explore_count = min(len(remaining), int(round(len(rest) * self.explore_fraction)))
+        explore_indices = np.sort(rng.choice(remaining, explore_count, replace=False)) if explore_count else \
+            np.array([], dtype=int)
+
+        calibration.screened_out = len(remaining) - explore_count
+        return ScreenResult(train_indices, train_turns, kept_indices, explore_indices, scores, calibration)
+
+
+def write_surrogate_calibration(calibration: SurrogateCalibration, output_path: str):
+    """Write the surrogate calibration metrics as a markdown report"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("# Surrogate Screening Calibration\n\n")
+        f.write(f"- **Training builds simulated**: {calibration.train_size:,} "
+                f"({calibration.holdout_size:,} held out for calibration)\n")
+        f.write(f"- **Kept by prediction**: top {calibration.keep_fraction * 100:.0f}%\n")
+        f.write(f"- **Screened out (never simulated in full)**: {calibration.screened_out:,}\n\n")
+        f.write("| Metric | Value |\n|--------|-------|\n")
+        f.write(f"| Holdout R² (mean turns) | {calibration.r2:.3f} |\n")
+        f.write(f"| Holdout Spearman rank correlation | {calibration.spearman:.3f} |\n")
+        f.write(f"| Holdout true top {calibration.top_fraction * 100:.0f}% screened out | "
+                f"{calibration.top_miss_rate * 100:.1f}% |\n")
+        if calibration.explored:
+            f.write(f"| Exploration builds in true top | {calibration.explored_in_top} / {calibration.explored} |\n")
+            f.write(f"| Estimated true top builds screened out | {calibration.estimated_missed_top:.0f} |\n")
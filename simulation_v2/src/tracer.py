@@ -0,0 +1,142 @@
+"""
+Structured combat event tracing for the Vitality System simulator.
+
+The untraced attack resolution in combat.py carries no logging code. When a
+combat is traced, the traced resolution records typed events instead of
+writing text:
+
+- Each event is a (kind, code, args) tuple. The kind is one of the EVENT_*
+  categories and the code selects a line template from EVENT_FORMATS.
+- Events are kept in a fixed-size ring buffer (the last `capacity` events).
+  This is enough to inspect how a timed-out or unexpected combat ended.
+- If the tracer has a sink (an open combat log file), every event is also
+  rendered to the sink as it is recorded. The combat_logs text is therefore
+  rendered from events, in order, and the buffer never needs to hold a whole
+  combat.
+
+A CombatTracer also accepts write(text), so it can be passed anywhere a log
+file is expected. Free text is recorded as an EVENT_TEXT event.
+"""
+
+from collections import deque
+from typing import List, Optional
+
+# Ring buffer size (events) for tracers created without an explicit capacity
+DEFAULT_TRACE_CAPACITY = 4096
+
+# Event kinds
+EVENT_TEXT = 'text'          # Free text written through write()
+EVENT_ATTACK = 'attack'      # Attack / AOE targeting headers
+EVENT_LIMIT = 'limit'        # Limit checks, activations and failures
+EVENT_ROLL = 'roll'          # Accuracy rolls, hit/miss, criticals
+EVENT_DAMAGE = 'damage'      # Damage dice, bonuses, durability
+EVENT_EFFECT = 'effect'      # Conditions and follow-up attacks
+
+# Event code -> line template (formatted with the event args)
+EVENT_FORMATS = {
+    # Attacks
+    'attack': "    Making {} attack with {}\n",
+    'aoe_targets': "  AOE Attack targeting {} enemies\n",
+    'aoe_shared_roll': "  Shared damage roll: {} = {}\n",
+    'aoe_target': "\n  --- Targeting Enemy {} ---\n",
+    # Limits
+    'limit_skipped_charging': "      {} skipped: currently charging (only checked on first charge turn)\n",
+    'limit_dc_roll': "      {} check: rolled {} vs DC {}\n",
+    'limit_dc_failed': "      Attack failed due to {}!\n",
+    'limit_failed': "      {} failed: {} - using basic attack\n",
+    'charge_shared': "      {} activated (AOE shared charge): bonus applied\n",
+    'charge_used': "      {} activated: charge {}/{} used\n",
+    'cooldown_failed': "      {} failed: still on cooldown (used on turn {}, need 3 turns, currently turn {}) - using basic attack\n",
+    'cooldown_shared': "      {} activated (AOE shared cooldown): bonus applied\n",
+    'cooldown_used': "      {} activated (last used on turn {}, now used on turn {})\n",
+    'attrition_used': "      {} activated: will cost 25 HP\n",
+    'charge_up_failed': "      {} failed: {}\n",
+    # Rolls
+    'advantage_roll': "      Reliable Accuracy: rolled {} and {}, taking {}\n",
+    'accuracy': "      Accuracy: {} = {} vs {}\n",
+    'critical': "      CRITICAL HIT! (rolled {})\n",
+    'miss': "      Miss!\n",
+    # Damage
+    'overhit': "      Overhit! Exceeded avoidance by {}, adding {} to damage\n",
+    'channeled': "      Channeled: turn {}, bonus {:+d}\n",
+    'empower': "      Empower bonus applied: +{}\n",
+    'direct_base': "      Direct damage base: {}\n",
+    'damage_dice': "      Damage dice: {} = {}\n",
+    'flat_bonus': "      Flat bonus: {} = {}\n",
+    'slayer_bonus': "      Slayer bonus: +{} [{} vs {}HP]\n",
+    'critical_bonus': "      Critical bonus: +{} [Critical Hit]\n",
+    'powerful_critical_bonus': "      Critical bonus: +{} [Critical Hit +{} + Powerful Critical +{}]\n",
+    'overhit_bonus': "      Overhit bonus: +{} [Exceeded avoidance by {}]\n",
+    'total_damage': "      Total damage: {}\n",
+    'armor_piercing': "      Armor piercing: reducing durability from {} to {}\n",
+    'direct_after_durability': "      Direct attack: {} - durability {} = {} damage\n",
+    'after_durability': "      After durability ({}): {} damage\n",
+    'brutal': "      Brutal bonus: +{} damage\n",
+    'leech': "      Leech: recover {} HP (half of {} damage)\n",
+    # Effects
+    'bleed': "      Applied bleed condition\n",
+    'explosive_critical': "      Explosive Critical triggered! (will splash to other enemies in range)\n",
+    'double_tap': "      Double-Tap triggered! Making identical attack:\n",
+    'double_tap_total': "      Total with double-tap: {} damage\n",
+    'ricochet': "      Ricochet triggered! (will attack up to 2 different targets)\n",
+    'extra_attack': "      Extra Attack triggered! (hit + effect success)\n",
+    'extra_attack_total': "      Total with extra attack: {} damage\n",
+    'barrage_second': "      Barrage - first attack succeeded, attempting second attack:\n",
+    'barrage_third': "      Barrage - second attack succeeded, attempting third attack:\n",
+    'barrage_total': "      Total with barrage ({} attacks): {} damage\n",
+}
+
+
+def join_breakdown(parts) -> str:
+    """Join 'value [label]' parts into a breakdown, folding '+ -x' into '- x'"""
+    return " + ".join(parts).replace(" + -", " - ")
+
+
+def render_event(event) -> str:
+    """Render one (kind, code, args) event to its log line"""
+    kind, code, args = event
+    if kind == EVENT_TEXT:
+        return args[0]
+    if code in ('accuracy', 'flat_bonus'):
+        # Breakdowns are recorded as part tuples
+        args = (join_breakdown(args[0]),) + tuple(args[1:])
+    return EVENT_FORMATS[code].format(*args)
+
+
+class CombatTracer:
+    """Ring buffer of combat events, optionally rendered to a log file as they are recorded"""
+
+    __slots__ = ('events', 'sink')
+
+    def __init__(self, sink=None, capacity: int = DEFAULT_TRACE_CAPACITY):
+        self.events = deque(maxlen=capacity)
+        self.sink = sink
+
+    def emit(self, kind: str, code: str, *args):
+        """Record a typed event (and render it to the sink, if any)"""
+        event = (kind, code, args)
+        self.events.append(event)
+        if self.sink is not None:
+            self.sink.write(render_event(event))
+
+    def write(self, text: str):
+        """Record free text, so the tracer can stand in for a log file"""
+        self.emit(EVENT_TEXT, None, text)
+
+    def of_kind(self, kind: str) -> List[tuple]:
+        """Buffered events of one kind"""
+        return [event for event in self.events if event[0] == kind]
+
+    def render(self) -> str:
+        """Render the buffered events as log text"""
+        return ''.join(render_event(event) for event in self.events)
+
+    def clear(self):
+        self.events.clear()
+
+
+def as_tracer(log_file, capacity: int = DEFAULT_TRACE_CAPACITY) -> Optional[CombatTracer]:
+    """Wrap a log file in a CombatTracer (None stays None, tracers are returned as-is)"""
+    if log_file is None or isinstance(log_file, CombatTracer):
+        return log_file
+    return CombatTracer(sink=log_file, capacity=capacity)
@@ -0,0 +1,51 @@
+"""Test script to verify interned, bitmask-backed AttackBuilds"""
+import gc
+import pickle
+import sys
+sys.path.insert(0, '..')
+
+from src.models import AttackBuild, MultiAttackBuild, interned_build_count
+
+
+def test_identical_builds_share_one_instance():
+    """Test that builds with the same type, upgrade set and limit set are one object"""
+    print("Testing build interning...")
+    build = AttackBuild('ranged', ['bleed', 'brutal'], ['quickdraw'])
+    assert AttackBuild('ranged', ('brutal', 'bleed'), ['quickdraw']) is build
+    assert build.upgrades == ('bleed', 'brutal')  # First construction's order is kept
+    assert AttackBuild('melee_dg', ['bleed', 'brutal'], ['quickdraw']) is not build
+    assert AttackBuild('ranged', ['bleed'], ['quickdraw']) != build
+
+    # Equality and hashing use the masks, so sets and dicts see one build
+    assert len({build, AttackBuild('ranged', ['brutal', 'bleed'], ['quickdraw'])}) == 1
+    assert build.total_cost == build.calculate_total_cost()
+
+    # Collected builds leave the flyweight table
+    before = interned_build_count()
+    extra = [AttackBuild('area', [upgrade], []) for upgrade in ('brutal', 'bleed', 'high_impact')]
+    assert interned_build_count() == before + 3
+    del extra
+    gc.collect()
+    assert interned_build_count() == before
+
+
+def test_compact_pickle_round_trip():
+    """Test that builds pickle as integers and unpickle to the interned instance"""
+    build = AttackBuild('melee_ac', ['power_attack', 'bleed'], ['charges_1', 'bloodied'])
+    data = pickle.dumps(build)
+    assert b'power_attack' not in data and len(data) < 80
+    assert pickle.loads(data) is build
+
+    pair = MultiAttackBuild([build, AttackBuild('area', [], [])], 'dual_natured', 'area', 1)
+    restored = pickle.loads(pickle.dumps(pair))
+    assert restored.builds[0] is build
+
+    # Names outside game_data pickle by name instead of by bit
+    custom = AttackBuild('ranged', ['homebrew_upgrade'], [])
+    assert pickle.loads(pickle.dumps(custom)) is custom
+
+
+if __name__ == '__main__':
+    test_identical_builds_share_one_instance()
+    test_compact_pickle_round_trip()
+    print("\nAll AttackBuild interning tests passed")
@@ -0,0 +1,95 @@
+"""Test script to verify the NumPy lockstep engine against simulate_combat_verbose distributions"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild, MultiAttackBuild
+from src.simulation import run_simulation_batch
+from src.batch_engine import BatchCombat, run_simulation_batch_vectorized, simulate_combat_batch, ATTACK_BASIC, \
+    ATTACK_CHARGE, _PROCEED
+from src.exact_solver import solve_or_simulate_batch
+from src.dice import seed
+
+ATTACKER = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+DEFENDER = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+
+# (build, scenario, archetype) covering limits, follow-up attacks, bleed, fallbacks and multi-attack selection
+PARITY_CASES = [
+    (AttackBuild('melee_dg', ['power_attack'], []), dict(num_enemies=1, enemy_hp=100), None),
+    (AttackBuild('area', ['bleed'], ['charge_up']), dict(num_enemies=3, enemy_hp=25), None),
+    (AttackBuild('melee_ac', ['double_tap', 'barrage'], ['unreliable_1']), dict(num_enemies=2, enemy_hp=50), None),
+    (AttackBuild('ranged', ['explosive_critical', 'culling_strike'], ['charges_2']),
+     dict(enemy_hp_list=[100, 25, 10, 10]), None),
+    (AttackBuild('melee_dg', ['splinter', 'extra_attack'], ['slaughter', 'passive']),
+     dict(num_enemies=4, enemy_hp=25), None),
+    (AttackBuild('ranged', ['reliable_accuracy', 'overhit', 'brutal'], ['near_death', 'relentless']),
+     dict(num_enemies=2, enemy_hp=100), 'focused'),
+    (AttackBuild('direct_area_damage', ['channeled'], ['cooldown']), dict(num_enemies=2, enemy_hp=50), None),
+    (MultiAttackBuild([AttackBuild('melee_dg', ['critical_effect'], ['charges_1']), AttackBuild('area', [], [])],
+                      'dual_natured', tier_bonus=1), dict(num_enemies=4, enemy_hp=25), None),
+    (MultiAttackBuild([AttackBuild('area', [], ['quickdraw']), AttackBuild('melee_dg', ['boss_slayer'], [])],
+                      'versatile_master'), dict(enemy_hp_list=[100, 10, 10]), None),
+]
+
+
+def test_turn_distributions_match_scalar_engine():
+    """Test that mean turns and win rates match simulate_combat_verbose within sampling error"""
+    print("Testing batch engine parity...")
+    for index, (build, scenario, archetype) in enumerate(PARITY_CASES):
+        seed(100, 'scalar', index)
+        scalar_turns, scalar_avg, _, scalar_stats = run_simulation_batch(
+            ATTACKER, build, 400, 100, DEFENDER, archetype=archetype, **scenario)
+        seed(100, 'batch', index)
+        batch_turns, batch_avg, _, batch_stats = run_simulation_batch_vectorized(
+            ATTACKER, build, 4000, 100, DEFENDER, archetype=archetype, **scenario)
+
+        standard_error = np.sqrt(np.var(scalar_turns) / len(scalar_turns) + np.var(batch_turns) / len(batch_turns))
+        print(f"  {index}: scalar {scalar_avg:.2f} vs batch {batch_avg:.2f} turns")
+        assert abs(scalar_avg - batch_avg) <= 4 * standard_error + 0.05
+        assert abs(scalar_stats['win_rate'] - batch_stats['win_rate']) <= 5
+
+
+def test_limit_checks_match_preview():
+    """Test vectorized limit checks and charge tracking"""
+    combat = BatchCombat(ATTACKER, DEFENDER, 3, [50])
+    runs = np.arange(3)
+    charge_build = AttackBuild('area', [], ['charge_up_2']).compiled
+    assert (combat.check_limits(charge_build, runs, 1, preview=True) == ATTACK_CHARGE).all()
+    combat.charge_history[1] = [True, True]
+    assert combat.check_limits(charge_build, runs, 3, preview=True).tolist() == [ATTACK_CHARGE, _PROCEED, ATTACK_CHARGE]
+
+    charges_build = AttackBuild('melee_dg', [], ['charges_1']).compiled
+    combat.check_limits(charges_build, runs[:2], 1)
+    assert combat.charges_used['charges_1'].tolist() == [1, 1, 0]
+    assert combat.check_limits(charges_build, runs, 2, preview=True).tolist() == [ATTACK_BASIC, ATTACK_BASIC, _PROCEED]
+
+    combat.attacker_hp[:] = [100, 25, 26]
+    near_death_build = AttackBuild('melee_dg', [], ['near_death']).compiled
+    assert combat.check_limits(near_death_build, runs, 1).tolist() == [ATTACK_BASIC, _PROCEED, ATTACK_BASIC]
+
+
+def test_seeded_batches_are_reproducible():
+    """Test that seeded batches replay exactly and every run ends"""
+    build = AttackBuild('area', ['bleed', 'finishing_blow_1'], ['unreliable_2'])
+
+    def run():
+        seed(7, 'batch')
+        return simulate_combat_batch(ATTACKER, build, 300, defender=DEFENDER, num_enemies=3, enemy_hp=25)
+
+    turns, won = run()
+    replay_turns, replay_won = run()
+    assert (turns == replay_turns).all() and (won == replay_won).all()
+    assert turns.min() >= 1 and turns.max() <= 100
+
+    # The solver fallback uses the batch engine for large batches when enabled
+    stateful_build = AttackBuild('melee_dg', [], ['charges_2'])
+    results, avg_turns, _, stats = solve_or_simulate_batch(ATTACKER, stateful_build, 50, 100, DEFENDER,
+                                                           use_batch_engine=True)
+    assert len(results) == 50 and stats['wins'] + stats['timeouts'] == 50 and avg_turns > 0
+
+
+if __name__ == '__main__':
+    test_turn_distributions_match_scalar_engine()
+    test_limit_checks_match_preview()
+    test_seeded_batches_are_reproducible()
+    print("\nAll batch engine tests passed")
@@ -0,0 +1,89 @@
+"""Test script to verify the constraint-propagating build enumerator"""
+import sys
+from collections import Counter
+from itertools import combinations
+sys.path.insert(0, '..')
+
+from src.models import AttackBuild
+from src.game_data import UPGRADES, LIMITS
+from src.build_enumerator import BuildEnumerator, DEFAULT_ATTACK_TYPES
+from src.build_generator import sample_valid_builds
+
+
+def test_enumerator_matches_rule_validator():
+    """Test that the enumerator yields exactly the builds AttackBuild.is_valid accepts"""
+    print("Testing enumerator against brute force...")
+    max_points = 5
+    expected = set()
+    for attack_type in DEFAULT_ATTACK_TYPES:
+        for upgrade_count in range(4):
+            for upgrades in combinations(UPGRADES, upgrade_count):
+                upgrade_cost = sum(UPGRADES[name].cost for name in upgrades)
+                if upgrade_cost > max_points:
+                    continue
+                for limit_count in range(3):
+                    for limits in combinations(LIMITS, limit_count):
+                        # Raw costs only skip hopeless candidates; is_valid decides
+                        if upgrade_cost + sum(LIMITS[name].cost for name in limits) > max_points:
+                            continue
+                        build = AttackBuild(attack_type, list(upgrades), list(limits))
+                        if build.is_valid(max_points):
+                            expected.add(build)
+
+    builds = list(BuildEnumerator(max_points).builds())
+    print(f"  {len(builds)} builds")
+    assert len(builds) == len(set(builds)) == len(expected)
+    assert set(builds) == expected
+
+
+def test_count_and_random_access():
+    """Test that count(), nth() and index ranges agree with full enumeration"""
+    enumerator = BuildEnumerator(6, ['melee_dg', 'area'])
+    builds = list(enumerator)
+    assert enumerator.count() == len(builds)
+
+    for index in (0, 1, 17, len(builds) // 2, len(builds) - 1, -1):
+        assert repr(enumerator.nth(index)) == repr(builds[index])
+
+    # Shards by index range concatenate back to the full enumeration
+    bounds = [0, 5, 1000, 1001, 10000, len(builds)]
+    shards = [list(enumerator.builds(start, stop)) for start, stop in zip(bounds, bounds[1:])]
+    assert [repr(b) for shard in shards for b in shard] == [repr(b) for b in builds]
+
+    try:
+        enumerator.nth(len(builds))
+        assert False, "expected IndexError"
+    except IndexError:
+        pass
+
+
+def test_seeded_sampling():
+    """Test that samples are deterministic, duplicate-free and proportional per stratum"""
+    print("Testing build sampling...")
+    enumerator = BuildEnumerator(6)
+    everything = set(enumerator)
+
+    sample = list(sample_valid_builds(6, fraction=0.05, seed=3))
+    assert len(sample) == int(enumerator.count() * 0.05) == len(set(sample))
+    assert set(sample) <= everything
+    assert [repr(b) for b in sample_valid_builds(6, fraction=0.05, seed=3)] == [repr(b) for b in sample]
+    assert set(sample_valid_builds(6, fraction=0.05, seed=4)) != set(sample)
+
+    # Stratified draws follow each stratum's share of the space
+    for by, key in (('attack_type', lambda b: b.attack_type), ('upgrade_count', lambda b: len(b.upgrades))):
+        sizes = {k: sum(stop - start for start, stop in ranges) for k, ranges in enumerator.strata(by).items()}
+        drawn = Counter(key(b) for b in sample_valid_builds(6, count=300, seed=3, stratify=by))
+        assert sum(drawn.values()) == 300 and set(drawn) == set(sizes)
+        for k, size in sizes.items():
+            assert abs(drawn[k] - 300 * size / enumerator.count()) <= 1.5
+
+    # Every stratum is represented even when tiny; an oversized request returns the whole space
+    assert len({b.attack_type for b in sample_valid_builds(6, count=6, seed=1, stratify='attack_type')}) == 6
+    assert set(sample_valid_builds(6, count=10 ** 9, seed=1)) == everything
+
+
+if __name__ == '__main__':
+    test_enumerator_matches_rule_validator()
+    test_count_and_random_access()
+    test_seeded_sampling()
+    print("\nAll build enumerator tests passed")
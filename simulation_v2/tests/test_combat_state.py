@@ -0,0 +1,127 @@
+"""Test script to verify CombatState, EnemyGroup and side-effect-free limit previews"""
+import sys
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild, CombatState, EnemyGroup
+from src.combat import preview_activation, make_attack, make_aoe_attack
+from src.dice import seed
+
+
+def test_snapshot_restore():
+    """Test that restore() rolls back scalar fields and charge usage"""
+    print("Testing CombatState snapshot/restore...")
+    state = CombatState()
+    state.charges_used['charges_2'] = 1
+    snapshot = state.snapshot()
+
+    state.charges_used['charges_2'] = 2
+    state.leech_hp = 7
+    state.was_hit_last_turn = True
+    state.restore(snapshot)
+    assert state.charges_used == {'charges_2': 1}
+    assert state.leech_hp == 0 and not state.was_hit_last_turn
+
+    # A snapshot can be restored more than once
+    state.charges_used['charges_2'] = 2
+    state.restore(snapshot)
+    assert state.charges_used == {'charges_2': 1}
+
+    copied = state.copy()
+    copied.charges_used['charges_1'] = 1
+    assert 'charges_1' not in state.charges_used
+
+    # Legacy dict access and coercion
+    assert state['charges_used'] is state.charges_used
+    assert state.get('channeled_turns') == 0
+    assert CombatState.coerce({'was_damaged_last_turn': True}).was_damaged_last_turn
+    assert CombatState.coerce(state) is state
+
+
+def test_preview_activation():
+    """Test that previews match make_attack's limit handling without consuming anything"""
+    print("Testing preview_activation...")
+    state = CombatState()
+    cooldown_history = {}
+
+    assert preview_activation(AttackBuild('area', [], ['charge_up']), 1, 100, 100, state, []) == 'charge'
+    assert preview_activation(AttackBuild('area', [], ['charge_up']), 2, 100, 100, state, [True]) == 'attack'
+    assert preview_activation(AttackBuild('area', [], ['charge_up_2']), 2, 100, 100, state, [True]) == 'charge'
+    assert preview_activation(AttackBuild('melee_dg', [], ['near_death']), 1, 100, 100, state) == 'basic_attack'
+    assert preview_activation(AttackBuild('melee_dg', [], ['unreliable_3']), 1, 100, 100, state) == 'attack'
+
+    # Action-based limits are skipped while charging, as in make_attack
+    charging_build = AttackBuild('melee_dg', [], ['relentless', 'charge_up'])
+    assert preview_activation(charging_build, 1, 100, 100, state, []) == 'basic_attack'
+    assert preview_activation(charging_build, 2, 100, 100, state, [True]) == 'attack'
+
+    # Charges and cooldowns are checked but not consumed
+    charges_build = AttackBuild('area', [], ['charges_1'])
+    assert preview_activation(charges_build, 1, 100, 100, state, [], cooldown_history) == 'attack'
+    assert state.charges_used == {}
+    cooldown_build = AttackBuild('area', [], ['cooldown'])
+    assert preview_activation(cooldown_build, 1, 100, 100, state, [], cooldown_history) == 'attack'
+    assert cooldown_history == {}
+
+
+def test_aoe_cooldown_attack_is_not_blocked():
+    """Test that an AOE cooldown attack fires on its first turn (no dry run marking the cooldown)"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=0, power=0, mobility=0, endurance=0, tier=4)
+    build = AttackBuild('direct_area_damage', [], ['cooldown'])
+    targets = [(i, 10) for i in range(3)]
+
+    seed(3)
+    state = CombatState()
+    cooldown_history = {}
+    results, total_damage = make_aoe_attack(attacker, defender, build, targets, turn_number=1,
+                                            charge_history=[], cooldown_history=cooldown_history,
+                                            combat_state=state)
+    assert all('basic_attack' not in conditions for _, _, conditions in results)
+    assert total_damage > 0
+    assert cooldown_history == {'cooldown': 1}
+
+
+def test_make_attack_updates_state():
+    """Test that make_attack records charge use and leech on the CombatState"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=0, power=0, mobility=0, endurance=0, tier=4)
+    state = CombatState()
+    make_attack(attacker, defender, AttackBuild('direct_damage', [], ['charges_1']), combat_state=state)
+    assert state.charges_used == {'charges_1': 1}
+    damage, conditions, _ = make_attack(attacker, defender, AttackBuild('direct_damage', [], ['charges_1']),
+                                        combat_state=state)
+    assert damage == 0 and conditions == ['basic_attack']
+
+
+def test_enemy_group_bookkeeping():
+    """Test that EnemyGroup keeps alive indices, count and total HP in step with damage and bleed"""
+    print("Testing EnemyGroup bookkeeping...")
+    enemies = EnemyGroup.from_scenario(enemy_hp_list=[10, 25, 10])
+    assert enemies.alive == [0, 1, 2] and enemies.alive_count == 3 and enemies.total_hp == 45
+    assert enemies.targets() == [(0, 10), (1, 25), (2, 10)]
+
+    assert enemies.damage(0, 12) == 0
+    assert enemies.alive == [1, 2] and enemies.total_hp == 35 and enemies.first_alive() == 1
+    assert enemies.first_alive(exclude=1) == 2
+    assert enemies.damage(0, 5) == 0 and enemies.total_hp == 35  # Dead enemies take no damage
+
+    # A bleed stack ticks while it has turns left, then clears on the next tick
+    assert enemies.apply_bleed(1, 6, 1) == 0
+    assert enemies.apply_bleed(1, 4, 1) == 1  # Replaces the existing stack
+    assert enemies.tick_bleed() == [(1, 4, 1)]
+    assert enemies.hp[1] == 21 and enemies.has_bleed(1) and enemies.pending_bleed() == 4
+    assert enemies.tick_bleed() == [] and not enemies.has_bleed()
+
+    enemies.kill(2)
+    assert enemies.alive == [1] and enemies.alive_count == 1 and enemies.total_hp == 21
+    enemies.damage(1, 30)
+    assert enemies.alive_count == 0 and enemies.total_hp == 0 and enemies.first_alive() is None
+
+
+if __name__ == '__main__':
+    test_snapshot_restore()
+    test_preview_activation()
+    test_aoe_cooldown_attack_is_not_blocked()
+    test_make_attack_updates_state()
+    test_enemy_group_bookkeeping()
+    print("\nAll combat state tests passed")
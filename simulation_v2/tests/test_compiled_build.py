@@ -0,0 +1,125 @@
+"""Test script to verify the precompiled attack build form"""
+import sys
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild
+from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS
+from src.compiled_build import CompiledBuild, DICE_FLAT_15, DICE_EXPLODE_5_6, DICE_EXPLODE_6
+from src.combat import make_attack, can_activate_limit
+from src.dice import seed
+
+
+def _reference_modifiers(build, tier):
+    """Accuracy and flat damage bonus summed the way make_attack did before compiling"""
+    attack_type = ATTACK_TYPES[build.attack_type]
+    accuracy = tier + attack_type.accuracy_mod * tier
+    damage = tier
+    if not attack_type.is_direct:
+        damage += attack_type.damage_mod * tier
+    if build.attack_type == 'melee_ac':
+        accuracy += tier
+    if build.attack_type == 'melee_dg':
+        damage += tier
+    for upgrade_name in build.upgrades:
+        upgrade = UPGRADES[upgrade_name]
+        accuracy += upgrade.accuracy_mod * tier
+        damage += upgrade.damage_mod * tier
+        if upgrade_name in ['reliable_accuracy', 'armor_piercing']:
+            accuracy -= upgrade.accuracy_penalty
+        else:
+            accuracy -= upgrade.accuracy_penalty * tier
+        if upgrade_name == 'critical_effect':
+            damage -= upgrade.damage_penalty
+        else:
+            damage -= upgrade.damage_penalty * tier
+    for limit_name in build.limits:
+        accuracy += LIMITS[limit_name].damage_bonus * tier
+        damage += LIMITS[limit_name].damage_bonus * tier
+    return accuracy, damage
+
+
+def test_compiled_modifiers_match_reference():
+    """Test that the tier coefficients reproduce the per-upgrade sums for every attack type"""
+    print("Testing compiled modifiers...")
+    upgrade_sets = [[], ['power_attack', 'brutal'], ['critical_effect', 'reliable_accuracy'],
+                    ['armor_piercing', 'accurate_attack'], ['high_impact', 'channeled']]
+    limit_sets = [[], ['unreliable_2'], ['near_death', 'charges_1']]
+    for attack_type in ATTACK_TYPES:
+        for upgrades in upgrade_sets:
+            upgrades = [name for name in upgrades if name in UPGRADES]
+            for limits in limit_sets:
+                build = AttackBuild(attack_type, upgrades, limits)
+                compiled = build.compiled
+                for tier in (3, 4, 5):
+                    accuracy, damage = _reference_modifiers(build, tier)
+                    assert tier * compiled.accuracy_tier_coef - compiled.accuracy_flat_penalty == accuracy
+                    assert tier * compiled.damage_tier_coef - compiled.damage_flat_penalty == damage
+
+
+def test_compiled_flags_and_masks():
+    """Test dice modes, effect flags and bitmask membership"""
+    build = AttackBuild('melee_dg', ['critical_effect', 'bleed', 'finishing_blow_1', 'minion_slayer'],
+                        ['charge_up', 'slaughter'])
+    compiled = build.compiled
+    assert compiled.dice_mode == DICE_EXPLODE_5_6
+    assert compiled.crit_threshold == 20
+    assert compiled.hit_conditions == ('bleed', 'finishing_5')
+    assert compiled.slayer_target_hps == frozenset({10})
+    assert compiled.charge_up_turns == 1
+    assert [check[0] for check in compiled.limit_checks] == ['slaughter']
+    assert compiled.limit_checks[0][4]  # slaughter is action-based
+    assert compiled.has_upgrade('bleed') and not compiled.has_upgrade('brutal')
+    assert compiled.has_limit('charge_up') and not compiled.has_limit('charge_up_2')
+
+    assert AttackBuild('ranged', ['high_impact'], []).compiled.dice_mode == DICE_FLAT_15
+    assert AttackBuild('ranged', ['double_tap'], []).compiled.crit_threshold == 15
+    assert AttackBuild('ranged', [], []).compiled.dice_mode == DICE_EXPLODE_6
+
+    # Compiled form is cached and not pickled with the build
+    assert build.compiled is compiled
+    assert all(isinstance(arg, int) for arg in build.__reduce__()[1])
+    assert isinstance(CompiledBuild(build).limit_checks, tuple)
+
+
+def test_can_activate_limit_rules():
+    """Test the dispatch-table limit checks against the documented rules"""
+    print("Testing limit activation rules...")
+    state = {'charges_used': {'charges_1': 1}, 'dealt_damage_last_turn': True}
+    assert can_activate_limit('near_death', 1, 25, 100, state)
+    assert not can_activate_limit('near_death', 1, 26, 100, state)
+    assert not can_activate_limit('timid', 1, 99, 100, state)
+    assert not can_activate_limit('charges_1', 1, 100, 100, state)
+    assert can_activate_limit('charges_2', 1, 100, 100, state)
+    assert can_activate_limit('relentless', 1, 100, 100, state)
+    assert not can_activate_limit('passive', 1, 100, 100, state)
+    assert can_activate_limit('quickdraw', 2, 100, 100, state)
+    assert not can_activate_limit('quickdraw', 3, 100, 100, state)
+    assert not can_activate_limit('finale', 6, 100, 100, state)
+    assert not can_activate_limit('cooldown', 5, 100, 100, state, cooldown_history={'cooldown': 2})
+    assert can_activate_limit('cooldown', 6, 100, 100, state, cooldown_history={'cooldown': 2})
+    assert not can_activate_limit('charge_up_2', 3, 100, 100, state, charge_history=[False, True])
+    assert can_activate_limit('unreliable_3', 1, 100, 100, state)
+    assert can_activate_limit('not_a_limit', 1, 100, 100, state)
+
+
+def test_seeded_attacks_are_reproducible():
+    """Test that seeded make_attack sequences replay exactly"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=0, power=0, mobility=2, endurance=2, tier=4)
+    build = AttackBuild('melee_ac', ['reliable_accuracy', 'overhit'], ['unreliable_1'])
+
+    def run():
+        seed(11, 'compiled')
+        return [make_attack(attacker, defender, build, combat_state={}) for _ in range(200)]
+
+    first = run()
+    assert first == run()
+    assert any(damage > 0 for damage, _, _ in first)
+
+
+if __name__ == '__main__':
+    test_compiled_modifiers_match_reference()
+    test_compiled_flags_and_masks()
+    test_can_activate_limit_rules()
+    test_seeded_attacks_are_reproducible()
+    print("\nAll compiled build tests passed")
@@ -0,0 +1,98 @@
+"""Test script to verify exact dice tables and expected damage against Monte Carlo"""
+import sys
+import random
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild
+from src.combat import make_attack, roll_3d6_exploding
+from src.dice_tables import EXPLODING_3D6, EXPLODING_3D6_5_6, D20, D20_ADVANTAGE, TAIL_CUTOFF
+from src.damage_calculator import calculate_expected_damage, prob_damage_at_least
+
+
+def test_dice_table_moments():
+    """Test that the truncated tables keep the exact means and sum to 1"""
+    print("Testing dice table moments...")
+
+    # Exploding die mean: 3.5 / (1 - p_explode) per die
+    checks = [
+        (EXPLODING_3D6, 3 * 3.5 / (1 - 1 / 6)),
+        (EXPLODING_3D6_5_6, 3 * 3.5 / (1 - 2 / 6)),
+        (D20, 10.5),
+        (D20_ADVANTAGE, 13.825),
+    ]
+    for table, expected_mean in checks:
+        total = sum(table.probs)
+        print(f"  {table}: total probability {total:.15f}")
+        assert abs(total - 1.0) < 1e-9
+        assert abs(table.mean - expected_mean) < 1e-6
+
+    # Truncated tail is negligible
+    assert EXPLODING_3D6.prob_at_least(EXPLODING_3D6.max_value) < TAIL_CUTOFF * 100
+    assert EXPLODING_3D6.prob_at_least(3) == 1.0
+    # P(3d6 >= 18) without explosions is 1/216, explosions only add mass above 18
+    assert EXPLODING_3D6.prob_at_least(18) > 1 / 216
+
+
+def test_alias_sampler_matches_table():
+    """Test that the alias sampler and the per-die roller agree with the table"""
+    print("Testing alias sampler...")
+    rng = random.Random(1234)
+    samples = 200000
+
+    sampler = EXPLODING_3D6.sampler
+    sampled_mean = sum(sampler.sample(rng.random()) for _ in range(samples)) / samples
+    rolled_mean = sum(roll_3d6_exploding()[0] for _ in range(samples)) / samples
+    print(f"  Table mean {EXPLODING_3D6.mean:.3f}, sampled {sampled_mean:.3f}, rolled {rolled_mean:.3f}")
+
+    assert abs(sampled_mean - EXPLODING_3D6.mean) < 0.1
+    assert abs(rolled_mean - EXPLODING_3D6.mean) < 0.15
+
+
+def test_expected_damage_matches_simulation():
+    """Test that exact expected damage matches the mean of make_attack"""
+    print("Testing expected damage against make_attack...")
+    random.seed(42)
+
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    attacks = 40000
+
+    builds = [
+        AttackBuild('melee_dg', [], []),
+        AttackBuild('ranged', ['critical_effect', 'brutal'], []),
+        AttackBuild('melee_ac', ['reliable_accuracy', 'overhit'], ['unreliable_1']),
+        AttackBuild('ranged', ['powerful_critical', 'double_tap'], []),
+        AttackBuild('melee_dg', ['armor_piercing', 'high_impact'], []),
+        AttackBuild('direct_damage', [], []),
+    ]
+
+    for build in builds:
+        expected = calculate_expected_damage(attacker, build, defender, include_bleed=False)
+        total = 0
+        for _ in range(attacks):
+            damage, _, _ = make_attack(attacker, defender, build, combat_state={})
+            total += damage
+        simulated = total / attacks
+        print(f"  {build.attack_type} {build.upgrades} {build.limits}: exact {expected:.3f}, simulated {simulated:.3f}")
+        assert abs(simulated - expected) < max(0.35, expected * 0.03)
+
+
+def test_tail_probability():
+    """Test one-shot tail probability bounds"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    build = AttackBuild('melee_dg', [], [])
+
+    assert prob_damage_at_least(attacker, build, defender, 0) == 1.0
+    p10 = prob_damage_at_least(attacker, build, defender, 10)
+    p25 = prob_damage_at_least(attacker, build, defender, 25)
+    print(f"  P(damage >= 10) = {p10:.4f}, P(damage >= 25) = {p25:.4f}")
+    assert 0.0 < p25 < p10 < 1.0
+
+
+if __name__ == '__main__':
+    test_dice_table_moments()
+    test_alias_sampler_matches_table()
+    test_expected_damage_matches_simulation()
+    test_tail_probability()
+    print("\nAll dice table tests passed")
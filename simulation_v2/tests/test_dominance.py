@@ -0,0 +1,63 @@
+"""Test script to verify analytical dominance pruning"""
+import sys
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild
+from src.dice import seed_common
+from src.simulation import run_simulation_batch
+from src.build_enumerator import BuildEnumerator
+from src.dominance import DominanceAnalyzer, EQUIVALENT, WEAKER
+
+ATTACKER = Character(2, 2, 2, 2, 4)
+DEFENDER = Character(2, 2, 2, 2, 4)
+BOSS_ONLY = [{'name': 'Boss', 'num_enemies': 1, 'enemy_hp': 100}]
+
+
+def _turns(build, enemy_hp_list):
+    seed_common(11, 'dominance', 0)
+    results, _, _, _ = run_simulation_batch(ATTACKER, build, 40, 100, DEFENDER, enemy_hp_list=enemy_hp_list)
+    return results
+
+
+def test_equivalent_builds_simulate_identically():
+    """Test that builds dropped as equivalent give the same results as their sibling on common dice"""
+    print("Testing equivalent dominance rules...")
+    analyzer = DominanceAnalyzer(BOSS_ONLY, [DEFENDER])
+    for build in (AttackBuild('melee_dg', ['minion_slayer', 'power_attack'], ['quickdraw']),
+                  AttackBuild('direct_damage', ['brutal', 'bleed'], ['charge_up'])):
+        dominated = analyzer.dominating_sibling(build)
+        assert dominated.kind == EQUIVALENT and dominated.dominated_by.total_cost < build.total_cost
+        assert _turns(build, [100]) == _turns(dominated.dominated_by, [100])
+
+    # Slayers that can trigger, and brutal on rolled attacks, are kept
+    assert analyzer.dominating_sibling(AttackBuild('melee_dg', ['boss_slayer'], [])) is None
+    assert analyzer.dominating_sibling(AttackBuild('melee_dg', ['brutal'], [])) is None
+    assert DominanceAnalyzer(BOSS_ONLY + [{'name': 'Swarm', 'enemy_hp_list': [10, 10]}], [DEFENDER]) \
+        .dominating_sibling(AttackBuild('melee_dg', ['minion_slayer'], [])) is None
+
+
+def test_weaker_rule_and_audit():
+    """Test the splinter rule's preconditions and that prune() records every dropped build"""
+    analyzer = DominanceAnalyzer(BOSS_ONLY, [DEFENDER])
+    assert analyzer.dominating_sibling(AttackBuild('ranged', ['splinter'], ['finale'])).kind == WEAKER
+    # Extra attacks read the splinter condition; HP limits depend on how the fight goes
+    assert analyzer.dominating_sibling(AttackBuild('ranged', ['splinter', 'extra_attack'], [])) is None
+    assert analyzer.dominating_sibling(AttackBuild('ranged', ['splinter'], ['bloodied'])) is None
+    assert DominanceAnalyzer(BOSS_ONLY, [DEFENDER], allow_weaker=False) \
+        .dominating_sibling(AttackBuild('ranged', ['splinter'], [])) is None
+
+    builds = list(BuildEnumerator(6))
+    audit = []
+    kept = list(analyzer.prune(builds, audit))
+    print(f"  Dropped {len(audit)} of {len(builds)} builds")
+    assert len(kept) + len(audit) == len(builds) and audit
+    kept_set = set(kept)
+    for dominated in audit:
+        # Siblings are valid cheaper builds of the same space, and never dropped themselves
+        assert dominated.dominated_by.is_valid(6) and dominated.dominated_by in kept_set
+
+
+if __name__ == '__main__':
+    test_equivalent_builds_simulate_identically()
+    test_weaker_rule_and_audit()
+    print("\nAll dominance tests passed")
@@ -0,0 +1,78 @@
+"""Test script to verify the exact turns-to-kill solver against Monte Carlo simulation"""
+import sys
+import random
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild, MultiAttackBuild
+from src.simulation import run_simulation_batch
+from src.exact_solver import solve_turns_distribution, solve_or_simulate_batch, get_unsupported_reason
+
+
+def test_exact_matches_simulation():
+    """Test that exact mean turns match the simulated mean for solvable builds"""
+    print("Testing exact solver against simulation...")
+    random.seed(7)
+
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    runs = 1500
+
+    cases = [
+        (AttackBuild('melee_dg', [], []), [100]),
+        (AttackBuild('ranged', ['double_tap', 'powerful_critical'], ['unreliable_2']), [25, 25, 50]),
+        (AttackBuild('melee_ac', ['finishing_blow_1', 'extra_attack'], ['quickdraw']), [10] * 5),
+        (AttackBuild('melee_dg', ['brutal', 'critical_effect', 'bleed'], ['patient']), [100]),
+        (AttackBuild('area', ['culling_strike'], ['unreliable_1']), [100]),
+    ]
+
+    for build, hp_list in cases:
+        distribution = solve_turns_distribution(attacker, build, defender, enemy_hp_list=hp_list)
+        assert distribution is not None
+        total = sum(distribution.win_probabilities.values()) + distribution.timeout_probability
+        assert abs(total + distribution.truncated_mass - 1.0) < 1e-9
+
+        _, simulated, _, _ = run_simulation_batch(attacker, build, runs, 100, defender, enemy_hp_list=hp_list)
+        print(f"  {build.attack_type} {build.upgrades} {build.limits} vs {hp_list}: "
+              f"exact {distribution.mean_turns:.3f}, simulated {simulated:.3f}")
+        assert abs(simulated - distribution.mean_turns) < max(0.3, distribution.mean_turns * 0.04)
+
+
+def test_direct_damage_is_deterministic():
+    """Test that direct area damage gives the exact kill turn"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    build = AttackBuild('direct_area_damage', [], [])
+
+    distribution = solve_turns_distribution(attacker, build, defender, enemy_hp_list=[10] * 5)
+    _, simulated, _, _ = run_simulation_batch(attacker, build, 5, 100, defender, enemy_hp_list=[10] * 5)
+    print(f"  direct_area_damage vs 5x10: exact {distribution.mean_turns:.3f}, simulated {simulated:.3f}")
+    assert distribution.win_probabilities == {round(simulated): 1.0}
+
+
+def test_unsupported_builds_fall_back():
+    """Test that stateful builds are rejected and solve_or_simulate_batch still simulates them"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+
+    assert get_unsupported_reason(AttackBuild('melee_dg', [], ['charge_up']), 1) is not None
+    assert get_unsupported_reason(AttackBuild('ranged', ['splinter'], []), 3) is not None
+    assert get_unsupported_reason(AttackBuild('ranged', ['splinter'], []), 1) is None
+    assert get_unsupported_reason(MultiAttackBuild([AttackBuild('melee_dg', [], [])], 'dual_natured'), 1) is not None
+
+    build = AttackBuild('melee_dg', [], ['charge_up'])
+    assert solve_turns_distribution(attacker, build, defender) is None
+    results, avg_turns, _, _ = solve_or_simulate_batch(attacker, build, 5, 100, defender)
+    assert len(results) == 5 and avg_turns > 0
+
+    # Solved batches report the exact mean with no individual runs
+    results, avg_turns, dpt, outcome_stats = solve_or_simulate_batch(
+        attacker, AttackBuild('melee_dg', [], []), 5, 100, defender)
+    assert results == [] and outcome_stats["wins"] == 5
+    assert abs(dpt - 100 / avg_turns) < 1e-9
+
+
+if __name__ == '__main__':
+    test_exact_matches_simulation()
+    test_direct_damage_is_deterministic()
+    test_unsupported_builds_fall_back()
+    print("\nAll exact solver tests passed")
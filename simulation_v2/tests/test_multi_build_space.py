@@ -0,0 +1,49 @@
+"""Test script to verify the index-based MultiAttackBuild spaces"""
+import pickle
+import sys
+from itertools import combinations_with_replacement
+sys.path.insert(0, '..')
+
+from src.models import AttackBuild, MultiAttackBuild
+from src.build_enumerator import BuildEnumerator
+from src.multi_build_space import MultiBuildSpace
+
+
+def test_versatile_unranking_matches_itertools():
+    """Test that nth_ids, rank and ids() follow combinations_with_replacement order"""
+    print("Testing versatile master unranking...")
+    candidates = list(BuildEnumerator(2, ['melee_dg', 'ranged']))[:9]
+    for set_size in (1, 3, 5):
+        space = MultiBuildSpace.versatile_master(candidates, set_size)
+        expected = list(combinations_with_replacement(range(len(candidates)), set_size))
+        print(f"  set_size {set_size}: {space.count()} sets")
+        assert space.count() == len(space) == len(expected)
+        assert list(space.ids()) == expected
+        assert all(space.nth_ids(index) == ids and space.rank(ids) == index for index, ids in enumerate(expected))
+        # Ranges resume mid-space by unranking the start only
+        assert list(space.ids(17, 40)) == expected[17:40]
+        assert space[-1].builds == [candidates[-1]] * set_size
+
+    assert MultiBuildSpace.versatile_master([], 3).count() == 0
+
+
+def test_dual_natured_space_and_hashing():
+    """Test the dual natured pairing order and that built objects hash like eagerly created ones"""
+    primaries = list(BuildEnumerator(4, ['melee_dg']))[:5]
+    space = MultiBuildSpace.dual_natured(primaries, ['ranged', 'area'], 1)
+    expected = [MultiAttackBuild([primary, AttackBuild(fallback, [], [])], 'dual_natured', fallback, 1)
+                for primary in primaries for fallback in ['ranged', 'area']]
+    assert space.count() == len(expected)
+    assert list(space) == expected and space[3:7] == expected[3:7]
+    assert {hash(build) for build in space} == {hash(build) for build in expected}
+
+    # The cached hash is not carried into another process
+    build = space.nth(4)
+    hash(build)
+    assert pickle.loads(pickle.dumps(build))._hash is None
+
+
+if __name__ == '__main__':
+    test_versatile_unranking_matches_itertools()
+    test_dual_natured_space_and_hashing()
+    print("\nAll multi build space tests passed")
@@ -0,0 +1,72 @@
+"""Test script to verify statistical racing against a fixed elimination schedule"""
+import sys
+import numpy as np
+sys.path.insert(0, '..')
+
+from core.config import ProgressiveEliminationRound
+from core.racing import RaceStats, race_builds, fixed_schedule_runs
+
+
+def test_running_stats_match_numpy():
+    """Test that batch-merged running mean/variance match a one-shot computation"""
+    rng = np.random.default_rng(1)
+    samples = rng.normal(8, 3, 50)
+    dpt = samples * 2
+    stats = RaceStats()
+    for batch in (slice(0, 2), slice(2, 5), slice(5, 50)):
+        stats.add(samples[batch], dpt=float(dpt[batch].mean()))
+    assert stats.runs == 50 and stats.batches == 3
+    assert abs(stats.mean - samples.mean()) < 1e-9
+    assert abs(stats.dpt - dpt.mean()) < 1e-9
+    assert abs(stats.variance - samples.var(ddof=1)) < 1e-9
+
+
+def test_race_finds_top_builds_with_fewer_runs():
+    """Test that racing separates the true top-K while spending less than the fixed schedule"""
+    print("Testing racing budget...")
+    rng = np.random.default_rng(2)
+    true_means = np.linspace(5, 15, 200)
+    builds = list(rng.permutation(len(true_means)))
+    runs_per_build = {}
+
+    def sample_build(build, runs, batch_index):
+        runs_per_build[build] = runs_per_build.get(build, 0) + runs
+        return rng.normal(true_means[build], 1.0, runs), False, 0.0
+
+    rounds = [ProgressiveEliminationRound(5, 0.2), ProgressiveEliminationRound(-1, 1.0)]
+    fixed = fixed_schedule_runs(len(builds), rounds, 10)
+    assert fixed == 200 * 5 + 40 * 10
+
+    stats, summary = race_builds(builds, sample_build, 40, initial_runs=2, batch_runs=3, max_runs=30,
+                                 final_runs=10, fixed_runs=fixed)
+    print(f"  {summary.runs_used} runs vs {summary.fixed_schedule_runs} fixed ({summary.percent_saved:.1f}% saved)")
+    assert summary.runs_used == sum(runs_per_build.values()) < fixed
+
+    ranked = [build for _, build in sorted(zip([s.mean for s in stats], builds))]
+    assert len(set(ranked[:40]) & set(range(40))) >= 36
+
+    # Clearly dominated builds stop after the first batch; kept builds reach final_runs
+    assert max(runs_per_build[build] for build in range(150, 200)) <= 5
+    assert all(runs_per_build[build] >= 10 for build in ranked[:40])
+
+
+def test_exact_builds_are_not_resampled():
+    """Test that exactly solved builds are sampled once"""
+    calls = []
+
+    def sample_build(build, runs, batch_index):
+        calls.append(build)
+        return np.full(runs, float(build)), True, 2.0 * build
+
+    stats, summary = race_builds(list(range(10)), sample_build, 3, initial_runs=2, batch_runs=3, max_runs=30,
+                                 final_runs=10)
+    assert sorted(calls) == list(range(10)) and summary.iterations == 0
+    assert [s.mean for s in stats] == [float(b) for b in range(10)]
+    assert [s.dpt for s in stats] == [2.0 * b for b in range(10)]
+
+
+if __name__ == '__main__':
+    test_running_stats_match_numpy()
+    test_race_finds_top_builds_with_fewer_runs()
+    test_exact_builds_are_not_resampled()
+    print("\nAll racing tests passed")
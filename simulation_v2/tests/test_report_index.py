@@ -0,0 +1,152 @@
+"""Test script to verify the single-pass report aggregation index"""
+import statistics
+import sys
+import tempfile
+from collections import Counter
+from itertools import combinations
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.build_enumerator import BuildEnumerator
+from src.multi_build_space import MultiBuildSpace
+from src.result_columns import write_result_columns, ResultColumns
+from core.report_index import MembershipMatrix, ReportIndex, exact_mean, sorted_median
+
+
+def _results(builds, seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct turn values, so ties check that the rank keeps build order
+    return [(build, float(rng.random()), float(rng.integers(3, 9)) + float(rng.integers(0, 3)) / 3)
+            for build in builds]
+
+
+def _attacks(build):
+    return getattr(build, 'builds', [build])
+
+
+def _check_index(index, ranked):
+    """Compare the index with statistics computed directly from the ranked results"""
+    turns = [avg_turns for _, _, avg_turns in ranked]
+    assert index.total == len(ranked) and index.turns.tolist() == turns
+    assert index.median() == statistics.median(turns)
+
+    for fraction in (0.01, 0.1, 0.5, 1.0):
+        top = index.tier_count(fraction)
+        assert index.median(top) == statistics.median(turns[:top])
+
+        for name, occurrences in index.enhancements.items():
+            in_top = [(slot, attack.attack_type, avg_turns)
+                      for build, _, avg_turns in ranked[:top]
+                      for slot, attack in enumerate(_attacks(build))
+                      if name in attack.upgrades or name in attack.limits]
+            assert occurrences.count(top) == len(in_top)
+            assert occurrences.turns_in(top).tolist() == [t for _, _, t in in_top]
+            assert occurrences.turns_sum(top) == sum(t for _, _, t in in_top)
+            assert occurrences.slot_count(1, top) == sum(1 for slot, _, _ in in_top if slot == 1)
+            assert occurrences.attack_type_turns_in('area', top).tolist() == [
+                t for _, attack_type, t in in_top if attack_type == 'area']
+
+    # Membership: each enhancement once per build (primary attack only for dual_natured)
+    primary_only = any(getattr(build, 'fallback_type', None) for build, _, _ in ranked)
+    assert index.primary_only == primary_only
+    for membership, slots in ((index.membership, None), (index.primary_membership, 1 if primary_only else None)):
+        sets = [{name for attack in _attacks(build)[:slots] for name in attack.upgrades + attack.limits}
+                for build, _, _ in ranked]
+        names = membership.names
+        assert set(names) == set().union(*sets)
+        for top in (0, 1, 63, 64, 65, len(ranked) // 3, len(ranked), len(ranked) + 5):
+            matrix = np.array([[name in enhancement_set for name in names] for enhancement_set in sets[:top]],
+                              dtype=np.int64).reshape(-1, len(names))
+            assert membership.counts(top).tolist() == matrix.sum(axis=0).tolist()
+            assert np.array_equal(membership.co_occurrence(top), matrix.T @ matrix)
+            for column in (0, len(names) - 1):
+                assert membership.count(names[column], top) == matrix[:, column].sum()
+                assert membership.partner_counts(names[column], top).tolist() == (
+                    matrix * matrix[:, [column]]).sum(axis=0).tolist()
+            assert membership.count_any(names[1:3], top, within=names[0]) == int(
+                (matrix[:, 1:3].any(axis=1) & (matrix[:, 0] == 1)).sum())
+
+    sets = [frozenset(name for attack in _attacks(build) for name in attack.upgrades + attack.limits)
+            for build, _, _ in ranked]
+    for start, stop in ((0, 10), (0, len(ranked)), (len(ranked) // 2, len(ranked)), (5, 40)):
+        assert index.unique_sets(start, stop) == len(set(sets[start:stop]))
+
+    expected = Counter()
+    for enhancement_set in sets[:50]:
+        for size in (2, 3):
+            expected.update(combinations(sorted(enhancement_set), size))
+    assert index.combination_counts(50) == expected
+
+
+def _check_usage(index, ranked):
+    """Compare combat usage sums with the builds' own usage percentages, skipping builds without usage"""
+    for name, enhancement in index.enhancements.items():
+        usages = [build.get_attack_usage_percentages() for build, _, _ in ranked
+                  for attack in _attacks(build)
+                  if getattr(build, 'attack_usage_counts', None) and (name in attack.upgrades or name in attack.limits)]
+        assert enhancement.usage_count == len(usages)
+        assert enhancement.usage_totals == [sum(usage[0] for usage in usages), sum(usage[1] for usage in usages)]
+
+
+def test_exact_mean_and_median():
+    """Test that exact_mean and sorted_median match the statistics module"""
+    print("Testing exact_mean and sorted_median...")
+    rng = np.random.default_rng(1)
+    for values in ([3.0], [0.1, 0.2, 0.3], (rng.random(1001) * 40).tolist(),
+                   rng.integers(3, 30, 500).astype(float).tolist()):
+        assert exact_mean(values) == statistics.mean(values)
+        assert exact_mean(np.array(values)) == statistics.mean(values)
+        assert sorted_median(np.sort(values)) == statistics.median(values)
+
+
+def test_membership_popcount_fallback():
+    """Test the membership matrix without np.bitwise_count (NumPy < 2.0)"""
+    print("Testing MembershipMatrix popcount fallback...")
+    rng = np.random.default_rng(5)
+    matrix = rng.random((300, 6)) < 0.4
+    membership = MembershipMatrix(list('abcdef'), [np.flatnonzero(column) for column in matrix.T], 300)
+    expected = (matrix[:130].T.astype(np.int64) @ matrix[:130].astype(np.int64))
+
+    bitwise_count = getattr(np, 'bitwise_count', None)
+    if bitwise_count is not None:
+        del np.bitwise_count
+    try:
+        assert membership.counts(130).tolist() == matrix[:130].sum(axis=0).tolist()
+        assert np.array_equal(membership.co_occurrence(130), expected)
+        assert np.array_equal(MembershipMatrix(membership.names, membership.rows, 300).words, membership.words)
+    finally:
+        if bitwise_count is not None:
+            np.bitwise_count = bitwise_count
+
+
+def test_index_matches_results():
+    """Test the index of focused and dual_natured results, from a list and from result columns"""
+    focused = list(BuildEnumerator(4, ['melee_dg', 'area']))
+    dual = list(MultiBuildSpace.dual_natured(focused[:40], ['melee_dg', 'area'], tier_bonus=2))
+
+    # Every third dual_natured build has no recorded usage
+    for build_id, build in enumerate(dual):
+        if build_id % 3:
+            build.attack_usage_counts = {0: build_id % 7, 1: build_id % 5 + 1}
+
+    for archetype, builds in (('focused', focused), ('dual_natured', dual)):
+        print(f"Testing {archetype} ({len(builds)} builds)...")
+        results = _results(builds, 7)
+        ranked = sorted(results, key=lambda x: x[2])
+        _check_index(ReportIndex(results), ranked)
+        _check_usage(ReportIndex(results), ranked)
+
+        with tempfile.TemporaryDirectory() as directory:
+            write_result_columns(directory, results, archetype, ['Boss'])
+            index = ReportIndex(ResultColumns(directory).ranked())
+            _check_index(index, ranked)
+            _check_usage(index, ranked)
+            assert list(index.enhancements) == list(ReportIndex(results).enhancements)
+
+
+if __name__ == '__main__':
+    test_exact_mean_and_median()
+    test_membership_popcount_fallback()
+    test_index_matches_results()
+    print("\nAll report index tests passed")
@@ -0,0 +1,101 @@
+"""Test script to verify the persistent simulation result cache"""
+import os
+import sys
+import tempfile
+from multiprocessing import Pool
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild
+from src.dice import seed, seed_common
+from src.exact_solver import solve_or_simulate_batch
+from src.result_cache import ResultCache, result_key, open_result_cache, get_result_cache, close_result_cache
+
+ATTACKER = Character(2, 2, 2, 2, 4)
+DEFENDER = Character(2, 2, 2, 2, 4)
+# Charge up is history-dependent, so these batches are always simulated
+BUILD = AttackBuild('melee_dg', ['power_attack'], ['charge_up'])
+
+
+def _simulate(build, enemy_hp_list, runs=20):
+    return solve_or_simulate_batch(ATTACKER, build, runs, 100, DEFENDER, enemy_hp_list=enemy_hp_list,
+                                   archetype='focused', use_batch_engine=False)
+
+
+def _read_key(args):
+    path, key = args
+    return ResultCache(path).get(key)[1]
+
+
+def test_keys_are_canonical():
+    """Test that keys ignore upgrade order but change with every simulation input"""
+    inputs = {'attacker': ATTACKER, 'runs': 10, 'enemy_hp_list': [25, 25, 50]}
+    key = result_key(BUILD, inputs, (7,))
+    assert key == result_key(AttackBuild('melee_dg', ['power_attack'], ['charge_up']), dict(inputs), (7,))
+    assert key == result_key(AttackBuild('melee_dg', ['power_attack'], ['charge_up']),
+                             {'enemy_hp_list': [25, 25, 50], 'runs': 10, 'attacker': ATTACKER}, (7,))
+    assert key != result_key(BUILD, dict(inputs, runs=11), (7,))
+    assert key != result_key(BUILD, dict(inputs, attacker=Character(2, 2, 2, 2, 5)), (7,))
+    assert key != result_key(BUILD, inputs, (8,))
+    assert key != result_key(BUILD, inputs, None)
+
+
+def test_cached_batches_do_not_depend_on_call_order():
+    """Test that seeded batches give the same results cold, warm and in a different order"""
+    print("Testing cache reproducibility...")
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            cache = open_result_cache(os.path.join(directory, 'cold.sqlite'))
+            seed(5, 'focused', BUILD)
+            cold = [_simulate(BUILD, [100]), _simulate(BUILD, [25, 25, 50])]
+            assert cache.misses == 2 and cache.hits == 0 and len(cache) == 2
+
+            seed(5, 'focused', BUILD)
+            warm = [_simulate(BUILD, [100]), _simulate(BUILD, [25, 25, 50])]
+            assert cache.hits == 2 and warm == cold
+            assert len(cold[0][0]) == 20 and sum(cold[0][3].values()) > 0
+
+            # A fresh cache filled in the opposite order stores the same batches
+            open_result_cache(os.path.join(directory, 'reversed.sqlite'))
+            seed(5, 'focused', BUILD)
+            reversed_order = [_simulate(BUILD, [25, 25, 50]), _simulate(BUILD, [100])]
+            assert reversed_order[::-1] == cold
+
+            # Common random numbers: different builds replay the same substream
+            other = AttackBuild('melee_dg', ['power_attack', 'armor_piercing'], ['charge_up'])
+            seed_common(5, 'focused', 0)
+            common_a = _simulate(BUILD, [100])
+            seed_common(5, 'focused', 0)
+            common_b = _simulate(other, [100])
+            seed_common(5, 'focused', 0)
+            assert _simulate(BUILD, [100]) == common_a
+            assert get_result_cache().hits == 1 and common_a != common_b
+        finally:
+            close_result_cache()
+
+
+def test_eviction_and_concurrent_reads():
+    """Test that LRU eviction bounds the cache and pool workers can read it concurrently"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results.sqlite')
+        cache = ResultCache(path, max_size_mb=0.25)
+        turns = list(range(1, 501))
+        for index in range(200):
+            cache.put(f'key{index}', (turns, float(index), 1.0, {'wins': 500}))
+        cache.get('key0')  # Recently used - survives eviction
+        removed = cache.evict()
+        print(f"  Evicted {removed} of 200 entries")
+        assert removed > 0 and cache.size_bytes() <= 0.25 * 1024 * 1024
+        assert cache.get('key0') is not None and cache.get('key1') is None
+
+        kept = [f'key{index}' for index in range(199, 190, -1)]
+        with Pool(2) as pool:
+            values = pool.map(_read_key, [(path, key) for key in kept])
+        assert values == [float(index) for index in range(199, 190, -1)]
+        cache.close()
+
+
+if __name__ == '__main__':
+    test_keys_are_canonical()
+    test_cached_batches_do_not_depend_on_call_order()
+    test_eviction_and_concurrent_reads()
+    print("\nAll result cache tests passed")
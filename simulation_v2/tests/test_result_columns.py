@@ -0,0 +1,90 @@
+"""Test script to verify the columnar, memory-mapped result format"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.build_enumerator import BuildEnumerator
+from src.multi_build_space import MultiBuildSpace
+from src.result_columns import write_result_columns, ResultColumns
+
+
+def _results(builds, seed):
+    rng = np.random.default_rng(seed)
+    # Few distinct turn values, so ties check that the rank keeps build order
+    return [(build, float(rng.random()), float(rng.integers(3, 9))) for build in builds]
+
+
+def test_round_trip_and_rank():
+    """Test that focused and dual_natured results read back as the sorted results list"""
+    focused = list(BuildEnumerator(4, ['melee_dg', 'area']))
+    dual = MultiBuildSpace.dual_natured(focused[:50], ['melee_dg', 'area'], tier_bonus=2)
+
+    dual_builds = list(dual)
+    for build_id, build in enumerate(dual_builds):
+        if build_id % 2:
+            build.attack_usage_counts = {0: build_id, 1: 3}
+
+    for archetype, builds in (('focused', focused), ('dual_natured', dual_builds)):
+        print(f"Testing {archetype} ({len(builds)} builds)...")
+        results = _results(builds, 3)
+        scenario_turns = np.random.default_rng(4).random((len(results), 2))
+        outcomes = np.arange(len(results) * 3).reshape(-1, 3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            write_result_columns(directory, results, archetype, ['Boss', 'Swarm'],
+                                 scenario_turns=scenario_turns, outcome_counts=outcomes)
+            columns = ResultColumns(directory)
+            ranked = columns.ranked()
+            expected = sorted(results, key=lambda x: x[2])
+
+            assert len(ranked) == len(results) and columns.scenario_names == ['Boss', 'Swarm']
+            assert list(ranked) == expected
+            assert ranked[:7] == expected[:7] and ranked[-1] == expected[-1]
+            assert ranked[5][0] == expected[5][0]
+            assert np.array_equal(ranked.column('avg_turns'), [turns for _, _, turns in expected])
+            assert np.allclose(columns.column('scenario_turns'), scenario_turns)
+            assert np.array_equal(columns.column('outcomes'), outcomes)
+            assert isinstance(columns.column('avg_dpt'), np.memmap)
+
+            # One dictionary entry per distinct attack, not per row
+            assert len(columns.column('builds')) == len({attack for build, _, _ in results
+                                                         for attack in getattr(build, 'builds', [build])})
+            if archetype == 'dual_natured':
+                build = columns.build(0)
+                assert build.fallback_type == results[0][0].fallback_type and build.tier_bonus == 2
+                # Attack usage counts come back as recorded, and not at all for builds without usage
+                assert [build.attack_usage_counts for build, _, _ in ranked] == [
+                    build.attack_usage_counts for build, _, _ in expected]
+                assert columns.usage([0, 1]) == [(0, 0), (1, 3)]
+            else:
+                assert not columns.has_column('usage') and columns.usage([0, 1]) == [None, None]
+
+
+def test_optional_and_incomplete():
+    """Test columns written without per-scenario data and a directory without meta.json"""
+    results = _results(list(BuildEnumerator(2, ['melee_dg'])), 5)
+    with tempfile.TemporaryDirectory() as directory:
+        write_result_columns(directory, results, 'focused', ['Boss'])
+        columns = ResultColumns(directory)
+        assert not columns.has_column('scenario_turns')
+        try:
+            columns.column('outcomes')
+            assert False, "missing column should raise"
+        except KeyError:
+            pass
+
+        os.remove(os.path.join(directory, 'meta.json'))
+        try:
+            ResultColumns(directory)
+            assert False, "incomplete directory should raise"
+        except FileNotFoundError:
+            pass
+
+
+if __name__ == '__main__':
+    test_round_trip_and_rank()
+    test_optional_and_incomplete()
+    print("\nAll result columns tests passed")
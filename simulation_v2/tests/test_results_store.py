@@ -0,0 +1,123 @@
+"""Test script to verify the durable, resumable build results store"""
+import os
+import sys
+import tempfile
+from dataclasses import replace
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.models import AttackBuild, MultiAttackBuild
+from src.results_store import ResultsStore, run_key
+from core.config import SimConfigV2
+from core.build_tester import BuildTester
+
+BUILDS = [AttackBuild('melee_dg', [], []), AttackBuild('ranged', ['power_attack'], []),
+          AttackBuild('area', [], ['charge_up'])]
+
+
+def test_store_rows_and_run_keys():
+    """Test that rows are kept per run and only reused for the same build"""
+    print("Testing results store...")
+    assert run_key({'runs': 5, 'tier': 4}) == run_key({'tier': 4, 'runs': 5}) != run_key({'runs': 6, 'tier': 4})
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results.sqlite')
+        store = ResultsStore(path, 'run-a')
+        store.begin('focused', len(BUILDS))
+        store.append([(0, BUILDS[0], 1.5, 9.0, [8.0, 10.0], (3, 0, 1)),
+                      (2, BUILDS[2], 2.5, 7.0, [6.0, 8.0], (4, 0, 0))])
+        assert store.missing(BUILDS) == [1]
+        assert ResultsStore(path, 'run-b').missing(BUILDS) == [0, 1, 2]
+
+        # A different build at a stored ID is not reused
+        assert store.missing([BUILDS[1], BUILDS[1], BUILDS[2]]) == [0, 1]
+
+        store.append([(1, BUILDS[1], 3.0, 6.0, [5.0, 7.0], (4, 0, 0))])
+        store.close()
+        reopened = ResultsStore(path, 'run-a')
+        assert len(reopened) == 3
+        # Read back in build order, in batches
+        batches = list(reopened.batches(BUILDS, batch_size=2))
+        assert [len(batch[0]) for batch in batches] == [2, 1]
+        builds, avg_dpt, avg_turns, scenario_turns, outcome_counts = (
+            [value for batch in batches for value in batch[column]] for column in range(5))
+        assert builds == BUILDS and avg_dpt == [1.5, 3.0, 2.5] and avg_turns == [9.0, 6.0, 7.0]
+        assert [turns.tolist() for turns in scenario_turns] == [[8.0, 10.0], [5.0, 7.0], [6.0, 8.0]]
+        assert [counts.tolist() for counts in outcome_counts] == [[3, 0, 1], [4, 0, 0], [4, 0, 0]]
+        try:
+            list(reopened.batches(BUILDS + [BUILDS[0]]))
+            assert False, "a build without a result should raise"
+        except KeyError:
+            pass
+
+        # Attack usage of multi-attack builds comes back on freshly created builds
+        def dual():
+            return MultiAttackBuild([BUILDS[0], BUILDS[1]], 'dual_natured', fallback_type='ranged')
+
+        tested = dual()
+        tested.attack_usage_counts = {0: 7, 1: 2}
+        reopened.append([(3, tested, 1.0, 5.0, [4.0, 6.0], (4, 0, 0))])
+        restored = [build for batch in reopened.batches(BUILDS + [dual()]) for build in batch[0]]
+        assert restored[3].attack_usage_counts == {0: 7, 1: 2}
+        reopened.clear()
+        assert len(reopened) == 0
+        reopened.close()
+
+
+def test_interrupted_run_resumes():
+    """Test that a crashed BuildTester run keeps finished builds and resumes with the rest"""
+    base = SimConfigV2.load()
+    with tempfile.TemporaryDirectory() as directory:
+        config = replace(base, random_seed=9, simulation_runs=3, use_gpu=False, use_threading=False,
+                         build_chunk_size=4, attack_types=['melee_dg'])
+        config.scenarios = base.scenarios[:1]
+        config.progressive_elimination = replace(base.progressive_elimination, enabled=False)
+        config.racing = replace(base.racing, enabled=False)
+        config.surrogate = replace(base.surrogate, enabled=False)
+        config.results_store = replace(base.results_store, enabled=True,
+                                       path=os.path.join(directory, 'results.sqlite'))
+
+        expected = BuildTester(replace(config, results_store=replace(config.results_store, enabled=False)),
+                               'focused')
+        expected.max_points = 1
+        expected_results = list(expected.test_all_builds(os.path.join(directory, 'expected')))
+
+        crashing = BuildTester(config, 'focused')
+        crashing.max_points = 1
+        tested = []
+        original = crashing._test_build_per_scenario
+
+        def crash_after_five(build, *args):
+            if len(tested) == 5:
+                raise KeyboardInterrupt
+            tested.append(build)
+            return original(build, *args)
+
+        crashing._test_build_per_scenario = crash_after_five
+        try:
+            crashing.test_all_builds(os.path.join(directory, 'crashed'))
+            assert False, "the run should have been interrupted"
+        except KeyboardInterrupt:
+            pass
+
+        resumed = BuildTester(config, 'focused')
+        resumed.max_points = 1
+        retested = []
+        original = resumed._test_build_per_scenario
+        resumed._test_build_per_scenario = lambda build, *args: retested.append(build) or original(build, *args)
+        results = resumed.test_all_builds(os.path.join(directory, 'resumed'))
+
+        print(f"  {len(tested)} builds before the crash, {len(retested)} after")
+        assert len(retested) == len(expected_results) - 5
+        assert not set(tested) & set(retested)
+        assert list(results) == expected_results
+        scenario_turns = results.columns.column('scenario_turns')
+        assert scenario_turns.shape == (len(results), 1)
+        assert np.allclose(scenario_turns[:, 0], results.columns.column('avg_turns'))
+
+
+if __name__ == '__main__':
+    test_store_rows_and_run_keys()
+    test_interrupted_run_resumes()
+    print("\nAll results store tests passed")
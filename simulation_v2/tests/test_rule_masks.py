@@ -0,0 +1,59 @@
+"""Test script to verify the compiled bitmask rule tables against RuleValidator's string path"""
+import random
+import sys
+from itertools import combinations
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.models import AttackBuild
+from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS, ATTACK_TYPE_IDS, UPGRADE_BITS, LIMIT_BITS, RuleValidator
+
+
+def _candidates():
+    """Every attack type with up to 2 upgrades and 1 limit, up to 1 upgrade and 2 limits, and random triples"""
+    upgrade_sets = [names for count in range(3) for names in combinations(UPGRADES, count)]
+    limit_sets = [names for count in range(3) for names in combinations(LIMITS, count)]
+    rng = random.Random(7)
+    for attack_type in ATTACK_TYPES:
+        for upgrades in upgrade_sets:
+            for limits in limit_sets:
+                if len(upgrades) + len(limits) <= 3:
+                    yield attack_type, upgrades, limits
+        for _ in range(2000):
+            yield attack_type, tuple(rng.sample(list(UPGRADES), 3)), tuple(rng.sample(list(LIMITS), 2))
+
+
+def test_mask_paths_match_string_validator():
+    """Test that is_valid_mask and validate_masks agree with validate_combination"""
+    print("Testing compiled rule tables...")
+    candidates = list(_candidates())
+    expected = np.array([RuleValidator.validate_combination(t, list(u), list(l))[0] for t, u, l in candidates])
+
+    type_ids = np.array([ATTACK_TYPE_IDS[t] for t, _, _ in candidates])
+    upgrade_masks = np.array([sum(UPGRADE_BITS[name] for name in u) for _, u, _ in candidates], dtype=np.uint64)
+    limit_masks = np.array([sum(LIMIT_BITS[name] for name in l) for _, _, l in candidates], dtype=np.uint64)
+
+    batch = RuleValidator.validate_masks(type_ids, upgrade_masks, limit_masks)
+    print(f"  {len(candidates)} candidates, {int(expected.sum())} valid")
+    assert np.array_equal(batch, expected)
+    assert all(RuleValidator.is_valid_mask(int(t), int(u), int(l)) == e
+               for t, u, l, e in zip(type_ids, upgrade_masks, limit_masks, expected))
+
+
+def test_attack_build_uses_both_paths():
+    """Test that AttackBuild.is_valid matches the string errors, including names outside game_data"""
+    build = AttackBuild('area', ['double_tap'], ['quickdraw', 'patient'])
+    assert not build.is_valid(20)
+    assert len(build.get_rule_errors()) == 3  # Error strings stay available for diagnostics
+    assert AttackBuild('melee_dg', ['power_attack'], ['quickdraw']).is_valid(20)
+
+    # Unknown names cannot be masked and take the string path
+    assert AttackBuild('ranged', ['homebrew_upgrade'], []).is_valid(20)
+    assert not AttackBuild('area', ['homebrew_upgrade', 'ricochet'], []).is_valid(20)
+
+
+if __name__ == '__main__':
+    test_mask_paths_match_string_validator()
+    test_attack_build_uses_both_paths()
+    print("\nAll rule mask tests passed")
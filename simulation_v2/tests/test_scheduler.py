@@ -0,0 +1,131 @@
+"""Test script to verify balanced scheduling of build x scenario work units"""
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from multiprocessing import Pool
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.scheduler import TaskScheduler, CostModel, WorkUnit, scenario_cost_key, scenario_cost_prior
+from src.models import AttackBuild, MultiAttackBuild
+from core.config import SimConfigV2, ScenarioConfig
+from src.result_columns import ResultColumns
+from src.build_enumerator import BuildEnumerator
+from src.multi_build_space import MultiBuildSpace
+from core.build_tester import BuildTester
+
+
+def _sleep_worker(args):
+    """Sleeps for each unit's cost and returns its (task, part)"""
+    results = []
+    for task, part, cost in args:
+        time.sleep(cost)
+        results.append(((task, part), cost))
+    return results
+
+
+def test_cost_model_and_scheduler():
+    """Test learned costs, longest-first grains and per-task reassembly"""
+    print("Testing cost model...")
+    model = CostModel(prior=lambda key: {'slow': 10.0, 'fast': 1.0, 'new': 4.0}[key])
+    assert model.estimate('slow') == 10.0
+    assert model.observe('fast', 0.002) and not model.observe('fast', 0.004)
+    assert abs(model.estimate('fast') - 0.003) < 1e-12
+    # Unseen keys keep their prior ratio, rescaled to observed seconds
+    assert abs(model.estimate('new') - 4.0 * 0.006 / 2.0) < 1e-12
+    assert model.keys_learned == 1
+
+    print("Testing scheduler...")
+    costs = {'slow': 0.02, 'fast': 0.001}
+    units = [WorkUnit(task, part, 'slow' if (task + part) % 5 == 0 else 'fast')
+             for task in range(12) for part in range(3)]
+    scheduler = TaskScheduler(workers=2, cost_model=CostModel(prior=lambda key: costs[key] * 1000))
+    first_grains = []
+
+    def make_args(grain):
+        first_grains.append([unit.cost_key for unit in grain])
+        return [(unit.task, unit.part, costs[unit.cost_key]) for unit in grain]
+
+    with Pool(processes=2) as pool:
+        completed = dict(scheduler.run(pool, _sleep_worker, units, make_args,
+                                       lambda task, values: values, parts_per_task=3))
+
+    assert completed == {task: [(task, part) for part in range(3)] for task in range(12)}
+    assert first_grains[0][0] == 'slow' and first_grains[-1] == ['fast']
+    assert sum(len(grain) for grain in first_grains) == len(units)
+    assert scheduler.grains_dispatched == len(first_grains) < len(units)
+    assert scheduler.cost_model.keys_learned == 2
+
+    # Multi-attack builds key on all their attack types; area attacks cost more a priori
+    prior = scenario_cost_prior([ScenarioConfig('Swarm', enemy_hp_list=[25, 25, 25, 25])])
+    multi = MultiAttackBuild([AttackBuild('area', [], []), AttackBuild('melee_dg', [], [])], 'versatile_master')
+    assert scenario_cost_key(multi, 0) == (0, ('area', 'melee_dg'))
+    assert prior(scenario_cost_key(multi, 0)) == 4 * prior(scenario_cost_key(AttackBuild('ranged', [], []), 0))
+
+
+def test_scheduled_parallel_matches_sequential():
+    """Test that scheduled units and whole-build index tasks reproduce the sequential results"""
+    base = SimConfigV2.load()
+    for common_random_numbers, scheduled in ((False, True), (True, True), (False, False)):
+        config = replace(base, random_seed=5, common_random_numbers=common_random_numbers, simulation_runs=3,
+                         use_gpu=False, use_exact_solver=False, build_chunk_size=7,
+                         attack_types=['melee_dg', 'area'])
+        config.scenarios = base.scenarios[:2]
+        config.scheduler = replace(base.scheduler, enabled=scheduled)
+        config.progressive_elimination = replace(base.progressive_elimination, enabled=False)
+        config.racing = replace(base.racing, enabled=False)
+        config.surrogate = replace(base.surrogate, enabled=False)
+        config.result_cache = replace(base.result_cache, enabled=False)
+
+        tester = BuildTester(config, 'focused')
+        tester.max_points = 1
+        sequential = replace(config, use_threading=False)
+        expected = BuildTester(sequential, 'focused')
+        expected.max_points = 1
+
+        config.use_threading = True
+        with tempfile.TemporaryDirectory() as directory:
+            results = tester.test_all_builds(os.path.join(directory, 'parallel'))
+            expected_results = expected.test_all_builds(os.path.join(directory, 'sequential'))
+            print(f"  CRN={common_random_numbers}, scheduler={scheduled}: {len(results)} builds")
+            assert list(results) == list(expected_results)
+            for name in ('scenario_turns', 'outcomes'):
+                assert np.array_equal(results.columns.column(name), expected_results.columns.column(name))
+            assert results.columns.column('scenario_turns').shape == (len(results), 2)
+
+
+def test_parallel_keeps_attack_usage():
+    """Test that attack usage recorded in pool workers reaches the parent's multi-attack builds"""
+    base = SimConfigV2.load()
+    focused = list(BuildEnumerator(2, ['melee_dg', 'area']))
+    for scheduled in (True, False):
+        config = replace(base, random_seed=5, simulation_runs=3, use_gpu=False, use_exact_solver=False,
+                         build_chunk_size=4, attack_types=['melee_dg', 'area'])
+        config.scenarios = base.scenarios[:2]
+        config.scheduler = replace(base.scheduler, enabled=scheduled)
+        config.result_cache = replace(base.result_cache, enabled=False)
+        config.results_store = replace(base.results_store, enabled=False)
+
+        usage = {}
+        for use_threading in (False, True):
+            # An index space creates fresh builds on every access, so usage must come back through the store
+            builds = MultiBuildSpace.dual_natured(focused[:4], ['melee_dg', 'area'], tier_bonus=2)
+            tester = BuildTester(replace(config, use_threading=use_threading), 'dual_natured')
+            with tempfile.TemporaryDirectory() as directory:
+                tester._test_builds_stored(builds, directory)
+                columns = ResultColumns(directory)
+                usage[use_threading] = [build.attack_usage_counts for build in columns.builds(range(len(columns)))]
+
+        print(f"  scheduler={scheduled}: {len(usage[True])} dual_natured builds")
+        assert all(sum(counts.values()) > 0 for counts in usage[False])
+        assert usage[True] == usage[False]
+
+
+if __name__ == '__main__':
+    test_cost_model_and_scheduler()
+    test_scheduled_parallel_matches_sequential()
+    test_parallel_keeps_attack_usage()
+    print("\nAll scheduler tests passed")
@@ -0,0 +1,78 @@
+"""Test script to verify the streaming top-K and quantile sketch summaries"""
+import sys
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.streaming_stats import TopK, TDigest
+
+
+def _rank_error(sorted_values, estimate, q):
+    """Distance between q and the share of values below the estimate (ties count half)"""
+    below = np.searchsorted(sorted_values, estimate, side='left')
+    at_or_below = np.searchsorted(sorted_values, estimate, side='right')
+    low, high = below / len(sorted_values), at_or_below / len(sorted_values)
+    return 0.0 if low <= q <= high else min(abs(low - q), abs(high - q))
+
+
+def test_top_k():
+    """Test that TopK keeps the first k of a stable sort, in any arrival order"""
+    print("Testing TopK...")
+    rng = np.random.default_rng(2)
+    keys = rng.integers(0, 20, 500).tolist()
+    expected = sorted(range(len(keys)), key=lambda i: keys[i])[:25]
+
+    in_order = TopK(25)
+    for i, key in enumerate(keys):
+        in_order.push(key, i)
+    assert in_order.sorted() == expected
+    assert in_order.threshold() == keys[expected[-1]]
+
+    shuffled, left, right = TopK(25), TopK(25), TopK(25)
+    for i in rng.permutation(len(keys)).tolist():
+        shuffled.push(keys[i], i, order=i)
+        (left if i % 2 else right).push(keys[i], i, order=i)
+    assert shuffled.sorted() == expected
+    assert left.merge(right).sorted() == expected
+    assert TopK(5).threshold() == float('inf')
+
+
+def test_tdigest_quantiles():
+    """Test t-digest quantile accuracy, tails and merging against exact quantiles"""
+    rng = np.random.default_rng(3)
+    for name, values in (('uniform', rng.random(100000)),
+                         ('lognormal', rng.lognormal(2, 0.6, 150000)),
+                         ('discrete', rng.integers(3, 30, 50000).astype(float)),
+                         ('small', rng.random(9))):
+        print(f"Testing TDigest ({name})...")
+        digest = TDigest()
+        digest.update(values.tolist())
+        ordered = np.sort(values)
+
+        def accurate(estimate, q):
+            if name == 'discrete':
+                # Interpolated between neighbouring values
+                return abs(estimate - np.quantile(values, q)) <= 1
+            return _rank_error(ordered, estimate, q) < (0.005 if len(values) > 100 else 0.1)
+
+        assert digest.count == len(values) and digest.min == ordered[0] and digest.max == ordered[-1]
+        assert abs(digest.mean - values.mean()) < 1e-9 * max(1.0, abs(values.mean()))
+        assert len(digest._means) <= digest.compression / 2 + 1
+        for q in (0.001, 0.01, 0.05, 0.25, 0.5, 0.9, 0.99):
+            assert accurate(digest.quantile(q), q), q
+
+        # Digests of parts merge into a digest of the whole
+        parts = [TDigest() for _ in range(3)]
+        for index, value in enumerate(values.tolist()):
+            parts[index % 3].add(value)
+        merged = TDigest().merge(parts[0]).merge(parts[1]).merge(parts[2])
+        assert merged.count == len(values)
+        assert accurate(merged.median(), 0.5) and accurate(merged.quantile(0.01), 0.01)
+
+    assert np.isnan(TDigest().median())
+
+
+if __name__ == '__main__':
+    test_top_k()
+    test_tdigest_quantiles()
+    print("\nAll streaming stats tests passed")
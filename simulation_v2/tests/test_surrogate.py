@@ -0,0 +1,87 @@
+"""Test script to verify surrogate pre-screening of builds"""
+import sys
+import tempfile
+sys.path.insert(0, '..')
+
+import numpy as np
+
+from src.models import Character
+from src.build_enumerator import BuildEnumerator
+from src.surrogate import FeatureEncoder, SurrogateScreen, BoostedTreeSurrogate, RidgeSurrogate
+from core.config import SimConfigV2
+from core.build_tester import BuildTester
+
+ATTACKER = Character(2, 2, 2, 2, 4)
+DEFENDER = Character(2, 2, 2, 2, 4)
+SCENARIOS = [{'name': 'Boss', 'num_enemies': 1, 'enemy_hp': 100},
+             {'name': 'Swarm', 'enemy_hp_list': [25, 10, 10]}]
+
+
+def _synthetic_turns(build):
+    """Turns driven by a limit interaction (like two limits that rarely activate together)"""
+    limits = set(build.limits)
+    boss = 10 + build.total_cost - 3 * ('power_attack' in build.upgrades)
+    if {'passive', 'timid'} <= limits:
+        boss = 100
+    return [boss, boss / 2]
+
+
+def test_models_and_screen():
+    """Test that the models learn an interaction and the screen splits builds as configured"""
+    print("Testing surrogate models...")
+    builds = list(BuildEnumerator(6, ['melee_dg', 'area']))
+    encoder = FeatureEncoder(ATTACKER, [DEFENDER], SCENARIOS)
+    features = encoder.encode(builds[:800])
+    turns = np.array([_synthetic_turns(build) for build in builds[:800]])
+    assert features.shape == (800, encoder.num_features)
+
+    for model in (BoostedTreeSurrogate(), RidgeSurrogate()):
+        predicted = model.fit(features[:600], turns[:600]).predict(features[600:])
+        error = np.abs(np.log(predicted) - np.log(turns[600:])).mean()
+        print(f"  {type(model).__name__}: mean |log error| {error:.3f}")
+        assert predicted.shape == (200, 2) and error < 0.3
+
+    screen = SurrogateScreen(encoder, keep_fraction=0.2, explore_fraction=0.05, train_size=300, seed=3)
+    result = screen.run(builds, lambda train: np.array([_synthetic_turns(build) for build in train]))
+    others = len(builds) - 300
+    assert len(result.kept_indices) == int(np.ceil(others * 0.2))
+    assert len(result.explore_indices) == round(others * 0.05)
+    assert len(set(result.tested_indices.tolist())) == len(result.tested_indices)
+    assert result.calibration.screened_out == len(builds) - len(result.tested_indices)
+    print(f"  {result.calibration.summary()}")
+    assert result.calibration.spearman > 0.8
+
+    # Same seed, same screen
+    again = screen.run(builds, lambda train: np.array([_synthetic_turns(build) for build in train]))
+    assert np.array_equal(result.tested_indices, again.tested_indices)
+
+
+def test_build_tester_screening():
+    """Test that BuildTester simulates only the screened builds and records exploration calibration"""
+    config = SimConfigV2.load()
+    config.attack_types = ['melee_dg']
+    config.scenarios = config.scenarios[:1]
+    config.simulation_runs = 2
+    config.random_seed = 4
+    config.use_threading = False
+    config.progressive_elimination.enabled = False
+    config.racing.enabled = False
+    config.surrogate.enabled = True
+    config.surrogate.train_size = 40
+    config.surrogate.train_runs = 2
+    config.surrogate.explore_fraction = 0.1
+
+    tester = BuildTester(config, 'focused')
+    tester.max_points = 2
+    with tempfile.TemporaryDirectory() as directory:
+        results = tester.test_all_builds(directory)
+        total = BuildEnumerator(2, ['melee_dg']).count()
+        calibration = tester.surrogate_screen.calibration
+        assert len(results) == total - calibration.screened_out < total
+    assert calibration.explored == len(tester.surrogate_explored) > 0
+
+
+if __name__ == '__main__':
+    test_models_and_screen()
+    test_build_tester_screening()
+    print("\nAll surrogate tests passed")
@@ -0,0 +1,97 @@
+"""Test script to verify structured combat tracing"""
+import sys
+import io
+sys.path.insert(0, '..')
+
+from src.models import Character, AttackBuild
+from src.combat import make_attack, split_exploding_total
+from src.simulation import simulate_combat_verbose
+from src.tracer import (CombatTracer, as_tracer, render_event, EVENT_TEXT, EVENT_ROLL,
+                        EVENT_DAMAGE, EVENT_LIMIT, EVENT_ATTACK)
+from src.dice import seed
+
+
+def test_ring_buffer_keeps_latest_events():
+    """Test that the tracer buffer is bounded and keeps the most recent events"""
+    tracer = CombatTracer(capacity=3)
+    for i in range(5):
+        tracer.write(f"line {i}\n")
+    assert len(tracer.events) == 3
+    assert tracer.render() == "line 2\nline 3\nline 4\n"
+    assert as_tracer(None) is None
+    assert as_tracer(tracer) is tracer
+
+
+def test_traced_attack_records_typed_events():
+    """Test that a traced attack records typed events that render to the log text"""
+    print("Testing traced attack events...")
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=0, power=0, mobility=0, endurance=0, tier=4)
+    build = AttackBuild('melee_ac', ['reliable_accuracy'], ['unreliable_1'])
+
+    seed(21)
+    sink = io.StringIO()
+    tracer = CombatTracer(sink=sink)
+    for _ in range(20):
+        make_attack(attacker, defender, build, log_file=tracer)
+
+    # The sink receives exactly the rendered events
+    assert sink.getvalue() == tracer.render()
+    assert tracer.of_kind(EVENT_ATTACK)
+    assert tracer.of_kind(EVENT_LIMIT)
+    assert any(code == 'accuracy' for _, code, _ in tracer.of_kind(EVENT_ROLL))
+    assert any(code == 'total_damage' for _, code, _ in tracer.of_kind(EVENT_DAMAGE))
+    assert "Reliable Accuracy: rolled" in sink.getvalue()
+
+    # Accuracy breakdowns are recorded as parts and joined when rendered
+    accuracy_event = next(event for event in tracer.events if event[1] == 'accuracy')
+    assert isinstance(accuracy_event[2][0], tuple)
+    assert render_event(accuracy_event).startswith("      Accuracy: ")
+
+
+def test_combat_log_rendered_from_events():
+    """Test that a verbose combat log is written through the tracer"""
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    build = AttackBuild('area', ['bleed'], ['charge_up'])
+
+    seed(5)
+    sink = io.StringIO()
+    tracer = CombatTracer(sink=sink, capacity=100000)
+    simulate_combat_verbose(attacker, build, 100, log_file=tracer, defender=defender,
+                            num_enemies=3, enemy_hp=25)
+    assert sink.getvalue() == tracer.render()
+    assert "COMBAT SIMULATION - DETAILED ANALYSIS" in sink.getvalue()
+    assert tracer.of_kind(EVENT_TEXT) and tracer.of_kind(EVENT_DAMAGE)
+
+
+def test_traced_combat_replays_untraced():
+    """Test that a seeded traced combat draws the same dice as the untraced run"""
+    print("Testing traced replay...")
+    attacker = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    defender = Character(focus=2, power=2, mobility=2, endurance=2, tier=4)
+    for build in (AttackBuild('melee_dg', ['power_attack'], []), AttackBuild('area', ['bleed'], ['charge_up']),
+                  AttackBuild('ranged', ['critical_effect', 'brutal'], ['unreliable_1'])):
+        for run_seed in range(10):
+            seed(run_seed)
+            untraced = simulate_combat_verbose(attacker, build, 100, defender=defender, num_enemies=3, enemy_hp=25)
+            seed(run_seed)
+            traced = simulate_combat_verbose(attacker, build, 100, log_file=CombatTracer(capacity=10),
+                                             defender=defender, num_enemies=3, enemy_hp=25)
+            assert traced == untraced
+
+    # Logged dice are a valid roll of the drawn total
+    for explode_on in (6, 5):
+        for total in range(3, 60):
+            dice = [[int(face) for face in die.split('+')] for die in split_exploding_total(total, explode_on)]
+            assert len(dice) == 3 and sum(map(sum, dice)) == total
+            assert all(explode_on <= face <= 6 for die in dice for face in die[:-1])
+            assert all(1 <= die[-1] < explode_on for die in dice)
+
+
+if __name__ == '__main__':
+    test_ring_buffer_keeps_latest_events()
+    test_traced_attack_records_typed_events()
+    test_combat_log_rendered_from_events()
+    test_traced_combat_replays_untraced()
+    print("\nAll tracer tests passed")
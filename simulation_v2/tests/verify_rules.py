@@ -7,9 +7,12 @@ in the codebase (game_data.py, combat.py, simulation.py).
 
 import sys
 from typing import List, Tuple, Dict
-from src.game_data import ATTACK_TYPES, UPGRADES, LIMITS, MUTUAL_EXCLUSIONS, ATTACK_TYPE_RESTRICTIONS, AOE_RESTRICTIONS
-from src.models import Character, AttackBuild
+from itertools import combinations
+from src.game_data import (ATTACK_TYPES, UPGRADES, LIMITS, MUTUAL_EXCLUSIONS, ATTACK_TYPE_RESTRICTIONS, AOE_RESTRICTIONS,
+                           ATTACK_TYPE_IDS, UPGRADE_BITS, LIMIT_BITS, RuleValidator)
+from src.models import Character, AttackBuild, CombatState
 from src.combat import make_attack, can_activate_limit
+from src.compiled_build import LIMIT_RULES, LIMIT_PREDICATES, LIMIT_DC, LIMIT_TURN_MIN, limit_rule
 
 
 class RuleVerifier:
@@ -198,64 +201,43 @@ def verify_limit_activation(verifier: RuleVerifier):
     """Verify limit activation conditions are implemented"""
     print("\n[VERIFYING] Limit Activation Logic...")
 
-    # Read combat.py to check which limits are implemented
-    import os
-    combat_file = os.path.join(os.path.dirname(__file__), 'src', 'combat.py')
-    with open(combat_file, 'r') as f:
-        combat_code = f.read()
-
-    # Check for each limit's activation check
-    # Note: unreliable_1, unreliable_2, unreliable_3 are implemented via DC system (not explicit name checks)
+    # Check each limit has an activation rule with a predicate in the compiled rule tables
+    # Note: unreliable_1, unreliable_2, unreliable_3 are implemented via DC system (LIMIT_DC rules)
     limits_to_check = [
-        ('near_death', 'near_death'),
-        ('bloodied', 'bloodied'),
-        ('timid', 'timid'),
-        # ('attrition', 'attrition'),  # Removed from simulation
-        ('charges_1', 'charges_1'),
-        ('charges_2', 'charges_2'),
-        ('slaughter', 'slaughter'),
-        ('relentless', 'relentless'),
-        ('combo_move', 'combo_move'),
-        ('revenge', 'revenge'),
-        ('vengeful', 'vengeful'),
-        ('untouchable', 'untouchable'),
-        ('unbreakable', 'unbreakable'),
-        ('passive', 'passive'),
-        ('careful', 'careful'),
-        ('quickdraw', 'quickdraw'),
-        ('patient', 'patient'),
-        ('finale', 'finale'),
-        ('charge_up', 'charge_up'),
-        ('charge_up_2', 'charge_up_2'),
-        ('cooldown', 'cooldown'),
+        'near_death', 'bloodied', 'timid',
+        # 'attrition',  # Removed from simulation
+        'charges_1', 'charges_2',
+        'slaughter', 'relentless', 'combo_move',
+        'revenge', 'vengeful', 'untouchable', 'unbreakable', 'passive', 'careful',
+        'quickdraw', 'patient', 'finale',
+        'charge_up', 'charge_up_2', 'cooldown',
     ]
 
-    for limit_display, limit_search in limits_to_check:
-        # Check if limit is mentioned in combat.py
-        if f"'{limit_search}'" in combat_code or f'"{limit_search}"' in combat_code:
-            verifier.check(f"Limit '{limit_display}' activation implemented", True, "implemented", "implemented")
+    for limit_name in limits_to_check:
+        if limit_name in LIMIT_RULES and LIMIT_RULES[limit_name][0] in LIMIT_PREDICATES:
+            verifier.check(f"Limit '{limit_name}' activation implemented", True, "implemented", "implemented")
         else:
-            verifier.failed.append(f"[FAIL] Limit '{limit_display}' activation NOT IMPLEMENTED in combat.py")
+            verifier.failed.append(f"[FAIL] Limit '{limit_name}' activation NOT IMPLEMENTED in LIMIT_RULES")
+
+    for limit_name in ('unreliable_1', 'unreliable_2', 'unreliable_3'):
+        kind, dc, _ = limit_rule(limit_name)
+        verifier.check(f"Limit '{limit_name}' activation implemented",
+                       kind == LIMIT_DC and dc == LIMITS[limit_name].dc,
+                       f"DC {LIMITS[limit_name].dc} roll", f"rule kind {kind}, DC {dc}")
 
 
 def verify_finale_turn_number(verifier: RuleVerifier):
     """Verify finale limit requires Turn 7+"""
     print("\n[VERIFYING] Finale Turn Number...")
 
-    import os
-    combat_file = os.path.join(os.path.dirname(__file__), 'src', 'combat.py')
-    with open(combat_file, 'r') as f:
-        combat_lines = f.readlines()
-
-    # Find the finale check
-    for i, line in enumerate(combat_lines):
-        if 'finale' in line.lower() and 'turn_number' in line:
-            # Check the condition
-            if 'turn_number < 7' in line:
-                verifier.check("Finale requires Turn 7+", True, "Turn 7+", "Turn 7+ (code checks < 7)")
-            elif 'turn_number < 8' in line:
-                verifier.failed.append(f"[FAIL] Finale turn check: RULES.md says 'Turn 7+' but code line {i+1} checks 'turn_number < 8'")
-            break
+    kind, min_turn, _ = limit_rule('finale')
+    verifier.check("Finale requires Turn 7+", kind == LIMIT_TURN_MIN and min_turn == 7,
+                   "Turn 7+", f"rule kind {kind}, turn {min_turn}+")
+
+    # And the activation check applies it: not on turn 6, from turn 7 on
+    activates = [can_activate_limit('finale', turn, 100, 100, CombatState()) for turn in (6, 7, 8)]
+    verifier.check("Finale activates from Turn 7", activates == [False, True, True],
+                   "[False, True, True] on turns 6-8", str(activates))
 
 
 def verify_mutual_exclusions(verifier: RuleVerifier):
@@ -324,6 +306,28 @@ def verify_aoe_restrictions(verifier: RuleVerifier):
         verifier.warn(f"Unexpected AOE restrictions found: {unexpected}")
 
 
+def verify_compiled_rule_tables(verifier: RuleVerifier):
+    """Verify the bitmask rule tables accept exactly what the string validator accepts"""
+    print("\n[VERIFYING] Compiled Rule Tables...")
+
+    # Every pair of enhancements (upgrade or limit) on every attack type
+    options = [(name, True) for name in UPGRADES] + [(name, False) for name in LIMITS]
+    for attack_type in ATTACK_TYPES:
+        mismatches = []
+        for count in (1, 2):
+            for combo in combinations(options, count):
+                upgrades = [name for name, is_upgrade in combo if is_upgrade]
+                limits = [name for name, is_upgrade in combo if not is_upgrade]
+                expected, _ = RuleValidator.validate_combination(attack_type, upgrades, limits)
+                actual = RuleValidator.is_valid_mask(ATTACK_TYPE_IDS[attack_type],
+                                                     sum(UPGRADE_BITS[name] for name in upgrades),
+                                                     sum(LIMIT_BITS[name] for name in limits))
+                if actual != expected:
+                    mismatches.append('+'.join(upgrades + limits))
+        verifier.check(f"Compiled rules match validator for {attack_type}",
+                       not mismatches, "no mismatches", ', '.join(mismatches[:5]))
+
+
 def verify_aoe_cost_multiplier(verifier: RuleVerifier):
     """Verify AOE attacks pay 2× for upgrades and limits"""
     print("\n[VERIFYING] AOE Cost Multiplier...")
@@ -705,6 +709,7 @@ def main():
     print("="*80)
     verify_mutual_exclusions(verifier)
     verify_aoe_restrictions(verifier)
+    verify_compiled_rule_tables(verifier)
     verify_aoe_cost_multiplier(verifier)
 
     print("\n" + "="*80)
@@ -15,6 +15,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulation_v2'
 
 from src.models import Character, AttackBuild
 from src.combat import make_attack, make_aoe_attack
+from src.result_cache import get_result_cache
 from typing import List, Tuple
 from dataclasses import dataclass
 
@@ -122,7 +123,7 @@ def make_aoe_attack_with_buffs(
     attacker: Character,
     defender: Character,
     build: AttackBuild,
-    alive_enemies: List[Tuple[int, dict]],
+    alive_enemies: List[Tuple[int, int]],
     buff_config: BuffConfig,
     **kwargs
 ) -> Tuple[List[Tuple[int, int, List[str]]], int]:
@@ -133,7 +134,7 @@ def make_aoe_attack_with_buffs(
         attacker: Attacking character
         defender: Defending character (template for all enemies)
         build: Attack build to use
-        alive_enemies: List of (index, enemy_dict) tuples
+        alive_enemies: List of (index, enemy_max_hp) tuples (EnemyGroup.targets())
         buff_config: Passive buff configuration
         **kwargs: Additional arguments passed to make_aoe_attack
 
@@ -224,6 +225,8 @@ def run_simulation_batch_with_buffs(
     """
     Run multiple combat simulations with buffs and return aggregate results.
 
+    Batches go through the shared Simulation V2 result cache when one is open.
+
     Args:
         attacker: Attacking character
         defender: Defending character (template)
@@ -238,6 +241,27 @@ def run_simulation_batch_with_buffs(
     Returns:
         Tuple of (individual_results, avg_turns, dpt, outcome_stats)
     """
+    cache = get_result_cache()
+    if cache is None:
+        return _run_simulation_batch_with_buffs(attacker, defender, build, buff_config, num_runs,
+                                                num_enemies, enemy_hp, enemy_hp_list, max_turns)
+
+    # The buff name and description do not affect combat, so they stay out of the key
+    inputs = {
+        'engine': 'v3_buffs', 'attacker': attacker, 'defender': defender,
+        'buffs': [buff_config.attacker_accuracy_bonus, buff_config.attacker_damage_bonus,
+                  buff_config.defender_avoidance_bonus, buff_config.defender_durability_bonus],
+        'runs': num_runs, 'num_enemies': num_enemies, 'enemy_hp': enemy_hp,
+        'enemy_hp_list': enemy_hp_list, 'max_turns': max_turns
+    }
+    return cache.get_or_compute(build, inputs, lambda: _run_simulation_batch_with_buffs(
+        attacker, defender, build, buff_config, num_runs, num_enemies, enemy_hp, enemy_hp_list, max_turns
+    ))
+
+
+def _run_simulation_batch_with_buffs(attacker, defender, build, buff_config, num_runs,
+                                     num_enemies, enemy_hp, enemy_hp_list, max_turns):
+    """Uncached run_simulation_batch_with_buffs"""
     results = []
     outcomes = {"win": 0, "loss": 0, "timeout": 0}
 
@@ -19,12 +19,17 @@ from datetime import datetime
 from typing import List, Dict, Tuple
 from collections import defaultdict
 import statistics
+import numpy as np
 
 # Add parent simulation directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulation_v2'))
 
 from src.models import Character, AttackBuild
-from src.build_generator import generate_valid_builds_chunked
+from src.build_generator import generate_valid_builds_chunked, sample_valid_builds
+from src.result_cache import open_result_cache, get_result_cache, close_result_cache
+from src.dominance import DominanceAnalyzer, write_dominance_audit
+from src.surrogate import FeatureEncoder, SurrogateScreen, write_surrogate_calibration
+from src.scheduler import TaskScheduler, CostModel, WorkUnit, scenario_cost_key, scenario_cost_prior
 from combat_with_buffs import BuffConfig, run_simulation_batch_with_buffs
 from enhancement_report import generate_enhancement_report
 from cost_analysis_report import generate_cost_analysis_report
@@ -43,6 +48,10 @@ def _test_attack_worker(args):
     result = AttackTestResult(attack)
     attacker = Character(*config_dict['attacker_stats'])
 
+    # Spawned workers (Windows) do not inherit the parent's open cache
+    if config_dict['result_cache_path']:
+        open_result_cache(config_dict['result_cache_path'], config_dict['result_cache_max_size_mb'])
+
     for profile in config_dict['defensive_profiles']:
         defender = Character(*profile['stats'])
 
@@ -73,6 +82,86 @@ def _test_attack_worker(args):
     return result
 
 
+def _test_attack_units_worker(args):
+    """
+    Worker function for scheduled parallel testing (see simulation_v2/src/scheduler.py).
+
+    Args:
+        args: (config_dict, [(attack, profile_index, buff_index, scenario_index), ...])
+
+    Returns:
+        (avg_turns, seconds) per unit, in order
+    """
+    config_dict, units = args
+
+    from combat_with_buffs import BuffConfig
+    from src.models import Character
+
+    if config_dict['result_cache_path']:
+        open_result_cache(config_dict['result_cache_path'], config_dict['result_cache_max_size_mb'])
+
+    attacker = Character(*config_dict['attacker_stats'])
+    defenders = {}
+    buff_configs = {}
+    results = []
+    for attack, profile_index, buff_index, scenario_index in units:
+        start = time.perf_counter()
+        if profile_index not in defenders:
+            defenders[profile_index] = Character(*config_dict['defensive_profiles'][profile_index]['stats'])
+        if buff_index not in buff_configs:
+            buff_configs[buff_index] = BuffConfig.from_dict(config_dict['buff_configs'][buff_index])
+        scenario = config_dict['scenarios'][scenario_index]
+
+        _, avg_turns, _, _ = run_simulation_batch_with_buffs(
+            attacker=attacker,
+            defender=defenders[profile_index],
+            build=attack,
+            buff_config=buff_configs[buff_index],
+            num_runs=config_dict['simulation_runs'],
+            num_enemies=scenario.get('num_enemies', 1),
+            enemy_hp=scenario.get('enemy_hp', 100),
+            enemy_hp_list=scenario.get('enemy_hp_list'),
+            max_turns=100
+        )
+        results.append((avg_turns, time.perf_counter() - start))
+    return results
+
+
+def _run_scheduled_chunk(pool, scheduler: TaskScheduler, chunk: List[AttackBuild], config_dict: dict) -> List['AttackTestResult']:
+    """
+    Test a chunk of attacks as attack x profile x buff x scenario units.
+
+    Returns:
+        AttackTestResult per attack, in chunk order (results added in _test_attack_worker's order)
+    """
+    cells = [(profile_index, buff_index, scenario_index)
+             for profile_index in range(len(config_dict['defensive_profiles']))
+             for buff_index in range(len(config_dict['buff_configs']))
+             for scenario_index in range(len(config_dict['scenarios']))]
+    units = [WorkUnit(task, part, scenario_cost_key(attack, cell[2]))
+             for task, attack in enumerate(chunk) for part, cell in enumerate(cells)]
+
+    def make_args(grain):
+        return config_dict, [(chunk[unit.task], *cells[unit.part]) for unit in grain]
+
+    def combine(task, values):
+        result = AttackTestResult(chunk[task])
+        for (profile_index, buff_index, scenario_index), avg_turns in zip(cells, values):
+            result.add_result(
+                config_dict['defensive_profiles'][profile_index]['name'],
+                config_dict['buff_configs'][buff_index]['name'],
+                config_dict['scenarios'][scenario_index]['name'],
+                avg_turns
+            )
+        result.calculate_aggregates()
+        return result
+
+    chunk_results = [None] * len(chunk)
+    for task, result in scheduler.run(pool, _test_attack_units_worker, units, make_args, combine, len(cells)):
+        chunk_results[task] = result
+    return chunk_results
+
+
 class Stage1Config:
     """Configuration for Stage 1 pruning."""
 
@@ -97,11 +186,41 @@ class Stage1Config:
         self.pruning_strategy = stage1.get('pruning_strategy', 'overall_only')
         self.enhancement_percent = stage1.get('enhancement_percent', 0.01)
 
+        # Optional seeded sample of the attack space (None = test every attack)
+        self.sample_percent = stage1.get('sample_percent', None)
+        self.sample_stratify = stage1.get('sample_stratify', None)  # None, "attack_type" or "upgrade_count"
+        self.sample_seed = stage1.get('sample_seed', None)
+
+        # Drop attacks that are provably never better than a cheaper sibling
+        self.dominance_pruning = stage1.get('dominance_pruning', False)
+
+        # Surrogate pre-screening: simulate a training sample, fully test only the predicted top
+        surrogate = stage1.get('surrogate', {})
+        self.surrogate_enabled = surrogate.get('enabled', False)
+        self.surrogate_model = surrogate.get('model', 'boosted')  # "boosted" or "ridge"
+        self.surrogate_train_size = surrogate.get('train_size', 500)
+        self.surrogate_keep_fraction = surrogate.get('keep_fraction', 0.3)
+        self.surrogate_explore_fraction = surrogate.get('explore_fraction', 0.05)
+        self.surrogate_seed = surrogate.get('seed', None)
+
         # Performance settings
         perf = data.get('performance', {})
         self.use_threading = perf.get('use_threading', False)
         self.num_workers = perf.get('num_workers', 0)  # 0 = auto (CPU count)
         self.chunk_size = perf.get('chunk_size', 500)
+        # Split attacks into profile x buff x scenario units balanced across workers
+        self.balanced_scheduling = perf.get('balanced_scheduling', True)
+        self.grains_per_worker = perf.get('grains_per_worker', 4)
+
+        # Result cache shared with Simulation V2 (None = disabled)
+        cache = data.get('result_cache', {})
+        self.result_cache_path = None
+        if cache.get('enabled', False):
+            self.result_cache_path = os.path.join(
+                os.path.dirname(os.path.abspath(config_path)),
+                cache.get('path', '../simulation_v2/cache/simulation_results.sqlite')
+            )
+        self.result_cache_max_size_mb = cache.get('max_size_mb', 512)
 
         # Character config
         self.attacker_stats = data['character_config']['attacker']
@@ -181,12 +300,13 @@ class AttackTestResult:
             self.specialization_variance = 0.0
 
 
-def generate_all_attacks(config: Stage1Config) -> List[AttackBuild]:
+def generate_all_attacks(config: Stage1Config, dominance_audit: list = None) -> List[AttackBuild]:
     """
     Generate all valid attack builds for the configured points budget.
 
     Args:
         config: Stage 1 configuration
+        dominance_audit: Optional list receiving the attacks dropped by dominance pruning
 
     Returns:
         List of all valid AttackBuild objects
@@ -194,11 +314,31 @@ def generate_all_attacks(config: Stage1Config) -> List[AttackBuild]:
     print(f"\n=== Generating Attacks ===")
     print(f"  Points per attack: {config.points_per_attack}")
 
-    attacks = list(generate_valid_builds_chunked(
-        max_points=config.points_per_attack,
-        attack_types=None,  # All attack types
-        chunk_size=10000
-    ))
+    if config.sample_percent is not None:
+        # Unranked straight from the build space - the full list is never built
+        print(f"  Sampling {config.sample_percent * 100:.1f}% of attacks (seed {config.sample_seed})")
+        attacks = list(sample_valid_builds(
+            max_points=config.points_per_attack,
+            attack_types=None,  # All attack types
+            fraction=config.sample_percent,
+            seed=config.sample_seed,
+            stratify=config.sample_stratify
+        ))
+    else:
+        attacks = list(generate_valid_builds_chunked(
+            max_points=config.points_per_attack,
+            attack_types=None,  # All attack types
+            chunk_size=10000
+        ))
+
+    if config.dominance_pruning:
+        # Equivalent rules only: the survivors are paired in Stage 2
+        defenders = [Character(*profile['stats']) for profile in config.defensive_profiles]
+        analyzer = DominanceAnalyzer(config.scenarios, defenders, allow_weaker=False)
+        audit = dominance_audit if dominance_audit is not None else []
+        generated = len(attacks)
+        attacks = list(analyzer.prune(attacks, audit))
+        print(f"  Dominance pruning dropped {generated - len(attacks):,} attacks")
 
     print(f"  Generated {len(attacks):,} valid attacks")
     return attacks
@@ -284,6 +424,8 @@ def test_all_attacks_parallel(
         'buff_configs': [bc.__dict__ for bc in config.buff_configs],
         'scenarios': config.scenarios,
         'simulation_runs': config.simulation_runs,
+        'result_cache_path': config.result_cache_path,
+        'result_cache_max_size_mb': config.result_cache_max_size_mb,
     }
 
     # Prepare work items
@@ -303,12 +445,20 @@ def test_all_attacks_parallel(
     print(f"  Using disk-based storage: {temp_dir}")
     print(f"  Memory dump interval: every {disk_dump_interval} chunks")
 
+    # Unit costs are learned across all chunks
+    scheduler = None
+    if config.balanced_scheduling:
+        scheduler = TaskScheduler(num_workers, CostModel(scenario_cost_prior(config.scenarios)),
+                                  grains_per_worker=config.grains_per_worker)
+
     with multiprocessing.Pool(processes=num_workers) as pool:
         chunk_size = config.chunk_size
         for chunk_idx, i in enumerate(range(0, len(work_items), chunk_size)):
             chunk_start = time.time()
-            chunk = work_items[i:i + chunk_size]
-            chunk_results = pool.map(_test_attack_worker, chunk)
+            if scheduler is not None:
+                chunk_results = _run_scheduled_chunk(pool, scheduler, attacks[i:i + chunk_size], config_dict)
+            else:
+                chunk_results = pool.map(_test_attack_worker, work_items[i:i + chunk_size])
             results_buffer.extend(chunk_results)
 
             # Free chunk memory
@@ -472,6 +622,56 @@ def test_all_attacks(
     return results
 
 
+def screen_attacks_with_surrogate(
+    attacks: List[AttackBuild],
+    config: Stage1Config
+) -> Tuple[List[AttackTestResult], List[AttackBuild], object, List[AttackBuild]]:
+    """
+    Test a training sample of attacks and pick the rest worth testing from surrogate predictions.
+
+    The model predicts every (profile, buff, scenario) average, so the training results
+    are regular Stage 1 results and are not tested again.
+
+    Args:
+        attacks: All attacks
+        config: Stage 1 configuration
+
+    Returns:
+        Tuple of (training results, attacks still to test, ScreenResult, exploration attacks)
+    """
+    print(f"\n=== Surrogate Screening ===")
+    defenders = [Character(*profile['stats']) for profile in config.defensive_profiles]
+    keys = [(profile['name'], buff_config.name, scenario['name'])
+            for profile in config.defensive_profiles
+            for buff_config in config.buff_configs
+            for scenario in config.scenarios]
+    screen = SurrogateScreen(
+        FeatureEncoder(Character(*config.attacker_stats), defenders, config.scenarios),
+        keep_fraction=config.surrogate_keep_fraction,
+        explore_fraction=config.surrogate_explore_fraction,
+        train_size=config.surrogate_train_size,
+        model=config.surrogate_model,
+        top_fraction=config.top_percent,
+        seed=config.surrogate_seed
+    )
+
+    train_results = []
+
+    def simulate(train_attacks):
+        train_results.extend(test_all_attacks(train_attacks, config))
+        return [[result.results[key] for key in keys] for result in train_results]
+
+    screen_result = screen.run(attacks, simulate)
+    to_test = [attacks[index] for index in np.concatenate([screen_result.kept_indices,
+                                                            screen_result.explore_indices])]
+    explored = [attacks[index] for index in screen_result.explore_indices]
+
+    print(f"  Surrogate kept {len(screen_result.kept_indices):,} attacks for testing "
+          f"(+{len(explored):,} exploration, {screen_result.calibration.screened_out:,} screened out)")
+    print(f"  Holdout: {screen_result.calibration.summary()}")
+    return train_results, to_test, screen_result, explored
+
+
 def prune_attacks(
     results: List[AttackTestResult],
     config: Stage1Config
@@ -793,10 +993,35 @@ def run_stage1(config_path: str = None, reports_base_dir: str = None):
     os.makedirs(output_dir, exist_ok=True)
 
     # Generate attacks
-    attacks = generate_all_attacks(config)
-
-    # Test attacks
-    results = test_all_attacks(attacks, config)
+    dominance_audit = []
+    attacks = generate_all_attacks(config, dominance_audit)
+    if config.dominance_pruning:
+        write_dominance_audit(dominance_audit, os.path.join(output_dir, 'dominance_audit.md'))
+
+    # Open the result cache before testing (forked workers inherit it)
+    if config.result_cache_path:
+        cache = open_result_cache(config.result_cache_path, config.result_cache_max_size_mb)
+        print(f"  Result cache: {config.result_cache_path} ({len(cache):,} cached batches)")
+
+    # Test attacks (or only a training sample plus the surrogate's picks)
+    if config.surrogate_enabled:
+        results, to_test, surrogate_screen, explored = screen_attacks_with_surrogate(attacks, config)
+        results.extend(test_all_attacks(to_test, config))
+    else:
+        results = test_all_attacks(attacks, config)
+
+    if config.result_cache_path:
+        print(f"  Result cache: {len(get_result_cache()):,} cached batches")
+        close_result_cache()
+
+    if config.surrogate_enabled:
+        # Exploration attacks that reach the overall top estimate what the screen dropped
+        ranked = sorted(results, key=lambda r: r.overall_avg)
+        top_count = max(1, int(len(ranked) * config.top_percent))
+        surrogate_screen.record_exploration(explored, {r.build for r in ranked[:top_count]})
+        print(f"  Surrogate calibration: {surrogate_screen.calibration.summary()}")
+        write_surrogate_calibration(surrogate_screen.calibration,
+                                    os.path.join(output_dir, 'surrogate_calibration.md'))
 
     # Prune attacks
     pruned_results, pruning_stats = prune_attacks(results, config)
@@ -11,9 +11,6 @@ import json
 import time
 import psutil
 import multiprocessing
-import gc
-import pickle
-import tempfile
 import random
 from datetime import datetime
 from typing import List, Dict, Tuple
@@ -25,10 +22,13 @@ from numba import njit
 # Add parent simulation directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'simulation_v2'))
 
-from src.models import Character, AttackBuild, MultiAttackBuild
+from src.models import Character, AttackBuild, MultiAttackBuild, CombatState, EnemyGroup
+from src.streaming_stats import TopK, TDigest
 from combat_with_buffs import BuffConfig, apply_defender_buffs
 from stage1_pruning import Stage1Config
 
+STAGE2_TOP_N = 5000  # Best pairs kept for the reports (more than enough for reporting)
+
 
 class Stage2Config:
     """Configuration for Stage 2 pairing."""
@@ -408,12 +408,9 @@ def simulate_pair_with_intelligent_selection(
         modified_attacker = attacker
 
     # Initialize enemies
-    if scenario.get('enemy_hp_list'):
-        enemies = [{'hp': hp, 'max_hp': hp, 'bleed_stacks': []} for hp in scenario['enemy_hp_list']]
-    else:
-        enemy_hp = scenario.get('enemy_hp', 100)
-        num_enemies = scenario.get('num_enemies', 1)
-        enemies = [{'hp': enemy_hp, 'max_hp': enemy_hp, 'bleed_stacks': []} for _ in range(num_enemies)]
+    enemies = EnemyGroup.from_scenario(
+        scenario.get('num_enemies', 1), scenario.get('enemy_hp', 100), scenario.get('enemy_hp_list') or None
+    )
 
     # Track attack usage
     attack_usage = {1: 0, 2: 0}
@@ -424,55 +421,23 @@ def simulate_pair_with_intelligent_selection(
     turns = 0
     charge_history = []
     cooldown_history = {}
-    combat_state = {
-        'last_target_hit': None,
-        'defeated_enemy_last_turn': False,
-        'dealt_damage_last_turn': False,
-        'was_hit_last_turn': False,
-        'was_damaged_last_turn': False,
-        'all_attacks_missed_last_turn': False,
-        'was_hit_no_damage_last_turn': False,
-        'was_attacked_last_turn': False,
-        'channeled_turns': 0,
-        'charges_used': {},
-        'leech_hp': 0,
-        'attrition_cost': 0,
-        'hit_same_target_last_turn': False,
-    }
+    combat_state = CombatState()
 
-    while any(e['hp'] > 0 for e in enemies) and turns < max_turns:
+    while enemies.alive_count and turns < max_turns:
         turns += 1
 
         # Apply bleed damage
-        for enemy in enemies:
-            if enemy['hp'] <= 0 or not enemy['bleed_stacks']:
-                continue
-
-            total_bleed = 0
-            active_bleeds = []
-            for bleed_dmg, turns_left in enemy['bleed_stacks']:
-                if turns_left > 0:
-                    total_bleed += bleed_dmg
-                    active_bleeds.append((bleed_dmg, turns_left - 1))
-
-            enemy['bleed_stacks'] = active_bleeds
-            enemy['hp'] = max(0, enemy['hp'] - total_bleed)
+        enemies.tick_bleed()
 
         # Check if combat is over
-        if not any(e['hp'] > 0 for e in enemies):
-            break
-
-        # Calculate dynamic combat metrics
-        alive_enemies = [e for e in enemies if e['hp'] > 0]
-        num_alive = len(alive_enemies)
-
+        num_alive = enemies.alive_count
         if num_alive == 0:
             break
 
-        total_hp = sum(e['hp'] for e in alive_enemies)
-        avg_hp_per_enemy = total_hp / num_alive
-        max_hp = max(e['max_hp'] for e in alive_enemies)
-        wounded_count = sum(1 for e in alive_enemies if e['hp'] < e['max_hp'] * 0.5)
+        # Calculate dynamic combat metrics
+        avg_hp_per_enemy = enemies.total_hp / num_alive
+        max_hp = max(enemies.max_hp[i] for i in enemies.alive)
+        wounded_count = sum(1 for i in enemies.alive if enemies.hp[i] < enemies.max_hp[i] * 0.5)
 
         # INTELLIGENT ATTACK SELECTION (OPTIMIZED)
         score1 = score_attack_for_situation(
@@ -499,9 +464,8 @@ def simulate_pair_with_intelligent_selection(
 
         if is_aoe:
             # AOE attack
-            alive_targets = [(i, e) for i, e in enumerate(enemies) if e['hp'] > 0]
             attack_results, _ = make_aoe_attack(
-                modified_attacker, modified_defender, selected_attack, alive_targets,
+                modified_attacker, modified_defender, selected_attack, enemies.targets(),
                 turn_number=turns, charge_history=charge_history,
                 cooldown_history=cooldown_history,
                 attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp,
@@ -510,32 +474,28 @@ def simulate_pair_with_intelligent_selection(
 
             # Apply damage
             for target_idx, damage, conditions in attack_results:
-                enemies[target_idx]['hp'] = max(0, enemies[target_idx]['hp'] - damage)
+                enemies.damage(target_idx, damage)
                 if 'bleed' in conditions:
                     bleed_dmg = max(0, damage - modified_attacker.tier)
-                    enemies[target_idx]['bleed_stacks'] = [(bleed_dmg, 2)]
+                    enemies.apply_bleed(target_idx, bleed_dmg, 2)
         else:
             # Single target attack
-            target_idx = None
-            for i, e in enumerate(enemies):
-                if e['hp'] > 0:
-                    target_idx = i
-                    break
+            target_idx = enemies.first_alive()
 
             if target_idx is not None:
-                damage, conditions = make_attack(
+                damage, conditions, _ = make_attack(
                     modified_attacker, modified_defender, selected_attack,
                     turn_number=turns, charge_history=charge_history,
                     cooldown_history=cooldown_history,
                     attacker_hp=attacker_hp, attacker_max_hp=attacker_max_hp,
                     combat_state=combat_state,
-                    enemy_max_hp=enemies[target_idx]['max_hp']
+                    enemy_max_hp=enemies.max_hp[target_idx]
                 )
 
-                enemies[target_idx]['hp'] = max(0, enemies[target_idx]['hp'] - damage)
+                enemies.damage(target_idx, damage)
                 if 'bleed' in conditions:
                     bleed_dmg = max(0, damage - modified_attacker.tier)
-                    enemies[target_idx]['bleed_stacks'] = [(bleed_dmg, 2)]
+                    enemies.apply_bleed(target_idx, bleed_dmg, 2)
 
         # Update charge history
         charge_history.append(False)  # Simplified - not tracking charges in Stage 2
@@ -546,7 +506,7 @@ def simulate_pair_with_intelligent_selection(
         # Skipping for Stage 2 to focus on attack comparison
 
     # Determine outcome
-    if all(e['hp'] <= 0 for e in enemies):
+    if not enemies.alive_count:
         outcome = "win"
     else:
         outcome = "timeout"
@@ -856,18 +816,24 @@ def generate_sampled_pairs(attacks: List[AttackBuild], sample_percent: float) ->
 def test_all_pairs_parallel(
     pairs: List[Tuple[AttackBuild, AttackBuild]],
     config: Stage2Config,
-    individual_results_map: Dict
+    individual_results_map: Dict,
+    turns_sketch: TDigest = None
 ) -> List[Dict]:
     """
     Test all pairs in parallel using multiprocessing.
 
+    Results are summarized as each chunk completes: only the best
+    STAGE2_TOP_N pairs are kept, and every pair's overall average goes into
+    turns_sketch, so memory stays constant however many pairs are tested.
+
     Args:
         pairs: List of attack pairs
         config: Stage 2 configuration
         individual_results_map: Map of attack → individual performance data
+        turns_sketch: Optional TDigest receiving every pair's overall_avg
 
     Returns:
-        List of result dictionaries sorted by overall performance
+        List of the best STAGE2_TOP_N result dictionaries sorted by overall performance
     """
     print(f"\n=== Testing Attack Pairs (Parallel Mode) ===")
     print(f"  Total pairs to test: {len(pairs):,}")
@@ -893,42 +859,28 @@ def test_all_pairs_parallel(
     work_items = [(attack1, attack2, config_dict, individual_results_dict)
                   for attack1, attack2 in pairs]
 
-    # Use disk-based storage to avoid memory accumulation
-    temp_dir = tempfile.mkdtemp(prefix='stage2_results_')
-    result_files = []
-    results_buffer = []
-    disk_dump_interval = 20  # Write to disk every 20 chunks
+    # Keep only the best pairs as results arrive (ties keep pair order)
+    top_results = TopK(STAGE2_TOP_N)
+    print(f"  Streaming results: keeping top {STAGE2_TOP_N:,} pairs")
 
     start_time = time.time()
     process = psutil.Process(os.getpid())
     chunk_times = []  # Track recent chunk processing times for better estimates
 
-    print(f"  Using disk-based storage: {temp_dir}")
-    print(f"  Memory dump interval: every {disk_dump_interval} chunks")
-
     with multiprocessing.Pool(processes=num_workers) as pool:
         chunk_size = config.chunk_size
         for chunk_idx, i in enumerate(range(0, len(work_items), chunk_size)):
             chunk_start = time.time()
             chunk = work_items[i:i + chunk_size]
             chunk_results = pool.map(_test_pair_worker, chunk)
-            results_buffer.extend(chunk_results)
+            for pair_index, result in enumerate(chunk_results, i):
+                top_results.push(result['overall_avg'], result, pair_index)
+                if turns_sketch is not None:
+                    turns_sketch.add(result['overall_avg'])
 
             # Free chunk memory
             del chunk_results
 
-            # Periodically dump results to disk and free memory
-            if (chunk_idx + 1) % disk_dump_interval == 0:
-                # Write buffer to disk
-                result_file = os.path.join(temp_dir, f'results_{chunk_idx + 1}.pkl')
-                with open(result_file, 'wb') as f:
-                    pickle.dump(results_buffer, f)
-                result_files.append(result_file)
-
-                # Clear buffer and force garbage collection
-                results_buffer = []
-                gc.collect()
-
             # Track chunk processing time
             chunk_time = time.time() - chunk_start
             chunk_times.append(chunk_time)
@@ -973,113 +925,41 @@ def test_all_pairs_parallel(
             print(f"  Testing pair {pairs_done}/{len(pairs)} ({pairs_done / len(pairs) * 100:.1f}%) | "
                   f"{time_str} | Elapsed: {elapsed_str} | Time: {current_time} | Memory: {mem_mb:.1f} MB")
 
-    # Write any remaining results in buffer
-    if results_buffer:
-        result_file = os.path.join(temp_dir, f'results_final.pkl')
-        with open(result_file, 'wb') as f:
-            pickle.dump(results_buffer, f)
-        result_files.append(result_file)
-        results_buffer = []
-        gc.collect()
-
-    # Load results in streaming fashion and keep only top N to reduce memory
-    print(f"\n  Loading and filtering results from disk ({len(result_files)} files)...")
-    print(f"  Using aggressive streaming mode - keeping only top 5000 results")
-
-    # Keep only top 5000 results (more than enough for reporting)
-    top_n = 5000
-    top_results = []
-    total_processed = 0
-
-    # Track memory usage
-    process_mem = psutil.Process(os.getpid())
-
-    for idx, result_file in enumerate(result_files, 1):
-        # Load file
-        mem_before = process_mem.memory_info().rss / 1024 / 1024
-        with open(result_file, 'rb') as f:
-            file_results = pickle.load(f)
-        mem_after = process_mem.memory_info().rss / 1024 / 1024
-        file_count = len(file_results)
-
-        # Process each result with minimal memory footprint
-        for result in file_results:
-            total_processed += 1
-            result_avg = result['overall_avg']
-
-            if len(top_results) < top_n:
-                # Still building up initial top-N
-                top_results.append(result)
-                if len(top_results) == top_n:
-                    # Sort when we reach top_n for the first time
-                    top_results.sort(key=lambda r: r['overall_avg'])
-            else:
-                # Check if this result is better than worst in top-N
-                if result_avg < top_results[-1]['overall_avg']:
-                    # Replace worst result
-                    top_results[-1] = result
-                    # Re-sort
-                    top_results.sort(key=lambda r: r['overall_avg'])
-
-        # Aggressively free memory after each file
-        del file_results
-        gc.collect()
-
-        mem_after_gc = process_mem.memory_info().rss / 1024 / 1024
-
-        # Progress reporting every 5 files
-        if idx % 5 == 0 or idx == len(result_files):
-            print(f"    File {idx}/{len(result_files)}: Processed {file_count:,} results | "
-                  f"Loaded +{mem_after - mem_before:.0f}MB, freed -{mem_after - mem_after_gc:.0f}MB | "
-                  f"Total: {total_processed:,} processed, {len(top_results):,} kept | "
-                  f"Memory: {mem_after_gc:.0f}MB")
-
-    final_mem = process_mem.memory_info().rss / 1024 / 1024
-    print(f"\n  [OK] Processed {total_processed:,} total results")
+    final_mem = process.memory_info().rss / 1024 / 1024
+    print(f"\n  [OK] Processed {len(pairs):,} total results")
     print(f"  [OK] Kept top {len(top_results):,} results")
     print(f"  [OK] Final memory usage: {final_mem:.0f}MB")
 
-    # Clean up temporary files
-    print(f"  Cleaning up temporary files...")
-    for result_file in result_files:
-        try:
-            os.remove(result_file)
-        except:
-            pass
-    try:
-        os.rmdir(temp_dir)
-    except:
-        pass
-
-    # Already sorted from streaming process
     print(f"  Testing complete")
-    return top_results
+    return top_results.sorted()
 
 
 def test_all_pairs(
     pairs: List[Tuple[AttackBuild, AttackBuild]],
     config: Stage2Config,
-    individual_results_map: Dict
+    individual_results_map: Dict,
+    turns_sketch: TDigest = None
 ) -> List[Dict]:
     """
-    Test all pairs and return sorted results.
+    Test all pairs and return the best STAGE2_TOP_N results, sorted.
 
     Args:
         pairs: List of attack pairs
         config: Stage 2 configuration
         individual_results_map: Map of attack → individual performance data
+        turns_sketch: Optional TDigest receiving every pair's overall_avg
 
     Returns:
         List of result dictionaries sorted by overall performance
     """
     # Use parallel or sequential based on config
     if config.use_threading:
-        return test_all_pairs_parallel(pairs, config, individual_results_map)
+        return test_all_pairs_parallel(pairs, config, individual_results_map, turns_sketch)
 
     print(f"\n=== Testing Attack Pairs (Sequential Mode) ===")
     print(f"  Total pairs to test: {len(pairs):,}")
 
-    results = []
+    top_results = TopK(STAGE2_TOP_N)
     start_time = time.time()
     process = psutil.Process(os.getpid())
 
@@ -1127,13 +1007,12 @@ def test_all_pairs(
             attack1, attack2, config,
             attack1_individual, attack2_individual
         )
-        results.append(result)
-
-    # Sort by overall average (ascending = better)
-    results.sort(key=lambda r: r['overall_avg'])
+        top_results.push(result['overall_avg'], result, i)
+        if turns_sketch is not None:
+            turns_sketch.add(result['overall_avg'])
 
     print(f"  Testing complete")
-    return results
+    return top_results.sorted()
 
 
 def load_individual_results(cache_path: str = None) -> Dict:
@@ -1168,7 +1047,8 @@ def load_individual_results(cache_path: str = None) -> Dict:
 def generate_stage2_report(
     results: List[Dict],
     config: Stage2Config,
-    output_path: str
+    output_path: str,
+    turns_sketch: TDigest = None
 ):
     """
     Generate Stage 2 markdown report with top pairs and detailed analysis.
@@ -1177,6 +1057,7 @@ def generate_stage2_report(
         results: List of pair test results (sorted)
         config: Stage 2 configuration
         output_path: Path to output markdown file
+        turns_sketch: Optional TDigest of every tested pair's overall_avg (results may be only the best pairs)
     """
     print(f"\n=== Generating Stage 2 Report ===")
     print(f"  Output file: {output_path}")
@@ -1187,7 +1068,13 @@ def generate_stage2_report(
 
         # Summary
         f.write("## Summary\n\n")
-        f.write(f"- **Total pairs tested**: {len(results):,}\n")
+        if turns_sketch is not None and turns_sketch.count:
+            f.write(f"- **Total pairs tested**: {turns_sketch.count:,} (top {len(results):,} kept for reports)\n")
+            f.write(f"- **Avg turns across all pairs** (estimated): "
+                    f"1st pct {turns_sketch.quantile(0.01):.2f} | 5th pct {turns_sketch.quantile(0.05):.2f} | "
+                    f"median {turns_sketch.median():.2f} | 95th pct {turns_sketch.quantile(0.95):.2f}\n")
+        else:
+            f.write(f"- **Total pairs tested**: {len(results):,}\n")
         f.write(f"- **Simulation runs per pair**: {config.simulation_runs}\n")
         f.write(f"- **Test configurations**: {len(config.defensive_profiles)} profiles × {len(config.buff_configs)} buffs × {len(config.scenarios)} scenarios\n\n")
 
@@ -1279,8 +1166,9 @@ def run_stage2(config_path: str = None, reports_base_dir: str = None):
         pairs = random.sample(pairs, config.max_pairs)
         print(f"  Final pair count: {len(pairs):,}")
 
-    # Test pairs
-    results = test_all_pairs(pairs, config, individual_results_map)
+    # Test pairs (keeps the best pairs; every pair's average goes into the sketch)
+    turns_sketch = TDigest()
+    results = test_all_pairs(pairs, config, individual_results_map, turns_sketch)
 
     # Set up output directory
     if reports_base_dir:
@@ -1294,7 +1182,7 @@ def run_stage2(config_path: str = None, reports_base_dir: str = None):
 
     # Main pairing report (top 50 pairs with details)
     report_path = os.path.join(output_dir, 'stage2_pairing_report.md')
-    generate_stage2_report(results, config, report_path)
+    generate_stage2_report(results, config, report_path, turns_sketch)
 
     # Import report generators
     from enhancement_ranking_report import generate_enhancement_ranking_reports